@@ -0,0 +1,68 @@
+#!/usr/bin/env python3
+"""Compiles a SQLite calibration database into a memory-mappable format."""
+
+import os
+import sys
+import argparse
+
+# Add parent SPINE base directory to the python path
+current_directory = os.path.dirname(os.path.abspath(__file__))
+current_directory = os.path.dirname(current_directory)
+sys.path.insert(0, current_directory)
+
+from spine.utils.calib.database import compile_database
+
+
+def main(source, dest, num_tpcs, db_type, value_key):
+    """Compiles a SQLite calibration database.
+
+    The compiled database directory can be provided in place of the SQLite
+    database in the calibration configuration.
+
+    Parameters
+    ----------
+    source : str
+        Path to the SQLite database
+    dest : str
+        Path to the compiled database directory
+    num_tpcs : int
+        Expected number of TPCs
+    db_type : str
+        Type of database (One 'value' or one 'map per TPC)
+    value_key : str
+        Name of the quantity to load for each bin when using 'map' db_type
+    """
+    database = compile_database(source, dest, num_tpcs, db_type, value_key)
+    print(f"Compiled {len(database.runs)} run ranges from {source} "
+          f"into {dest}.")
+
+
+if __name__ == '__main__':
+    # Parse the command-line arguments
+    parser = argparse.ArgumentParser(
+            description="Compiles a SQLite calibration database")
+
+    parser.add_argument('--source', '-s',
+                        help='Path to the SQLite database',
+                        type=str, required=True)
+
+    parser.add_argument('--dest', '-o',
+                        help='Path to the compiled database directory',
+                        type=str, required=True)
+
+    parser.add_argument('--num-tpcs', '-n',
+                        help='Number of TPCs in the detector',
+                        type=int, required=True)
+
+    parser.add_argument('--db-type', '-t',
+                        help="Type of database ('value' or 'map')",
+                        type=str, default='value')
+
+    parser.add_argument('--value-key', '-k',
+                        help="Quantity to load for each bin of a 'map'",
+                        type=str, default='scale')
+
+    args = parser.parse_args()
+
+    # Execute the main function
+    main(args.source, args.dest, args.num_tpcs, args.db_type, args.value_key)
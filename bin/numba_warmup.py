@@ -0,0 +1,52 @@
+#!/usr/bin/env python3
+"""Compiles the SPINE Numba kernels ahead of time into a cache directory."""
+
+import os
+import sys
+import argparse
+
+# Add parent SPINE base directory to the python path
+current_directory = os.path.dirname(os.path.abspath(__file__))
+current_directory = os.path.dirname(current_directory)
+sys.path.insert(0, current_directory)
+
+from spine.utils.jit import set_cache_dir, warmup
+
+
+def main(cache_dir, signatures):
+    """Compiles the recorded kernel signatures into a cache directory.
+
+    The signatures are recorded by running SPINE with the `jit` block of
+    the base configuration pointing at the same cache directory.
+
+    Parameters
+    ----------
+    cache_dir : str
+        Path to the Numba cache directory
+    signatures : str
+        Path to the signature file. If not specified, use the one stored in
+        the cache directory
+    """
+    # Point Numba to the cache directory, compile the kernels
+    cache_dir = set_cache_dir(cache_dir)
+    count = warmup(signatures)
+    print(f"Compiled {count} kernel signatures in {cache_dir}.")
+
+
+if __name__ == '__main__':
+    # Parse the command-line arguments
+    parser = argparse.ArgumentParser(
+            description="Compiles the Numba kernels ahead of time")
+
+    parser.add_argument('--cache-dir', '-d',
+                        help='Path to the Numba cache directory',
+                        type=str, required=True)
+
+    parser.add_argument('--signatures', '-s',
+                        help='Path to the signature file',
+                        type=str, default=None)
+
+    args = parser.parse_args()
+
+    # Execute the main function
+    main(args.cache_dir, args.signatures)
@@ -26,7 +26,7 @@ from spine.main import run
 
 
 def main(config, source, source_list, output, n, nskip, detect_anomaly,
-         log_dir, weight_prefix, weight_path):
+         log_dir, weight_prefix, weight_path, num_workers):
     """Main driver for training/validation/inference/analysis.
 
     Performs these basic functions:
@@ -56,6 +56,8 @@ def main(config, source, source_list, output, n, nskip, detect_anomaly,
     weight_path : str
         Path string a weight file or pattern for multiple weight files to load
         the model weights
+    num_workers : int
+        Number of processes to shard the entries across (reader mode only)
     """
     # Try to find configuration file using the absolute path or under
     # the 'config' directory of the parent SPINE repository
@@ -121,6 +123,12 @@ def main(config, source, source_list, output, n, nskip, detect_anomaly,
     if weight_path is not None:
         cfg['model']['weight_path']=weight_path
 
+    if num_workers is not None:
+        if not 'reader' in cfg['io']:
+            raise KeyError("--num_workers flag provided: must specify "
+                           "`reader` in the `io` block.")
+        cfg['base']['num_workers'] = num_workers
+
     # Turn on PyTorch anomaly detection, if requested
     if detect_anomaly is not None:
         assert 'model' in cfg, (
@@ -181,9 +189,13 @@ if __name__ == '__main__':
                         help='Path to a weight file (or pattern to multiple weight files)',
                         type=str, default=None)
 
+    parser.add_argument('--num_workers',
+                        help='Number of processes to shard the entries across (reader mode only)',
+                        type=int, default=None)
+
     args = parser.parse_args()
 
     # Execute the main function
     main(args.config, args.source, args.source_list, args.output, args.n,
          args.nskip, args.detect_anomaly, args.log_dir, args.weight_prefix,
-         args.weight_path)
+         args.weight_path, args.num_workers)
@@ -217,3 +217,63 @@ class BuilderBase(ABC):
             Dictionary which contains the necessary data products
         """
         raise NotImplementedError
+
+
+def group_index(labels):
+    """Groups the indexes of an array of labels by label value.
+
+    This sorts the labels once (O(N log N)), rather than looking for the
+    elements which match each label value independently (O(N*G)).
+
+    Parameters
+    ----------
+    labels : np.ndarray
+        (N) Array of labels
+
+    Returns
+    -------
+    Dict[int, np.ndarray]
+        Dictionary which maps each label value onto the (ordered) index of
+        the elements which share it
+    """
+    # Sort the labels (stable, to preserve the order within each group)
+    perm = np.argsort(labels, kind='stable')
+    values, starts = np.unique(labels[perm], return_index=True)
+    edges = np.append(starts, len(labels))
+
+    return {int(v): perm[edges[i]:edges[i+1]] for i, v in enumerate(values)}
+
+
+def concat_index(index_list):
+    """Concatenates a list of indexes into a single index.
+
+    This allows to gather the long-form attributes of all objects at once
+    and to provide each object with a view of the gathered attributes,
+    rather than gathering them separately for each object.
+
+    Parameters
+    ----------
+    index_list : List[np.ndarray]
+        (C) List of indexes
+
+    Returns
+    -------
+    np.ndarray
+        (M) Concatenated index
+    np.ndarray
+        (C + 1) Boundaries of each index in the concatenated index
+
+    Notes
+    -----
+    The views given to the objects are disjoint slices of one buffer, which
+    is itself a copy of the input tensors. Modifying the attributes of one
+    object in place therefore never affects another object nor the input.
+    The buffer is only released once all the objects are.
+    """
+    counts = [len(index) for index in index_list]
+    edges = np.zeros(len(counts) + 1, dtype=np.int64)
+    edges[1:] = np.cumsum(counts)
+    if not len(index_list):
+        return np.empty(0, dtype=np.int64), edges
+
+    return np.concatenate(index_list).astype(np.int64, copy=False), edges
@@ -11,7 +11,7 @@ from spine.data.out import RecoFragment, TruthFragment
 from spine.utils.decorators import inherit_docstring
 from spine.utils.globals import CLUST_COL, PART_COL, TRACK_SHP
 
-from .base import BuilderBase
+from .base import BuilderBase, group_index, concat_index
 
 __all__ = ['FragmentBuilder']
 
@@ -108,20 +108,28 @@ class FragmentBuilder(BuilderBase):
             primary_scores = softmax(fragment_node_pred, axis=1)
             primary_pred = np.argmax(primary_scores, axis=1)
 
+        # Gather the long-form attributes of all fragments at once
+        full_index, edges = concat_index(fragment_clusts)
+        points_all = points[full_index]
+        depositions_all = depositions[full_index]
+        if sources is not None:
+            sources_all = sources[full_index]
+
         # Loop over the fragment instances
         reco_fragments = []
         for i, index in enumerate(fragment_clusts):
             # Initialize
+            lower, upper = edges[i], edges[i+1]
             fragment = RecoFragment(
                     id=i,
                     shape=fragment_shapes[i],
                     index=index,
-                    points=points[index],
-                    depositions=depositions[index])
+                    points=points_all[lower:upper],
+                    depositions=depositions_all[lower:upper])
 
             # Add optional arguments
             if sources is not None:
-                fragment.sources = sources[index]
+                fragment.sources = sources_all[lower:upper]
             if fragment_start_points is not None:
                 fragment.start_point = fragment_start_points[i]
             if fragment_end_points is not None and fragment.shape == TRACK_SHP:
@@ -199,18 +207,25 @@ class FragmentBuilder(BuilderBase):
         # Check once if the fragment labels are untouched
         broken = (label_tensor[:, CLUST_COL] != label_tensor[:, PART_COL]).any()
 
+        # Group the indexes of each label tensor by fragment ID, once
+        empty = np.empty(0, dtype=np.int64)
+        index_adapt_dict = group_index(label_adapt_tensor[:, CLUST_COL])
+        unadapted = id(label_tensor) == id(label_adapt_tensor)
+        if unadapted:
+            index_dict = index_adapt_dict
+            if not broken and label_g4_tensor is not None:
+                index_g4_dict = group_index(label_g4_tensor[:, CLUST_COL])
+
         # Loop over the true fragment instances in the *adapted* label tensor.
         # The label tensor does not necessarily contain the correct fragments.
         truth_fragments = []
-        unique_fragment_ids = np.unique(label_adapt_tensor[:, CLUST_COL])
-        valid_fragment_ids = unique_fragment_ids[unique_fragment_ids > -1]
+        valid_fragment_ids = [f for f in index_adapt_dict if f > -1]
         for i, frag_id in enumerate(valid_fragment_ids):
             # Initialize fragment
             fragment = TruthFragment(id=i)
 
             # Find the particle which matches this fragment best
-            index_adapt = np.where(
-                    label_adapt_tensor[:, CLUST_COL] == frag_id)[0]
+            index_adapt = index_adapt_dict[frag_id]
             if particles is not None:
                 part_ids, counts = np.unique(
                         label_adapt_tensor[index_adapt, PART_COL],
@@ -230,9 +245,9 @@ class FragmentBuilder(BuilderBase):
                 fragment.sources_adapt = sources[index_adapt]
 
             # If the input cluster label is not adapted, fill other long-form
-            if id(label_tensor) == id(label_adapt_tensor):
+            if unadapted:
                 # Update the fragment with its true long-form attributes
-                index = np.where(label_tensor[:, CLUST_COL] == frag_id)[0]
+                index = index_dict[frag_id]
                 fragment.index = index
                 fragment.points = points_label[index]
                 fragment.depositions = depositions_label[index]
@@ -245,10 +260,9 @@ class FragmentBuilder(BuilderBase):
                 if not broken:
                     # If available, append the Geant4 information
                     if label_g4_tensor is not None:
-                        index_g4 = np.where(
-                                label_g4_tensor[:, CLUST_COL] == frag_id)[0]
+                        index_g4 = index_g4_dict.get(frag_id, empty)
                         fragment.index_g4 = index_g4
-                        fragment.points_g4 = poins_g4[index_g4]
+                        fragment.points_g4 = points_g4[index_g4]
                         fragment.depositions_g4 = depositions_g4[index_g4]
 
             # Append
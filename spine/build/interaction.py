@@ -7,7 +7,7 @@ import numpy as np
 
 from spine.data.out import RecoInteraction, TruthInteraction
 
-from .base import BuilderBase
+from .base import BuilderBase, group_index
 
 __all__ = ['InteractionBuilder']
 
@@ -80,11 +80,11 @@ class InteractionBuilder(BuilderBase):
         # Loop over unique interaction IDs
         reco_interactions = []
         inter_ids = np.array([p.interaction_id for p in reco_particles])
-        for i, inter_id in enumerate(np.unique(inter_ids)):
+        index_dict = group_index(inter_ids)
+        for i, (inter_id, particle_ids) in enumerate(index_dict.items()):
             # Get the list of particles associates with this interaction
             assert inter_id > -1, (
                     "Invalid reconstructed interaction ID found.")
-            particle_ids = np.where(inter_ids == inter_id)[0]
             inter_particles = [reco_particles[j] for j in particle_ids]
 
             # Build interaction
@@ -130,11 +130,11 @@ class InteractionBuilder(BuilderBase):
         # Loop over unique interaction IDs
         truth_interactions = []
         inter_ids = np.array([p.interaction_id for p in truth_particles])
-        unique_inter_ids = np.unique(inter_ids)
-        valid_inter_ids = unique_inter_ids[unique_inter_ids > -1]
+        index_dict = group_index(inter_ids)
+        valid_inter_ids = [i for i in index_dict if i > -1]
         for i, inter_id in enumerate(valid_inter_ids):
             # Get the list of particles associates with this interaction
-            particle_ids = np.where(inter_ids == inter_id)[0]
+            particle_ids = index_dict[inter_id]
             inter_particles = [truth_particles[j] for j in particle_ids]
 
             # Build interaction
@@ -7,7 +7,7 @@ from scipy.special import softmax
 from spine.data.out import RecoParticle, TruthParticle
 from spine.utils.globals import COORD_COLS, VALUE_COL, GROUP_COL, TRACK_SHP
 
-from .base import BuilderBase
+from .base import BuilderBase, group_index, concat_index
 
 __all__ = ['ParticleBuilder']
 
@@ -109,20 +109,29 @@ class ParticleBuilder(BuilderBase):
         primary_scores = softmax(particle_node_primary_pred, axis=1)
         pid_pred = np.argmax(pid_scores, axis=1)
         primary_pred = np.argmax(primary_scores, axis=1)
+        orient_pred = None
         if particle_node_orient_pred is not None:
             orient_pred = np.argmax(particle_node_orient_pred, axis=1)
 
+        # Gather the long-form attributes of all particles at once
+        full_index, edges = concat_index(particle_clusts)
+        points_all = points[full_index]
+        depositions_all = depositions[full_index]
+        if sources is not None:
+            sources_all = sources[full_index]
+
         # Loop over the particle instances
         reco_particles = []
         for i, index in enumerate(particle_clusts):
             # Initialize
+            lower, upper = edges[i], edges[i+1]
             particle = RecoParticle(
                     id=i,
                     interaction_id=particle_group_pred[i],
                     shape=particle_shapes[i],
                     index=index,
-                    points=points[index],
-                    depositions=depositions[index],
+                    points=points_all[lower:upper],
+                    depositions=depositions_all[lower:upper],
                     pid=pid_pred[i],
                     primary_scores=primary_scores[i],
                     is_primary=bool(primary_pred[i]))
@@ -144,7 +153,7 @@ class ParticleBuilder(BuilderBase):
 
             # Add optional arguments
             if sources is not None:
-                particle.sources = sources[index]
+                particle.sources = sources_all[lower:upper]
 
             # Append
             reco_particles.append(particle)
@@ -205,13 +214,25 @@ class ParticleBuilder(BuilderBase):
         List[TruthParticle]
             List of restored true particle instances
         """
-        # Fetch the group ID of each of the particles
+        # Sum the deposited energy of all the particles in each group
+        # (LArCV definition != SPINE definition)
         group_ids = np.array([p.group_id for p in particles], dtype=int)
+        energies = np.array([p.energy_deposit for p in particles])
+        valid = np.where(group_ids > -1)[0]
+        group_energies = np.bincount(
+                group_ids[valid], weights=energies[valid],
+                minlength=len(particles))
+
+        # Group the indexes of each label tensor by particle group ID, once
+        empty = np.empty(0, dtype=np.int64)
+        index_dict = group_index(label_tensor[:, GROUP_COL])
+        index_adapt_dict = group_index(label_adapt_tensor[:, GROUP_COL])
+        if label_g4_tensor is not None:
+            index_g4_dict = group_index(label_g4_tensor[:, GROUP_COL])
 
         # Loop over the true *visible* particle instance groups
         truth_particles = []
-        unique_group_ids = np.unique(label_tensor[:, GROUP_COL]).astype(int)
-        valid_group_ids = unique_group_ids[unique_group_ids > -1]
+        valid_group_ids = [g for g in index_dict if g > -1]
         for i, group_id in enumerate(valid_group_ids):
             # Load the MC particle information
             assert group_id < len(particles), (
@@ -224,11 +245,8 @@ class ParticleBuilder(BuilderBase):
             particle.orig_id = group_id
             particle.id = i
 
-            # Update the deposited energy attribute by summing that of all
-            # particles in the group (LArCV definition != SPINE definition)
-            particle.energy_deposit = 0.
-            for j in np.where(group_ids == group_id)[0]:
-                particle.energy_deposit += particles[j].energy_deposit
+            # Update the deposited energy attribute with that of the group
+            particle.energy_deposit = float(group_energies[group_id])
 
             # Update the attributes shared between reconstructed and true
             particle.length = particle.distance_travel
@@ -238,7 +256,7 @@ class ParticleBuilder(BuilderBase):
                 particle.end_point = particle.last_step
 
             # Update the particle with its long-form attributes
-            index = np.where(label_tensor[:, GROUP_COL] == group_id)[0]
+            index = index_dict[group_id]
             particle.index = index
             particle.points = points_label[index]
             particle.depositions = depositions_label[index]
@@ -247,8 +265,7 @@ class ParticleBuilder(BuilderBase):
             if sources_label is not None:
                 particle.sources = sources_label[index]
 
-            index_adapt = np.where(
-                    label_adapt_tensor[:, GROUP_COL] == group_id)[0]
+            index_adapt = index_adapt_dict.get(group_id, empty)
             particle.index_adapt = index_adapt
             particle.points_adapt = points[index_adapt]
             particle.depositions_adapt = depositions[index_adapt]
@@ -256,8 +273,7 @@ class ParticleBuilder(BuilderBase):
                 particle.sources_adapt = sources[index_adapt]
 
             if label_g4_tensor is not None:
-                index_g4 = np.where(
-                        label_g4_tensor[:, GROUP_COL] == group_id)[0]
+                index_g4 = index_g4_dict.get(group_id, empty)
                 particle.index_g4 = index_g4
                 particle.points_g4 = points_g4[index_g4]
                 particle.depositions_g4 = depositions_g4[index_g4]
@@ -57,6 +57,20 @@ class BatchBase:
         """Returns the number of entries that make up the batch."""
         return self.batch_size
 
+    def __getstate__(self):
+        """Returns the state of the object to pickle.
+
+        Private attributes are caches (which may not be picklable), they are
+        not pickled and get rebuilt on demand.
+
+        Returns
+        -------
+        dict
+            Attributes of the object
+        """
+        return {k: v for k, v in self.__dict__.items()
+                if not k.startswith('_')}
+
     def __eq__(self, other):
         """Checks that all attributes of two class instances are the same.
 
@@ -77,8 +91,11 @@ class BatchBase:
         if self.__class__ != other.__class__:
             return False
 
-        # Check that all attributes are identical
+        # Check that all attributes are identical (skip private caches)
         for k, v in self.__dict__.items():
+            if k.startswith('_'):
+                continue
+
             v_other = getattr(other, k)
             if v is None:
                 # If not filled, make sure neither are
@@ -8,6 +8,7 @@ import numpy as np
 import torch
 
 from spine.utils.decorators import inherit_docstring
+from spine.utils.numba_local import csr_to_list
 
 from .base import BatchBase
 
@@ -19,6 +20,13 @@ __all__ = ['IndexBatch']
 class IndexBatch(BatchBase):
     """Batched index with the necessary methods to slice it.
 
+    A list of indexes can also be represented in a flat, CSR-like format,
+    i.e. a concatenated index (`csr_index`) and the boundaries of each index
+    within it (`csr_edges`). This representation is built once (or provided
+    upfront through :meth:`from_csr`) and is passed as is to the kernels
+    which accept it, or used to build the typed lists which numba functions
+    expect without going through python objects.
+
     Attributes
     ----------
     offsets : Union[np.ndarray, torch.Tensor]
@@ -167,6 +175,77 @@ class IndexBatch(BatchBase):
 
         return self.data
 
+    @property
+    def csr_index(self):
+        """Returns the concatenated index of a list of indexes.
+
+        Returns
+        -------
+        np.ndarray
+            (M) Concatenated index
+        """
+        return self.get_csr()[0]
+
+    @property
+    def csr_edges(self):
+        """Returns the boundaries of each index in the concatenated index.
+
+        Returns
+        -------
+        np.ndarray
+            (I + 1) Boundaries of each index in `csr_index`
+        """
+        return self.get_csr()[1]
+
+    @property
+    def typed_index_list(self):
+        """Returns the list of indexes as a numba typed list.
+
+        The typed list is built in compiled code from the CSR representation
+        of the index list and cached, so it can be passed to any number of
+        numba functions at no extra cost. If the underlying index is not
+        a numpy array, the index list is returned as is.
+
+        Returns
+        -------
+        Union[numba.typed.List, List[torch.Tensor]]
+            (I) List of indexes
+        """
+        if not self.is_numpy:
+            return self.index_list
+
+        if '_typed_index_list' not in self.__dict__:
+            self._typed_index_list = csr_to_list(*self.get_csr())
+
+        return self._typed_index_list
+
+    def get_csr(self):
+        """Builds (once) the CSR representation of the list of indexes.
+
+        The CSR representation is always made of numpy arrays, as it is
+        meant to be consumed by numba functions. If the underlying indexes
+        are torch tensors, they are brought to numpy.
+
+        Returns
+        -------
+        np.ndarray
+            (M) Concatenated index
+        np.ndarray
+            (I + 1) Boundaries of each index in the concatenated index
+        """
+        assert self.is_list, (
+                "The CSR representation is only defined for index lists.")
+
+        if '_csr' not in self.__dict__:
+            index, edges = self.full_index, self.get_edges(self.single_counts)
+            if not self.is_numpy:
+                index, edges = self._to_numpy(index), self._to_numpy(edges)
+
+            self._csr = (np.ascontiguousarray(index, dtype=np.int64),
+                         np.ascontiguousarray(edges, dtype=np.int64))
+
+        return self._csr
+
     @property
     def full_index(self):
         """Returns the index combining all sub-indexes, if relevant.
@@ -236,6 +315,43 @@ class IndexBatch(BatchBase):
         """
         return self._repeat(self._arange(self.batch_size), self.full_counts)
 
+    @classmethod
+    def from_csr(cls, index, edges, offsets, counts):
+        """Builds a list of indexes from its flat (CSR) representation.
+
+        The CSR representation is stored as is and the individual indexes
+        are views of the concatenated index.
+
+        Parameters
+        ----------
+        index : np.ndarray
+            (M) Concatenated index
+        edges : np.ndarray
+            (I + 1) Boundaries of each index in the concatenated index
+        offsets : Union[List[int], np.ndarray]
+            (B) Offsets between successive indexes in the batch
+        counts : Union[List[int], np.ndarray]
+            (B) Number of indexes in each entry of the batch
+
+        Returns
+        -------
+        IndexBatch
+            Batched list of indexes
+        """
+        # Build the list of views
+        index = np.ascontiguousarray(index, dtype=np.int64)
+        edges = np.ascontiguousarray(edges, dtype=np.int64)
+        data = np.empty(len(edges) - 1, dtype=object)
+        for i in range(len(data)):
+            data[i] = index[edges[i]:edges[i+1]]
+
+        # Initialize the index batch, store its CSR representation
+        index_batch = cls(data, offsets, counts, np.diff(edges),
+                          default=np.empty(0, dtype=np.int64))
+        index_batch._csr = (index, edges)
+
+        return index_batch
+
     def split(self):
         """Breaks up the index batch into its constituents.
 
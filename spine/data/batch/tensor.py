@@ -8,6 +8,7 @@ import torch
 from spine.utils.globals import BATCH_COL, COORD_COLS
 from spine.utils.decorators import inherit_docstring
 from spine.utils.conditional import ME
+from spine.utils.neighbors import VoxelNeighborhood
 
 from .base import BatchBase
 
@@ -154,6 +155,46 @@ class TensorBatch(BatchBase):
         self.counts = self.get_counts(batch_ids, self.batch_size)
         self.edges = self.get_edges(self.counts)
 
+        # Reset the neighborhood cache, it is no longer valid
+        self._neighborhoods = {}
+
+    def get_neighborhood(self, size):
+        """Returns the neighborhood service of the voxels in the tensor.
+
+        The neighborhood is built once for each grid cell size and cached on
+        the tensor batch, along with the result of the queries made to it.
+        The cache is shared with the batches obtained from this one through
+        :meth:`to_numpy` or :meth:`to_tensor`, which have the same voxels.
+
+        Parameters
+        ----------
+        size : float
+            Size of the grid cells (typical query radius)
+
+        Returns
+        -------
+        VoxelNeighborhood
+            Voxel neighborhood service
+        """
+        # Check that the tensor has coordinates
+        assert not self.is_sparse, (
+                "Cannot build the neighborhood of sparse tensors.")
+        coord_cols = self.coord_cols
+        if coord_cols is None:
+            coord_cols = COORD_COLS
+
+        # Build the neighborhood, if it is not cached yet
+        neighborhoods = self.__dict__.setdefault('_neighborhoods', {})
+        if size not in neighborhoods:
+            voxels, batch_ids = self.data[:, coord_cols], self.batch_ids
+            if not self.is_numpy:
+                voxels, batch_ids = (
+                        self._to_numpy(voxels), self._to_numpy(batch_ids))
+
+            neighborhoods[size] = VoxelNeighborhood(voxels, batch_ids, size)
+
+        return neighborhoods[size]
+
     def merge(self, tensor_batch):
         """Merge this tensor batch with another.
 
@@ -198,9 +239,14 @@ class TensorBatch(BatchBase):
         data = self._to_numpy(data)
         counts = self._to_numpy(self.counts)
 
-        return TensorBatch(data, counts, 
-                           has_batch_col=self.has_batch_col, 
-                           coord_cols=self.coord_cols)
+        batch = TensorBatch(data, counts,
+                            has_batch_col=self.has_batch_col,
+                            coord_cols=self.coord_cols)
+
+        # Share the neighborhood cache, the voxels are the same
+        batch._neighborhoods = self.__dict__.setdefault('_neighborhoods', {})
+
+        return batch
 
     def to_tensor(self, dtype=None, device=None):
         """Cast underlying tensor to a `torch.tensor` and return a new instance.
@@ -224,9 +270,14 @@ class TensorBatch(BatchBase):
         data = self._to_tensor(self.data, dtype, device)
         counts = self._to_tensor(self.counts, dtype, device)
 
-        return TensorBatch(data, counts, 
-                           has_batch_col=self.has_batch_col, 
-                           coord_cols=self.coord_cols)
+        batch = TensorBatch(data, counts,
+                            has_batch_col=self.has_batch_col,
+                            coord_cols=self.coord_cols)
+
+        # Share the neighborhood cache, the voxels are the same
+        batch._neighborhoods = self.__dict__.setdefault('_neighborhoods', {})
+
+        return batch
 
     def to_cm(self, meta):
         """Converts the pixel coordinates of the tensor to cm.
@@ -240,6 +291,9 @@ class TensorBatch(BatchBase):
         self.data[:, COORD_COLS] = meta.to_cm(
                 self.data[:, COORD_COLS], center=True)
 
+        # Reset the neighborhood cache, it is no longer valid
+        self._neighborhoods = {}
+
     def to_px(self, meta):
         """Converts the coordinates of the tensor to pixel indexes.
 
@@ -252,6 +306,9 @@ class TensorBatch(BatchBase):
         self.data[:, COORD_COLS] = meta.to_px(
                 self.data[:, COORD_COLS], floor=True)
 
+        # Reset the neighborhood cache, it is no longer valid
+        self._neighborhoods = {}
+
     @classmethod
     def from_list(cls, data_list):
         """Builds a batch from a list of tensors.
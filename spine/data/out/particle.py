@@ -4,7 +4,6 @@ from typing import List
 from dataclasses import dataclass, field
 
 import numpy as np
-from scipy.spatial.distance import cdist
 
 from spine.utils.globals import (
         TRACK_SHP, SHAPE_LABELS, PID_LABELS, PID_MASSES, PID_TO_PDG)
@@ -284,7 +283,7 @@ class RecoParticle(ParticleBase, RecoBase):
         dirs_i = np.vstack([self.start_dir, self.end_dir])
         dirs_j = np.vstack([other.start_dir, other.end_dir])
 
-        dists = cdist(points_i, points_j)
+        dists = np.linalg.norm(points_i[:, None] - points_j, axis=-1)
         max_index = np.argmax(dists)
         max_i, max_j = max_index//2, max_index%2
 
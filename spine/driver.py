@@ -12,7 +12,11 @@ Takes care of everything in one centralized place:
 
 import os
 import time
+import weakref
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
 from datetime import datetime
+import multiprocessing as mp
 import subprocess as sc
 
 import yaml
@@ -22,19 +26,18 @@ import torch
 
 from .io import loader_factory, reader_factory, writer_factory
 from .io.write import CSVWriter
+from .io.write.background import BackgroundWriter
 
 from .utils.logger import logger
+from .utils.jit import set_cache_dir, save_signatures, record_signatures
 from .utils.numba_local import seed as numba_seed
-from .utils.unwrap import Unwrapper
 from .utils.stopwatch import StopwatchManager
 
 from .version import __version__
 from .logo import ascii_logo
 
-from .model import ModelManager
-from .build import BuildManager
-from .post import PostManager
-from .ana import AnaManager
+# The model, build, post and ana managers (and their dependencies) are only
+# imported when the corresponding configuration block is provided
 
 __all__ = ['Driver']
 
@@ -98,6 +101,7 @@ class Driver:
         if model is not None:
             assert self.loader is not None, (
                     "The model can only be used in conjunction with a loader.")
+            from .model import ModelManager
             self.watch.initialize('model')
             self.model = ModelManager(
                     **model, train=train, dtype=self.dtype, rank=self.rank,
@@ -114,6 +118,7 @@ class Driver:
                     "Must unwrap the model output to build representations.")
             assert self.model is None or self.model.to_numpy, (
                     "Must cast model output to numpy to build representations.")
+            from .build import BuildManager
             self.watch.initialize('build')
             self.builder = BuildManager(**build)
 
@@ -122,6 +127,7 @@ class Driver:
         if post is not None:
             assert self.model is None or self.unwrap, (
                     "Must unwrap the model output to run post-processors.")
+            from .post import PostManager
             self.watch.initialize('post')
             self.post = PostManager(post, parent_path=self.parent_path)
 
@@ -130,10 +136,17 @@ class Driver:
         if ana is not None:
             assert self.model is None or self.unwrap, (
                     "Must unwrap the model output to run analysis scripts.")
+            from .ana import AnaManager
             self.watch.initialize('ana')
             self.ana = AnaManager(
                     ana, log_dir=self.log_dir, prefix=self.log_prefix)
 
+        # If pipelined execution is requested, check that there is something
+        # to offload to the worker processes
+        if self.pipeline is not None:
+            assert self.builder is not None or self.post is not None, (
+                    "Pipelined execution requires a `build` or `post` block.")
+
     def process_config(self, io, base=None, model=None, build=None,
                        post=None, ana=None, rank=None):
         """Reads the configuration and dumps it to the logger.
@@ -228,7 +241,9 @@ class Driver:
                         log_dir='logs', prefix_log=False, overwrite_log=False,
                         parent_path=None, iterations=None, epochs=None,
                         unwrap=False, rank=None, log_step=1, distributed=False,
-                        split_output=False, train=None, verbosity='info'):
+                        split_output=False, train=None, verbosity='info',
+                        pipeline=None, num_workers=None, shard_id=None,
+                        jit=None):
         """Initialize the base driver parameters.
 
         Parameters
@@ -266,6 +281,28 @@ class Driver:
         verbosity : int, default 'info'
             Verbosity level to pass to the `logging` module. Pick one of
             'debug', 'info', 'warning', 'error', 'critical'.
+        pipeline : dict, optional
+            Pipelined execution configuration. If provided, the representation
+            building and post-processing stages of batch N-1 are executed in
+            a pool of worker processes while the batch N is loaded and passed
+            through the model. Accepts the following keys:
+            - `num_workers` (int, default 1): number of worker processes
+            - `queue_size` (int, default 2 * `num_workers`): maximum number of
+              batches in flight in the worker pool
+        num_workers : int, optional
+            Number of processes to shard the entries across in reader mode.
+            The processes are launched by :func:`spine.main.run`
+        shard_id : int, optional
+            Index of the shard of entries processed by this driver. This is
+            set by :func:`spine.main.run` for each of the `num_workers`
+        jit : dict, optional
+            Numba kernel cache configuration. Accepts the following keys:
+            - `cache_dir` (str): directory where the compiled kernels are
+              cached. If read-only, it is copied to a scratch directory
+            - `record` (bool, default True): record the signatures the
+              kernels were compiled for (also in the pipeline workers) in the
+              cache directory, so that they can be compiled ahead of time
+              with `bin/numba_warmup.py`
 
         Returns
         -------
@@ -274,6 +311,16 @@ class Driver:
         rank
             Updated rank
         """
+        # Relocate the Numba kernel cache, if requested (must be done
+        # before any kernel is compiled)
+        self.jit = None
+        if jit is not None:
+            assert 'cache_dir' in jit, (
+                    "Must provide the `cache_dir` of the Numba kernels.")
+            cache_dir = set_cache_dir(jit['cache_dir'])
+            self.jit = {'cache_dir': cache_dir,
+                        'record': jit.get('record', True)}
+
         # Set up the seed
         np.random.seed(seed)
         numba_seed(seed)
@@ -298,6 +345,16 @@ class Driver:
         if not distributed and world_size > 1:
             self.distributed = True
 
+        # If this driver only processes a shard of the entries, give it its
+        # own log directory to avoid overwriting the logs of other shards
+        self.num_shards = num_workers if shard_id is not None else None
+        self.shard_id = shard_id
+        if shard_id is not None:
+            assert num_workers is not None and 0 <= shard_id < num_workers, (
+                    f"The shard ID ({shard_id}) must be smaller than the "
+                    f"number of workers ({num_workers}).")
+            log_dir = os.path.join(log_dir, f'shard_{shard_id}')
+
         # Store general parameters
         self.dtype = dtype
         self.log_dir = log_dir
@@ -311,6 +368,17 @@ class Driver:
         self.log_step = log_step
         self.split_output = split_output
 
+        # Store the pipelined execution parameters
+        self.pipeline = None
+        if pipeline is not None:
+            num_workers = pipeline.get('num_workers', 1)
+            queue_size = pipeline.get('queue_size', 2*num_workers)
+            assert num_workers > 0 and queue_size > 0, (
+                    "The pipeline `num_workers` and `queue_size` must be "
+                    "positive integers.")
+            self.pipeline = {'num_workers': num_workers,
+                             'queue_size': queue_size}
+
         return train
 
     def initialize_io(self, loader=None, reader=None, writer=None):
@@ -350,6 +418,7 @@ class Driver:
                     hasattr(self.loader.collate_fn, 'geo')):
                     geo = self.loader.collate_fn.geo
 
+                from .utils.unwrap import Unwrapper
                 self.watch.initialize('unwrap')
                 self.unwrapper = Unwrapper(geometry=geo)
 
@@ -363,15 +432,45 @@ class Driver:
         self.log_prefix, self.output_prefix = self.get_prefixes(
                 self.reader.file_paths, self.split_output)
 
+        # If this driver only processes a shard of the entries, tag its outputs
+        if self.shard_id is not None:
+            assert self.loader is None, (
+                    "Can only shard the entries in reader mode.")
+            self.log_prefix = f'{self.log_prefix}_shard{self.shard_id}'
+            if not self.split_output:
+                self.output_prefix = f'{self.output_prefix}_shard{self.shard_id}'
+            else:
+                self.output_prefix = [
+                        f'{pre}_shard{self.shard_id}' for pre in self.output_prefix]
+
         # Initialize the data writer, if provided
         self.writer = None
         if writer is not None:
             assert self.loader is None or self.unwrap, (
                     "Must unwrap the model output to write it to file.")
-            self.watch.initialize('write')
+            if (self.shard_id is not None and not self.split_output and
+                writer.get('file_name', None)):
+                writer = dict(writer)
+                name, ext = os.path.splitext(writer['file_name'])
+                writer['file_name'] = f'{name}_shard{self.shard_id}{ext}'
+
             self.writer = writer_factory(
                     writer, prefix=self.output_prefix, split=self.split_output)
 
+            # Make sure that the buffered output is written to file when the
+            # driver is deleted or the interpreter exits, even if the driver
+            # is used by calling :meth:`process` and never closed
+            if hasattr(self.writer, 'close'):
+                weakref.finalize(self, self.writer.close)
+
+            # If the writer runs in the background, time the hand-off to
+            # the writer queue separately from the write itself
+            if isinstance(self.writer, BackgroundWriter):
+                self.watch.initialize('write_queue')
+                self.watch.update(self.writer.watch)
+            else:
+                self.watch.initialize('write')
+
         # Harmonize the iterations and epochs parameters
         assert (self.iterations is None) or (self.epochs is None), (
                 "Must not specify both `iterations` or `epochs` parameters.")
@@ -382,6 +481,17 @@ class Driver:
         elif self.epochs is not None:
             self.iterations = self.epochs*self.iter_per_epoch
 
+        # If this driver only processes a shard of the entries, restrict the
+        # reader to a contiguous block of the entries to process
+        if self.shard_id is not None and self.iterations is not None:
+            assert self.iterations <= len(self.reader), (
+                    "Cannot shard more iterations than there are entries.")
+            entry_index = self.reader.entry_index[:self.iterations]
+            self.reader.entry_index = np.array_split(
+                    entry_index, self.num_shards)[self.shard_id]
+            self.iter_per_epoch = len(self.reader)
+            self.iterations = len(self.reader)
+
     @staticmethod
     def get_prefixes(file_paths, split_output):
         """Builds an appropriate output prefix based on the list of input files.
@@ -542,30 +652,175 @@ class Driver:
         if self.model is not None and self.model.train:
             start_iteration = self.model.start_iteration
 
-        # Loop and process each iteration
-        for iteration in range(start_iteration, self.iterations):
-            # When switching to a new epoch, reset the loader iterator
-            if (self.loader is not None and
-                (self.loader_iter is None or
-                 iteration%self.iter_per_epoch == 0)):
-                if self.distributed:
-                    epoch_cnt = iteration//self.iter_per_epoch
-                    self.loader.sampler.set_epoch(epoch_cnt)
-                self.loader_iter = iter(self.loader)
+        # If requested, dispatch to the pipelined loop
+        if self.pipeline is not None:
+            self.run_pipeline(start_iteration)
+            return
+
+        # Loop and process each iteration. Whether the loop completes or
+        # not, make sure that any buffered output gets written to file.
+        try:
+            for iteration in range(start_iteration, self.iterations):
+                # Prepare the iteration, record the execution date/time
+                epoch, tstamp = self.prepare_iteration(iteration)
+
+                # Process one batch/entry of data
+                entry = iteration if self.loader is None else None
+                data = self.process(entry=entry, iteration=iteration)
 
-            # Update the epoch counter, record the execution date/time
-            epoch = (iteration + 1)/self.iter_per_epoch
-            tstamp = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+                # Log the output
+                self.log(data, tstamp, iteration, epoch)
 
-            # Process one batch/entry of data
-            entry = iteration if self.loader is None else None
-            data = self.process(entry=entry, iteration=iteration)
+                # Release the memory for the next iteration
+                data = None
 
-            # Log the output
-            self.log(data, tstamp, iteration, epoch)
+        except BaseException:
+            self.close(safe=True)
+            raise
 
-            # Release the memory for the next iteration
-            data = None
+        self.close()
+
+    def run_pipeline(self, start_iteration=0):
+        """Loop over the requested number of iterations in pipelined mode.
+
+        The data loading, model forward pass and unwrapping of a batch are
+        executed in the main process while the representation building and
+        post-processing of the previous batches are executed in a pool of
+        worker processes. The analysis scripts and the writer are executed
+        in the main process, in the order in which the batches were loaded,
+        which preserves the event ordering in the output.
+
+        Parameters
+        ----------
+        start_iteration : int, default 0
+            Iteration to start the loop from
+        """
+        # Initialize the worker pool. Use spawn to avoid inheriting the
+        # state of the main process (CUDA context, writer threads, etc.)
+        executor = ProcessPoolExecutor(
+                max_workers=self.pipeline['num_workers'],
+                mp_context=mp.get_context('spawn'),
+                initializer=PipelineWorker.initialize,
+                initargs=(self.cfg.get('build', None),
+                          self.cfg.get('post', None),
+                          self.parent_path, self.seed,
+                          self.jit is not None and self.jit['record']))
+
+        # Loop and process each iteration. The batches in flight are kept in
+        # a bounded queue, which is consumed in order.
+        pending = deque()
+        try:
+            for iteration in range(start_iteration, self.iterations):
+                # Prepare the iteration, record the execution date/time
+                epoch, tstamp = self.prepare_iteration(iteration)
+
+                # Load the data and run the model, offload the rest
+                self.watch.start('iteration')
+                entry = iteration if self.loader is None else None
+                data = self.process_input(entry=entry, iteration=iteration)
+                future = executor.submit(
+                        PipelineWorker.process, data,
+                        (self.seed + iteration)%2**32)
+                pending.append((future, tstamp, iteration, epoch))
+                self.watch.stop('iteration')
+                data = None
+
+                # If the queue is full, finalize the oldest batch
+                if len(pending) >= self.pipeline['queue_size']:
+                    self.finalize_pipeline(*pending.popleft())
+
+            # Finalize the batches still in flight
+            while pending:
+                self.finalize_pipeline(*pending.popleft())
+
+        except BaseException:
+            executor.shutdown(wait=True, cancel_futures=True)
+            self.close(safe=True)
+            raise
+
+        executor.shutdown(wait=True, cancel_futures=True)
+        self.close()
+
+    def finalize_pipeline(self, future, tstamp, iteration, epoch):
+        """Fetches one batch from the worker pool, writes and logs it.
+
+        Parameters
+        ----------
+        future : concurrent.futures.Future
+            Pending result of the worker process
+        tstamp : str
+            Time when this iteration was run
+        iteration : int
+            Iteration counter
+        epoch : float
+            Progress in the training process in number of epochs
+        """
+        # Fetch the output of the worker, add its times to the timers
+        data, watch = future.result()
+        self.watch.merge(watch)
+
+        # Run the analysis scripts and write the output
+        self.process_output(data)
+
+        # Log the output
+        self.log(data, tstamp, iteration, epoch)
+
+    def prepare_iteration(self, iteration):
+        """Prepares the loader for an iteration, if needed.
+
+        Parameters
+        ----------
+        iteration : int
+            Iteration counter
+
+        Returns
+        -------
+        epoch : float
+            Progress in the training process in number of epochs
+        tstamp : str
+            Time when this iteration was run
+        """
+        # When switching to a new epoch, reset the loader iterator
+        if (self.loader is not None and
+            (self.loader_iter is None or
+             iteration%self.iter_per_epoch == 0)):
+            if self.distributed:
+                epoch_cnt = iteration//self.iter_per_epoch
+                self.loader.sampler.set_epoch(epoch_cnt)
+            self.loader_iter = iter(self.loader)
+
+        # Update the epoch counter, record the execution date/time
+        epoch = (iteration + 1)/self.iter_per_epoch
+        tstamp = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+
+        return epoch, tstamp
+
+    def close(self, safe=False):
+        """Writes any buffered output to file and closes the output file(s).
+
+        This is called at the end of :meth:`run`. If the driver is used by
+        calling :meth:`process` directly, this should be called once done.
+        Otherwise, the output is only written out when the driver is deleted
+        or when the interpreter exits.
+
+        Parameters
+        ----------
+        safe : bool, default False
+            If `True`, an error raised while closing the writer is logged
+            instead of raised. This is used when closing the driver while
+            another exception is propagated, so as not to hide it.
+        """
+        if self.writer is not None and hasattr(self.writer, 'close'):
+            try:
+                self.writer.close()
+            except Exception: # pylint: disable=W0718
+                if not safe:
+                    raise
+                logger.exception("Failed to close the writer.")
+
+        # Record the signatures of the Numba kernels used by this process
+        if self.jit is not None and self.jit['record']:
+            save_signatures()
 
     def process(self, entry=None, run=None, subrun=None, event=None,
                 iteration=None):
@@ -597,6 +852,43 @@ class Driver:
         # 0. Start the timer for the iteration
         self.watch.start('iteration')
 
+        # 1-3. Load data, pass it through the model and unwrap it
+        data = self.process_input(entry, run, subrun, event, iteration)
+
+        # 4-5. Build representations and run post-processors
+        self.process_reco(data)
+
+        # 6-7. Run analysis scripts and write output to file
+        self.process_output(data)
+
+        # Stop the iteration timer
+        self.watch.stop('iteration')
+
+        # Return
+        return data
+
+    def process_input(self, entry=None, run=None, subrun=None, event=None,
+                      iteration=None):
+        """Loads one entry or batch of entries, runs the model on it.
+
+        Parameters
+        ----------
+        entry : int, optional
+            Entry number to load
+        run : int, optional
+            Run number to load
+        subrun : int, optional
+            Subrun number to load
+        event : int, optional
+            Event number to load
+        iteration : int, optional
+            Iteration number
+
+        Returns
+        -------
+        dict
+            Data dictionary, including the model output
+        """
         # 1. Load data
         data = self.load(entry, run, subrun, event)
 
@@ -614,19 +906,26 @@ class Driver:
             data = self.unwrapper(data)
             self.watch.stop('unwrap')
 
-        # 4. Build representations
-        if self.builder is not None:
-            self.watch.start('build')
-            self.builder(data)
-            self.watch.stop('build')
+        return data
+
+    def process_reco(self, data):
+        """Builds representations and runs the post-processors in place.
+
+        Parameters
+        ----------
+        data : dict
+            Data dictionary, including the model output
+        """
+        run_reco(data, self.builder, self.post, self.watch)
 
-        # 5. Run post-processing, if requested
-        if self.post is not None:
-            self.watch.start('post')
-            self.post(data)
-            self.watch.stop('post')
-            self.watch.update(self.post.watch, 'post')
+    def process_output(self, data):
+        """Runs the analysis scripts and writes the output to file.
 
+        Parameters
+        ----------
+        data : dict
+            Data dictionary, including the reconstruction output
+        """
         # 6. Run scripts, if requested
         if self.ana is not None:
             self.watch.start('ana')
@@ -636,15 +935,16 @@ class Driver:
 
         # 7. Write output to file, if requested
         if self.writer is not None:
-            self.watch.start('write')
-            self.writer(data, self.cfg)
-            self.watch.stop('write')
+            if not isinstance(self.writer, BackgroundWriter):
+                self.watch.start('write')
+                self.writer(data, self.cfg)
+                self.watch.stop('write')
 
-        # Stop the iteration timer
-        self.watch.stop('iteration')
-
-        # Return
-        return data
+            else:
+                self.watch.start('write_queue')
+                self.writer(data, self.cfg)
+                self.watch.stop('write_queue')
+                self.watch.update(self.writer.watch)
 
     def load(self, entry=None, run=None, subrun=None, event=None):
         """Loads one batch/entry to process.
@@ -837,3 +1137,114 @@ class Driver:
             if self.main_process:
                 print('', flush=True)
 
+
+def run_reco(data, builder, post, watch, seed=None):
+    """Builds representations and runs the post-processors on one batch.
+
+    Parameters
+    ----------
+    data : dict
+        Data dictionary, modified in place
+    builder : BuildManager
+        Representation builder, if any
+    post : PostManager
+        Post-processor manager, if any
+    watch : StopwatchManager
+        Timers to record the execution time of each stage in
+    seed : int, optional
+        If provided, reset the random number generators with this seed
+        beforehand, such that the stochastic algorithms produce the same
+        output for a batch, regardless of the pipeline worker which handles
+        it (the serial execution keeps a single random stream)
+    """
+    # Set up the seed of this batch
+    if seed is not None and (builder is not None or post is not None):
+        np.random.seed(seed)
+        numba_seed(seed)
+
+    # 4. Build representations
+    if builder is not None:
+        watch.start('build')
+        builder(data)
+        watch.stop('build')
+
+    # 5. Run post-processing, if requested
+    if post is not None:
+        watch.start('post')
+        post(data)
+        watch.stop('post')
+        watch.update(post.watch, 'post')
+
+
+class PipelineWorker:
+    """Reconstruction stage of the pipelined driver execution.
+
+    Each worker process of the pipeline pool holds its own representation
+    builder and post-processor manager, initialized once from the
+    configuration when the process starts.
+    """
+    builder = None
+    post = None
+    watch = None
+
+    @classmethod
+    def initialize(cls, build=None, post=None, parent_path=None, seed=None,
+                   record_jit=False):
+        """Initializes the reconstruction stage in the worker process.
+
+        Parameters
+        ----------
+        build : dict, optional
+            Representation building configuration dictionary
+        post : dict, optional
+            Post-processor configutation dictionary
+        parent_path : str, optional
+            Path to the parent directory of the analysis configuration file
+        seed : int, optional
+            Random number generator seed
+        record_jit : bool, default False
+            If `True`, record the signatures of the Numba kernels compiled
+            by the worker when it shuts down. The worker inherits the cache
+            directory of the main process through the environment
+        """
+        # Record the Numba kernel signatures when the worker exits
+        if record_jit:
+            record_signatures()
+
+        # Set up the seed
+        if seed is not None:
+            np.random.seed(seed)
+            numba_seed(seed)
+
+        # Initialize the timers and the reconstruction modules
+        cls.watch = StopwatchManager()
+        if build is not None:
+            from .build import BuildManager
+            cls.watch.initialize('build')
+            cls.builder = BuildManager(**build)
+        if post is not None:
+            from .post import PostManager
+            cls.watch.initialize('post')
+            cls.post = PostManager(post, parent_path=parent_path)
+
+    @classmethod
+    def process(cls, data, seed=None):
+        """Runs the reconstruction stage on one batch of data.
+
+        Parameters
+        ----------
+        data : dict
+            Data dictionary, including the model output
+        seed : int, optional
+            Random number generator seed of this batch
+
+        Returns
+        -------
+        data : dict
+            Data dictionary, including the reconstruction output
+        watch : StopwatchManager
+            Execution time of each reconstruction stage
+        """
+        run_reco(data, cls.builder, cls.post, cls.watch, seed)
+
+        return data, cls.watch
@@ -0,0 +1,204 @@
+"""Module with an on-disk cache of parsed entries.
+
+Parsing LArCV entries is deterministic: the same entry, parsed with the same
+schema and the same code, always yields the same data products. This
+module stores the parser output of each entry in its own memory-mappable
+file, which can be read back without copying the underlying arrays.
+"""
+
+import os
+import glob
+import json
+import mmap
+import pickle
+import struct
+import hashlib
+import tempfile
+
+import numpy as np
+
+from spine.version import __version__
+
+__all__ = ['ParserCache']
+
+# Root directory of the package source code. The parsers depend on modules
+# throughout the package (data structures, clustering, geometry, etc.)
+SOURCE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+class ParserCache:
+    """On-disk cache of the parser output, one file per entry.
+
+    Each entry is pickled (protocol 5) with its contiguous numpy arrays
+    stored out-of-band, as aligned raw buffers at the end of the file. When
+    an entry is loaded, the file is memory-mapped (copy-on-write) and the
+    arrays are views of the mapped buffers, i.e. no data is copied upfront
+    and in-place modifications (e.g. augmentation) do not alter the cache.
+
+    The cache lives in a subdirectory of `cache_dir` named after a hash of
+    the schema, of the input files and of the package source code, so it is
+    invalidated automatically when any of these changes.
+    """
+    _header = struct.Struct('<QQ')
+    _align = 64
+
+    def __init__(self, cache_dir, schema, dtype, file_paths):
+        """Initialize the cache directory.
+
+        Parameters
+        ----------
+        cache_dir : str
+            Path to the directory where the caches are stored
+        schema : dict
+            Dataset schema configuration
+        dtype : str
+            Data type the input data is cast to
+        file_paths : List[str]
+            List of input file paths
+        """
+        # Build the cache key, create the directory
+        self.key = self.get_key(schema, dtype, file_paths)
+        self.path = os.path.join(cache_dir, self.key)
+        os.makedirs(self.path, exist_ok=True)
+
+    @staticmethod
+    def get_key(schema, dtype, file_paths):
+        """Builds a unique key for a given cache configuration.
+
+        Parameters
+        ----------
+        schema : dict
+            Dataset schema configuration
+        dtype : str
+            Data type the input data is cast to
+        file_paths : List[str]
+            List of input file paths
+
+        Returns
+        -------
+        str
+            Hexadecimal hash of the configuration
+        """
+        # Hash the configuration and the input files (with their size and
+        # modification time, to detect files that are overwritten)
+        files = []
+        for path in file_paths:
+            stat = os.stat(path)
+            files.append((os.path.abspath(path), stat.st_size, stat.st_mtime))
+
+        cfg = {'schema': schema, 'dtype': str(dtype), 'files': files,
+               'version': __version__}
+        digest = hashlib.sha1(
+                json.dumps(cfg, sort_keys=True, default=str).encode())
+
+        # Hash the source code of the package. The parser output does not
+        # only depend on the parsers themselves, but also on the modules they
+        # import (e.g. the clustering algorithms used to break clusters).
+        paths = glob.glob(os.path.join(SOURCE_DIR, '**', '*.py'), recursive=True)
+        for path in sorted(paths):
+            digest.update(os.path.relpath(path, SOURCE_DIR).encode())
+            with open(path, 'rb') as source:
+                digest.update(source.read())
+
+        return digest.hexdigest()
+
+    def get_file_path(self, entry):
+        """Returns the path to the cache file of an entry.
+
+        Parameters
+        ----------
+        entry : int
+            Entry index
+
+        Returns
+        -------
+        str
+            Path to the cache file
+        """
+        return os.path.join(self.path, f'{entry:09d}.bin')
+
+    def __contains__(self, entry):
+        """Checks whether an entry is already cached.
+
+        Parameters
+        ----------
+        entry : int
+            Entry index
+
+        Returns
+        -------
+        bool
+            `True` if the entry is in the cache
+        """
+        return os.path.isfile(self.get_file_path(entry))
+
+    def load(self, entry):
+        """Loads the parser output of an entry from the cache.
+
+        Parameters
+        ----------
+        entry : int
+            Entry index
+
+        Returns
+        -------
+        dict
+            Dictionary of parsed data products
+        """
+        # Map the file in memory
+        with open(self.get_file_path(entry), 'rb') as in_file:
+            buffer = mmap.mmap(in_file.fileno(), 0, access=mmap.ACCESS_COPY)
+
+        # Read the header, the table of buffer bounds and the pickled object
+        meta_size, num_buffers = self._header.unpack_from(buffer, 0)
+        offset = self._header.size
+        bounds = np.frombuffer(
+                buffer, dtype=np.int64, count=2*num_buffers, offset=offset)
+        offset += bounds.nbytes
+        meta = buffer[offset:offset + meta_size]
+
+        # Unpickle the object, pointing the arrays to the mapped buffers
+        view = memoryview(buffer)
+        buffers = [view[start:start + size]
+                   for start, size in bounds.reshape(-1, 2)]
+
+        return pickle.loads(meta, buffers=buffers)
+
+    def save(self, entry, data):
+        """Stores the parser output of an entry in the cache.
+
+        The file is written to a temporary location first and moved into
+        place once complete, so that concurrent loader workers never read
+        or write a partially written cache file.
+
+        Parameters
+        ----------
+        entry : int
+            Entry index
+        data : dict
+            Dictionary of parsed data products
+        """
+        # Pickle the data, keep the contiguous buffers out-of-band
+        buffers = []
+        meta = pickle.dumps(data, protocol=5, buffer_callback=buffers.append)
+        raws = [buffer.raw() for buffer in buffers]
+
+        # Compute the aligned location of each buffer in the file
+        offset = self._header.size + 16*len(raws) + len(meta)
+        bounds = np.empty((len(raws), 2), dtype=np.int64)
+        for i, raw in enumerate(raws):
+            offset += -offset % self._align
+            bounds[i] = offset, raw.nbytes
+            offset += raw.nbytes
+
+        # Write the file
+        fd, tmp_path = tempfile.mkstemp(dir=self.path, suffix='.tmp')
+        with os.fdopen(fd, 'wb') as out_file:
+            out_file.write(self._header.pack(len(meta), len(raws)))
+            out_file.write(bounds.tobytes())
+            out_file.write(meta)
+            for (start, _), raw in zip(bounds, raws):
+                out_file.write(b'\0'*(start - out_file.tell()))
+                out_file.write(raw)
+
+        os.replace(tmp_path, self.get_file_path(entry))
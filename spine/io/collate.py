@@ -114,59 +114,7 @@ class CollateAll:
             if isinstance(ref_obj, tuple) and len(ref_obj) == 3:
                 # Case where a coordinates tensor and a feature tensor
                 # are provided, along with the metadata information
-                if not self.split:
-                    # If not split, simply stack everything
-                    voxels    = np.vstack([sample[key][0] for sample in batch])
-                    features  = np.vstack([sample[key][1] for sample in batch])
-                    counts    = [len(sample[key][0]) for sample in batch]
-                    batch_ids = np.repeat(
-                            np.arange(batch_size, dtype=voxels.dtype), counts)
-
-                else:
-                    # If split, must shift the voxel coordinates and create
-                    # one batch ID per [batch, volume] pair
-                    voxels_v, features_v, batch_ids_v = [], [], []
-                    counts = np.empty(
-                            batch_size*self.geo.tpc.num_modules, dtype=np.int64)
-                    for s, sample in enumerate(batch):
-                        # Identify which point belongs to which module
-                        voxels, features, meta = sample[key]
-                        voxels_wrapped, module_indexes = self.geo.split(
-                                voxels.reshape(-1, 3),
-                                self.target_id, meta=meta)
-                        voxels = voxels_wrapped.reshape(-1, voxels.shape[1])
-
-                        # If there are more than one point per row and they
-                        # are in separate volumes, the choice is arbitrary
-                        if voxels.shape[1] > 3:
-                            num_points = voxels.shape[1]//3
-                            free = np.ones(len(voxels), dtype=bool)
-                            for m, module_index in enumerate(module_indexes):
-                                mask = np.zeros(len(voxels_wrapped), dtype=bool)
-                                mask[module_index] = True
-                                mask = mask.reshape(-1, num_points).any(axis=1)
-                                module_indexes[m] = np.where(free & mask)[0]
-                                free[module_indexes[m]] = False
-
-                        # Assign a different batch ID to each volume
-                        for m, module_index in enumerate(module_indexes):
-                            voxels_v.append(voxels[module_index])
-                            features_v.append(features[module_index])
-                            idx = self.geo.tpc.num_modules * s + m
-                            batch_ids_v.append(np.full(len(module_index),
-                                               idx, dtype=voxels.dtype))
-                            counts[idx] = len(module_index)
-
-                    voxels = np.vstack(voxels_v)
-                    features = np.vstack(features_v)
-                    batch_ids = np.concatenate(batch_ids_v)
-
-                # Stack the coordinates with the features
-                tensor = np.hstack([batch_ids[:, None], voxels, features])
-                coord_cols = np.arange(1, 1+voxels.shape[1])
-                data[key] = TensorBatch(
-                        tensor.astype(features.dtype), counts,
-                        has_batch_col=True, coord_cols=coord_cols)
+                data[key] = self.collate_sparse(batch, key)
 
             elif isinstance(ref_obj, tuple) and len(ref_obj) == 2:
                 # Case where an index and an offset is provided per entry.
@@ -190,18 +138,26 @@ class CollateAll:
                     counts = [len(sample[key]) for sample in batch]
 
                 else:
-                    features_v = []
-                    counts = np.empty(
-                            batch_size*self.geo.tpc.num_modules, dtype=np.int64)
+                    # Find the index of the rows in each module
+                    num_modules = self.geo.tpc.num_modules
+                    indexes = []
+                    counts = np.empty(batch_size*num_modules, dtype=np.int64)
                     for s, sample in enumerate(batch):
-                        features = sample[key]
-                        for m in range(self.geo.tpc.num_modules):
-                            module_index = np.where(sources[s][:, 0] == m)[0]
-                            features_v.append(features[module_index])
-                            idx = self.geo.tpc.num_modules * s + m
-                            counts[idx] = len(module_index)
-
-                    tensor = np.vstack(features_v)
+                        module_ids = sources[s][:, 0]
+                        for m in range(num_modules):
+                            module_index = np.where(module_ids == m)[0]
+                            indexes.append((sample[key], module_index))
+                            counts[num_modules*s + m] = len(module_index)
+
+                    # Fill the features directly into the output tensor
+                    shape = (np.sum(counts), *ref_obj.shape[1:])
+                    dtype = np.result_type(*[sample[key] for sample in batch])
+                    tensor = np.empty(shape, dtype=dtype)
+                    offset = 0
+                    for features, module_index in indexes:
+                        count = len(module_index)
+                        tensor[offset:offset+count] = features[module_index]
+                        offset += count
 
                 data[key] = TensorBatch(tensor, counts)
 
@@ -210,3 +166,107 @@ class CollateAll:
                 data[key] = [sample[key] for sample in batch]
 
         return data
+
+    def collate_sparse(self, batch, key):
+        """Collates sparse tensors into a single batched tensor.
+
+        Each entry in the batch is provided as a (voxels, features, meta)
+        tuple. The output tensor has rows [batch_id, *coords, *features]. The
+        total number of rows is computed first so that each voxel and feature
+        array is copied once, directly into the preallocated output tensor.
+
+        Parameters
+        ----------
+        batch : List[Dict]
+            List of dictionaries of parsed information, one per event
+        key : str
+            Data product key
+
+        Returns
+        -------
+        TensorBatch
+            Batched sparse tensor
+        """
+        # Fetch the list of blocks of rows to stack
+        if not self.split:
+            blocks = [(b, *sample[key][:2], None) for b, sample in enumerate(batch)]
+            counts = np.array([len(sample[key][0]) for sample in batch])
+        else:
+            blocks, counts = self.split_sparse(batch, key)
+
+        # Initialize the output tensor with the final shape and type
+        voxels, features, _ = batch[0][key]
+        num_coords, num_features = voxels.shape[1], features.shape[1]
+        dtype = np.result_type(*[sample[key][1] for sample in batch])
+        tensor = np.empty(
+                (np.sum(counts), 1 + num_coords + num_features), dtype=dtype)
+
+        # Fill the output tensor, one block of rows at a time
+        offset = 0
+        for batch_id, voxels, features, index in blocks:
+            if index is not None:
+                voxels, features = voxels[index], features[index]
+
+            count = len(voxels)
+            rows = slice(offset, offset + count)
+            tensor[rows, 0] = batch_id
+            tensor[rows, 1:1+num_coords] = voxels
+            tensor[rows, 1+num_coords:] = features
+            offset += count
+
+        coord_cols = np.arange(1, 1 + num_coords)
+
+        return TensorBatch(
+                tensor, counts, has_batch_col=True, coord_cols=coord_cols)
+
+    def split_sparse(self, batch, key):
+        """Splits the sparse tensors of each entry by module.
+
+        Each [entry, module] pair is assigned its own batch ID. The voxel
+        coordinates are shifted to the target module.
+
+        Parameters
+        ----------
+        batch : List[Dict]
+            List of dictionaries of parsed information, one per event
+        key : str
+            Data product key
+
+        Returns
+        -------
+        blocks : List[tuple]
+            List of (batch_id, voxels, features, index) blocks
+        counts : np.ndarray
+            Number of rows in each [entry, module] pair
+        """
+        num_modules = self.geo.tpc.num_modules
+        blocks = []
+        counts = np.empty(len(batch)*num_modules, dtype=np.int64)
+        for s, sample in enumerate(batch):
+            # Identify which point belongs to which module
+            voxels, features, meta = sample[key]
+            voxels_wrapped, module_indexes = self.geo.split(
+                    voxels.reshape(-1, 3), self.target_id, meta=meta)
+            voxels = voxels_wrapped.reshape(-1, voxels.shape[1])
+
+            # If there are more than one point per row and they are in
+            # separate volumes, assign the row to the lowest module ID
+            if voxels.shape[1] > 3:
+                num_points = voxels.shape[1]//3
+                point_modules = np.full(
+                        len(voxels_wrapped), num_modules, dtype=np.int64)
+                for m, module_index in enumerate(module_indexes):
+                    point_modules[module_index] = np.minimum(
+                            point_modules[module_index], m)
+
+                row_modules = point_modules.reshape(-1, num_points).min(axis=1)
+                module_indexes = [
+                        np.where(row_modules == m)[0] for m in range(num_modules)]
+
+            # Assign a different batch ID to each volume
+            for m, module_index in enumerate(module_indexes):
+                idx = num_modules*s + m
+                blocks.append((idx, voxels, features, module_index))
+                counts[idx] = len(module_index)
+
+        return blocks, counts
@@ -7,6 +7,7 @@ from spine.utils.augment import Augmenter
 
 from . import parse
 from .read import LArCVReader
+from .cache import ParserCache
 
 PARSER_DICT  = module_dict(parse)
 
@@ -29,7 +30,7 @@ class LArCVDataset(Dataset):
     """
     name = 'larcv'
 
-    def __init__(self, schema, dtype, augment=None, **kwargs):
+    def __init__(self, schema, dtype, augment=None, cache_dir=None, **kwargs):
         """Instantiates the LArCVDataset.
 
         Parameters
@@ -45,6 +46,10 @@ class LArCVDataset(Dataset):
             Data type to cast the input data to (to match the downstream model)
         augment : dict, optional
             Augmentation strategy configuration
+        cache_dir : str, optional
+            Path to a directory where to cache the parser output of each
+            entry. Cached entries are loaded instead of being parsed again.
+            The augmentation is still applied on top of the cached entries
         **kwargs : dict, optional
             Additional arguments to pass to the LArCVReader class
         """
@@ -69,6 +74,12 @@ class LArCVDataset(Dataset):
         # Instantiate the reader
         self.reader = LArCVReader(tree_keys=tree_keys, **kwargs)
 
+        # Initialize the parser output cache, if requested
+        self.cache = None
+        if cache_dir is not None:
+            self.cache = ParserCache(
+                    cache_dir, schema, dtype, self.reader.file_paths)
+
     def __len__(self):
         """Returns the lenght of the dataset (in number of batches).
 
@@ -92,9 +103,6 @@ class LArCVDataset(Dataset):
         dict
             Dictionary of data product names and their associated data
         """
-        # Read in a specific entry
-        data_dict = self.reader[idx]
-
         # Get the index
         entry_idx = self.reader.entry_index[idx]
         file_idx = self.reader.get_file_index(idx)
@@ -102,13 +110,28 @@ class LArCVDataset(Dataset):
         result = {'index': entry_idx, 'file_index': file_idx,
                   'file_entry_index': file_entry_idx}
 
-        # Loop over data products, execute parsers
-        for name, parser in self.parsers.items():
-            try:
-                result[name] = parser(data_dict)
-            except Exception as err:
-                print(f"Failed to produce {name} using {parser}")
-                raise err
+        # If the entry was already parsed, load it from the cache
+        if self.cache is not None and entry_idx in self.cache:
+            result.update(self.cache.load(entry_idx))
+
+        else:
+            # Read in a specific entry
+            data_dict = self.reader[idx]
+
+            # Loop over data products, execute parsers
+            parsed = {}
+            for name, parser in self.parsers.items():
+                try:
+                    parsed[name] = parser(data_dict)
+                except Exception as err:
+                    print(f"Failed to produce {name} using {parser}")
+                    raise err
+
+            # If requested, store the parser output
+            if self.cache is not None:
+                self.cache.save(entry_idx, parsed)
+
+            result.update(parsed)
 
         # If requested, augment the data
         if self.augmenter is not None:
@@ -2,17 +2,15 @@
 
 from warnings import warn
 
+import torch
 from torch.utils.data import DataLoader
 
 from spine.utils.factory import module_dict, instantiate
 
-from . import dataset, sample, collate, read, write
+from .shared import SharedMemoryCollate
 
-DATASET_DICT = module_dict(dataset)
-SAMPLER_DICT = module_dict(sample)
-COLLATE_DICT = module_dict(collate)
-READER_DICT  = module_dict(read)
-WRITER_DICT  = module_dict(write)
+# The IO submodules are only imported when the corresponding factory is
+# called, as some of them depend on packages which are slow to import
 
 __all__ = ['loader_factory', 'dataset_factory', 'sampler_factory',
            'collate_factory', 'reader_factory', 'writer_factory']
@@ -20,7 +18,8 @@ __all__ = ['loader_factory', 'dataset_factory', 'sampler_factory',
 
 def loader_factory(dataset, dtype, batch_size=None, minibatch_size=None,
                    shuffle=True, sampler=None, num_workers=0, collate_fn=None,
-                   entry_list=None, distributed=False, world_size=0, rank=0):
+                   entry_list=None, distributed=False, world_size=0, rank=0,
+                   shared_memory=False):
     """Instantiates a DataLoader based on configuration.
 
     Dataset comes from `dataset_factory`.
@@ -52,6 +51,10 @@ def loader_factory(dataset, dtype, batch_size=None, minibatch_size=None,
         Total number of GPUs using the sampler
     rank : int, default 0
         Unique identifier of the process sampling data
+    shared_memory : bool, default False
+        If `True`, the buffers of the batched data structures are sent from
+        the workers to the main process through shared memory, and copied
+        to pinned memory if a GPU is available. Requires `num_workers` > 0
 
     Returns
     -------
@@ -79,6 +82,13 @@ def loader_factory(dataset, dtype, batch_size=None, minibatch_size=None,
     if collate_fn is not None:
         collate_fn = collate_factory(collate_fn)
 
+    # If requested, transport the batches through shared memory
+    if shared_memory:
+        assert num_workers > 0, (
+                "Shared memory transport requires `num_workers` > 0.")
+        collate_fn = SharedMemoryCollate(
+                collate_fn, pin_memory=torch.cuda.is_available())
+
     # Initialize the loader
     loader = DataLoader(
             dataset, batch_size=minibatch_size, shuffle=shuffle,
@@ -118,7 +128,8 @@ def dataset_factory(dataset_cfg, entry_list=None, dtype=None):
         dataset_cfg['entry_list'] = entry_list
 
     # Initialize dataset
-    return instantiate(DATASET_DICT, dataset_cfg, dtype=dtype)
+    from . import dataset
+    return instantiate(module_dict(dataset), dataset_cfg, dtype=dtype)
 
 
 def sampler_factory(sampler_cfg, dataset, minibatch_size, distributed=False,
@@ -148,8 +159,9 @@ def sampler_factory(sampler_cfg, dataset, minibatch_size, distributed=False,
         Initialized sampler
     """
     # Initialize sampler
+    from . import sample
     sampler = instantiate(
-            SAMPLER_DICT, sampler_cfg, dataset=dataset,
+            module_dict(sample), sampler_cfg, dataset=dataset,
             batch_size=minibatch_size)
 
     # If we are working a distributed environment, wrap the sampler
@@ -177,7 +189,8 @@ def collate_factory(collate_cfg):
         Initialized collate function
     """
     # Initialize collate function
-    return instantiate(COLLATE_DICT, collate_cfg, 'collate_fn')
+    from . import collate
+    return instantiate(module_dict(collate), collate_cfg, 'collate_fn')
 
 
 def reader_factory(reader_cfg):
@@ -200,7 +213,8 @@ def reader_factory(reader_cfg):
     Currently the choice is limited to `HDF5Writer` only.
     """
     # Initialize reader
-    return instantiate(READER_DICT, reader_cfg)
+    from . import read
+    return instantiate(module_dict(read), reader_cfg)
 
 
 def writer_factory(writer_cfg, prefix=None, split=False):
@@ -224,7 +238,24 @@ def writer_factory(writer_cfg, prefix=None, split=False):
 
     Note
     ----
-    Currently the choice is limited to `HDF5Writer` only.
+    Currently the choice is limited to `HDF5Writer` only. If a `queue_size`
+    is specified in the configuration, the writer is wrapped in a
+    :class:`BackgroundWriter` which executes it in a dedicated thread.
     """
+    # Fetch the size of the background writer queue, if requested
+    queue_size = None
+    if isinstance(writer_cfg, dict) and 'queue_size' in writer_cfg:
+        writer_cfg = dict(writer_cfg)
+        queue_size = writer_cfg.pop('queue_size')
+
     # Initialize writer
-    return instantiate(WRITER_DICT, writer_cfg, prefix=prefix, split=split)
+    from . import write
+    writer = instantiate(
+            module_dict(write), writer_cfg, prefix=prefix, split=split)
+
+    # If requested, execute the writer in a background thread
+    if queue_size is not None:
+        from .write.background import BackgroundWriter
+        writer = BackgroundWriter(writer, queue_size)
+
+    return writer
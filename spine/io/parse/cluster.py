@@ -143,7 +143,8 @@ class Cluster3DParser(ParserBase):
                  clean_data=False, type_include_mpr=True,
                  type_include_secondary=True, primary_include_mpr=True,
                  break_clusters=False, break_eps=1.1, break_metric='chebyshev',
-                 shape_precedence=SHAPE_PREC, **kwargs):
+                 break_algorithm='brute', shape_precedence=SHAPE_PREC,
+                 **kwargs):
         """Initialize the parser.
 
         Parameters
@@ -168,6 +169,10 @@ class Cluster3DParser(ParserBase):
             Distance scale used in the break up procedure
         break_metric : str, default 'chebyshev'
             Distance metric used in the break up produce
+        break_algorithm : str, default 'brute'
+            DBSCAN algorithm used in the break up procedure (`brute` or
+            `grid`). The fragments are identical, but `grid` numbers them
+            in order of appearance
         shape_precedence: list, default SHAPE_PREC
              Array of classes in the reference array, ordered by precedence
         **kwargs : dict, optional
@@ -185,6 +190,7 @@ class Cluster3DParser(ParserBase):
         self.break_clusters = break_clusters
         self.break_eps = break_eps
         self.break_metric = break_metric
+        self.break_algorithm = break_algorithm
         self.shape_precedence = shape_precedence
 
         # Intialize the sparse and particle parsers
@@ -332,7 +338,8 @@ class Cluster3DParser(ParserBase):
                 # If requested, break cluster into detached pieces
                 if self.break_clusters:
                     frag_labels = dbscan(
-                            voxels, self.break_eps, self.break_metric)
+                            voxels, self.break_eps, self.break_metric,
+                            self.break_algorithm)
                     features[1] = id_offset + frag_labels
                     id_offset += max(frag_labels) + 1
 
@@ -1,8 +1,13 @@
 """Contains a reader class dedicated to loading data from HDF5 files."""
 
+from collections import OrderedDict
+from collections.abc import MutableMapping
+from contextlib import contextmanager
+from dataclasses import dataclass, fields
+from functools import partial
+
 import h5py
 import numpy as np
-from dataclasses import fields
 
 import spine.data
 
@@ -23,6 +28,15 @@ class HDF5Reader(ReaderBase):
       - An `events` dataset with all the region references
       - One dataset per data product corresponding to each region reference in
         the `events` dataset
+
+    By default, each call to :meth:`get` opens and closes the underlying file.
+    When processing many entries, set `keep_open` to maintain a bounded pool
+    of open file handles (along with their dataset handles and attributes)
+    and use :meth:`get_many` to load several entries of a file at once.
+
+    To reduce I/O, the data products to load can be restricted using `keys`
+    or `skip_keys`. In `lazy` mode, each data product is only read from file
+    the first time it is accessed in the entry dictionary.
     """
     name = 'hdf5'
 
@@ -31,7 +45,9 @@ class HDF5Reader(ReaderBase):
                  skip_entry_list=None, run_event_list=None,
                  skip_run_event_list=None, create_run_map=False,
                  build_classes=True, skip_unknown_attrs=False,
-                 run_info_key='run_info', allow_missing=False):
+                 run_info_key='run_info', allow_missing=False,
+                 keep_open=False, max_open_files=8, object_table=False,
+                 keys=None, skip_keys=None, lazy=False):
         """Initalize the HDF5 file reader.
 
         Parameters
@@ -59,6 +75,12 @@ class HDF5Reader(ReaderBase):
             For large files, this can be quite expensive (must load every entry).
         build_classes : bool, default True
             If the stored object is a class, build it back
+        object_table : bool, default False
+            If `True`, lists of stored objects are returned as a columnar
+            table (record array with one attribute per column) rather than
+            as a list of objects. This is much faster to load when only a
+            few attributes are needed. Columns which share their name with
+            an array attribute (e.g. `shape`, `size`) must be accessed by key.
         skip_unknown_attrs : bool, default False
             If `True`, allow a loaded object to have unrecognized attributes.
             This allows backward compatibility with old files, but use with
@@ -67,6 +89,19 @@ class HDF5Reader(ReaderBase):
             Name of the data product which contains the run info of the event
         allow_missing : bool, default False
             If `True`, allows missing entries in the entry or event list
+        keep_open : bool, default False
+            If `True`, keep a pool of open file handles between calls instead
+            of opening and closing the file for every entry
+        max_open_files : int, default 8
+            Maximum number of file handles to keep open at once when
+            `keep_open` is `True`. The least recently used one is closed first.
+        keys : List[str], optional
+            List of data product keys to load. If not specified, load everything
+        skip_keys: List[str], optional
+            List of data product keys to skip
+        lazy : bool, default False
+            If `True`, each data product is only read from file when it is
+            accessed for the first time in the entry dictionary
         """
         # Process the list of files
         self.process_file_paths(file_keys, limit_num_files, max_print_files)
@@ -76,6 +111,7 @@ class HDF5Reader(ReaderBase):
             create_run_map = True
 
         # Loop over the input files, build a map from index to file ID
+        stored_keys       = None
         self.num_entries  = 0
         self.file_index   = []
         self.file_offsets = np.empty(len(self.file_paths), dtype=np.int64)
@@ -86,6 +122,10 @@ class HDF5Reader(ReaderBase):
                 assert 'events' in in_file, (
                         "File does not contain an event tree")
 
+                # Fetch the list of keys stored in the first file
+                if stored_keys is None:
+                    stored_keys = in_file['events'].dtype.names
+
                 # If requested, register the (run, subrun, event) information
                 if create_run_map:
                     assert run_info_key in in_file, (
@@ -120,8 +160,196 @@ class HDF5Reader(ReaderBase):
 
         # Store other attributes
         self.build_classes = build_classes
+        self.object_table = object_table
         self.skip_unknown_attrs = skip_unknown_attrs
 
+        # Initialize the pool of open file handles
+        assert max_open_files > 0, (
+                "Must allow at least one open file in the pool.")
+        self.keep_open = keep_open
+        self.max_open_files = max_open_files
+        self.file_pool = OrderedDict()
+
+        # Process the list of data products to load
+        self.keys = self.process_keys(stored_keys, keys, skip_keys)
+        self.lazy = lazy
+
+    @dataclass
+    class KeyFormat:
+        """Data structure to hold the storage properties of a data product.
+
+        Attributes
+        ----------
+        dataset : h5py.Dataset, optional
+            Dataset which contains a simple array or a list of objects
+        index : h5py.Dataset, optional
+            Dataset of region references, if the product is a list of arrays
+        elements : List[h5py.Dataset], optional
+            Datasets which contain the arrays, if the product is a list of arrays
+        scalar : bool, default False
+            Whether the data is a scalar object or not
+        obj_class : type, optional
+            Class to rebuild, if the dataset contains objects
+        known_attrs : List[str], optional
+            List of attributes recognized by the object class
+        """
+        dataset: h5py.Dataset = None
+        index: h5py.Dataset = None
+        elements: list = None
+        scalar: bool = False
+        obj_class: type = None
+        known_attrs: list = None
+
+    def __del__(self):
+        """Closes any file handle left open before deleting the reader."""
+        try:
+            self.close()
+        except Exception:
+            pass
+
+    def __getstate__(self):
+        """Drops the open file handles when the reader gets pickled.
+
+        The file handles cannot be shared between processes (e.g. data
+        loader workers). Each copy of the reader opens its own on demand.
+
+        Returns
+        -------
+        dict
+            Picklable state of the reader
+        """
+        state = self.__dict__.copy()
+        state['file_pool'] = OrderedDict()
+
+        return state
+
+    @staticmethod
+    def process_keys(stored_keys, keys=None, skip_keys=None):
+        """Get the list of data product keys to load.
+
+        Parameters
+        ----------
+        stored_keys : List[str]
+            List of data product keys stored in the file
+        keys : List[str], optional
+            List of data product keys to load
+        skip_keys: List[str], optional
+            List of data product keys to skip
+
+        Returns
+        -------
+        List[str]
+            List of data product keys to load, in the order they are stored
+        """
+        # Check that the required keys make sense
+        assert (keys is None) or (skip_keys is None), (
+                "Must not specify both `keys` or `skip_keys`.")
+
+        # Translate keys/skip_keys into a single list. Always load the index.
+        for key in (keys if keys is not None else skip_keys or []):
+            if key not in stored_keys:
+                raise KeyError(
+                        f"Key {key} is requested (or skipped) but does not "
+                         "appear in the list of stored data products.")
+
+        if keys is not None:
+            return [k for k in stored_keys if k in keys or k == 'index']
+        elif skip_keys is not None:
+            return [k for k in stored_keys if k not in skip_keys or k == 'index']
+
+        return list(stored_keys)
+
+    def close(self):
+        """Closes all the file handles held in the pool."""
+        while self.file_pool:
+            _, (in_file, _) = self.file_pool.popitem(last=False)
+            in_file.close()
+
+    @contextmanager
+    def open_file(self, file_idx):
+        """Provides an open file handle and its cache of key formats.
+
+        If `keep_open` is `False`, the file is opened and closed around each
+        use. Otherwise, the handle is fetched from (or added to) the pool of
+        open files, which evicts the least recently used file when full.
+
+        Parameters
+        ----------
+        file_idx : int
+            Index of the file in the file list
+
+        Yields
+        ------
+        h5py.File
+            HDF5 file instance
+        dict
+            Dictionary which maps keys onto their :class:`KeyFormat`
+        """
+        # If the file handles are not to be kept, open a fresh file
+        if not self.keep_open:
+            with h5py.File(self.file_paths[file_idx], 'r') as in_file:
+                yield in_file, {}
+            return
+
+        # Otherwise, fetch the file from the pool, add it if needed
+        if file_idx in self.file_pool:
+            self.file_pool.move_to_end(file_idx)
+        else:
+            if len(self.file_pool) >= self.max_open_files:
+                _, (old_file, _) = self.file_pool.popitem(last=False)
+                old_file.close()
+
+            in_file = h5py.File(self.file_paths[file_idx], 'r')
+            self.file_pool[file_idx] = (in_file, {})
+
+        yield self.file_pool[file_idx]
+
+    def get_key_format(self, in_file, cache, key):
+        """Fetches the storage properties of a data product, caches them.
+
+        Parameters
+        ----------
+        in_file : h5py.File
+            HDF5 file instance
+        cache : dict
+            Dictionary which maps keys onto their :class:`KeyFormat`
+        key: str
+            Name of the dataset in the entry
+
+        Returns
+        -------
+        KeyFormat
+            Storage properties of the data product
+        """
+        # If the key has already been processed, return it
+        if key in cache:
+            return cache[key]
+
+        # Otherwise, dispatch
+        fmt = self.KeyFormat(scalar=bool(in_file[key].attrs.get('scalar', False)))
+        if isinstance(in_file[key], h5py.Dataset):
+            # The product is a simple array or a list of objects
+            fmt.dataset = in_file[key]
+            if fmt.dataset.dtype.names:
+                class_name = fmt.dataset.attrs['class_name']
+                fmt.obj_class = getattr(spine.data, class_name)
+                if self.skip_unknown_attrs:
+                    fmt.known_attrs = [f.name for f in fields(fmt.obj_class)]
+
+        else:
+            # The product is a list of arrays (merged or not)
+            fmt.index = in_file[key]['index']
+            if len(fmt.index.shape) == 1:
+                fmt.elements = [in_file[key]['elements']]
+            else:
+                num_elements = fmt.index.shape[1]
+                fmt.elements = [
+                        in_file[key][f'element_{i}'] for i in range(num_elements)]
+
+        cache[key] = fmt
+
+        return fmt
+
     def get(self, idx):
         """Returns a specific entry in the file.
 
@@ -142,14 +370,107 @@ class HDF5Reader(ReaderBase):
 
         # Use the event tree to find out what needs to be loaded
         data = {'file_index': file_idx}
-        with h5py.File(self.file_paths[file_idx], 'r') as in_file:
+        with self.open_file(file_idx) as (in_file, cache):
             event = in_file['events'][entry_idx]
-            for key in event.dtype.names:
-                self.load_key(in_file, event, data, key)
+            if self.lazy:
+                return self.get_lazy(file_idx, event)
+
+            for key in self.keys:
+                self.load_key(in_file, event, data, key, cache)
 
         return data
 
-    def load_key(self, in_file, event, data, key):
+    def get_lazy(self, file_idx, event):
+        """Returns an entry which only loads its data products on access.
+
+        Parameters
+        ----------
+        file_idx : int
+            Index of the file in the file list
+        event : np.ndarray
+            Region references of the event
+
+        Returns
+        -------
+        LazyEntry
+            Dictionary of data products corresponding to one event
+        """
+        loader = partial(self.load_key_lazy, file_idx, event)
+
+        return LazyEntry(loader, self.keys, file_index=file_idx)
+
+    def load_key_lazy(self, file_idx, event, key):
+        """Fetch a specific key for a specific event, on demand.
+
+        Parameters
+        ----------
+        file_idx : int
+            Index of the file in the file list
+        event : np.ndarray
+            Region references of the event
+        key: str
+            Name of the dataset in the entry
+
+        Returns
+        -------
+        object
+            Data product
+        """
+        data = {}
+        with self.open_file(file_idx) as (in_file, cache):
+            self.load_key(in_file, event, data, key, cache)
+
+        return data[key]
+
+    def get_many(self, indices):
+        """Returns a list of entries in the file(s).
+
+        The entries are grouped by file. Within a file, each dataset is read
+        once per block of contiguous entries, rather than once per entry.
+
+        Parameters
+        ----------
+        indices : List[int]
+            List of integer entry IDs to access
+
+        Returns
+        -------
+        List[dict]
+            One dictionary of data products per requested entry, in the
+            order in which they were requested
+        """
+        # Get the appropriate entry indexes
+        indices = np.asarray(indices, dtype=np.int64)
+        assert np.all(indices < len(self.entry_index))
+        file_ids = self.file_index[self.entry_index[indices]]
+        entry_ids = self.entry_index[indices] - self.file_offsets[file_ids]
+
+        # Loop over the files which contain the requested entries
+        result = [None]*len(indices)
+        for file_idx in np.unique(file_ids):
+            batch_ids = np.where(file_ids == file_idx)[0]
+            data_list = [{'file_index': file_idx} for _ in batch_ids]
+            with self.open_file(file_idx) as (in_file, cache):
+                # Load the region references of all the requested entries
+                events = self.read_ranges(
+                        in_file['events'], entry_ids[batch_ids],
+                        entry_ids[batch_ids] + 1)
+                events = np.concatenate(events)
+
+                # Load each key for all the requested entries at once
+                if self.lazy:
+                    data_list = [self.get_lazy(file_idx, e) for e in events]
+                else:
+                    for key in self.keys:
+                        self.load_key_many(
+                                in_file, events, data_list, key, cache)
+
+            for i, batch_id in enumerate(batch_ids):
+                result[batch_id] = data_list[i]
+
+        return result
+
+    def load_key(self, in_file, event, data, key, cache=None):
         """Fetch a specific key for a specific event.
 
         Parameters
@@ -162,67 +483,372 @@ class HDF5Reader(ReaderBase):
             Dictionary of data products corresponding to one event
         key: str
             Name of the dataset in the entry
+        cache : dict, optional
+            Dictionary which maps keys onto their :class:`KeyFormat`
         """
+        # Fetch the storage properties of the key
+        cache = cache if cache is not None else {}
+        fmt = self.get_key_format(in_file, cache, key)
+
         # The event-level information is a region reference: fetch it
         region_ref = event[key]
-        if isinstance(in_file[key], h5py.Dataset):
-            if not in_file[key].dtype.names:
-                # If the reference points at a simple dataset, return
-                data[key] = in_file[key][region_ref]
-                if in_file[key].attrs['scalar']:
-                    data[key] = data[key][0]
-                if len(in_file[key].shape) > 1:
-                    data[key] = data[key].reshape(-1, in_file[key].shape[1])
+        if fmt.dataset is not None:
+            # If the reference points at a simple dataset, return
+            array = fmt.dataset[region_ref]
+            if len(fmt.dataset.shape) > 1:
+                array = array.reshape(-1, fmt.dataset.shape[1])
 
+            data[key] = self.finalize(fmt, array)
+
+        else:
+            # If the reference points at a group, unpack
+            el_refs = fmt.index[region_ref].flatten()
+            if len(fmt.index.shape) == 1:
+                elements = [fmt.elements[0]]*len(el_refs)
             else:
-                # If the dataset has multiple attributes, it contains an object.
-                # Start by fetching the appropriate class to rebuild
-                array = in_file[key][region_ref]
-                class_name = in_file[key].attrs['class_name']
-                obj_class = getattr(spine.data, class_name)
+                elements = fmt.elements
 
-                # If needed, get the list of recognized attributes
-                if self.skip_unknown_attrs:
-                    known_attrs = [f.name for f in fields(obj_class)]
-
-                # Load the object
-                names = array.dtype.names
-                data[key] = []
-                for i, el in enumerate(array):
-                    # Fetch the list of key/value pairs, filter if requested
-                    if self.skip_unknown_attrs:
-                        obj_dict = {}
-                        for i, k in enumerate(names):
-                            if k in known_attrs:
-                                obj_dict[k] = el[i]
-                    else:
-                        obj_dict = dict(zip(names, el))
-
-                    # Rebuild an instance of the object class, if requested
-                    if self.build_classes:
-                        data[key].append(obj_class(**obj_dict))
-                    else:
-                        data[key].append(obj_dict)
-
-                if in_file[key].attrs['scalar']:
-                    data[key] = data[key][0]
+            arrays = [elements[i][r] for i, r in enumerate(el_refs)]
+
+            for i, element in enumerate(elements):
+                if len(element.shape) > 1:
+                    arrays[i] = arrays[i].reshape(-1, element.shape[1])
+
+            data[key] = self.finalize_list(fmt, arrays)
+
+    def load_key_many(self, in_file, events, data_list, key, cache):
+        """Fetch a specific key for a list of events in the same file.
+
+        Parameters
+        ----------
+        in_file : h5py.File
+            HDF5 file instance
+        events : np.ndarray
+            Array of region references for each requested event
+        data_list : List[dict]
+            List of data product dictionaries, one per requested event
+        key: str
+            Name of the dataset in the entry
+        cache : dict
+            Dictionary which maps keys onto their :class:`KeyFormat`
+        """
+        # Fetch the storage properties of the key
+        fmt = self.get_key_format(in_file, cache, key)
+
+        if fmt.dataset is not None:
+            # If the references point at a simple dataset, read all at once
+            starts, stops = self.get_bounds(fmt.dataset, events[key])
+            arrays = self.read_ranges(fmt.dataset, starts, stops)
+            for i, array in enumerate(arrays):
+                data_list[i][key] = self.finalize(fmt, array)
 
         else:
-            # If the reference points at a group, unpack
-            el_refs = in_file[key]['index'][region_ref].flatten()
-            if len(in_file[key]['index'].shape) == 1:
-                ret = np.empty(len(el_refs), dtype=object)
-                ret[:] = [in_file[key]['elements'][r] for r in el_refs]
-                if len(in_file[key]['elements'].shape) > 1:
-                    for i in range(len(el_refs)):
-                        ret[i] = ret[i].reshape(
-                                -1, in_file[key]['elements'].shape[1])
+            # If the references point at a group, fetch the element references
+            starts, stops = self.get_bounds(fmt.index, events[key])
+            el_refs = self.read_ranges(fmt.index, starts, stops)
+            el_refs = [refs.flatten() for refs in el_refs]
+
+            if len(fmt.index.shape) == 1:
+                # All elements are stored in a single dataset
+                counts = [len(refs) for refs in el_refs]
+                refs = np.concatenate(el_refs) if len(el_refs) else []
+                starts, stops = self.get_bounds(fmt.elements[0], refs)
+                arrays = self.read_ranges(fmt.elements[0], starts, stops)
+                offsets = np.cumsum([0] + counts)
+                arrays_list = [
+                        arrays[offsets[i]:offsets[i+1]]
+                        for i in range(len(counts))]
 
             else:
-                ret = [in_file[key][f'element_{i}'][r] for i, r in enumerate(el_refs)]
-                for i in range(len(el_refs)):
-                    if len(in_file[key][f'element_{i}'].shape) > 1:
-                        ret[i] = ret[i].reshape(
-                                -1, in_file[key][f'element_{i}'].shape[1])
+                # Each element is stored in its own dataset
+                arrays_list = [[] for _ in el_refs]
+                for j, element in enumerate(fmt.elements):
+                    refs = [refs[j] for refs in el_refs]
+                    starts, stops = self.get_bounds(element, refs)
+                    arrays = self.read_ranges(element, starts, stops)
+                    for i, array in enumerate(arrays):
+                        arrays_list[i].append(array)
+
+            for i, arrays in enumerate(arrays_list):
+                data_list[i][key] = self.finalize_list(fmt, arrays)
+
+    def finalize(self, fmt, array):
+        """Converts an array read from a simple dataset into a data product.
+
+        Parameters
+        ----------
+        fmt : KeyFormat
+            Storage properties of the data product
+        array : np.ndarray
+            Array of values (or structured array of objects) read from file
+
+        Returns
+        -------
+        object
+            Data product
+        """
+        # If the dataset contains objects, rebuild them
+        if fmt.obj_class is not None:
+            array = self.build_objects(fmt, array)
+
+        # If the data product is a scalar, unwrap it
+        if fmt.scalar:
+            return array[0]
+
+        return array
+
+    @staticmethod
+    def finalize_list(fmt, arrays):
+        """Converts a list of arrays read from a group into a data product.
+
+        Parameters
+        ----------
+        fmt : KeyFormat
+            Storage properties of the data product
+        arrays : List[np.ndarray]
+            List of arrays read from file
+
+        Returns
+        -------
+        Union[np.ndarray, List[np.ndarray]]
+            Data product
+        """
+        # If all elements are stored in a single dataset, return an array
+        if len(fmt.index.shape) == 1:
+            ret = np.empty(len(arrays), dtype=object)
+            ret[:] = arrays
+            return ret
+
+        return list(arrays)
+
+    def build_objects(self, fmt, array):
+        """Rebuilds a list of objects from a structured array.
+
+        The structured array is decoded one column at a time and the objects
+        are instantiated in bulk using :meth:`DataBase.from_columns`.
+
+        Parameters
+        ----------
+        fmt : KeyFormat
+            Storage properties of the data product
+        array : np.ndarray
+            Structured array with one row per object
+
+        Returns
+        -------
+        Union[List[object], np.recarray]
+            List of objects (or dictionaries, if `build_classes` is `False`),
+            or record array, if `object_table` is `True`
+        """
+        # Filter the list of attributes, if requested
+        names = array.dtype.names
+        if self.skip_unknown_attrs:
+            names = [k for k in names if k in fmt.known_attrs]
+            array = array[names]
+
+        # If requested, return the columnar view of the objects
+        if self.object_table:
+            return array.view(np.recarray)
+
+        # Rebuild the list of objects (or dictionaries), if requested
+        columns = {k: array[k] for k in names}
+        if self.build_classes:
+            return fmt.obj_class.from_columns(columns)
+
+        return [dict(zip(names, values)) for values in zip(*columns.values())]
+
+    @staticmethod
+    def get_bounds(dataset, region_refs):
+        """Converts a list of region references into row ranges.
+
+        Parameters
+        ----------
+        dataset : h5py.Dataset
+            Dataset the region references point to
+        region_refs : List[h5py.RegionReference]
+            List of region references, each pointing at a contiguous block
+
+        Returns
+        -------
+        np.ndarray
+            (N) Index of the first row of each region
+        np.ndarray
+            (N) Index of the row past the last row of each region
+        """
+        starts = np.zeros(len(region_refs), dtype=np.int64)
+        stops = np.zeros(len(region_refs), dtype=np.int64)
+        for i, ref in enumerate(region_refs):
+            space = h5py.h5r.get_region(ref, dataset.id)
+            if space.get_select_npoints() > 0:
+                bounds = space.get_select_bounds()
+                starts[i], stops[i] = bounds[0][0], bounds[1][0] + 1
+
+        return starts, stops
+
+    @staticmethod
+    def read_ranges(dataset, starts, stops):
+        """Reads a list of row ranges from a dataset.
+
+        Ranges which are contiguous (or overlapping) are merged, such that
+        each block of contiguous rows is read from the dataset only once.
+
+        Parameters
+        ----------
+        dataset : h5py.Dataset
+            Dataset to read from
+        starts : np.ndarray
+            (N) Index of the first row of each range
+        stops : np.ndarray
+            (N) Index of the row past the last row of each range
+
+        Returns
+        -------
+        List[np.ndarray]
+            (N) Array of rows for each range
+        """
+        # Initialize the output, give each empty range its own empty array
+        arrays = [None]*len(starts)
+        for i in np.where(stops <= starts)[0]:
+            arrays[i] = np.empty((0, *dataset.shape[1:]), dtype=dataset.dtype)
+
+        # Loop over blocks of contiguous ranges, read each block once
+        order = np.where(stops > starts)[0]
+        order = order[np.argsort(starts[order], kind='stable')]
+        i = 0
+        while i < len(order):
+            first, last = starts[order[i]], stops[order[i]]
+            j = i + 1
+            while j < len(order) and starts[order[j]] <= last:
+                last = max(last, stops[order[j]])
+                j += 1
+
+            block = dataset[first:last]
+            for k in order[i:j]:
+                arrays[k] = block[starts[k] - first:stops[k] - first]
+
+            i = j
+
+        return arrays
+
+
+class LazyEntry(MutableMapping):
+    """Dictionary of data products which are only loaded when accessed.
+
+    All the keys are registered upfront, such that the dictionary can be
+    inspected (`in`, `len`, `keys`) without reading anything from file. The
+    value of a key is loaded the first time it is accessed and kept for any
+    subsequent access.
+
+    Only the loaded values are stored. Every access path to the values
+    (indexing, `get`, `items`, `values`, `dict(entry)`, `{**entry}`, copies
+    and pickling) goes through :meth:`__getitem__`, which loads them.
+    """
+
+    def __init__(self, loader, keys, **kwargs):
+        """Initialize the dictionary.
+
+        Parameters
+        ----------
+        loader : callable
+            Function which loads the value of a key, given its name
+        keys : List[str]
+            List of keys to be loaded on demand
+        **kwargs : dict, optional
+            Values which are already loaded
+        """
+        # Store the loaded values
+        self.loader = loader
+        self.data = dict(kwargs)
+
+        # Register the keys to be loaded on demand, preserve the key order
+        self.order = list(self.data)
+        self.pending = set()
+        for key in keys:
+            if key not in self.data:
+                self.order.append(key)
+                self.pending.add(key)
+
+    def __getitem__(self, key):
+        """Returns the value of a key, loads it if it has not been yet.
+
+        Parameters
+        ----------
+        key : str
+            Data product name
+
+        Returns
+        -------
+        object
+            Data product
+        """
+        if key in self.pending:
+            self.data[key] = self.loader(key)
+            self.pending.discard(key)
+
+        return self.data[key]
+
+    def __setitem__(self, key, value):
+        """Sets the value of a key, which no longer needs to be loaded.
+
+        Parameters
+        ----------
+        key : str
+            Data product name
+        value : object
+            Data product
+        """
+        if key not in self:
+            self.order.append(key)
+
+        self.pending.discard(key)
+        self.data[key] = value
+
+    def __delitem__(self, key):
+        """Removes a key, which no longer needs to be loaded.
+
+        Parameters
+        ----------
+        key : str
+            Data product name
+        """
+        if key not in self:
+            raise KeyError(key)
+
+        self.order.remove(key)
+        self.pending.discard(key)
+        self.data.pop(key, None)
+
+    def __contains__(self, key):
+        """Checks whether a key exists, without loading it."""
+        return key in self.pending or key in self.data
+
+    def __iter__(self):
+        """Iterates over the keys, without loading them."""
+        return iter(list(self.order))
+
+    def __len__(self):
+        """Returns the number of keys, without loading them."""
+        return len(self.order)
+
+    def __repr__(self):
+        """Returns a representation of the loaded values."""
+        return f'LazyEntry({self.data!r}, pending={sorted(self.pending)!r})'
+
+    def __reduce__(self):
+        """Loads every value before pickling the entry as a simple dictionary.
+
+        Returns
+        -------
+        tuple
+            Pickling instructions
+        """
+        return dict, (self.copy(),)
+
+    def copy(self):
+        """Returns a simple dictionary copy, loads all values."""
+        return {k: self[k] for k in self}
 
-            data[key] = ret
+    def load(self):
+        """Loads all the values which have not been loaded yet."""
+        for key in list(self.pending):
+            self[key]
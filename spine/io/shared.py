@@ -0,0 +1,152 @@
+"""Module to transport batched data between loader workers and the model.
+
+By default, the batches produced by :class:`torch.utils.data.DataLoader`
+workers are pickled, sent through a pipe and unpickled in the main process,
+which copies every underlying buffer twice. This module provides a collate
+function wrapper which hands the large buffers of batched data structures
+over to torch, so that they are transported through shared memory instead.
+The main process receives numpy views of the shared memory buffers.
+"""
+
+import numpy as np
+import torch
+
+from spine.data.batch.base import BatchBase
+
+__all__ = ['SharedMemoryCollate']
+
+
+class SharedMemoryCollate:
+    """Collate function wrapper which moves batch buffers to shared memory.
+
+    This only affects the instances of :class:`BatchBase` (`TensorBatch`,
+    `IndexBatch`, `EdgeIndexBatch`) returned by the underlying collate
+    function. Other objects are transported through the default path.
+
+    Note
+    ----
+    This is only useful when the data is loaded by worker processes, i.e.
+    when the :class:`torch.utils.data.DataLoader` `num_workers` is > 0.
+    """
+
+    def __init__(self, collate_fn=None, pin_memory=False, min_bytes=1024):
+        """Initialize the collate function wrapper.
+
+        Parameters
+        ----------
+        collate_fn : callable, optional
+            Collate function to wrap. If not specified, use the default
+            torch collate function
+        pin_memory : bool, default False
+            If `True`, the buffers are copied to pinned memory once received
+            by the main process, which speeds up the transfer to GPU
+        min_bytes : int, default 1024
+            Minimum size of an array for it to be moved to shared memory. The
+            smaller arrays are cheaper to send through the default path
+        """
+        self.collate_fn = collate_fn
+        if collate_fn is None:
+            self.collate_fn = torch.utils.data.default_collate
+
+        self.pin_memory = pin_memory
+        self.min_bytes = min_bytes
+
+    def __call__(self, batch):
+        """Collates a batch, wraps the batched data structures.
+
+        Parameters
+        ----------
+        batch : List[Dict]
+            List of dictionaries of parsed information, one per event
+
+        Returns
+        -------
+        Dict
+            Dictionary that matches one data key to one batch-worth of data
+        """
+        data = self.collate_fn(batch)
+        for key, value in data.items():
+            if isinstance(value, BatchBase):
+                data[key] = SharedBatch(value, self.pin_memory, self.min_bytes)
+
+        return data
+
+
+class SharedBatch:
+    """Pickling proxy of a batched data structure.
+
+    When pickled, the large numpy buffers of the batch are converted to
+    torch tensors, which torch transports through shared memory. When
+    unpickled, the original batch class is rebuilt around numpy views of
+    these tensors, i.e. the proxy never exists in the receiving process.
+    """
+
+    def __init__(self, batch, pin_memory=False, min_bytes=1024):
+        """Store the batch to transport.
+
+        Parameters
+        ----------
+        batch : BatchBase
+            Batched data structure
+        pin_memory : bool, default False
+            If `True`, copy the buffers to pinned memory when received
+        min_bytes : int, default 1024
+            Minimum size of an array for it to be moved to shared memory
+        """
+        self.batch = batch
+        self.pin_memory = pin_memory
+        self.min_bytes = min_bytes
+
+    def __reduce__(self):
+        """Converts the large buffers of the batch to torch tensors.
+
+        Returns
+        -------
+        tuple
+            Function used to rebuild the batch and its arguments
+        """
+        state, shared = {}, []
+        for key, value in self.batch.__dict__.items():
+            # Private attributes are caches, they are rebuilt on demand
+            if key.startswith('_'):
+                continue
+
+            if (isinstance(value, np.ndarray) and value.dtype != object and
+                value.nbytes >= self.min_bytes):
+                value = torch.from_numpy(np.ascontiguousarray(value))
+                shared.append(key)
+            state[key] = value
+
+        return (rebuild_batch,
+                (type(self.batch), state, shared, self.pin_memory))
+
+
+def rebuild_batch(cls, state, shared, pin_memory=False):
+    """Rebuilds a batched data structure from its transported state.
+
+    Parameters
+    ----------
+    cls : type
+        Batched data structure class
+    state : dict
+        Attributes of the batched data structure
+    shared : List[str]
+        List of attributes transported as torch tensors
+    pin_memory : bool, default False
+        If `True`, copy the buffers to pinned memory
+
+    Returns
+    -------
+    BatchBase
+        Batched data structure with numpy views of the shared buffers
+    """
+    for key in shared:
+        tensor = state[key]
+        if pin_memory:
+            tensor = tensor.pin_memory()
+        state[key] = tensor.numpy()
+
+    batch = object.__new__(cls)
+    batch.__dict__.update(state)
+
+    return batch
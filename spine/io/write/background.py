@@ -0,0 +1,173 @@
+"""Module to execute a writer in a background thread."""
+
+import atexit
+from copy import deepcopy
+from queue import Queue, Full
+from threading import Thread
+
+from spine.utils.stopwatch import StopwatchManager
+
+__all__ = ['BackgroundWriter']
+
+
+class BackgroundWriter:
+    """Wraps a writer to execute it in a dedicated background thread.
+
+    Calling this object does not write the data directly: it pushes it to a
+    bounded queue which is consumed by a writer thread. This allows the
+    following iteration to be processed while the previous one is written.
+    If the queue is full, the call blocks until a slot frees up.
+
+    Any error raised in the writer thread is propagated back to the caller
+    on the next call to :meth:`__call__` or :meth:`close`.
+
+    Typical configuration should look like:
+
+    .. code-block:: yaml
+
+        io:
+          ...
+          writer:
+            name: hdf5
+            file_name: output.h5
+            queue_size: 4
+
+    Attributes
+    ----------
+    watch : StopwatchManager
+        Time spent writing the last processed batch in the writer thread
+    """
+
+    def __init__(self, writer, queue_size=2):
+        """Initialize the queue and the writer thread.
+
+        Parameters
+        ----------
+        writer : object
+            Writer instance to execute in the background
+        queue_size : int, default 2
+            Maximum number of batches which can wait in the queue
+        """
+        # Check that the queue size is sensible
+        assert queue_size > 0, "The writer `queue_size` must be positive."
+
+        # Store the writer and initialize the queue
+        self.writer = writer
+        self.queue = Queue(maxsize=queue_size)
+        self.thread = None
+        self.error = None
+
+        # Initialize the writer thread timer. The timer is only modified in
+        # the writer thread, a finished copy of it is exposed to the caller.
+        self.thread_watch = StopwatchManager()
+        self.thread_watch.initialize('write')
+        self.thread_watch.start('write')
+        self.thread_watch.stop('write')
+        self.watch = deepcopy(self.thread_watch)
+
+    def __getattr__(self, name):
+        """Forwards attribute requests to the underlying writer.
+
+        Parameters
+        ----------
+        name : str
+            Name of the attribute
+
+        Returns
+        -------
+        object
+            Attribute of the underlying writer
+        """
+        if name == 'writer':
+            raise AttributeError(name)
+
+        return getattr(self.writer, name)
+
+    def __call__(self, data, cfg=None):
+        """Pushes a batch of data to the writer queue.
+
+        Parameters
+        ----------
+        data : dict
+            Dictionary of data products
+        cfg : dict
+            Dictionary containing the complete SPINE configuration
+        """
+        # If the writer thread is not running, start it. Make sure that the
+        # queue is written out if the interpreter exits before it is closed.
+        if self.thread is None:
+            self.thread = Thread(target=self.process, daemon=True)
+            self.thread.start()
+            atexit.register(self.close)
+
+        # Push a shallow copy of the data to the queue (the writer may
+        # reassign some of the values in the dictionary). Access each value,
+        # such that lazily loaded products are read in the calling thread.
+        self.put(({k: data[k] for k in data}, cfg))
+
+    def put(self, item):
+        """Pushes an item to the queue, waits while the queue is full.
+
+        Parameters
+        ----------
+        item : object
+            Item to push to the queue
+        """
+        while True:
+            self.check()
+            try:
+                self.queue.put(item, timeout=0.1)
+                return
+            except Full:
+                continue
+
+    def check(self):
+        """Raises the error encountered by the writer thread, if any."""
+        if self.error is not None:
+            error, self.error = self.error, None
+            raise RuntimeError(
+                    "The background writer thread failed.") from error
+
+    def process(self):
+        """Consumes the queue in the writer thread until it is closed."""
+        while True:
+            # Fetch the next item, a `None` item signals the end of the run
+            item = self.queue.get()
+            if item is None:
+                break
+
+            # If an error occured previously, drop the remaining items
+            if self.error is not None:
+                continue
+
+            # Write the data to file
+            try:
+                self.thread_watch.start('write')
+                self.writer(*item)
+                self.thread_watch.stop('write')
+                self.watch = deepcopy(self.thread_watch)
+
+            except Exception as err: # pylint: disable=W0718
+                self.error = err
+
+        # Close the underlying writer, if needed
+        if self.error is None and hasattr(self.writer, 'close'):
+            try:
+                self.writer.close()
+            except Exception as err: # pylint: disable=W0718
+                self.error = err
+
+    def close(self):
+        """Waits for the queue to be written out, closes the writer.
+
+        The writer thread is restarted if more data is written afterwards.
+        """
+        # Signal the end of the run, wait for the thread to finish
+        if self.thread is not None:
+            self.queue.put(None)
+            self.thread.join()
+            self.thread = None
+            atexit.unregister(self.close)
+
+        # Propagate the error, if there was one
+        self.check()
@@ -1,6 +1,7 @@
 """Module to write the output of the reconstruction to file."""
 
 import os
+from collections import defaultdict
 from dataclasses import dataclass
 
 import yaml
@@ -34,12 +35,19 @@ class HDF5Writer:
               - input_data
               - segmentation
               - ...
+
+    By default, the output file is reopened and each dataset is resized once
+    per entry and per data product. To write large outputs efficiently, set
+    `buffer_size` to keep the file open for the whole run and to accumulate
+    entries in memory before writing them with a single resize-and-write per
+    dataset. The buffer is written out by :meth:`flush` (or :meth:`close`).
     """
     name = 'hdf5'
 
     def __init__(self, file_name=None, keys=None, skip_keys=None, dummy_ds=None,
                  overwrite=False, append=False, prefix=None, split=False,
-                 lite=False):
+                 lite=False, buffer_size=None, chunks=None, compression=None,
+                 compression_opts=None):
         """Initializes the basics of the output file.
 
         Parameters
@@ -64,6 +72,16 @@ class HDF5Writer:
             If `True`, split the output to produce one file per input file
         lite : bool, default False
             If `True`, the lite version of objects is stored (drop point indexes)
+        buffer_size : int, optional
+            If specified, keep the output file(s) open and buffer this many
+            entries in memory before writing them to file at once
+        chunks : int, optional
+            Number of rows per chunk along the first axis of each dataset. If
+            not specified, the chunk shape is picked automatically by h5py.
+        compression : str, optional
+            Compression filter to apply to each dataset ('gzip', 'lzf', etc.)
+        compression_opts : int, optional
+            Compression filter settings (e.g. compression level for 'gzip')
         """
         # If the output file name is not provided, use the input file prefix(es)
         if not file_name:
@@ -103,6 +121,9 @@ class HDF5Writer:
         self.split = split
         self.lite = lite
         self.ready = False
+        self.chunks = chunks
+        self.compression = compression
+        self.compression_opts = compression_opts
         self.object_dtypes = [] # TODO: make this a set
 
         self.keys = keys
@@ -118,6 +139,20 @@ class HDF5Writer:
         self.type_dict   = None
         self.event_dtype = None
 
+        # Initialize the entry buffer and the open file handles
+        assert buffer_size is None or buffer_size > 0, (
+                "If provided, the `buffer_size` must be strictly positive.")
+        self.buffer_size = buffer_size
+        self.buffer = defaultdict(list)
+        self.out_files = {}
+
+    def __del__(self):
+        """Writes the buffered entries to file before deleting the writer."""
+        try:
+            self.close()
+        except Exception:
+            pass
+
     @dataclass
     class DataFormat:
         """Data structure to hold writing parameters.
@@ -390,8 +425,7 @@ class HDF5Writer:
                 # If the key contains a list of objects of identical shape
                 shape = (0, val.width) if val.width else (0,)
                 maxshape = (None, val.width) if val.width else (None,)
-                out_file.create_dataset(
-                        key, shape, maxshape=maxshape, dtype=val.dtype)
+                self.create_dataset(out_file, key, shape, maxshape, val.dtype)
 
                 # Store the class name to rebuild it later, if relevant
                 if val.class_name is not None:
@@ -405,15 +439,13 @@ class HDF5Writer:
 
                 n_arrays = len(val.width)
                 shape, maxshape = (0, n_arrays), (None, n_arrays)
-                group.create_dataset(
-                        'index', shape, maxshape=maxshape, dtype=ref_dtype)
+                self.create_dataset(group, 'index', shape, maxshape, ref_dtype)
 
                 for i, w in enumerate(val.width):
                     shape = (0, w) if w else (0,)
                     maxshape = (None, w) if w else (None,)
                     el = f'element_{i}'
-                    group.create_dataset(
-                            el, shape, maxshape=maxshape, dtype=val.dtype)
+                    self.create_dataset(group, el, shape, maxshape, val.dtype)
 
             else:
                 # If the  elements of the list are of equal width, store them
@@ -423,16 +455,40 @@ class HDF5Writer:
 
                 shape = (0, val.width[0]) if val.width[0] else (0,)
                 maxshape = (None, val.width[0]) if val.width[0] else (None,)
-                group.create_dataset(
-                        'index', (0,), maxshape=(None,), dtype=ref_dtype)
-                group.create_dataset(
-                        'elements', shape, maxshape=maxshape, dtype=val.dtype)
+                self.create_dataset(group, 'index', (0,), (None,), ref_dtype)
+                self.create_dataset(
+                        group, 'elements', shape, maxshape, val.dtype)
 
             # Give relevant attributes to the dataset
             out_file[key].attrs['scalar'] = val.scalar
 
-        out_file.create_dataset(
-                'events', (0,), maxshape=(None,), dtype=self.event_dtype)
+        self.create_dataset(
+                out_file, 'events', (0,), (None,), self.event_dtype)
+
+    def create_dataset(self, group, name, shape, maxshape, dtype):
+        """Create a resizable dataset with the requested storage options.
+
+        Parameters
+        ----------
+        group : Union[h5py.File, h5py.Group]
+            HDF5 file or group instance in which to create the dataset
+        name : str
+            Name of the dataset
+        shape : tuple
+            Initial shape of the dataset
+        maxshape : tuple
+            Maximum shape of the dataset
+        dtype : object
+            Data type of the dataset
+        """
+        chunks = None
+        if self.chunks is not None:
+            chunks = (self.chunks, *shape[1:])
+
+        group.create_dataset(
+                name, shape, maxshape=maxshape, dtype=dtype, chunks=chunks,
+                compression=self.compression,
+                compression_opts=self.compression_opts)
 
     def __call__(self, data, cfg=None):
         """Append the HDF5 file with the content of a batch.
@@ -462,6 +518,17 @@ class HDF5Writer:
             self.create(data, cfg)
             self.ready = True
 
+        # If requested, buffer the entries, write them once the buffer is full
+        if self.buffer_size is not None:
+            file_ids = data['file_index'] if self.split else [0]*batch_size
+            for batch_id in range(batch_size):
+                self.buffer_entry(file_ids[batch_id], data, batch_id)
+
+            if sum(len(b) for b in self.buffer.values()) >= self.buffer_size:
+                self.flush()
+
+            return
+
         # Append file(s)
         if not self.split:
             with h5py.File(self.file_name, 'a') as out_file:
@@ -476,6 +543,148 @@ class HDF5Writer:
                     for batch_id in np.where(file_ids == file_id)[0]:
                         self.append_entry(out_file, data, batch_id)
 
+    def buffer_entry(self, file_id, data, batch_id):
+        """Adds one entry to the buffer of entries to be written to file.
+
+        Parameters
+        ----------
+        file_id : int
+            Index of the output file the entry is to be written to
+        data : dict
+            Dictionary of data products
+        batch_id : int
+            Batch ID to be buffered
+        """
+        # Loop over the keys to store, fetch and format the entry data. The
+        # arrays are copied, as the caller may reuse their buffers before the
+        # entry is written to file.
+        entry = {}
+        for key in self.keys:
+            val = self.type_dict[key]
+            if not val.merge and not isinstance(val.width, list):
+                # Single arrays
+                if np.isscalar(data[key]):
+                    array = [data[key]]
+                else:
+                    array = data[key][batch_id]
+                    if val.scalar:
+                        array = [array]
+
+                if val.dtype in self.object_dtypes:
+                    entry[key] = self.get_objects(array, val.dtype, self.lite)
+                else:
+                    entry[key] = self.format_array(
+                            np.array(array, dtype=val.dtype), val.dtype,
+                            val.width)
+
+            else:
+                # Lists of arrays
+                entry[key] = [np.array(el, dtype=val.dtype)
+                              for el in data[key][batch_id]]
+
+        self.buffer[file_id].append(entry)
+
+    def flush(self):
+        """Writes all the buffered entries to file."""
+        for file_id, entries in self.buffer.items():
+            if len(entries):
+                out_file = self.get_file(file_id)
+                self.append_entries(out_file, entries)
+                out_file.flush()
+
+        self.buffer.clear()
+
+    def close(self):
+        """Writes all the buffered entries to file and closes the file(s).
+
+        The file(s) will be reopened if more entries are written afterwards.
+        """
+        self.flush()
+        for out_file in self.out_files.values():
+            out_file.close()
+
+        self.out_files = {}
+
+    def get_file(self, file_id):
+        """Fetches an open output file handle, opens it if needed.
+
+        Parameters
+        ----------
+        file_id : int
+            Index of the output file
+
+        Returns
+        -------
+        h5py.File
+            HDF5 file instance
+        """
+        if file_id not in self.out_files:
+            file_name = self.file_name if not self.split else self.file_name[file_id]
+            self.out_files[file_id] = h5py.File(file_name, 'a')
+
+        return self.out_files[file_id]
+
+    def append_entries(self, out_file, entries):
+        """Stores a list of buffered entries at once.
+
+        Each dataset is resized and written to once for the whole list.
+
+        Parameters
+        ----------
+        out_file : h5py.File
+            HDF5 file instance
+        entries : List[dict]
+            List of buffered entries
+        """
+        # Initialize the new events
+        events = np.empty(len(entries), self.event_dtype)
+        ref_dtype = h5py.special_dtype(ref=h5py.RegionReference)
+
+        # Loop over the keys to store
+        for key in self.keys:
+            val = self.type_dict[key]
+            arrays = [entry[key] for entry in entries]
+            if not val.merge and not isinstance(val.width, list):
+                # Store single arrays
+                events[key] = self.store_many(out_file[key], arrays)
+
+            elif not val.merge:
+                # Store the arrays of each element, then the index
+                group = out_file[key]
+                index = np.empty((len(arrays), len(val.width)), dtype=ref_dtype)
+                for i, width in enumerate(val.width):
+                    el_arrays = [
+                            self.format_array(a[i], val.dtype, width)
+                            for a in arrays]
+                    index[:, i] = self.store_many(
+                            group[f'element_{i}'], el_arrays)
+
+                events[key] = self.store_many(
+                        group['index'], [index[i:i+1] for i in range(len(index))])
+
+            else:
+                # Store all arrays in one dataset, then the index to break them
+                group = out_file[key]
+                el_arrays = [
+                        self.format_array(el, val.dtype, val.width[0])
+                        for a in arrays for el in a]
+                el_refs = self.store_many(group['elements'], el_arrays)
+
+                offsets = np.cumsum([0] + [len(a) for a in arrays])
+                index = []
+                for i in range(len(arrays)):
+                    refs = np.empty(offsets[i+1] - offsets[i], dtype=ref_dtype)
+                    refs[:] = el_refs[offsets[i]:offsets[i+1]]
+                    index.append(refs)
+
+                events[key] = self.store_many(group['index'], index)
+
+        # Append events
+        event_ds = out_file['events']
+        event_id = len(event_ds)
+        event_ds.resize(event_id + len(events), axis=0) # pylint: disable=E1101
+        event_ds[event_id:event_id + len(events)] = events
+
     def append_entry(self, out_file, data, batch_id):
         """Stores one entry.
 
@@ -650,6 +859,89 @@ class HDF5Writer:
         region_ref = index.regionref[current_id:current_id + len(array_list)]
         event[key] = region_ref
 
+    @staticmethod
+    def store_many(dataset, arrays):
+        """Stores a list of arrays contiguously in a dataset and returns the
+        region reference of each one of them.
+
+        The dataset is resized and written to only once for the whole list.
+
+        Parameters
+        ----------
+        dataset : h5py.Dataset
+            HDF5 dataset instance
+        arrays : List[np.ndarray]
+            List of arrays to be stored
+
+        Returns
+        -------
+        np.ndarray
+            Array of region references, one per array in the list
+        """
+        # Extend the dataset, store the concatenated arrays
+        counts = [len(array) for array in arrays]
+        first_id = len(dataset)
+        offsets = first_id + np.cumsum([0] + counts)
+        if offsets[-1] > first_id:
+            dataset.resize(offsets[-1], axis=0)
+            dataset[first_id:offsets[-1]] = np.concatenate(arrays)
+
+        # Define one region reference per array
+        region_refs = np.empty(len(arrays), dtype=object)
+        for i in range(len(arrays)):
+            region_refs[i] = dataset.regionref[offsets[i]:offsets[i+1]]
+
+        return region_refs
+
+    @staticmethod
+    def format_array(array, dtype, width=0):
+        """Casts an array (or list of scalars) to the dtype and shape of the
+        dataset it is to be stored in.
+
+        Parameters
+        ----------
+        array : Union[np.ndarray, list]
+            Array or list of scalars
+        dtype : object
+            Data type of the dataset
+        width : int, default 0
+            Width of the dataset, if it is two-dimensional
+
+        Returns
+        -------
+        np.ndarray
+            Formatted array
+        """
+        array = np.asarray(array, dtype=dtype)
+        if width:
+            return array.reshape(-1, width)
+
+        return array.reshape(-1)
+
+    @staticmethod
+    def get_objects(array, obj_dtype, lite):
+        """Converts a list of objects into a structured array.
+
+        Parameters
+        ----------
+        array : np.ndarray
+            Array of objects or dictionaries to be stored
+        obj_dtype : list
+            List of (key, dtype) pairs which specify what's to store
+        lite : bool
+            If `True`, store the lite version of objects
+
+        Returns
+        -------
+        np.ndarray
+            Structured array with one row per object
+        """
+        objects = np.empty(len(array), obj_dtype)
+        for i, obj in enumerate(array):
+            objects[i] = tuple(obj.as_dict(lite).values())
+
+        return objects
+
     @staticmethod
     def store_objects(out_file, event, key, array, obj_dtype, lite):
         """Stores a list of objects with understandable attributes in the file
@@ -671,9 +963,7 @@ class HDF5Writer:
             If `True`, store the lite version of objects
         """
         # Convert list of objects to list of storable objects
-        objects = np.empty(len(array), obj_dtype)
-        for i, obj in enumerate(array):
-            objects[i] = tuple(obj.as_dict(lite).values())
+        objects = HDF5Writer.get_objects(array, obj_dtype, lite)
 
         # Extend the dataset, store array
         dataset = out_file[key]
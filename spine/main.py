@@ -8,6 +8,7 @@ scripts, writers and profilers.
 
 import os
 import glob
+from copy import deepcopy
 
 import torch
 from torch.distributed import init_process_group, destroy_process_group
@@ -65,6 +66,8 @@ def run_single(cfg):
     # Dispatch
     if 'train' in cfg['base']:
         train_single(cfg=cfg, rank=None)
+    elif cfg['base'].get('num_workers', 1) > 1:
+        inference_sharded(cfg)
     else:
         inference_single(cfg)
 
@@ -127,6 +130,45 @@ def inference_single(cfg):
         driver.run()
 
 
+def inference_sharded(cfg):
+    """Execute the reader-mode inference in multiple processes.
+
+    The entries are sharded into `num_workers` contiguous blocks, each
+    processed by an independent driver in its own process. Each driver
+    writes to its own output file and log directory, tagged with the
+    index of the shard it processed.
+
+    Parameters
+    ----------
+    cfg : dict
+        Full driver configuration
+    """
+    # Make sure that the input is read entry-by-entry
+    assert 'reader' in cfg['io'], (
+            "Can only use multiple workers in reader mode.")
+
+    # Launch one process per shard
+    num_workers = cfg['base']['num_workers']
+    torch.multiprocessing.spawn(
+            inference_shard, args=(cfg,), nprocs=num_workers)
+
+
+def inference_shard(shard_id, cfg):
+    """Execute the reader-mode inference on one shard of the entries.
+
+    Parameters
+    ----------
+    shard_id : int
+        Index of the shard of entries to process
+    cfg : dict
+        Full driver configuration
+    """
+    # Tag the configuration with the shard index, run
+    cfg = deepcopy(cfg)
+    cfg['base']['shard_id'] = shard_id
+    inference_single(cfg)
+
+
 def process_world(base, **kwargs):
     """Check on the number of available GPUs and what has been requested.
     
@@ -99,14 +99,20 @@ class DBSCAN(torch.nn.Module):
                     "must provide a PPN predictor configuration.")
             self.ppn_predictor = PPNPredictor(**ppn_predictor)
 
-        # Initialize one clustering algorithm per class
+        # Initialize one clustering algorithm per class. When each point is
+        # a core point (`min_samples` of 1), the clusters are the connected
+        # components of the radius graph, which is obtained from the voxel
+        # neighborhood service shared across the batch (`None` clusterer).
         self.clusterers = []
         for k, c in enumerate(shapes):
-            if c not in break_shapes:
+            if (c not in break_shapes and self.min_samples[k] == 1 and
+                self.metric[k] == 'euclidean'):
+                clusterer = None
+            elif c not in break_shapes:
                 dbscan = sklearn_dbscan(
                         eps=self.eps[k], min_samples=self.min_samples[k],
                         metric=self.metric[k])
-                clusterer = lambda x, _: dbscan.fit(x).labels_
+                clusterer = lambda x, _, dbscan=dbscan: dbscan.fit(x).labels_
             else:
                 method = break_track_method
                 if c != TRACK_SHP:
@@ -174,6 +180,7 @@ class DBSCAN(torch.nn.Module):
             # Fetch the necessary data products, in numpy format
             voxels_b = data_np[b][:, COORD_COLS]
             seg_pred_b = seg_pred_np[b]
+            points_b = None
             if points is not None:
                 points_b = points_np[b]
                 point_shapes_b = point_shapes_np[b]
@@ -195,8 +202,13 @@ class DBSCAN(torch.nn.Module):
                     continue
 
                 # Run clustering
-                voxels_b_s = voxels_b[shape_index]
-                labels = self.clusterers[k](voxels_b_s, points_b)
+                if self.clusterers[k] is None:
+                    neighborhood = data_np.get_neighborhood(self.eps[k])
+                    labels = neighborhood.dbscan(
+                            self.eps[k], int(offsets[b]) + shape_index)
+                else:
+                    voxels_b_s = voxels_b[shape_index]
+                    labels = self.clusterers[k](voxels_b_s, points_b)
 
                 # If delta points were added to track points, remove them
                 if s == TRACK_SHP and break_class and self.track_include_delta:
@@ -207,7 +219,7 @@ class DBSCAN(torch.nn.Module):
                 for c in np.unique(labels):
                     clust = np.where(labels == c)[0]
                     if c > -1 and len(clust) > self.min_size[k]:
-                        clusts_b_s.append(int(offsets[b]) + clust)
+                        clusts_b_s.append(int(offsets[b]) + shape_index[clust])
                         counts_b.append(len(clust))
  
                 clusts_b.extend(clusts_b_s)
@@ -219,11 +231,14 @@ class DBSCAN(torch.nn.Module):
             counts.append(len(clusts_b))
             single_counts.extend(counts_b)
 
-        # Initialize an IndexBatch and return it
-        clusts_nb    = np.empty(len(clusts), dtype=object)
-        clusts_nb[:] = clusts
+        # Initialize an IndexBatch from the flat (CSR) index and return it
+        csr_index = np.empty(0, dtype=np.int64)
+        if len(clusts):
+            csr_index = np.concatenate(clusts)
+        csr_edges = np.zeros(len(single_counts) + 1, dtype=np.int64)
+        csr_edges[1:] = np.cumsum(single_counts)
 
-        index = IndexBatch(clusts_nb, offsets, counts, single_counts)
+        index = IndexBatch.from_csr(csr_index, csr_edges, offsets, counts)
         if len(shapes):
             shapes = TensorBatch(np.concatenate(shapes), counts)
         else:
@@ -6,7 +6,7 @@ from spine.data import TensorBatch
 from spine.utils.torch_local import local_cdist
 from spine.utils.globals import COORD_COLS, VALUE_COL, SHAPE_COL
 from spine.utils.gnn.cluster import (
-        get_cluster_features_batch, get_cluster_points_label_batch,
+        get_cluster_features_fused_batch, get_cluster_points_label_batch,
         get_cluster_directions_batch, get_cluster_dedxs_batch)
 from spine.utils.gnn.network import get_cluster_edge_features_batch
 
@@ -147,9 +147,16 @@ class ClustGeoNodeEncoder(torch.nn.Module):
 
         # Extract the base geometric features
         if self.use_numpy:
-            # If numpy is to be used, pass it through the Numba function
-            feats = get_cluster_features_batch(
-                    data, clusts, add_value, add_shape).tensor
+            # If numpy is to be used, compute all the requested statistics
+            # in a single pass through the fused Numba function
+            features = ['center', 'cov', 'dir', 'size']
+            if add_value:
+                features.append('value')
+            if add_shape:
+                features.append('shape')
+
+            feats = get_cluster_features_fused_batch(
+                    data, clusts, features).tensor
         else:
             # Otherwise, use the local torch method
             feats = self.get_base_features(
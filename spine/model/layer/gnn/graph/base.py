@@ -8,7 +8,9 @@ import numpy as np
 from spine.data import EdgeIndexBatch
 
 from spine.utils.globals import COORD_COLS
-from spine.utils.gnn.network import inter_cluster_distance
+from spine.utils.gnn.network import (
+        inter_cluster_distance, inter_cluster_distance_neighbors,
+        get_sparse_edge_distances)
 
 
 class GraphBase:
@@ -38,7 +40,10 @@ class GraphBase:
             Method used to compute inter-node distance ('voxel' or 'centroid')
         dist_algorithm : str, default 'brute'
             Algorithm used to comppute inter-node distance
-            ('brute' or 'recursive')
+            ('brute', 'recursive', 'bbox' or 'grid'). The 'grid' algorithm
+            only computes the (exact) distance between pairs of nodes closer
+            than the maximum edge length, and stores them sparsely. It uses
+            the neighborhood service cached on the input tensor batch
         """
         # Store attributes
         self.directed = directed
@@ -70,6 +75,18 @@ class GraphBase:
         self.compute_dist = (max_length is not None or
                              self.name in ('mst', 'knn'))
 
+        # If the distances are to be stored sparsely, check that it is
+        # compatible with the graph, store the distance cutoff
+        if dist_algorithm == 'grid':
+            assert dist_method == 'voxel', (
+                    "The 'grid' algorithm only supports the 'voxel' method.")
+            assert max_length is not None, (
+                    "The 'grid' algorithm requires a `max_length` cutoff.")
+            assert self.name not in ('mst', 'knn'), (
+                    "The 'grid' algorithm cannot be used to build "
+                    f"{self.name} graphs, which require all distances.")
+            self.max_dist = np.max(self.max_length)
+
         # If this is a loop graph, simply set as undirected
         assert self.name != 'loop' or self.directed, (
                 "For loop graphs, set as directed (no need for reciprocal)")
@@ -90,17 +107,29 @@ class GraphBase:
 
         Returns
         -------
-        np.ndarray
+        EdgeIndexBatch
             (2, E) Tensor of edges
+        Union[np.ndarray, numba.typed.Dict]
+            (C, C) Inter-cluster distance matrix, or dictionary which maps
+            pairs of clusters onto their distance if it is stored sparsely
+        Union[np.ndarray, numba.typed.Dict]
+            (C, C) Combined index of the closest pair of voxels per pair of
+            clusters, or dictionary which maps pairs of clusters onto it
         """
         # Generate the inter-cluster distsnce matrix, if needed
         dist_mat, closest_index = None, None
-        if self.compute_dist:
+        if self.compute_dist and self.dist_algorithm != 'grid':
             dist_mat, closest_index = inter_cluster_distance(
-                    data.tensor[:, COORD_COLS], clusts.index_list,
+                    data.tensor[:, COORD_COLS], clusts.typed_index_list,
                     clusts.counts, method=self.dist_method,
                     algorithm=self.dist_algorithm, return_index=True)
 
+        elif self.compute_dist:
+            neighborhood = data.get_neighborhood(self.max_dist)
+            dist_mat, closest_index = inter_cluster_distance_neighbors(
+                    data.tensor[:, COORD_COLS], clusts.typed_index_list,
+                    neighborhood, self.max_dist)
+
         # Generate the edge index
         edge_index, edge_counts = self.generate(
                 data=data, clusts=clusts, dist_mat=dist_mat)
@@ -164,8 +193,9 @@ class GraphBase:
             (2, E) Tensor of edges
         edge_counts : np.ndarray
             (B) : Number of edges in each entry of the batch
-        dist_mat : np.ndarray
-            (C, C) Tensor of pair-wise cluster distances
+        dist_mat : Union[np.ndarray, numba.typed.Dict]
+            (C, C) Tensor of pair-wise cluster distances, or dictionary which
+            maps pairs of clusters onto their distance
         classes : TensorBatch, optional
             (C) List of class for each cluster in the graph
 
@@ -174,15 +204,19 @@ class GraphBase:
         np.ndarray
             (2,E) Restricted tensor of edges
         """
+        # Fetch the length of each edge (missing sparse pairs are infinite)
+        if isinstance(dist_mat, np.ndarray):
+            dists = dist_mat[(edge_index[0], edge_index[1])]
+        else:
+            dists = get_sparse_edge_distances(edge_index, dist_mat)
+
         # Restrict the input set of edges based on a edge length cut
         if classes is None or np.isscalar(self.max_length):
             # If classes are not provided, apply a static cut to all edges
-            dists = dist_mat[(edge_index[0], edge_index[1])]
             mask = np.where(dists < self.max_length)[0]
 
         else:
             # If classes are provided, apply the cut based on the class
-            dists = dist_mat[(edge_index[0], edge_index[1])]
             edge_classes = classes.tensor[edge_index]
             max_lengths = self.max_length[(edge_classes[0], edge_classes[1])]
             mask = np.where(dists < max_lengths)[0]
@@ -57,19 +57,29 @@ class BipartiteGraph(GraphBase):
         -------
         np.ndarray
             (2, E) Tensor of edges
+        np.ndarray
+            (B) Number of edges in each entry of the batch
         """
         # Get the primary status of each node
         primaries = get_cluster_label(
-                data.tensor, clusts.index_list, column=PRINT_COL)
+                data.tensor, clusts.typed_index_list, column=PRINT_COL) == 1
 
-        return self._generate(
+        edge_index = self._generate(
                 clusts.batch_ids, primaries, self.directed, self.directed_to)
 
+        # Count the number of edges in each entry of the batch
+        edge_counts = np.bincount(
+                clusts.batch_ids[edge_index[0]],
+                minlength=len(clusts.counts)).astype(np.int64)
+
+        return edge_index, edge_counts
+
+    @staticmethod
     @nb.njit(cache=True)
-    def bipartite_graph(batch_ids: nb.int64[:],
-                        primaries: nb.boolean[:],
-                        directed: nb.boolean = True,
-                        directed_to: str = 'secondary') -> nb.int64[:,:]:
+    def _generate(batch_ids: nb.int64[:],
+                  primaries: nb.boolean[:],
+                  directed: nb.boolean = True,
+                  directed_to: str = 'secondary') -> nb.int64[:,:]:
         # Create the incidence matrix
         ret = np.empty((0,2), dtype=np.int64)
         for i in np.where(primaries)[0]:
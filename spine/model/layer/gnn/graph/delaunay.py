@@ -4,6 +4,7 @@ import numpy as np
 import numba as nb
 
 from scipy.spatial import Delaunay
+from scipy.spatial import QhullError
 
 from spine.utils.globals import COORD_COLS
 
@@ -16,7 +17,10 @@ class DelaunayGraph(GraphBase):
     """Generates graphs based on the Delaunay triangulation of the input
     node locations.
 
-    Triangulates the input, converts the triangles into a list of valid edges.
+    Each node is represented by a small set of points (by default, the
+    extreme voxels of the cluster along a fixed set of directions, which lie
+    on its convex hull). The points of each entry are triangulated and two
+    nodes are connected if any of their points share a Delaunay edge.
 
     See :class:`GraphBase` for attributes/methods shared
     across all graph constructors.
@@ -25,6 +29,40 @@ class DelaunayGraph(GraphBase):
     # Name of the graph constructor (as specified in the configuration)
     name = 'delaunay'
 
+    # Directions along which to look for the extreme points of each cluster
+    # (3 axes, 6 face diagonals and 4 body diagonals)
+    _directions = np.array([
+            [1, 0, 0], [0, 1, 0], [0, 0, 1],
+            [1, 1, 0], [1, -1, 0], [1, 0, 1], [1, 0, -1], [0, 1, 1],
+            [0, 1, -1], [1, 1, 1], [1, 1, -1], [1, -1, 1], [1, -1, -1]],
+            dtype=np.float64)
+
+    def __init__(self, point_method='hull', **kwargs):
+        """Initialize the graph constructor.
+
+        This adds the possibility to choose the set of points used to
+        represent each node in the triangulation.
+
+        Parameters
+        ----------
+        point_method : str, default 'hull'
+            Points used to represent each node in the triangulation:
+            - 'hull': Extreme voxels along 13 directions (up to 26 points)
+            - 'centroid': Centroid of the cluster (1 point)
+            - 'voxel': All voxels in the cluster (slow, for large clusters)
+        **kwargs : dict, optional
+            Additional parameters to pass to the :class:`GraphBase`
+            constructor.
+        """
+        # Initialize base class
+        super().__init__(**kwargs)
+
+        # Store attribute
+        assert point_method in ('hull', 'centroid', 'voxel'), (
+                f"Point method not recognized: {point_method}. Should be "
+                 "one of 'hull', 'centroid' or 'voxel'.")
+        self.point_method = point_method
+
     def generate(self, data, clusts, **kwargs):
         """Generates an incidence matrix that connects nodes
         that share an edge in their corresponding Euclidean Delaunay graph.
@@ -42,63 +80,175 @@ class DelaunayGraph(GraphBase):
         -------
         np.ndarray
             (2, E) Tensor of edges
+        np.ndarray
+            (B) Number of edges in each entry of the batch
         """
-        return self._generate(
-                data.tensor, nb.typed.List(clusts.index_list),
-                clusts.batch_ids, self.directed)
+        # If there are no clusters, nothing to do
+        num_clusts = len(clusts.index_list)
+        edge_counts = np.zeros(len(clusts.counts), dtype=np.int64)
+        if not num_clusts:
+            return np.empty((2, 0), dtype=np.int64), edge_counts
+
+        # Fetch the points which represent each cluster, ordered by cluster
+        voxels = np.asarray(data.tensor[:, COORD_COLS], dtype=np.float64)
+        points, labels = self.get_points(
+                voxels, clusts.typed_index_list)
+
+        # Loop over the entries in the batch, triangulate each one of them
+        point_edges = np.searchsorted(labels, clusts.edges)
+        edge_list = []
+        for b in range(len(clusts.counts)):
+            # If there is less than two nodes, nothing to do
+            if clusts.counts[b] < 2:
+                continue
+
+            # Build the edges between the clusters of this entry
+            lower, upper = point_edges[b], point_edges[b+1]
+            edges = self._generate(
+                    points[lower:upper], labels[lower:upper],
+                    clusts.edges[b], clusts.counts[b], num_clusts)
+
+            edge_list.append(edges)
+            edge_counts[b] = edges.shape[1]
+
+        # Merge the blocks together
+        if not len(edge_list):
+            return np.empty((2, 0), dtype=np.int64), edge_counts
+
+        return np.hstack(edge_list), edge_counts
+
+    def get_points(self, voxels, clusts):
+        """Fetches the set of points used to represent each cluster.
+
+        Parameters
+        ----------
+        voxels : np.ndarray
+            (N, 3) Voxel coordinates
+        clusts : numba.typed.List
+            (C) List of cluster indexes
+
+        Returns
+        -------
+        np.ndarray
+            (P, 3) Point coordinates
+        np.ndarray
+            (P) Index of the cluster each point belongs to
+        """
+        if self.point_method == 'hull':
+            return self._get_hull_points(voxels, clusts, self._directions)
+
+        elif self.point_method == 'centroid':
+            return self._get_centroids(voxels, clusts)
+
+        else:
+            index = np.concatenate(list(clusts))
+            labels = np.repeat(
+                    np.arange(len(clusts)), [len(c) for c in clusts])
+            return voxels[index], labels
 
     @staticmethod
-    @nb.njit(cache=True)
-    def _generate(data: nb.float64[:,:],
-                  clusts: nb.types.List(nb.int64[:]),
-                  batch_ids: nb.int64[:],
-                  directed: bool = False) -> nb.int64[:,:]:
-        # For each batch, find the list of edges, append it
-        edge_list, offset = [], 0
-        edge_counts = np.zeros(len(counts), dtype=counts.dtype)
-        for b in np.unique(batch_ids):
-            # Combine the cluster masks into one
-            clust_ids = np.where(batch_ids == b)[0]
-            limits = np.array([0] + [len(clusts[i]) for i in clust_ids])
-            limits = np.cumsum(limits)
-            mask = np.zeros(limits[-1], dtype=np.int64)
-            labels = np.zeros(limits[-1], dtype=np.int64)
-            for i in range(len(clust_ids)):
-                l, u = limits[i], limits[i+1]
-                mask[l:u] = clusts[clust_ids[i]]
-                labels[l:u] = i
-
-            # Run Delaunay triangulation in object mode because it relies on an
-            # external package. Only way to speed this up would be to implement
-            # Delaunay triangulation in Numba (tall order)
-            with nb.objmode(tri = 'int32[:,:]'): 
-                # Run Delaunay triangulation in joggled mode, this
-                # guarantees simplical faces (no ambiguities)
-                tri = Delaunay(data[mask][:, COORD_COLS], 
-                               qhull_options='QJ').simplices
-
-            # Create an adjanceny matrix from the simplex list
-            adj_mat = np.zeros((len(clust_ids),len(clust_ids)), dtype=np.bool_)
-            for s in tri:
-                for i in s:
-                    for j in s:
-                        if labels[j] > labels[i]:
-                            adj_mat[labels[i],labels[j]] = True
-
-            # Convert the adjancency matrix to a list of edges, store
-            edges = np.where(adj_mat)
-            edges = np.vstack((clust_ids[edges[0]], clust_ids[edges[1]]))
-
-            edge_list.append(offset + edge_index.T)
-            edge_counts[b] = edge_index.shape[-1]
-            offset += c
+    def _generate(points, labels, offset, count, num_clusts):
+        """Builds the edges between the clusters of one entry.
 
-        # Merge the blocks together
+        Parameters
+        ----------
+        points : np.ndarray
+            (P, 3) Point coordinates
+        labels : np.ndarray
+            (P) Index of the cluster each point belongs to
+        offset : int
+            Index of the first cluster of the entry
+        count : int
+            Number of clusters in the entry
+        num_clusts : int
+            Total number of clusters in the batch
+
+        Returns
+        -------
+        np.ndarray
+            (2, E) Sorted list of edges, from lower to higher cluster index
+        """
+        # Run the Delaunay triangulation. If the points are degenerate (e.g.
+        # all coplanar), retry in joggled mode, which guarantees simplicial
+        # faces. If there are too few points to triangulate, the entry is
+        # small: connect every pair of clusters.
+        simplices = None
+        if len(points) >= points.shape[1] + 2:
+            for options in (None, 'QJ'):
+                try:
+                    tri = Delaunay(points, qhull_options=options)
+                    simplices = tri.simplices
+                    break
+                except QhullError:
+                    continue
+
+        if simplices is None:
+            edges = np.vstack(np.triu_indices(count, k=1))
+            return offset + edges
+
+        # Convert the simplex sides to pairs of clusters. Encode each
+        # pair as a single integer to remove duplicates without building
+        # a dense adjacency matrix.
+        simplex_labels = labels[simplices]
+        left, right = np.triu_indices(simplices.shape[1], k=1)
+        source = simplex_labels[:, left].flatten()
+        target = simplex_labels[:, right].flatten()
+        mask = np.where(source != target)[0]
+        lower = np.minimum(source[mask], target[mask])
+        upper = np.maximum(source[mask], target[mask])
+        pairs = np.unique(lower*num_clusts + upper)
+
+        return np.vstack((pairs//num_clusts, pairs%num_clusts))
+
+    @staticmethod
+    @nb.njit(cache=True)
+    def _get_hull_points(voxels: nb.float64[:,:],
+                         clusts: nb.types.List(nb.int64[:]),
+                         directions: nb.float64[:,:]) -> (
+                                 nb.float64[:,:], nb.int64[:]):
+        # Loop over the clusters, find the extreme voxels along each direction
+        num_dirs = len(directions)
+        num_points = 0
+        for c in clusts:
+            num_points += min(len(c), 2*num_dirs)
+
+        points = np.empty((num_points, voxels.shape[1]), dtype=voxels.dtype)
+        labels = np.empty(num_points, dtype=np.int64)
+        index = np.empty(2*num_dirs, dtype=np.int64)
         offset = 0
-        result = np.empty((2, num_edges), dtype=np.int64)
-        for edges in edge_list:
-            num_block = edges.shape[-1]
-            result[:, offset:offset+num_block] = edges
-            offset += num_block
+        for k, c in enumerate(clusts):
+            # Find the extreme voxel index in each direction
+            for d in range(num_dirs):
+                dmin, dmax = np.inf, -np.inf
+                for i in c:
+                    proj = 0.
+                    for j in range(voxels.shape[1]):
+                        proj += voxels[i, j]*directions[d, j]
+                    if proj < dmin:
+                        dmin = proj
+                        index[2*d] = i
+                    if proj > dmax:
+                        dmax = proj
+                        index[2*d+1] = i
+
+            # Store the unique extreme voxels
+            uniques = np.unique(index)
+            num_uniques = len(uniques)
+            points[offset:offset + num_uniques] = voxels[uniques]
+            labels[offset:offset + num_uniques] = k
+            offset += num_uniques
+
+        return points[:offset], labels[:offset]
 
-        return result
+    @staticmethod
+    @nb.njit(cache=True)
+    def _get_centroids(voxels: nb.float64[:,:],
+                       clusts: nb.types.List(nb.int64[:])) -> (
+                               nb.float64[:,:], nb.int64[:]):
+        # Loop over the clusters, compute the centroid of each of them
+        points = np.empty((len(clusts), voxels.shape[1]), dtype=voxels.dtype)
+        for k, c in enumerate(clusts):
+            for j in range(voxels.shape[1]):
+                points[k, j] = np.mean(voxels[c, j])
+
+        return points, np.arange(len(clusts))
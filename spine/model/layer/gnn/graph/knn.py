@@ -59,10 +59,19 @@ class KNNGraph(GraphBase):
         -------
         np.ndarray
             (2, E) Tensor of edges
+        np.ndarray
+            (B) Number of edges in each entry of the batch
         """
-        return self._generate(
+        edge_index = self._generate(
                 clusts.batch_ids, self.k, dist_mat, self.directed)
 
+        # Count the number of edges in each entry of the batch
+        edge_counts = np.bincount(
+                clusts.batch_ids[edge_index[0]],
+                minlength=len(clusts.counts)).astype(np.int64)
+
+        return edge_index, edge_counts
+
     @staticmethod
     @nb.njit(cache=True)
     def _generate(batch_ids: nb.int64[:],
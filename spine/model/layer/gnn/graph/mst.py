@@ -43,18 +43,28 @@ class MSTGraph(GraphBase):
         -------
         np.ndarray
             (2, E) Tensor of edges
+        np.ndarray
+            (B) Number of edges in each entry of the batch
         """
-        return self._generate(clusts.batch_ids, dist_mat, self.directed)
+        edge_index = self._generate(clusts.batch_ids, dist_mat, self.directed)
+
+        # Count the number of edges in each entry of the batch
+        edge_counts = np.bincount(
+                clusts.batch_ids[edge_index[0]],
+                minlength=len(clusts.counts)).astype(np.int64)
+
+        return edge_index, edge_counts
 
     @staticmethod
     @nb.njit(cache=True)
     def _generate(batch_ids: nb.int64[:],
                   dist_mat: nb.float64[:,:],
                   directed: bool = False) -> nb.int64[:,:]:
-        # For each batch, find the list of edges, append it
-        edge_list = []
+        # Preallocate the edge index (there are at most C - 1 edges)
+        edge_index = np.empty((2, len(batch_ids)), dtype=np.int64)
         num_edges = 0
-        ret = np.empty((0, 2), dtype=np.int64)
+
+        # For each batch, find the list of edges, append it
         for b in np.unique(batch_ids):
             clust_ids = np.where(batch_ids == b)[0]
             if len(clust_ids) > 1:
@@ -64,7 +74,10 @@ class MSTGraph(GraphBase):
                     mst_mat = minimum_spanning_tree(submat)
                     mst_mat = mst_mat.toarray().astype(np.float32)
                 edges = np.where(mst_mat > 0.)
-                edges = np.vstack((clust_ids[edges[0]],clust_ids[edges[1]])).T
-                ret   = np.vstack((ret, edges))
+                num_edges_b = len(edges[0])
+                lower, upper = num_edges, num_edges + num_edges_b
+                edge_index[0, lower:upper] = clust_ids[edges[0]]
+                edge_index[1, lower:upper] = clust_ids[edges[1]]
+                num_edges += num_edges_b
 
-        return ret.T
+        return edge_index[:, :num_edges]
@@ -2,6 +2,8 @@
 
 from abc import ABC, abstractmethod
 
+from spine.utils.tracking import TrackSegmentCache
+
 
 class PostBase(ABC):
     """Base class of all post-processors.
@@ -33,6 +35,10 @@ class PostBase(ABC):
     # Set of data keys needed for this post-processor to operate
     _keys = ()
 
+    # Cache of track segmentations, shared by the post-processors of a
+    # :class:`PostManager` and cleared after each batch of entries
+    segment_cache = None
+
     # List of recognized object types
     _obj_types = ('fragment', 'particle', 'interaction')
 
@@ -331,6 +337,33 @@ class PostBase(ABC):
         else:
             return getattr(obj, self.truth_dep_mode)
 
+    def segment_tracks(self, points, start_points=None, **kwargs):
+        """Segments a list of tracks.
+
+        If the post-processor is run by a :class:`PostManager`, the
+        segmentations are shared with the other post-processors which
+        segment the same tracks in the same way.
+
+        Parameters
+        ----------
+        points : List[np.ndarray]
+            (T) Coordinates of the points that make up each track
+        start_points : List[np.ndarray], optional
+            (T) Preferred end point of each track from which to start
+        **kwargs : dict, optional
+            Segmentation parameters (see :class:`TrackSegmentCache`)
+
+        Returns
+        -------
+        List[TrackSegments]
+            (T) Segmentation of each track
+        """
+        cache = self.segment_cache
+        if cache is None:
+            cache = TrackSegmentCache()
+
+        return cache(points, start_points, **kwargs)
+
     def check_units(self, obj):
         """Check that the point coordinates of an object are as expected.
 
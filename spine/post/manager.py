@@ -7,6 +7,7 @@ from collections import defaultdict, OrderedDict
 import numpy as np
 
 from spine.utils.stopwatch import StopwatchManager
+from spine.utils.tracking import TrackSegmentCache
 
 from .factories import post_processor_factory
 
@@ -35,6 +36,9 @@ class PostManager:
             if 'priority' in cfg[k]:
                 priorities[i] = cfg[k].pop('priority')
 
+        # Initialize the track segmentation cache shared by the modules
+        self.segment_cache = TrackSegmentCache()
+
         # Add the modules to a processor list in decreasing order of priority
         self.watch = StopwatchManager()
         self.modules = OrderedDict()
@@ -46,6 +50,7 @@ class PostManager:
             # Append
             self.modules[k] = post_processor_factory(
                     k, cfg[k], parent_path=parent_path)
+            self.modules[k].segment_cache = self.segment_cache
 
     def __call__(self, data):
         """Pass one batch of data through the post-processors.
@@ -55,6 +60,10 @@ class PostManager:
         data : dict
             Dictionary of data products
         """
+        # Start from an empty track segmentation cache (it only holds the
+        # segmentations of the entries currently being processed)
+        self.segment_cache.clear()
+
         # Loop over the post-processor modules
         single_entry = np.isscalar(data['index'])
         for key, module in self.modules.items():
@@ -82,3 +91,6 @@ class PostManager:
                                 f"The number {key} ({len(val)}) does not match "
                                 f"the number of entries ({num_entries}).")
                     data[key] = val
+
+        # Release the track segmentations of the processed entries
+        self.segment_cache.clear()
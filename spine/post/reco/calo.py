@@ -79,14 +79,19 @@ class CalibrationProcessor(PostBase):
     # Set of data keys needed for this post-processor to operate
     _keys = (('run_info', False),)
 
-    def __init__(self, do_tracking=False, obj_type=('particle', 'interaction'),
-                 run_mode='reco', truth_point_mode='points', **cfg):
+    def __init__(self, do_tracking=False, event_level=True,
+                 obj_type=('particle', 'interaction'), run_mode='reco',
+                 truth_point_mode='points', **cfg):
         """Initialize the calibration manager.
 
         Parameters
         ----------
         do_tracking : bool, default False
             Segment track to get a proper local dQ/dx estimate
+        event_level : bool, default True
+            If `True`, calibrate all the depositions in an entry at once and
+            gather the object depositions from them. Only the track
+            recombination correction is applied object by object.
         **cfg : dict
             Calibration manager configuration
         """
@@ -99,6 +104,7 @@ class CalibrationProcessor(PostBase):
         # Initialize the calibrator
         self.calibrator = CalibrationManager(**cfg)
         self.do_tracking = do_tracking
+        self.event_level = event_level
 
         # Add necessary keys
         keys = {}
@@ -132,54 +138,159 @@ class CalibrationProcessor(PostBase):
             run_info = data['run_info']
             run_id = run_info.run
 
-        # Loop over particle objects
-        for k in self.particle_keys:
-            points_key = 'points' if not 'truth' in k else self.truth_point_key
-            source_key = 'sources' if not 'truth' in k else self.truth_source_key
-            dep_key = 'depositions' if not 'truth' in k else self.truth_dep_key
-            unass_mask = np.ones(len(data[dep_key]), dtype=bool)
-            for part in data[k]:
-                # Make sure the particle coordinates are expressed in cm
-                self.check_units(part)
+        # Loop over particle objects. If several particle types refer to
+        # the same depositions tensor (e.g. reco particles and true particles
+        # in `points_adapt` mode), calibrate that tensor only once.
+        if self.event_level:
+            groups = {}
+            for k in self.particle_keys:
+                dep_key = self.get_tensor_keys(k)[2]
+                groups.setdefault(dep_key, []).append(k)
+            for keys in groups.values():
+                self.process_event(data, keys, run_id)
+
+        else:
+            calibrated = set()
+            for k in self.particle_keys:
+                dep_key = self.get_tensor_keys(k)[2]
+                self.process_objects(
+                        data, k, run_id, dep_key not in calibrated)
+                calibrated.add(dep_key)
 
-                # Get point coordinates, sources and depositions
-                points = self.get_points(part)
-                if not len(points):
-                    continue
+        # If requested, updated the depositions attribute of interactions
+        for k in self.interaction_keys:
+            dep_key = self.get_tensor_keys(k)[2]
+            for inter in data[k]:
+                # Update depositions for the interaction
+                depositions = data[dep_key][self.get_index(inter)]
+                if not inter.is_truth:
+                    inter.depositions = depositions
+                else:
+                    setattr(inter, self.truth_dep_mode, depositions)
 
-                sources = self.get_sources(part)
-                deps = self.get_depositions(part)
+    def get_tensor_keys(self, key):
+        """Returns the keys of the tensors an object key refers to.
 
-                # Apply calibration
-                if not self.do_tracking or part.shape != TRACK_SHP:
-                    depositions = self.calibrator(
-                            points, deps, sources, run_id)
-                else:
-                    depositions = self.calibrator.process(
-                            points, deps, sources, run_id, track=True)
+        Parameters
+        ----------
+        key : str
+            Object key
+
+        Returns
+        -------
+        str
+            Point coordinates tensor key
+        str
+            Sources tensor key
+        str
+            Depositions tensor key
+        """
+        if not 'truth' in key:
+            return 'points', 'sources', 'depositions'
+
+        return self.truth_point_key, self.truth_source_key, self.truth_dep_key
+
+    def process_event(self, data, keys, run_id=None):
+        """Calibrate all the depositions of an entry at once, then gather the
+        depositions of each particle from them.
+
+        Parameters
+        ----------
+        data : dict
+            Dictionary of data products
+        keys : List[str]
+            Particle object keys which all refer to the same tensors
+        run_id : int, optional
+            ID of the run to get the calibration for
+
+        Notes
+        -----
+        The tensor is calibrated once, whichever number of particle types
+        refer to it. If tracks of different particle types overlap, the
+        local recombination correction of the last one listed prevails.
+        """
+        # Fetch the relevant tensor keys
+        points_key, source_key, dep_key = self.get_tensor_keys(keys[0])
 
-                # Update the particle *and* the reference tensor
+        # List the tracks which must be segmented to apply recombination
+        track_index = []
+        for key in keys:
+            for part in data[key]:
+                # Make sure the particle coordinates are expressed in cm
+                self.check_units(part)
+                if self.do_tracking and part.shape == TRACK_SHP:
+                    index = self.get_index(part)
+                    if len(index):
+                        track_index.append(index)
+
+        # Calibrate the whole depositions tensor at once
+        data[dep_key][:] = self.calibrator.process_event(
+                data[points_key], data[dep_key], data[source_key], run_id,
+                track_index)
+
+        # Update the particle depositions
+        for key in keys:
+            for part in data[key]:
+                depositions = data[dep_key][self.get_index(part)]
                 if not part.is_truth:
                     part.depositions = depositions
                 else:
                     setattr(part, self.truth_dep_mode, depositions)
 
-                data[dep_key][part.index] = depositions
-                unass_mask[part.index] = False
+    def process_objects(self, data, key, run_id=None, unassociated=True):
+        """Calibrate the depositions of each particle separately, then the
+        depositions which are not associated with any particle.
 
-            # Apply calibration corrections to unassociated depositions
-            unass_index = np.where(unass_mask)[0]
-            data[dep_key][unass_index] = self.calibrator(
-                    data[points_key][unass_index], data[dep_key][unass_index],
-                    data[source_key][unass_index], run_id)
-
-        # If requested, updated the depositions attribute of interactions
-        for k in self.interaction_keys:
-            dep_key = 'depositions' if not 'truth' in k else self.truth_dep_key
-            for inter in data[k]:
-                # Update depositions for the interaction
-                depositions = data[dep_key][inter.index]
-                if not part.is_truth:
-                    inter.depositions = depositions
-                else:
-                    setattr(inter, self.truth_dep_mode, depositions)
+        Parameters
+        ----------
+        data : dict
+            Dictionary of data products
+        key : str
+            Particle object key
+        run_id : int, optional
+            ID of the run to get the calibration for
+        unassociated : bool, default True
+            Whether to calibrate the depositions which are not associated
+            with any particle. Must be `False` if the tensor has already been
+            calibrated by another particle type.
+        """
+        # Fetch the relevant tensor keys
+        points_key, source_key, dep_key = self.get_tensor_keys(key)
+
+        # Loop over particles
+        unass_mask = np.ones(len(data[dep_key]), dtype=bool)
+        for part in data[key]:
+            # Make sure the particle coordinates are expressed in cm
+            self.check_units(part)
+
+            # Get point coordinates, sources and depositions
+            points = self.get_points(part)
+            if not len(points):
+                continue
+
+            sources = self.get_sources(part)
+            deps = self.get_depositions(part)
+
+            # Apply calibration
+            track = self.do_tracking and part.shape == TRACK_SHP
+            depositions = self.calibrator(
+                    points, deps, sources, run_id, track=track)
+
+            # Update the particle *and* the reference tensor
+            if not part.is_truth:
+                part.depositions = depositions
+            else:
+                setattr(part, self.truth_dep_mode, depositions)
+
+            index = self.get_index(part)
+            data[dep_key][index] = depositions
+            unass_mask[index] = False
+
+        # Apply calibration corrections to unassociated depositions
+        if not unassociated:
+            return
+
+        unass_index = np.where(unass_mask)[0]
+        data[dep_key][unass_index] = self.calibrator(
+                data[points_key][unass_index], data[dep_key][unass_index],
+                data[source_key][unass_index], run_id)
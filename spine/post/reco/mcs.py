@@ -4,8 +4,7 @@ import numpy as np
 
 from spine.utils.globals import (
         TRACK_SHP, MUON_PID, PION_PID, PROT_PID, KAON_PID, PID_MASSES)
-from spine.utils.tracking import get_track_segments
-from spine.utils.mcs import mcs_fit
+from spine.utils.mcs import mcs_fit_batch
 
 from spine.post.base import PostBase
 
@@ -81,7 +80,8 @@ class MCSEnergyProcessor(PostBase):
         data : dict
             Dictionary of data products
         """
-        # Loop over particle objects
+        # Loop over particle objects, collect the tracks to fit
+        objs, points = [], []
         for k in self.fragment_keys + self.particle_keys:
             for obj in data[k]:
                 # Only run this algorithm on particle species that are needed
@@ -95,35 +95,53 @@ class MCSEnergyProcessor(PostBase):
                 self.check_units(obj)
 
                 # Get point coordinates
-                points = self.get_points(obj)
-                if not len(points):
+                obj_points = self.get_points(obj)
+                if not len(obj_points):
                     continue
 
-                # Get the list of segment directions
-                _, dirs, _ = get_track_segments(
-                        points, self.segment_length, obj.start_point,
-                        method=self.tracking_mode, **self.tracking_kwargs)
-
-                # Find the angles between successive segments
-                costh = np.sum(dirs[:-1] * dirs[1:], axis=1)
-                costh = np.clip(costh, -1, 1)
-                theta = np.arccos(costh)
-                if len(theta) < 1:
-                    continue
-
-                # Store the length and the MCS kinetic energy
-                mass = PID_MASSES[obj.pid]
-                obj.mcs_ke = mcs_fit(
-                        theta, mass, self.segment_length, 1,
-                        self.split_angle, self.res_a, self.res_b)
-
-                # If requested, convert the KE to other PID hypotheses
-                if self.fill_per_pid:
-                    # Compute the momentum (what MCS is truly sensitive to)
-                    mom = np.sqrt(obj.mcs_ke**2 + 2*mass*obj.mcs_ke) 
-
-                    # For each PID, convert back to KE
-                    for pid in self.include_pids:
-                        mass = PID_MASSES[pid]
-                        ke = np.sqrt(mom**2 + mass**2) - mass
-                        obj.mcs_ke_per_pid[pid] = ke
+                objs.append(obj)
+                points.append(obj_points)
+
+        # Get the list of segment directions of each track (segmented at once)
+        segments = self.segment_tracks(
+                points, [obj.start_point for obj in objs],
+                segment_length=self.segment_length,
+                method=self.tracking_mode, **self.tracking_kwargs)
+
+        # Find the angles between successive segments
+        fit_objs, thetas = [], []
+        for obj, segs in zip(objs, segments):
+            dirs = segs.dirs
+            costh = np.sum(dirs[:-1] * dirs[1:], axis=1)
+            costh = np.clip(costh, -1, 1)
+            theta = np.arccos(costh)
+            if len(theta) < 1:
+                continue
+
+            fit_objs.append(obj)
+            thetas.append(theta)
+
+        # If there are no tracks to fit, nothing to do
+        if not len(fit_objs):
+            return
+
+        # Fit the MCS kinetic energy of all the tracks at once
+        masses = np.array([PID_MASSES[obj.pid] for obj in fit_objs])
+        mcs_kes = mcs_fit_batch(
+                thetas, masses, self.segment_length, 1,
+                self.split_angle, self.res_a, self.res_b)
+
+        # Store the MCS kinetic energies
+        for obj, mass, mcs_ke in zip(fit_objs, masses, mcs_kes):
+            obj.mcs_ke = mcs_ke
+
+            # If requested, convert the KE to other PID hypotheses
+            if self.fill_per_pid:
+                # Compute the momentum (what MCS is truly sensitive to)
+                mom = np.sqrt(obj.mcs_ke**2 + 2*mass*obj.mcs_ke)
+
+                # For each PID, convert back to KE
+                for pid in self.include_pids:
+                    mass = PID_MASSES[pid]
+                    ke = np.sqrt(mom**2 + mass**2) - mass
+                    obj.mcs_ke_per_pid[pid] = ke
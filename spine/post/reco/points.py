@@ -55,29 +55,80 @@ class TrackExtremaProcessor(PostBase):
         data : dict
             Dictionary of data products
         """
-        for part in data['reco_particles']:
-            # Only process track objects
-            if part.shape == TRACK_SHP:
-                # Check if the end points need to be flipped
-                if self.method in ['local', 'gradient']:
-                    flip = not check_track_orientation(
-                            part.points, part.depositions, part.start_point,
-                            part.end_point, self.method, **self.kwargs)
-
-                elif self.method == 'ppn':
-                    assert 'ppn_candidates' in data, (
-                            "Must run the `ppn` post-processor "
-                            "before using PPN predictions to assign extrema.")
-                    flip = not check_track_orientation_ppn(
-                            part.start_point, part.end_point,
-                            data['ppn_candidates'])
-
-                else:
-                    raise ValueError(
-                             "Point assignment method not recognized: "
-                            f"{self.method}")
-
-                # If needed, flip en end points
-                if flip:
-                    part.start_point, part.end_point = (
-                            part.end_point, part.start_point)
+        # If the gradient method is used, segment all tracks at once
+        tracks = [part for part in data['reco_particles']
+                  if part.shape == TRACK_SHP]
+        if self.method == 'gradient':
+            flips = self.check_gradients(tracks)
+
+        for i, part in enumerate(tracks):
+            # Check if the end points need to be flipped
+            if self.method == 'local':
+                flip = not check_track_orientation(
+                        part.points, part.depositions, part.start_point,
+                        part.end_point, self.method, **self.kwargs)
+
+            elif self.method == 'gradient':
+                flip = flips[i]
+
+            elif self.method == 'ppn':
+                assert 'ppn_candidates' in data, (
+                        "Must run the `ppn` post-processor "
+                        "before using PPN predictions to assign extrema.")
+                flip = not check_track_orientation_ppn(
+                        part.start_point, part.end_point,
+                        data['ppn_candidates'])
+
+            else:
+                raise ValueError(
+                         "Point assignment method not recognized: "
+                        f"{self.method}")
+
+            # If needed, flip en end points
+            if flip:
+                part.start_point, part.end_point = (
+                        part.end_point, part.start_point)
+
+    def check_gradients(self, tracks):
+        """Checks the orientation of a list of tracks based on the gradient
+        of their energy deposition rate, as in `check_track_orientation`.
+
+        The tracks are segmented from both ends at once and the segmentation
+        is shared with the other algorithms which need it.
+
+        Parameters
+        ----------
+        tracks : List[RecoParticle]
+            List of track particles
+
+        Returns
+        -------
+        List[bool]
+            For each track, whether its end points must be flipped or not
+        """
+        # Fetch the segmentation parameters
+        anchor_point = self.kwargs.get('anchor_points', True)
+        method = self.kwargs.get('segment_method', 'step_next')
+        segment_length = self.kwargs.get('segment_length', 5)
+        min_count = self.kwargs.get('segment_min_count', 10)
+
+        # Segment the tracks from either ends
+        points = [part.points for part in tracks]
+        segments = {}
+        for attr in ('start_point', 'end_point'):
+            segments[attr] = self.segment_tracks(
+                    points, [getattr(part, attr) for part in tracks],
+                    segment_length=segment_length, method=method,
+                    anchor_point=anchor_point, min_count=min_count)
+
+        # Compute the deposition gradient as an average of the two
+        flips = []
+        for i, part in enumerate(tracks):
+            grad_start = segments['start_point'][i].gradient(
+                    part.depositions, min_count)
+            grad_end = segments['end_point'][i].gradient(
+                    part.depositions, min_count)
+            gradient = (grad_start - grad_end) / 2.
+            flips.append(not gradient >= 0.)
+
+        return flips
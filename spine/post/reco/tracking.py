@@ -6,7 +6,7 @@ from scipy.spatial.distance import cdist
 
 from spine.utils.globals import (
         SHOWR_SHP, TRACK_SHP, MUON_PID, PION_PID, PROT_PID, KAON_PID)
-from spine.utils.energy_loss import csda_table_spline
+from spine.utils.energy_loss import CSDATable
 from spine.utils.gnn.cluster import cluster_dedx
 from spine.utils.tracking import get_track_length
 from spine.post.base import PostBase
@@ -42,16 +42,18 @@ class CSDAEnergyProcessor(PostBase):
         fill_per_pid : bool, default False
             If `True`, compute the CSDA KE estimate under all PID assumptions
         **kwargs : dict, optional
-            Additional arguments to pass to the tracking algorithm
+            Additional arguments to pass to the tracking algorithm. For the
+            segmentation-based methods ('step', 'step_next' and 'bin_pca'),
+            `segment_length` defaults to 5 cm (the segmentation has no
+            default of its own, so it had to be specified before)
         """
         # Initialize the parent class
         super().__init__(obj_type, run_mode, truth_point_mode)
 
-        # Fetch the functions that map the range to a KE
+        # Fetch the tables that map the range to a KE
         self.include_pids = include_pids
         self.fill_per_pid = fill_per_pid
-        self.splines = {
-                ptype: csda_table_spline(ptype) for ptype in include_pids}
+        self.table = CSDATable(include_pids)
 
         # Store the tracking parameters
         self.tracking_mode = tracking_mode
@@ -65,7 +67,8 @@ class CSDAEnergyProcessor(PostBase):
         data : dict
             Dictionary of data products
         """
-        # Loop over particle objects
+        # Loop over particle objects, collect the tracks
+        objs, points = [], []
         for k in self.fragment_keys + self.particle_keys:
             for obj in data[k]:
                 # Only run this algorithm on tracks that have a CSDA table
@@ -77,32 +80,53 @@ class CSDAEnergyProcessor(PostBase):
                 self.check_units(obj)
 
                 # Get point coordinates
-                points = self.get_points(obj)
-                if not len(points):
+                obj_points = self.get_points(obj)
+                if not len(obj_points):
                     continue
 
-                # Compute the length of the track
-                length = get_track_length(
-                        points, point=obj.start_point,
-                        method=self.tracking_mode, **self.tracking_kwargs)
-
-                # Store the length
-                if not obj.is_truth:
-                    obj.length = length
-                else:
-                    obj.reco_length = length
-
-                # Compute the CSDA kinetic energy
-                if length > 0.:
-                    obj.csda_ke = self.splines[obj.pid](length).item()
-                    if self.fill_per_pid:
-                        for pid in self.include_pids:
-                            obj.csda_ke_per_pid[pid] = self.splines[pid](length).item()
-                else:
-                    obj.csda_ke = 0.
-                    if self.fill_per_pid:
-                        for pid in self.include_pids:
-                            obj.csda_ke_per_pid[pid] = 0.
+                objs.append(obj)
+                points.append(obj_points)
+
+        # Compute the length of the tracks. If the tracks are segmented,
+        # segment them all at once (or reuse the existing segmentation)
+        if self.tracking_mode in ('step', 'step_next', 'bin_pca'):
+            kwargs = dict(self.tracking_kwargs)
+            kwargs.pop('spline_smooth', None)
+            segments = self.segment_tracks(
+                    points, [obj.start_point for obj in objs],
+                    method=self.tracking_mode, **kwargs)
+            lengths = [segs.length for segs in segments]
+
+        else:
+            lengths = [get_track_length(
+                obj_points, point=obj.start_point, method=self.tracking_mode,
+                **self.tracking_kwargs) for obj, obj_points in zip(objs, points)]
+
+        # Store the lengths
+        for obj, length in zip(objs, lengths):
+            if not obj.is_truth:
+                obj.length = length
+            else:
+                obj.reco_length = length
+
+        # If there are no tracks, nothing to do
+        if not len(objs):
+            return
+
+        # Compute the CSDA kinetic energies of all tracks at once
+        lengths = np.array(lengths)
+        valid = lengths > 0.
+        pids = np.array([obj.pid for obj in objs])
+        csda_kes = np.where(valid, self.table.ke(lengths, pids), 0.)
+        for obj, csda_ke in zip(objs, csda_kes):
+            obj.csda_ke = float(csda_ke)
+
+        # If requested, compute the kinetic energies under all PID hypotheses
+        if self.fill_per_pid:
+            for pid in self.include_pids:
+                csda_kes = np.where(valid, self.table.ke(lengths, pid), 0.)
+                for obj, csda_ke in zip(objs, csda_kes):
+                    obj.csda_ke_per_pid[pid] = float(csda_ke)
 
 
 class TrackValidityProcessor(PostBase):
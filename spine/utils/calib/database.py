@@ -1,10 +1,24 @@
-"""SQLite calibration database parsing."""
-
+"""SQLite calibration database parsing.
+
+The SQLite databases can also be compiled once into a directory of binary
+arrays which are memory-mapped when loaded, which avoids parsing the
+database at the start of each job:
+- `meta.json`: Database type, quantity name and number of TPCs;
+- `runs.npy`: (N_r) Sorted list of boundary runs;
+- `values.npy`: (N_r, N_tpc) values or (N_r, N_tpc, N_y, N_z) look-up
+  tables, padded to the largest table;
+- `bins.npy`, `ranges.npy`: (N_r, N_tpc, 2) number of bins and
+  (N_r, N_tpc, 2, 2) axis ranges of each look-up table ('map' type only).
+"""
+
+import os
+import json
 from pathlib import Path
 import sqlite3 as sql
 
 import numpy as np
-import pandas as pd
+
+__all__ = ['CalibrationDatabase', 'CalibrationLUT', 'compile_database']
 
 
 class CalibrationDatabase:
@@ -16,14 +30,21 @@ class CalibrationDatabase:
     This class assumes that the structure of the SQLite libraries used
     is that of ICARUS calibration databases, for now.
     """
+
+    # Name of the metadata file of a compiled database
+    meta_file = 'meta.json'
+
+    # List of arrays stored in a compiled database
+    array_keys = ('runs', 'values', 'bins', 'ranges')
+
     def __init__(self, db_path, num_tpcs, db_type='value', value_key='scale'):
         """Given a path to a calibration data base, load the information
-        into a dictionary.
+        into a set of arrays.
 
         Parameters
         ----------
         db_path : str
-            Path to a SQLite database
+            Path to a SQLite database or to a compiled database directory
         num_tpcs : int
             Expected number of TPCs
         db_type : str, default 'value'
@@ -31,11 +52,6 @@ class CalibrationDatabase:
         value_key : str, default 'scale'
             Name of the quantity to load for each bin when using 'map' db_type
 
-        Returns
-        -------
-        dict
-            Dictionary which maps a run onto a set of values (one per TPC)
-
         Notes
         -----
         This makes assumptions about how the database is structured for
@@ -47,9 +63,34 @@ class CalibrationDatabase:
                     f"Type of database not recognized: {db_type}. "
                      "Must be either 'value' or 'map'.")
 
+        self.num_tpcs = num_tpcs
+        self.db_type = db_type
+        self.bins, self.ranges = None, None
+
+        # Load the database
+        if os.path.isdir(db_path):
+            self.load_compiled(db_path)
+        else:
+            self.load_sql(db_path, value_key)
+
+        # Initialize the cache of query results, one per boundary run
+        self._cache = {}
+
+    def load_sql(self, db_path, value_key):
+        """Loads a SQLite database.
+
+        Parameters
+        ----------
+        db_path : str
+            Path to a SQLite database
+        value_key : str
+            Name of the quantity to load for each bin when using 'map' db_type
+        """
         # Load the database into a pandas dataframe
+        import pandas as pd
+
         stem = Path(db_path).stem
-        quantity = '_'.join(stem.split('_')[1:-1])
+        self.quantity = '_'.join(stem.split('_')[1:-1])
 
         db = sql.connect(db_path)
         df = pd.read_sql_query(f'SELECT * from {stem}_data', db)
@@ -60,18 +101,88 @@ class CalibrationDatabase:
         df = df[df.active == 1]
 
         # Loop over unique runs, store the values per TPCs for each run
-        self.num_tpcs = num_tpcs
-        self.dict = {}
-        for run in np.unique(df.begin_time):
-            df_run = df[df.begin_time == run]
-            run_id = run - int(1e9)
-            if db_type == 'value':
-                self.dict[run_id] = self.load_values(df_run, quantity)
+        runs, tables = [], []
+        for run, df_run in df.groupby('begin_time', sort=True):
+            runs.append(run - int(1e9))
+            if self.db_type == 'value':
+                tables.append(self.load_values(df_run, self.quantity))
             else:
-                self.dict[run_id] = self.load_tables(df_run, value_key)
+                tables.append(self.load_tables(df_run, value_key))
+
+        # Store the sorted list of boundary runs
+        self.runs = np.array(runs, dtype=np.int64)
 
-        # Create a list of boundary runs
-        self.runs = np.sort(list(self.dict.keys()))
+        # Stack the values (and look-up table metadata)
+        if self.db_type == 'value':
+            self.values = np.array(tables, dtype=np.float64)
+            self.values = self.values.reshape(-1, self.num_tpcs)
+
+        else:
+            self.bins = np.array(
+                    [[b for b, _, _ in t] for t in tables], dtype=np.int64)
+            self.bins = self.bins.reshape(-1, self.num_tpcs, 2)
+            self.ranges = np.array(
+                    [[r for _, r, _ in t] for t in tables], dtype=np.float64)
+            self.ranges = self.ranges.reshape(-1, self.num_tpcs, 2, 2)
+
+            max_bins = (0, 0)
+            if len(runs):
+                max_bins = np.max(self.bins, axis=(0, 1))
+
+            shape = (len(runs), self.num_tpcs, *max_bins)
+            self.values = np.ones(shape, dtype=np.float64)
+            for i, table in enumerate(tables):
+                for t, (bins, _, values) in enumerate(table):
+                    self.values[i, t, :bins[0], :bins[1]] = values
+
+    def load_compiled(self, db_path):
+        """Loads a compiled database, memory-maps its arrays.
+
+        Parameters
+        ----------
+        db_path : str
+            Path to a compiled database directory
+        """
+        # Load the metadata, check that it matches the expected database
+        with open(os.path.join(db_path, self.meta_file), 'r',
+                  encoding='utf-8') as meta_file:
+            meta = json.load(meta_file)
+
+        assert meta['db_type'] == self.db_type, (
+                f"The compiled database is of type {meta['db_type']}, "
+                f"expected {self.db_type}.")
+        assert meta['num_tpcs'] == self.num_tpcs, (
+                f"The compiled database has {meta['num_tpcs']} TPCs, "
+                f"expected {self.num_tpcs}.")
+        self.quantity = meta['quantity']
+
+        # Memory-map the arrays
+        for key in self.array_keys:
+            path = os.path.join(db_path, f'{key}.npy')
+            if os.path.isfile(path):
+                setattr(self, key, np.load(path, mmap_mode='r'))
+
+    def save(self, db_path):
+        """Saves the database in its compiled form.
+
+        Parameters
+        ----------
+        db_path : str
+            Path to the compiled database directory
+        """
+        # Store the metadata
+        os.makedirs(db_path, exist_ok=True)
+        meta = {'db_type': self.db_type, 'quantity': self.quantity,
+                'num_tpcs': self.num_tpcs}
+        with open(os.path.join(db_path, self.meta_file), 'w',
+                  encoding='utf-8') as meta_file:
+            json.dump(meta, meta_file)
+
+        # Store the arrays
+        for key in self.array_keys:
+            value = getattr(self, key)
+            if value is not None:
+                np.save(os.path.join(db_path, f'{key}.npy'), value)
 
     def load_values(self, df_run, quantity):
         """Loads one value per TPC.
@@ -94,10 +205,8 @@ class CalibrationDatabase:
 
         # Store the values into an array
         array = np.empty(self.num_tpcs)
-        for i in range(len(df_run)):
-            channel = int(df_run.iloc[i].channel)
-            value = df_run.iloc[i][quantity]
-            array[channel] = value
+        array[df_run.channel.to_numpy().astype(int)] = (
+                df_run[quantity].to_numpy())
 
         return array
 
@@ -113,8 +222,9 @@ class CalibrationDatabase:
 
         Returns
         -------
-        np.ndarray
-            (N_tpc) Array of calibration look-up tables
+        List[Tuple[np.ndarray, np.ndarray, np.ndarray]]
+            (N_tpc) List of look-up table number of bins, axis ranges and
+            values, one per TPC
         """
         tpc_luts = []
         tpc_keys = ['EE', 'EW', 'WE', 'WW']
@@ -126,9 +236,10 @@ class CalibrationDatabase:
             range_z = [np.min(df_tpc.zlow), np.max(df_tpc.zhigh)]
             values = df_tpc[quantity].to_numpy().reshape(bins_y, bins_z)
 
-            lut = CalibrationLUT(
-                    [1, 2], [bins_y, bins_z], [range_y, range_z], values)
-            tpc_luts.append(lut)
+            # Overwrite dummy values to 1.
+            values = np.where(values == CalibrationLUT.dummy, 1., values)
+
+            tpc_luts.append(([bins_y, bins_z], [range_y, range_z], values))
 
         return tpc_luts
 
@@ -142,8 +253,8 @@ class CalibrationDatabase:
 
         Returns
         -------
-        np.ndarray
-            List of values per channel
+        Union[np.ndarray, List[CalibrationLUT]]
+            List of values or look-up tables per channel
         """
         return self.query(run_id)
 
@@ -158,18 +269,69 @@ class CalibrationDatabase:
 
         Returns
         -------
-        np.ndarray
-            List of values per channel
+        Union[np.ndarray, List[CalibrationLUT]]
+            List of values or look-up tables per channel
         """
         # Identify the closest run that is before the queried run
-        if run_id < self.runs[0]:
+        if not len(self.runs):
+            raise IndexError(
+                    f"No calibration information for run {run_id}: the "
+                     "database does not contain any active run.")
+
+        idx = np.searchsorted(self.runs, run_id, side='right') - 1
+        if idx < 0:
             raise IndexError(
                      "No calibration information for run "
                     f"{run_id} < {self.runs[0]}")
 
-        closest_run = self.runs[np.where(self.runs <= run_id)[0][-1]]
+        # If the result for this run range has already been built, use it
+        if idx in self._cache:
+            return self._cache[idx]
+
+        # Build the result
+        if self.db_type == 'value':
+            result = np.array(self.values[idx])
+
+        else:
+            result = []
+            for t in range(self.num_tpcs):
+                bins, ranges = self.bins[idx, t], self.ranges[idx, t]
+                values = self.values[idx, t, :bins[0], :bins[1]]
+                result.append(CalibrationLUT(
+                        [1, 2], bins, ranges, values, dummy=None))
+
+        self._cache[idx] = result
+
+        return result
+
+
+def compile_database(db_path, out_path, num_tpcs, db_type='value',
+                     value_key='scale'):
+    """Compiles a SQLite calibration database into a directory of binary
+    arrays which can be memory-mapped.
+
+    Parameters
+    ----------
+    db_path : str
+        Path to a SQLite database
+    out_path : str
+        Path to the compiled database directory
+    num_tpcs : int
+        Expected number of TPCs
+    db_type : str, default 'value'
+        Type of database (One 'value' or one 'map per TPC)
+    value_key : str, default 'scale'
+        Name of the quantity to load for each bin when using 'map' db_type
+
+    Returns
+    -------
+    CalibrationDatabase
+        Loaded calibration database
+    """
+    database = CalibrationDatabase(db_path, num_tpcs, db_type, value_key)
+    database.save(out_path)
 
-        return self.dict[closest_run]
+    return database
 
 
 class CalibrationLUT:
@@ -177,7 +339,10 @@ class CalibrationLUT:
     returns a calibration value.
     """
 
-    def __init__(self, dims, bins, range, values, dummy=-999.0): # pylint: disable=W0622
+    # Value used to flag bins with no calibration information
+    dummy = -999.0
+
+    def __init__(self, dims, bins, range, values, dummy=dummy): # pylint: disable=W0622
         """Initialize the calibration map.
 
         Parameters
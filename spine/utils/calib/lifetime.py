@@ -29,10 +29,12 @@ class LifetimeCalibrator:
             should map a tpc ID onto a specific value.
         lifetime_db : str, optional
             Path to a SQLite db file which maps [run, cryo, tpc] sets onto
-            a specific lifetime value in microseconds.
+            a specific lifetime value in microseconds. Can also be the path
+            to a compiled database (see :func:`compile_database`).
         driftv_db : str, optional
             Path to a SQLite db file which maps [run, cryo, tpc] sets onto
-            a specific electron drift velocity value in cm/us.
+            a specific electron drift velocity value in cm/us. Can also be
+            the path to a compiled database (see :func:`compile_database`).
         """
         # Load the database, which maps run numbers onto a lifetime/drift v
         assert ((lifetime is not None and driftv is not None) ^
@@ -73,29 +73,57 @@ class CalibrationManager:
         np.ndarray
             (N) array of calibrated depositions in ADC, e- or MeV
         """
-        # Create a mask for each of the TPC volume in the detector
-        if sources is not None:
-            tpc_indexes = []
-            for module_id in range(self.geo.tpc.num_modules):
-                for tpc_id in range(self.geo.tpc.num_chambers_per_module):
-                    # Get the set of points associated with this TPC
-                    tpc_index = self.geo.get_volume_index(
-                            sources, module_id, tpc_id)
-                    tpc_indexes.append(tpc_index)
-
-        else:
-            assert points is not None, (
-                    "If sources are not given, must provide points instead.")
-            tpc_indexes = self.geo.get_closest_tpc_indexes(points)
+        # The whole set of points is processed as one object
+        track_index = [np.arange(len(values))] if track else None
+
+        return self.process_event(points, values, sources, run_id, track_index)
+
+    def process_event(self, points, values, sources=None, run_id=None,
+                      track_index=None):
+        """Calibrates all the depositions in an event at once.
+
+        The points are sorted by TPC once and the corrections are applied
+        to each contiguous TPC block. Only the track recombination correction,
+        which relies on the segmentation of each track, is applied object by
+        object.
+
+        Parameters
+        ----------
+        points : np.ndarray, optional
+            (N, 3) array of space point coordinates
+        values : np.ndarray
+            (N) array of depositions in ADC
+        sources : np.ndarray, optional
+            (N) array of [cryo, tpc] specifying which TPC produced each hit. If
+            not specified, uses the closest TPC as calibration reference.
+        run_id : int, optional
+            ID of the run to get the calibration for. This is needed when using
+            a database of corrections organized by run.
+        track_index : List[np.ndarray], optional
+            List of point indexes of the tracks to segment to evaluate local
+            dE/dx and track angles for the recombination correction
 
-        # Loop over the TPCs, apply the relevant calibration corrections
+        Returns
+        -------
+        np.ndarray
+            (N) array of calibrated depositions in ADC, e- or MeV
+        """
+        # Sort the points by TPC
+        tpc_ids = self.get_tpc_ids(points, sources)
+        num_tpcs = self.geo.tpc.num_chambers
+        perm = np.argsort(tpc_ids, kind='stable')
+        edges = np.zeros(num_tpcs + 2, dtype=np.int64)
+        edges[1:] = np.cumsum(np.bincount(tpc_ids, minlength=num_tpcs + 1))
+
+        # Loop over the TPC blocks, apply the point-wise corrections
         new_values = np.copy(values)
-        for t in range(self.geo.tpc.num_chambers):
+        for t in range(num_tpcs):
             # Restrict to the TPC of interest
-            if len(tpc_indexes[t]) == 0:
+            if edges[t] == edges[t+1]:
                 continue
-            tpc_points = points[tpc_indexes[t]]
-            tpc_values = values[tpc_indexes[t]]
+            tpc_index = perm[edges[t]:edges[t+1]]
+            tpc_points = points[tpc_index]
+            tpc_values = values[tpc_index]
 
             # Apply the transparency correction
             if 'transparency' in self.modules:
@@ -119,14 +147,66 @@ class CalibrationManager:
                 tpc_values = self.modules['gain'].process(tpc_values, t) # e-
                 self.watch.stop('gain')
 
-            # Apply the recombination correction
-            if 'recombination' in self.modules:
-                self.watch.start('recombination')
-                tpc_values = self.modules['recombination'].process(
-                        tpc_values, tpc_points, track) # MeV
-                self.watch.stop('recombination')
-
             # Append
-            new_values[tpc_indexes[t]] = tpc_values
+            new_values[tpc_index] = tpc_values
+
+        # Apply the recombination correction
+        if 'recombination' in self.modules:
+            self.watch.start('recombination')
+            recombination = self.modules['recombination']
+
+            # Apply the flat (MIP) correction to all the points in a TPC
+            charges = np.copy(new_values) # e-
+            index = perm[:edges[num_tpcs]]
+            new_values[index] = recombination.process(charges[index]) # MeV
+
+            # Segment each track, one TPC at a time, to apply local corrections
+            if track_index is not None:
+                for track in track_index:
+                    track_tpc_ids = tpc_ids[track]
+                    for t in np.unique(track_tpc_ids):
+                        if t == num_tpcs:
+                            continue
+                        tpc_index = track[track_tpc_ids == t]
+                        new_values[tpc_index] = recombination.process(
+                                charges[tpc_index], points[tpc_index],
+                                track=True) # MeV
+
+            self.watch.stop('recombination')
 
         return new_values
+
+    def get_tpc_ids(self, points, sources=None):
+        """Assigns each point to a TPC.
+
+        Parameters
+        ----------
+        points : np.ndarray, optional
+            (N, 3) array of space point coordinates
+        sources : np.ndarray, optional
+            (N) array of [cryo, tpc] specifying which TPC produced each hit. If
+            not specified, uses the closest TPC.
+
+        Returns
+        -------
+        np.ndarray
+            (N) Index of the TPC each point belongs to. Points which do not
+            belong to any TPC are assigned to an extra TPC index (`num_tpcs`)
+        """
+        # If there are no sources, use the closest TPC
+        if sources is None:
+            assert points is not None, (
+                    "If sources are not given, must provide points instead.")
+            return self.geo.get_closest_tpc(points)
+
+        # Convert the [module ID, tpc ID] pairs to a flat TPC index
+        sources = self.geo.get_sources(sources)
+        num_modules = self.geo.tpc.num_modules
+        num_chambers = self.geo.tpc.num_chambers_per_module
+        module_ids, chamber_ids = sources[:, 0], sources[:, 1]
+        tpc_ids = module_ids*num_chambers + chamber_ids
+        valid = ((module_ids >= 0) & (module_ids < num_modules) &
+                 (chamber_ids >= 0) & (chamber_ids < num_chambers))
+        tpc_ids[~valid] = num_modules*num_chambers
+
+        return tpc_ids.astype(np.int64)
@@ -19,9 +19,10 @@ class TransparencyCalibrator:
 
         Parameters
         ----------
-        lifetime_db : str
+        transparency_db : str
             Path to a SQLite db file which maps [run, cryo, tpc] sets onto
-            a specific transparency calibration map.
+            a specific transparency calibration map. Can also be the path to
+            a compiled database (see :func:`compile_database`).
         num_tpcs : int
             Number of TPCs in the detector
         value_key: str, default 'scale'
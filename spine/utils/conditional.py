@@ -1,35 +1,90 @@
 """Module that handles conditional imports for optional packages.
 
 Currently wraps the following packages:
+- ROOT: only needed when reading larcv-format data
 - larcv: only needed when reading larcv-format data in parsers
 - MinkowskiEngine: only needed when running sparse CNNs
+
+These packages are slow to import. Each of them is wrapped in a proxy which
+only imports the package the first time one of its attributes is accessed.
 """
 
 import os
-from warnings import warn
-
-# If ROOT is available, load it
-try:
-    import ROOT
-except ModuleNotFoundError:
-    warn("ROOT could not be found, cannot parse LArCV data.")
-    ROOT = None
-
-# If LArCV is available, load it
-try:
-    from larcv import larcv
-except ModuleNotFoundError:
-    warn("larcv could not be found, cannot parse LArCV data.")
-    larcv = None
-
-
-# If MinkowskiEngine is available, load it with the right number of threads
-try:
-    if os.environ.get('OMP_NUM_THREADS') is None:
-        os.environ['OMP_NUM_THREADS'] = '16'
-    import MinkowskiEngine as ME
-    import MinkowskiFunctional as MF
-except ModuleNotFoundError:
-    warn("MinkowskiEngine could not be found, cannot run sparse CNNs.")
-    ME = None
-    MF = None
+import importlib
+
+__all__ = ['ROOT', 'larcv', 'ME', 'MF']
+
+
+class LazyModule:
+    """Proxy of an optional package, imported on first attribute access."""
+
+    def __init__(self, name, message, attr=None, env=None):
+        """Store the information needed to import the package.
+
+        Parameters
+        ----------
+        name : str
+            Name of the package to import
+        message : str
+            Error message to show if the package cannot be found
+        attr : str, optional
+            Name of the package attribute to proxy, if not the package itself
+        env : dict, optional
+            Environment variables to set (if not yet set) before the import
+        """
+        self._name = name
+        self._message = message
+        self._attr = attr
+        self._env = env or {}
+        self._module = None
+
+    def __getattr__(self, key):
+        """Imports the package, if needed, and fetches one of its attributes.
+
+        Parameters
+        ----------
+        key : str
+            Name of the attribute
+
+        Returns
+        -------
+        object
+            Package attribute
+        """
+        # Private attributes are never forwarded to the package
+        if key.startswith('_'):
+            raise AttributeError(key)
+
+        if self._module is None:
+            for var, value in self._env.items():
+                if os.environ.get(var) is None:
+                    os.environ[var] = value
+            try:
+                module = importlib.import_module(self._name)
+            except ModuleNotFoundError as err:
+                raise ModuleNotFoundError(self._message) from err
+
+            if self._attr is not None:
+                module = getattr(module, self._attr)
+            self._module = module
+
+        return getattr(self._module, key)
+
+
+# ROOT, to read LArCV files
+ROOT = LazyModule('ROOT', "ROOT could not be found, cannot parse LArCV data.")
+
+# LArCV, to parse the content of LArCV files
+larcv = LazyModule(
+        'larcv', "larcv could not be found, cannot parse LArCV data.",
+        attr='larcv')
+
+# MinkowskiEngine, loaded with the right number of threads
+ME = LazyModule(
+        'MinkowskiEngine',
+        "MinkowskiEngine could not be found, cannot run sparse CNNs.",
+        env={'OMP_NUM_THREADS': '16'})
+MF = LazyModule(
+        'MinkowskiFunctional',
+        "MinkowskiEngine could not be found, cannot run sparse CNNs.",
+        env={'OMP_NUM_THREADS': '16'})
@@ -3,7 +3,6 @@ a list of clusters in the form of a point index list."""
 
 import numpy as np
 from typing import List
-from sklearn.cluster import DBSCAN
 
 
 def dbscan_points(coordinates, eps=1.999, min_samples=1, metric='euclidean'):
@@ -27,7 +26,8 @@ def dbscan_points(coordinates, eps=1.999, min_samples=1, metric='euclidean'):
     List[np.ndarray]
         List of cluster indexes
     """
-    # Initialize DBSCAN
+    # Initialize DBSCAN (sklearn is slow to import, only load it if needed)
+    from sklearn.cluster import DBSCAN
     dbscan = DBSCAN(eps=eps, min_samples=min_samples, metric=metric)
 
     # Build clusters
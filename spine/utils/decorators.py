@@ -135,7 +135,8 @@ def numbafy(cast_args=[], list_args=[], keep_torch=False, ref_arg=None):
                 assert arg in kwargs, (
                         f"Argument `{arg}` appears in `list_args` but does "
                          "not appear in the function arguments.")
-                kwargs[arg] = nb.typed.List(kwargs[arg])
+                if not isinstance(kwargs[arg], nb.typed.List):
+                    kwargs[arg] = nb.typed.List(kwargs[arg])
 
             # Get the output
             ret = fn(**kwargs)
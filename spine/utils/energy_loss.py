@@ -5,9 +5,11 @@ range and vice-versa.
 
 import os
 import pathlib
+import tempfile
+from functools import lru_cache
+
 import numpy as np
 import numba as nb
-import pandas as pd
 
 from scipy.interpolate import CubicSpline
 from scipy.integrate import quad
@@ -20,6 +22,9 @@ from .globals import (
         MUON_MASS, LAR_DENSITY, LAR_Z, LAR_A, LAR_MEE,
         LAR_a, LAR_k, LAR_x0, LAR_x1, LAR_Cbar, LAR_delta0)
 
+# Lowest kinetic energy (MeV) in the tabulated Bethe-Bloch CSDA ranges
+CSDA_TABLE_MIN_KE = 1.
+
 
 def csda_table_spline(particle_type, value='T', table_dir='csda_tables'):
     """Interpolates a CSDA table to form a spline which maps a range to a
@@ -45,6 +50,32 @@ def csda_table_spline(particle_type, value='T', table_dir='csda_tables'):
             "Can only provide the kinetic energy or dE/dx for a given range.")
     factor = 1.0 if value == 'T' else LAR_DENSITY
 
+    # Fetch the table and fit a spline
+    import pandas as pd
+
+    path = csda_table_path(particle_type, table_dir)
+    tab = pd.read_csv(path, delimiter=' ', index_col=False)
+    f = CubicSpline(tab['CSDARange'] / LAR_DENSITY, tab[value]*factor)
+
+    return f
+
+
+def csda_table_path(particle_type, table_dir='csda_tables'):
+    """Fetches the path to the CSDA table of a particle species.
+
+    Parameters
+    ----------
+    particle_type : int
+        Particle type ID. Tables are avaible for muons, pions, kaons
+        and protons.
+    table_dir : str, default 'csda_tables'
+        Relative path to the CSDA range tables
+
+    Returns
+    -------
+    str
+        Path to the CSDA table
+    """
     # Check that the table for the requested PID exists
     path = pathlib.Path(__file__).parent
     suffix = 'E_liquid_argon'
@@ -56,24 +87,287 @@ def csda_table_spline(particle_type, value='T', table_dir='csda_tables'):
         raise ValueError(
                 f"CSDA table for particle type {particle_type} is not available.")
 
-    # Fetch the table and fit a spline
+    # Fetch the table path
     pid = name_mapping[particle_type]
     file_name = os.path.join(path, table_dir, f'{pid}{suffix}')
     if os.path.isfile(f'{file_name}.txt'):
-        path = f'{file_name}.txt'
-    else:
-        path = f'{file_name}_bethe.txt'
+        return f'{file_name}.txt'
 
-    tab = pd.read_csv(path, delimiter=' ', index_col=False)
-    f = CubicSpline(tab['CSDARange'] / LAR_DENSITY, tab[value]*factor)
+    return f'{file_name}_bethe.txt'
 
-    return f
+
+def csda_table_dense(particle_type, num_points=10000, table_dir='csda_tables',
+                     cache_dir=None):
+    """Builds dense tables of the kinetic energy and dE/dx as a function of
+    the CSDA range of a particle species.
+
+    The source CSDA table is interpolated with a spline, which is evaluated
+    at `num_points` log-spaced range values. The result is cached on disk as
+    a `.npy` file, which is rebuilt if the source table is modified. If the
+    cache directory cannot be accessed, the table is only kept in memory.
+
+    Parameters
+    ----------
+    particle_type : int
+        Particle type ID. Tables are avaible for muons, pions, kaons
+        and protons.
+    num_points : int, default 10000
+        Number of range values in the dense tables
+    table_dir : str, default 'csda_tables'
+        Relative path to the CSDA range tables
+    cache_dir : str, optional
+        Directory where the dense tables are cached. If not specified, use
+        the `spine/csda_tables` directory of the user cache directory
+        (`$XDG_CACHE_HOME`, `~/.cache` by default)
+
+    Returns
+    -------
+    np.ndarray
+        (3, num_points) Range (cm), kinetic energy (MeV) and dE/dx (MeV/cm).
+        The range and the kinetic energy are strictly increasing
+    """
+    # Check if the dense table has already been cached
+    source = csda_table_path(particle_type, table_dir)
+    if cache_dir is None:
+        user_dir = os.path.join(os.path.expanduser('~'), '.cache')
+        user_dir = os.environ.get('XDG_CACHE_HOME', user_dir)
+        cache_dir = os.path.join(user_dir, 'spine', 'csda_tables')
+    name = pathlib.Path(source).stem
+    path = os.path.join(cache_dir, f'{name}_{num_points}.npy')
+    if (os.path.isfile(path) and
+        os.path.getmtime(path) >= os.path.getmtime(source)):
+        try:
+            return np.load(path)
+        except OSError:
+            pass
+
+    # Evaluate the table splines on a log-spaced grid of range values
+    import pandas as pd
+
+    tab = pd.read_csv(source, delimiter=' ', index_col=False)
+    ranges = tab['CSDARange'].to_numpy() / LAR_DENSITY
+    ke_spline = CubicSpline(ranges, tab['T'])
+    dedx_spline = CubicSpline(ranges, tab['dE/dx']*LAR_DENSITY)
+
+    ranges = np.geomspace(ranges[0], ranges[-1], num_points)
+    kes = ke_spline(ranges)
+    dedxs = dedx_spline(ranges)
+
+    # The kinetic energy must increase with range for the table to be inverted
+    assert np.all(np.diff(kes) > 0.), (
+            "The CSDA kinetic energy must increase monotonically with range.")
+
+    # Store the table (write to a temporary file first, as several
+    # processes may build the same table concurrently). If the cache
+    # directory is not writable, simply return the table.
+    table = np.vstack((ranges, kes, dedxs))
+    tmp_path = None
+    try:
+        os.makedirs(cache_dir, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=cache_dir, suffix='.npy')
+        with os.fdopen(fd, 'wb') as out_file:
+            np.save(out_file, table)
+
+        os.replace(tmp_path, path)
+
+    except OSError:
+        if tmp_path is not None and os.path.isfile(tmp_path):
+            os.remove(tmp_path)
+
+    return table
+
+
+class CSDATable:
+    """Dense CSDA look-up tables for a set of particle species.
+
+    Maps ranges to kinetic energies and dE/dx values (and kinetic energies
+    back to ranges) by linear interpolation in precomputed tables, for
+    arrays of values and particle species at once.
+
+    Ranges outside of the tables are evaluated with the spline of the source
+    table (see :func:`csda_table_spline`), which extrapolates the first and
+    last cubic segments, so that the kinetic energy and dE/dx are the same
+    as the spline everywhere. Kinetic energies outside of the tables are
+    mapped to ranges by linear extrapolation.
+    """
+
+    def __init__(self, include_pids=(MUON_PID, PION_PID, PROT_PID, KAON_PID),
+                 num_points=10000, table_dir='csda_tables', cache_dir=None):
+        """Load the dense CSDA tables.
+
+        Parameters
+        ----------
+        include_pids : list, default [2, 3, 4, 5]
+            Particle species to load the CSDA tables for
+        num_points : int, default 10000
+            Number of range values in the dense tables
+        table_dir : str, default 'csda_tables'
+            Relative path to the CSDA range tables
+        cache_dir : str, optional
+            Directory where the dense tables are cached
+        """
+        # Load the tables, stack them
+        tables = np.stack([
+            csda_table_dense(pid, num_points, table_dir, cache_dir)
+            for pid in include_pids])
+        self.ranges, self.kes, self.dedxs = tables.transpose(1, 0, 2)
+
+        # Build a map from particle species to table index
+        self.include_pids = include_pids
+        self.index = np.full(max(include_pids) + 1, -1, dtype=np.int64)
+        self.index[np.asarray(include_pids)] = np.arange(len(include_pids))
+
+        # Initialize the splines used to extrapolate, built on demand
+        self.table_dir = table_dir
+        self._splines = {}
+
+    def ke(self, ranges, pids):
+        """Computes the CSDA kinetic energy for a set of ranges.
+
+        Parameters
+        ----------
+        ranges : Union[float, np.ndarray]
+            (N) Range in cm
+        pids : Union[int, np.ndarray]
+            (N) Particle species
+
+        Returns
+        -------
+        Union[float, np.ndarray]
+            (N) Kinetic energy in MeV
+        """
+        return self.lookup(ranges, pids, self.ranges, self.kes, 'T')
+
+    def dedx(self, ranges, pids):
+        """Computes the CSDA dE/dx for a set of residual ranges.
+
+        Parameters
+        ----------
+        ranges : Union[float, np.ndarray]
+            (N) Residual range in cm
+        pids : Union[int, np.ndarray]
+            (N) Particle species
+
+        Returns
+        -------
+        Union[float, np.ndarray]
+            (N) Energy loss rate in MeV/cm
+        """
+        return self.lookup(ranges, pids, self.ranges, self.dedxs, 'dE/dx')
+
+    def range(self, kes, pids):
+        """Computes the CSDA range for a set of kinetic energies.
+
+        Parameters
+        ----------
+        kes : Union[float, np.ndarray]
+            (N) Kinetic energy in MeV
+        pids : Union[int, np.ndarray]
+            (N) Particle species
+
+        Returns
+        -------
+        Union[float, np.ndarray]
+            (N) Range in cm
+        """
+        return self.lookup(kes, pids, self.kes, self.ranges)
+
+    def lookup(self, values, pids, xp, fp, spline_value=None):
+        """Interpolates a set of tables.
+
+        Parameters
+        ----------
+        values : Union[float, np.ndarray]
+            (N) Values to interpolate the tables at
+        pids : Union[int, np.ndarray]
+            (N) Particle species
+        xp : np.ndarray
+            (P, M) Increasing sample coordinates, one row per species
+        fp : np.ndarray
+            (P, M) Sample values, one row per species
+        spline_value : str, optional
+            Value of the source table spline to use outside of the tables
+            (one of 'T' or 'dE/dx'). If not specified, extrapolate linearly
+
+        Returns
+        -------
+        Union[float, np.ndarray]
+            (N) Interpolated values
+        """
+        # Convert the particle species to table indexes
+        scalar = np.isscalar(values)
+        values = np.atleast_1d(np.asarray(values, dtype=np.float64))
+        pids = np.asarray(pids, dtype=np.int64)
+        assert np.all(pids >= 0) and np.all(pids < len(self.index)), (
+                "Some of the particle species do not have a CSDA table.")
+        rows = np.broadcast_to(self.index[pids], values.shape)
+        assert np.all(rows > -1), (
+                "Some of the particle species do not have a CSDA table.")
+
+        # Interpolate
+        rows = np.ascontiguousarray(rows)
+        result = _csda_lookup(values, rows, xp, fp)
+
+        # Outside of the tables, evaluate the source table splines
+        if spline_value is not None:
+            outside = np.where(
+                    (values < xp[rows, 0]) | (values > xp[rows, -1]))[0]
+            for r in np.unique(rows[outside]):
+                index = outside[rows[outside] == r]
+                spline = self.spline(self.include_pids[r], spline_value)
+                result[index] = spline(values[index])
+
+        return result[0] if scalar else result
+
+    def spline(self, pid, value):
+        """Returns the spline of the source table of a particle species.
+
+        Parameters
+        ----------
+        pid : int
+            Particle species
+        value : str
+            Value provided by the spline (one of 'T' or 'dE/dx')
+
+        Returns
+        -------
+        callable
+            Function mapping range (cm) to Kinetic E (MeV) or dE/dx (MeV/cm)
+        """
+        if (pid, value) not in self._splines:
+            self._splines[(pid, value)] = csda_table_spline(
+                    pid, value, self.table_dir)
+
+        return self._splines[(pid, value)]
+
+
+@nb.njit(cache=True)
+def _csda_lookup(values: nb.float64[:],
+                 rows: nb.int64[:],
+                 xp: nb.float64[:,:],
+                 fp: nb.float64[:,:]) -> nb.float64[:]:
+    # Loop over the values, interpolate the table of each of them linearly.
+    # Values outside of the table range are linearly extrapolated
+    num_points = xp.shape[1]
+    result = np.empty(len(values), dtype=fp.dtype)
+    for i, x in enumerate(values):
+        r = rows[i]
+        j = np.searchsorted(xp[r], x)
+        j = min(max(j, 1), num_points - 1)
+        slope = (fp[r, j] - fp[r, j-1])/(xp[r, j] - xp[r, j-1])
+        result[i] = fp[r, j-1] + slope*(x - xp[r, j-1])
+
+    return result
 
 
 def csda_ke_lar(R, M, z=1, T_max=1e6, epsrel=1e-3, epsabs=1e-3):
     """Numerically optimizes the kinetic energy necessary to observe the
     range of a particle that has been measured, under the CSDA.
 
+    The kinetic energy is looked up in a dense table of the CSDA range (see
+    :func:`csda_table_lar`), built once per particle mass and charge. Ranges
+    below the table (kinetic energies below 1 MeV) are solved numerically.
+
     Parameters
     ----------
     R : float
@@ -94,7 +388,14 @@ def csda_ke_lar(R, M, z=1, T_max=1e6, epsrel=1e-3, epsabs=1e-3):
     float
         CSDA kinetic energy in MeV
     """
-    func = lambda x: csda_range_lar(x, M, z, epsrel, epsabs) - R
+    # If the range is within the table, interpolate it
+    if T_max > CSDA_TABLE_MIN_KE:
+        log_kes, log_ranges = csda_table_lar(M, z, T_max, epsrel, epsabs)
+        if R > 0. and log_ranges[0] <= np.log(R) <= log_ranges[-1]:
+            return float(np.exp(np.interp(np.log(R), log_ranges, log_kes)))
+
+    # Otherwise, find the root of the integral
+    func = lambda x: _csda_range_lar(x, M, z, epsrel, epsabs) - R
     return brentq(func, 0., T_max, rtol=epsrel, xtol=epsabs)
 
 
@@ -102,6 +403,10 @@ def csda_range_lar(T0, M, z=1, epsrel=1e-3, epsabs=1e-3):
     """Numerically integrates the inverse Bethe-Bloch formula to find the
     CSDA range of a particle for a given initial kinetic energy.
 
+    The range is looked up in a dense table (see :func:`csda_table_lar`),
+    built once per particle mass and charge. Kinetic energies outside of the
+    table are integrated numerically.
+
     Parameters
     ----------
     T0 : float
@@ -120,6 +425,69 @@ def csda_range_lar(T0, M, z=1, epsrel=1e-3, epsabs=1e-3):
     float
         CSDA range in cm
     """
+    # If the kinetic energy is within the table, interpolate it
+    log_kes, log_ranges = csda_table_lar(M, z, epsrel=epsrel, epsabs=epsabs)
+    if T0 >= CSDA_TABLE_MIN_KE and np.log(T0) <= log_kes[-1]:
+        return float(np.exp(np.interp(np.log(T0), log_kes, log_ranges)))
+
+    # Otherwise, integrate
+    return _csda_range_lar(T0, M, z, epsrel, epsabs)
+
+
+@lru_cache
+def csda_table_lar(M, z=1, T_max=1e6, epsrel=1e-3, epsabs=1e-3,
+                   num_points=1000):
+    """Tabulates the CSDA range of a particle as a function of its initial
+    kinetic energy, by integrating the inverse Bethe-Bloch formula.
+
+    The table spans log-spaced kinetic energies from 1 MeV (below which the
+    Bethe-Bloch formula is not valid) up to `T_max`. It is built once per
+    set of arguments and kept in memory. The range and the kinetic energy
+    are both smooth power laws of one another, so the table is stored (and
+    should be interpolated) in log-log space.
+
+    Parameters
+    ----------
+    M : float
+        Particle mass in MeV/c^2
+    z : int, default 1
+        Impinging partile charge in multiples of electron charge
+    T_max : float, default 1e6
+        Maximum kinetic energy in the table
+    epsrel : float, default 1e-3
+        Relative error tolerance of the integration
+    epsabs : float, default 1e-3
+        Asbolute error tolerance of the integration
+    num_points : int, default 1000
+        Number of kinetic energy values in the table
+
+    Returns
+    -------
+    np.ndarray
+        (num_points) Log of the kinetic energies in MeV
+    np.ndarray
+        (num_points) Log of the CSDA ranges in cm
+    """
+    # Integrate the inverse Bethe-Bloch formula up to each kinetic energy
+    kes = np.geomspace(CSDA_TABLE_MIN_KE, T_max, num_points)
+    steps = np.empty(num_points, dtype=np.float64)
+    steps[0] = _csda_range_lar(kes[0], M, z, epsrel, epsabs)
+    for i in range(1, num_points):
+        steps[i] = -quad(inv_bethe_bloch_lar, kes[i-1], kes[i],
+                         args=(M, z), epsrel=epsrel, epsabs=epsabs)[0]
+
+    ranges = np.cumsum(steps)
+    assert ranges[0] > 0. and np.all(steps[1:] > 0.), (
+            "The CSDA range must increase monotonically with kinetic energy.")
+
+    return np.log(kes), np.log(ranges)
+
+
+def _csda_range_lar(T0, M, z=1, epsrel=1e-3, epsabs=1e-3):
+    """Integrates the inverse Bethe-Bloch formula up to a kinetic energy.
+
+    See :func:`csda_range_lar` for the parameters.
+    """
     if T0 <= 0.:
         return 0.
 
@@ -127,7 +495,6 @@ def csda_range_lar(T0, M, z=1, epsrel=1e-3, epsabs=1e-3):
             args=(M, z), epsrel=epsrel, epsabs=epsabs)[0]
 
 
-@nb.njit(cache=True)
 def step_energy_loss_lar(T0, M, dx, z=1, num_steps=None):
     """Steps the initial energy of a particle down by pushing it through
     steps of dx of liquid argon. If `num_steps` is not specified, it will
@@ -40,7 +40,8 @@ def compute_rescaled_charge_batch(data, collection_only=False, collection_id=2):
 
 def adapt_labels_batch(clust_label, seg_label, seg_pred, ghost_pred=None,
                        break_classes=[SHOWR_SHP,TRACK_SHP,MICHL_SHP,DELTA_SHP],
-                       break_eps=1.1, break_metric='chebyshev'):
+                       break_eps=1.1, break_metric='chebyshev',
+                       break_algorithm='brute'):
     """Batched version of :func:`adapt_labels`.
 
     Parameters
@@ -60,6 +61,10 @@ def adapt_labels_batch(clust_label, seg_label, seg_pred, ghost_pred=None,
         Distance scale used in the break up procedure
     break_metric : str, default 'chebyshev'
         Distance metric used in the break up produce
+    break_algorithm : str, default 'brute'
+        DBSCAN algorithm used in the break up procedure (`brute` or
+        `grid`). The fragments are identical, but `grid` numbers them
+        in order of appearance
 
     Returns
     -------
@@ -74,7 +79,8 @@ def adapt_labels_batch(clust_label, seg_label, seg_pred, ghost_pred=None,
         ghost_pred_b = ghost_pred[b] if ghost_pred is not None else None
         clust_label_adapted[lower:upper] = adapt_labels(
                 clust_label[b], seg_label[b], seg_pred[b],
-                ghost_pred_b, break_classes, break_eps, break_metric)
+                ghost_pred_b, break_classes, break_eps, break_metric,
+                break_algorithm)
 
     return TensorBatch(clust_label_adapted, seg_pred.counts)
 
@@ -136,7 +142,8 @@ def compute_rescaled_charge(data, collection_only=False, collection_id=2):
 
 def adapt_labels(clust_label, seg_label, seg_pred, ghost_pred=None,
                  break_classes=[SHOWR_SHP,TRACK_SHP,MICHL_SHP,DELTA_SHP],
-                 break_eps=1.1, break_metric='chebyshev'):
+                 break_eps=1.1, break_metric='chebyshev',
+                 break_algorithm='brute'):
     """Adapts the cluster labels to account for the predicted semantics.
 
     Points wrongly predicted get the cluster label of the closest touching
@@ -170,6 +177,10 @@ def adapt_labels(clust_label, seg_label, seg_pred, ghost_pred=None,
         Distance scale used in the break up procedure
     break_metric : str, default 'chebyshev'
         Distance metric used in the break up produce
+    break_algorithm : str, default 'brute'
+        DBSCAN algorithm used in the break up procedure (`brute` or
+        `grid`). The fragments are identical, but `grid` numbers them
+        in order of appearance
 
     Returns
     -------
@@ -331,7 +342,8 @@ def adapt_labels(clust_label, seg_label, seg_pred, ghost_pred=None,
 
             # Run DBSCAN on the cluster, update labels
             break_labels = dbscan(
-                    coordinates, eps=break_eps, metric=break_metric)
+                    coordinates, eps=break_eps, metric=break_metric,
+                    algorithm=break_algorithm)
             break_labels += cluster_count
             if torch.is_tensor(new_label):
                 break_labels = torch.tensor(break_labels,
@@ -17,6 +17,10 @@ from spine.utils.globals import (
         MOM_COL, SHAPE_COL, COORD_START_COLS, COORD_END_COLS, COORD_TIME_COL)
 import spine.utils.numba_local as nbl
 
+# Number of columns of each statistic produced by the fused feature engine
+CLUSTER_FEATURES = {'center': 3, 'cov': 9, 'dir': 3, 'size': 1,
+                    'value': 2, 'shape': 1, 'energy': 1}
+
 
 def form_clusters_batch(data, min_size=-1, column=CLUST_COL, shapes=None,
                         batch_size=None):
@@ -78,7 +82,7 @@ def get_cluster_label_batch(data, clusts, column=CLUST_COL):
     TensorBatch
         (C) List of individual cluster labels
     """
-    labels = get_cluster_label(data.tensor, clusts.index_list, column)
+    labels = get_cluster_label(data.tensor, clusts.typed_index_list, column)
 
     return TensorBatch(labels, clusts.counts)
 
@@ -100,7 +104,8 @@ def get_cluster_primary_label_batch(data, clusts, column):
     TensorBatch
         (C) List of cluster primary labels
     """
-    labels = get_cluster_primary_label(data.tensor, clusts.index_list, column)
+    labels = get_cluster_primary_label(
+            data.tensor, clusts.typed_index_list, column)
 
     return TensorBatch(labels, clusts.counts)
 
@@ -193,7 +198,7 @@ def get_cluster_directions_batch(data, starts, clusts,
         (C, 3) List of cluster directions
     """
     dirs = get_cluster_directions(
-            data.tensor, starts.tensor, clusts.index_list)
+            data.tensor, starts.tensor, clusts.typed_index_list)
 
     return TensorBatch(dirs, clusts.counts)
 
@@ -218,7 +223,7 @@ def get_cluster_dedxs_batch(data, starts, clusts, max_dist=-1):
         (C) List of cluster dE/dx value close to the start points
     """
     dedxs = get_cluster_dedxs(
-            data.tensor, starts.tensor, clusts.index_list)
+            data.tensor, starts.tensor, clusts.typed_index_list)
 
     return TensorBatch(dedxs, clusts.counts)
 
@@ -243,7 +248,30 @@ def get_cluster_features_batch(data, clusts, add_value=False, add_shape=False):
         (C) List of cluster dE/dx value close to the start points
     """
     feats = get_cluster_features(
-            data.tensor, clusts.index_list, add_value, add_shape)
+            data.tensor, clusts.typed_index_list, add_value, add_shape)
+
+    return TensorBatch(feats, clusts.counts)
+
+
+def get_cluster_features_fused_batch(data, clusts, features):
+    """Batched version of :func:`get_cluster_features_fused`.
+
+    Parameters
+    ----------
+    data : TensorBatch
+        Batch of cluster label data tensor
+    clusts : IndexBatch
+        (C) List of cluster indexes
+    features : List[str]
+        List of statistics to compute (keys of `CLUSTER_FEATURES`)
+
+    Returns
+    -------
+    TensorBatch
+        (C, N_c) Tensor of cluster features
+    """
+    feats = get_cluster_features_fused(
+            data.tensor, clusts.csr_index, clusts.csr_edges, features)
 
     return TensorBatch(feats, clusts.counts)
 
@@ -749,6 +777,164 @@ def _get_cluster_features_extended(data: nb.float64[:,:],
     return feats
 
 
+@numbafy(cast_args=['data'], keep_torch=True, ref_arg='data')
+def get_cluster_features_fused(data, index, edges, features):
+    """Computes a configurable set of statistics for each cluster.
+
+    All the statistics are computed in a single parallel pass over the
+    clusters, provided in a flat (CSR) format, and written to a single
+    feature matrix. No copy of the cluster voxels is made.
+
+    The available statistics (see `CLUSTER_FEATURES`) are:
+    - 'center': Center (3)
+    - 'cov': Covariance matrix, normalized to its largest eigenvalue (9)
+    - 'dir': Principal axis, weighted by its relative spread (3)
+    - 'size': Voxel count (1)
+    - 'value': Mean and RMS voxel value (2)
+    - 'shape': Semantic type, i.e. most represented type in cluster (1)
+    - 'energy': Sum of the voxel values (1)
+
+    The 'center', 'cov', 'dir' and 'size' statistics are identical to
+    those produced by :func:`get_cluster_features_base`, the 'value' and
+    'shape' statistics to those produced by
+    :func:`get_cluster_features_extended`.
+
+    Parameters
+    ----------
+    data : np.ndarray
+        Cluster label data tensor
+    index : np.ndarray
+        (M) Concatenated cluster indexes
+    edges : np.ndarray
+        (C + 1) Boundaries of each cluster in the concatenated index
+    features : List[str]
+        List of statistics to compute, in the order they are to be stored
+
+    Returns
+    -------
+    np.ndarray
+        (C, N_c) Tensor of cluster features
+    """
+    # Find the first column of each requested statistic (-1 if not requested)
+    cols = np.full(len(CLUSTER_FEATURES), -1, dtype=np.int64)
+    keys = list(CLUSTER_FEATURES.keys())
+    num_cols = 0
+    for feature in features:
+        assert feature in CLUSTER_FEATURES, (
+                f"Cluster feature not recognized: {feature}. Should be "
+                f"one of {keys}.")
+        cols[keys.index(feature)] = num_cols
+        num_cols += CLUSTER_FEATURES[feature]
+
+    return _get_cluster_features_fused(
+            data, np.asarray(index, dtype=np.int64),
+            np.asarray(edges, dtype=np.int64), cols, num_cols)
+
+
+@nb.njit(parallel=True, cache=True)
+def _get_cluster_features_fused(data: nb.float64[:,:],
+                                index: nb.int64[:],
+                                edges: nb.int64[:],
+                                cols: nb.int64[:],
+                                num_cols: nb.int64) -> nb.float64[:,:]:
+
+    # Loop over the clusters (parallelize)
+    num_clusts = len(edges) - 1
+    feats = np.zeros((num_clusts, num_cols), dtype=data.dtype)
+    c_center, c_cov, c_dir, c_size = cols[0], cols[1], cols[2], cols[3]
+    c_value, c_shape, c_energy = cols[4], cols[5], cols[6]
+    for k in nb.prange(num_clusts):
+        # Get the range of voxels in the cluster
+        lower, upper = edges[k], edges[k+1]
+        size = upper - lower
+        if size == 0:
+            continue
+
+        # First pass: compute the center and the value sums
+        center = np.zeros(3, dtype=np.float64)
+        value_sum = 0.
+        for ii in range(lower, upper):
+            i = index[ii]
+            for d in range(3):
+                center[d] += data[i, COORD_COLS[d]]
+            value_sum += data[i, VALUE_COL]
+        center /= size
+        value_mean = value_sum/size
+
+        # Second pass: compute the scatter matrix and the value variance
+        value_var = 0.
+        A = np.zeros((3, 3), dtype=np.float64)
+        for ii in range(lower, upper):
+            i = index[ii]
+            value_var += (data[i, VALUE_COL] - value_mean)**2
+            for d1 in range(3):
+                x1 = data[i, COORD_COLS[d1]] - center[d1]
+                for d2 in range(d1, 3):
+                    A[d1, d2] += x1*(data[i, COORD_COLS[d2]] - center[d2])
+        for d1 in range(3):
+            for d2 in range(d1):
+                A[d1, d2] = A[d2, d1]
+
+        # Store the simple statistics
+        if c_center > -1:
+            feats[k, c_center:c_center+3] = center
+        if c_size > -1:
+            feats[k, c_size] = size
+        if c_value > -1:
+            feats[k, c_value] = value_mean
+            feats[k, c_value+1] = np.sqrt(value_var/size)
+        if c_energy > -1:
+            feats[k, c_energy] = value_sum
+
+        # Get the most represented semantic type (lowest if tied)
+        if c_shape > -1:
+            shapes = np.empty(size, dtype=data.dtype)
+            for ii in range(lower, upper):
+                shapes[ii - lower] = data[index[ii], SHAPE_COL]
+            shapes = np.sort(shapes)
+            best, best_count, count = shapes[0], 1, 1
+            for i in range(1, size):
+                count = count + 1 if shapes[i] == shapes[i-1] else 1
+                if count > best_count:
+                    best, best_count = shapes[i], count
+            feats[k, c_shape] = best
+
+        # Get the orientation matrix and the principal axis, if needed. If
+        # the points are superimposed (largest eigenvalue of 0), leave at 0
+        if c_cov < 0 and c_dir < 0:
+            continue
+
+        w, v = np.linalg.eigh(A)
+        if w[2] == 0.:
+            continue
+
+        if c_cov > -1:
+            feats[k, c_cov:c_cov+9] = (A/w[2]).flatten()
+
+        if c_dir > -1:
+            # Third pass: flip the principal direction if it is not pointing
+            # towards the maximum spread (transverse distance to the axis)
+            v0 = v[:, 2].copy()
+            sc = 0.
+            for ii in range(lower, upper):
+                i = index[ii]
+                x0 = 0.
+                for d in range(3):
+                    x0 += (data[i, COORD_COLS[d]] - center[d])*v0[d]
+                dist_sq = 0.
+                for d in range(3):
+                    dist_sq += (data[i, COORD_COLS[d]] - center[d]
+                                - x0*v0[d])**2
+                sc += x0*np.sqrt(dist_sq)
+            if sc < 0:
+                v0 = -v0
+
+            # Weight the direction by the relative spread
+            feats[k, c_dir:c_dir+3] = (1.0 - w[1]/w[2])*v0
+
+    return feats
+
+
 @numbafy(cast_args=['data', 'coord_label'], list_args=['clusts'],
          keep_torch=True, ref_arg='data')
 def get_cluster_points_label(data, coord_label, clusts, random_order=True):
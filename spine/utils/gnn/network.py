@@ -9,6 +9,9 @@ from spine.utils.decorators import numbafy
 from spine.utils.globals import COORD_COLS
 import spine.utils.numba_local as nbl
 
+# Numba type of the keys of the sparse cluster pair dictionaries
+PAIR_TYPE = nb.types.UniTuple(nb.int64, 2)
+
 
 def get_cluster_edge_features_batch(data, clusts, edge_index,
                                     closest_index=True, algorithm='brute'):
@@ -36,7 +39,8 @@ def get_cluster_edge_features_batch(data, clusts, edge_index,
     index = edge_index.index_t if directed else edge_index.directed_index_t
     counts = edge_index.counts if directed else edge_index.directed_counts
     feats = get_cluster_edge_features(
-            data.tensor, clusts.index_list, index, closest_index, algorithm)
+            data.tensor, clusts.typed_index_list, index, closest_index,
+            algorithm)
 
     return TensorBatch(feats, counts)
 
@@ -86,8 +90,9 @@ def get_cluster_edge_features(data, clusts, edge_index,
         (C) List of arrays of voxels IDs in each cluster
     edge_index : Union[np.ndarray, torch.Tensor]
         (2, E) Incidence map between voxels
-    closest_index : Union[np.ndarray, torch.Tensor], optional
-        (C, C) : Combined index of the closest pair of voxels per edge
+    closest_index : Union[np.ndarray, torch.Tensor, numba.typed.Dict], optional
+        (C, C) : Combined index of the closest pair of voxels per edge, or
+        dictionary which maps pairs of clusters onto it
     algorithm : str, default 'brute'
         Method used to compute the inter-cluster distance
 
@@ -124,7 +129,7 @@ def _get_cluster_edge_features(data: nb.float32[:,:],
             imin = closest_index[c1, c2]
             i1, i2 = imin//len(x2), imin%len(x2)
         else:
-            i1, j2, _ = nbl.closest_pair(x1, x2, algorithm)
+            i1, i2, _ = nbl.closest_pair(x1, x2, algorithm)
         v1 = x1[i1,:]
         v2 = x2[i2,:]
 
@@ -315,7 +320,8 @@ def inter_cluster_distance(voxels, clusts, counts=None, method='voxel',
         distance ('centroid')
     algorithm : str, default 'brute'
         Algorithm used to compute the 'voxel' distance. The 'brute' method
-        is exact but slow, 'recursive' uses a fast but approximate method.
+        is exact but slow, 'recursive' uses a fast but approximate method,
+        'bbox' is exact and uses bounding boxes to prune the pairs of voxels.
     return_index : bool, default True
         Returns a combined index of the closest pair of voxels for each
         cluster, if the 'voxel' distance method is used
@@ -399,15 +405,296 @@ def _inter_cluster_distance_index(voxels: nb.float32[:,:],
         i, j = indxi[k], indxj[k]
         ii, jj, dist = nbl.closest_pair(
                 voxels[clusts[i]], voxels[clusts[j]], algorithm)
-        index = ii*len(clusts[j]) + jj
 
-        # Store the index and the distance in a matrix
-        closest_index[i, j] = closest_index[j, i] = index
+        # Store the index and the distance in a matrix (the index of the
+        # reciprocal pair is transposed, as the cluster order is swapped)
+        closest_index[i, j] = ii*len(clusts[j]) + jj
+        closest_index[j, i] = jj*len(clusts[i]) + ii
         dist_mat[i, j] = dist_mat[j, i] = dist
 
     return dist_mat, closest_index
 
 
+@numbafy(cast_args=['voxels'], list_args=['clusts'])
+def inter_cluster_distance_sparse(voxels, clusts, max_dist, counts=None):
+    """Finds the closest voxel distance between every pair of clusters within
+    each batch which are closer than a certain distance.
+
+    Rather than comparing every pair of clusters with a full `cdist`, this
+    bins all the voxels of each entry in a grid of cells of size `max_dist`
+    and only compares voxels in neighboring cells. The distance and the
+    closest voxel pair are exact for every pair of clusters within the
+    cutoff, the other pairs of clusters are not stored.
+
+    Parameters
+    ----------
+    voxels : Union[np.ndarray, torch.Tensor]
+        (N, 3) Tensor of voxel coordinates
+    clusts : List[np.ndarray]
+        (C) List of cluster indexes
+    max_dist : float
+        Distance cutoff beyond which cluster pairs are not stored
+    counts : np.ndarray, optional
+        (B) Number of clusters in each entry of the batch
+
+    Returns
+    -------
+    numba.typed.Dict
+        Maps each (i, j) pair of clusters within the cutoff onto their distance
+    numba.typed.Dict
+        Maps each (i, j) pair of clusters within the cutoff onto the combined
+        index of their closest pair of voxels, `ii*len(clusts[j]) + jj`
+    """
+    # If there is no counts provided, assume all clusters are in one entry
+    if counts is None:
+        counts = np.array([len(clusts)], dtype=np.int64)
+
+    # If there are no clusters, type the empty list
+    if not len(clusts):
+        clusts = nb.typed.List.empty_list(nb.int64[:])
+
+    return _inter_cluster_distance_sparse(
+            voxels, clusts, counts, float(max_dist))
+
+@nb.njit(cache=True)
+def _inter_cluster_distance_sparse(voxels: nb.float32[:,:],
+                                   clusts: nb.types.List(nb.int64[:]),
+                                   counts: nb.int64[:],
+                                   max_dist: nb.float64) -> (
+                                           nb.types.DictType, nb.types.DictType):
+    # Initialize the output dictionaries
+    dist_dict = nb.typed.Dict.empty(key_type=PAIR_TYPE, value_type=nb.float64)
+    index_dict = nb.typed.Dict.empty(key_type=PAIR_TYPE, value_type=nb.int64)
+
+    # Loop over the entries in the batch
+    offset = 0
+    for b in range(len(counts)):
+        # Flatten the voxels of all the clusters in this entry
+        clust_ids = np.arange(offset, offset + counts[b])
+        offset += counts[b]
+        num_points = 0
+        for c in clust_ids:
+            num_points += len(clusts[c])
+        if num_points == 0:
+            continue
+
+        point_index = np.empty(num_points, dtype=np.int64)
+        point_clust = np.empty(num_points, dtype=np.int64)
+        point_local = np.empty(num_points, dtype=np.int64)
+        n = 0
+        for c in clust_ids:
+            for k, v in enumerate(clusts[c]):
+                point_index[n], point_clust[n], point_local[n] = v, c, k
+                n += 1
+
+        # Bin the points in a grid, compare points in neighboring cells
+        points = voxels[point_index]
+        order, starts, cell_keys, offsets = nbl.grid_index(points, max_dist)
+        num_cells = len(cell_keys)
+        for c in range(num_cells):
+            for o in range(14):
+                # Find the neighbor cell, skip if it is empty
+                if o == 0:
+                    nc = c
+                else:
+                    key = cell_keys[c] + offsets[o-1]
+                    nc = np.searchsorted(cell_keys, key)
+                    if nc == num_cells or cell_keys[nc] != key:
+                        continue
+
+                for pi in range(starts[c], starts[c+1]):
+                    p = order[pi]
+                    qstart = pi + 1 if o == 0 else starts[nc]
+                    for qi in range(qstart, starts[nc+1]):
+                        q = order[qi]
+                        if point_clust[p] == point_clust[q]:
+                            continue
+
+                        # Check that the points are within the cutoff
+                        dist = np.sqrt(
+                                (points[p][0] - points[q][0])**2 +
+                                (points[p][1] - points[q][1])**2 +
+                                (points[p][2] - points[q][2])**2)
+                        if dist >= max_dist:
+                            continue
+
+                        # Order the pair of clusters
+                        i, j = point_clust[p], point_clust[q]
+                        ii, jj = point_local[p], point_local[q]
+                        if i > j:
+                            i, j, ii, jj = j, i, jj, ii
+
+                        # Keep the closest pair (lowest index if tied)
+                        index = ii*len(clusts[j]) + jj
+                        if (i, j) in dist_dict:
+                            cur_dist = dist_dict[(i, j)]
+                            if (dist > cur_dist or
+                                (dist == cur_dist and
+                                 index >= index_dict[(i, j)])):
+                                continue
+
+                        dist_dict[(i, j)] = dist
+                        index_dict[(i, j)] = index
+
+    # Store the reciprocal pairs
+    _store_reciprocal_pairs(dist_dict, index_dict, clusts)
+
+    return dist_dict, index_dict
+
+
+def inter_cluster_distance_neighbors(voxels, clusts, neighborhood, max_dist):
+    """Finds the closest voxel distance between every pair of clusters which
+    are closer than a certain distance, using a shared voxel neighborhood.
+
+    This produces the same output as :func:`inter_cluster_distance_sparse`
+    but, rather than binning the voxels of each entry in its own grid, it
+    reuses the (cached) radius query of a :class:`VoxelNeighborhood` built
+    once on the whole batch, so that it can be shared with other consumers.
+
+    Parameters
+    ----------
+    voxels : Union[np.ndarray, torch.Tensor]
+        (N, 3) Tensor of voxel coordinates
+    clusts : List[np.ndarray]
+        (C) List of cluster indexes
+    neighborhood : VoxelNeighborhood
+        Neighborhood service of the voxels
+    max_dist : float
+        Distance cutoff beyond which cluster pairs are not stored
+
+    Returns
+    -------
+    numba.typed.Dict
+        Maps each (i, j) pair of clusters within the cutoff onto their distance
+    numba.typed.Dict
+        Maps each (i, j) pair of clusters within the cutoff onto the combined
+        index of their closest pair of voxels, `ii*len(clusts[j]) + jj`
+    """
+    # If there are no clusters, type the empty list
+    if not len(clusts):
+        clusts = nb.typed.List.empty_list(nb.int64[:])
+
+    # Fetch the neighbors of each voxel within the cutoff
+    offsets, neighbors = neighborhood.radius(max_dist)
+
+    return _inter_cluster_distance_neighbors(
+            np.asarray(voxels, dtype=np.float32), clusts, offsets, neighbors,
+            float(max_dist))
+
+@nb.njit(cache=True)
+def _inter_cluster_distance_neighbors(voxels: nb.float32[:,:],
+                                      clusts: nb.types.List(nb.int64[:]),
+                                      offsets: nb.int64[:],
+                                      neighbors: nb.int64[:],
+                                      max_dist: nb.float64) -> (
+                                              nb.types.DictType,
+                                              nb.types.DictType):
+    # Initialize the output dictionaries
+    dist_dict = nb.typed.Dict.empty(key_type=PAIR_TYPE, value_type=nb.float64)
+    index_dict = nb.typed.Dict.empty(key_type=PAIR_TYPE, value_type=nb.int64)
+
+    # Build the list of (cluster, local index) memberships of each voxel
+    num_voxels = len(offsets) - 1
+    member_counts = np.zeros(num_voxels + 1, dtype=np.int64)
+    for c in range(len(clusts)):
+        for v in clusts[c]:
+            member_counts[v + 1] += 1
+
+    member_starts = np.cumsum(member_counts)
+    member_clust = np.empty(member_starts[-1], dtype=np.int64)
+    member_local = np.empty(member_starts[-1], dtype=np.int64)
+    fill = member_starts[:-1].copy()
+    for c in range(len(clusts)):
+        for k, v in enumerate(clusts[c]):
+            member_clust[fill[v]], member_local[fill[v]] = c, k
+            fill[v] += 1
+
+    # Loop over the pairs of neighboring voxels which belong to clusters
+    for p in range(num_voxels):
+        if member_starts[p] == member_starts[p+1]:
+            continue
+
+        for n in range(offsets[p], offsets[p+1]):
+            q = neighbors[n]
+            if q < p or member_starts[q] == member_starts[q+1]:
+                continue
+
+            # Check that the voxels are within the cutoff
+            dist = np.sqrt(
+                    (voxels[p][0] - voxels[q][0])**2 +
+                    (voxels[p][1] - voxels[q][1])**2 +
+                    (voxels[p][2] - voxels[q][2])**2)
+            if dist >= max_dist:
+                continue
+
+            for mp in range(member_starts[p], member_starts[p+1]):
+                qstart = mp + 1 if q == p else member_starts[q]
+                for mq in range(qstart, member_starts[q+1]):
+                    if member_clust[mp] == member_clust[mq]:
+                        continue
+
+                    # Order the pair of clusters
+                    i, j = member_clust[mp], member_clust[mq]
+                    ii, jj = member_local[mp], member_local[mq]
+                    if i > j:
+                        i, j, ii, jj = j, i, jj, ii
+
+                    # Keep the closest pair (lowest index if tied)
+                    index = ii*len(clusts[j]) + jj
+                    if (i, j) in dist_dict:
+                        cur_dist = dist_dict[(i, j)]
+                        if (dist > cur_dist or
+                            (dist == cur_dist and
+                             index >= index_dict[(i, j)])):
+                            continue
+
+                    dist_dict[(i, j)] = dist
+                    index_dict[(i, j)] = index
+
+    # Store the reciprocal pairs
+    _store_reciprocal_pairs(dist_dict, index_dict, clusts)
+
+    return dist_dict, index_dict
+
+@nb.njit(cache=True)
+def _store_reciprocal_pairs(dist_dict: nb.types.DictType,
+                            index_dict: nb.types.DictType,
+                            clusts: nb.types.List(nb.int64[:])):
+    # Add the (j, i) pair of each stored (i, j) pair of clusters (the closest
+    # pair of voxels is transposed, as the cluster order is swapped)
+    pairs = nb.typed.List(dist_dict.keys())
+    for i, j in pairs:
+        index = index_dict[(i, j)]
+        ii, jj = index//len(clusts[j]), index%len(clusts[j])
+        dist_dict[(j, i)] = dist_dict[(i, j)]
+        index_dict[(j, i)] = jj*len(clusts[i]) + ii
+
+@nb.njit(cache=True)
+def get_sparse_edge_distances(edge_index: nb.int64[:,:],
+                              dist_dict: nb.types.DictType) -> nb.float64[:]:
+    """Fetches the length of each edge from a sparse distance dictionary.
+
+    Parameters
+    ----------
+    edge_index : np.ndarray
+        (2, E) Tensor of edges
+    dist_dict : numba.typed.Dict
+        Maps pairs of clusters onto their distance
+
+    Returns
+    -------
+    np.ndarray
+        (E) Length of each edge (`inf` if the pair is not in the dictionary)
+    """
+    dists = np.full(edge_index.shape[1], np.inf, dtype=np.float64)
+    for k in range(edge_index.shape[1]):
+        key = (edge_index[0, k], edge_index[1, k])
+        if key in dist_dict:
+            dists[k] = dist_dict[key]
+
+    return dists
+
+
 @numbafy(cast_args=['graph'])
 def get_fragment_edges(graph, clust_ids):
     """Function that converts a set of edges between cluster ids
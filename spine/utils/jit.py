@@ -0,0 +1,292 @@
+"""Module to manage the cache of the Numba-compiled kernels.
+
+The Numba kernels in SPINE are compiled lazily, the first time they are
+called with a given set of argument types (signature), and written to an
+on-disk cache (`cache=True`). This module provides tools to:
+- Relocate the cache to a chosen directory, e.g. one shipped with a
+  container image. If the directory is read-only, its content is copied to
+  a writable scratch directory, as Numba cannot use a read-only cache;
+- Record the signatures that the kernels were called with in a job,
+  including in its worker processes;
+- Compile all the recorded signatures ahead of time (warmup), so that the
+  next jobs only load the compiled kernels from the cache.
+"""
+
+import os
+import sys
+import fcntl
+import atexit
+import shutil
+import pickle
+import inspect
+import tempfile
+import importlib
+from multiprocessing.util import Finalize
+
+import numba as nb
+from numba.core.caching import NullCache
+from numba.core.dispatcher import Dispatcher
+
+from .logger import logger
+
+__all__ = ['set_cache_dir', 'get_kernels', 'save_signatures',
+           'record_signatures', 'load_signatures', 'warmup']
+
+# List of modules which define Numba kernels
+KERNEL_MODULES = (
+        'spine.utils.numba_local',
+        'spine.utils.neighbors',
+        'spine.utils.gnn.cluster',
+        'spine.utils.gnn.network',
+        'spine.utils.gnn.voxels',
+        'spine.utils.gnn.evaluation',
+        'spine.utils.tracking',
+        'spine.utils.energy_loss',
+        'spine.utils.mcs',
+        'spine.utils.match',
+        'spine.utils.vertex',
+        'spine.io.parse.clean_data',
+        'spine.model.layer.gnn.graph.bipartite',
+        'spine.model.layer.gnn.graph.complete',
+        'spine.model.layer.gnn.graph.delaunay',
+        'spine.model.layer.gnn.graph.knn',
+        'spine.model.layer.gnn.graph.mst'
+)
+
+# Name of the file which stores the recorded signatures in the cache
+SIGNATURE_FILE = 'signatures.pkl'
+
+
+def set_cache_dir(cache_dir):
+    """Sets the directory where the Numba kernels are cached.
+
+    This applies to the kernels already imported, to the kernels imported
+    later and to the processes spawned by this one.
+
+    Parameters
+    ----------
+    cache_dir : str
+        Path to the cache directory
+
+    Returns
+    -------
+    str
+        Path to the cache directory in use (differs from `cache_dir` if
+        the latter is read-only)
+    """
+    # If the cache directory exists but is read-only, copy it to a writable
+    # scratch directory, unique to this process (concurrent jobs may
+    # relocate the same cache), which is removed when the process exits
+    cache_dir = os.path.abspath(cache_dir)
+    if os.path.isdir(cache_dir) and not os.access(cache_dir, os.W_OK):
+        scratch_dir = tempfile.mkdtemp(prefix='spine_numba_cache_')
+        atexit.register(shutil.rmtree, scratch_dir, ignore_errors=True)
+        shutil.copytree(cache_dir, scratch_dir, dirs_exist_ok=True)
+        logger.info("Numba cache directory %s is read-only, using a copy "
+                    "in %s.", cache_dir, scratch_dir)
+        cache_dir = scratch_dir
+
+    # Update the Numba configuration (and the environment for subprocesses)
+    os.makedirs(cache_dir, exist_ok=True)
+    os.environ['NUMBA_CACHE_DIR'] = cache_dir
+    nb.config.CACHE_DIR = cache_dir
+
+    # The cache location of a kernel is set when it is defined: reset it
+    # for the kernels which have already been imported
+    for kernel in get_kernels(import_modules=False).values():
+        kernel.enable_caching()
+
+    return cache_dir
+
+
+def get_kernels(modules=KERNEL_MODULES, import_modules=True):
+    """Fetches all the cached Numba kernels defined in a list of modules.
+
+    Kernels imported from another module are only listed once, under the
+    name of the module which defines them.
+
+    Parameters
+    ----------
+    modules : List[str], default KERNEL_MODULES
+        List of module names to look for kernels in
+    import_modules : bool, default True
+        If `True`, import the modules which have not been imported yet.
+        Modules which cannot be imported (missing dependency) are skipped
+
+    Returns
+    -------
+    Dict[str, Dispatcher]
+        Dictionary which maps the qualified name of each kernel to it
+    """
+    kernels = {}
+    for name in modules:
+        # Fetch the module
+        module = sys.modules.get(name)
+        if module is None and import_modules:
+            try:
+                module = importlib.import_module(name)
+            except ImportError as err:
+                logger.debug("Could not import %s: %s", name, err)
+
+        if module is None:
+            continue
+
+        # Look for kernels in the module and in the classes it defines
+        objects = list(vars(module).values())
+        for obj in vars(module).values():
+            if inspect.isclass(obj) and obj.__module__ == name:
+                objects.extend(vars(obj).values())
+
+        for obj in objects:
+            if isinstance(obj, staticmethod):
+                obj = obj.__func__
+            if (isinstance(obj, Dispatcher) and
+                obj.py_func.__module__ == name and
+                not isinstance(obj._cache, NullCache)):
+                kernels[f'{name}.{obj.py_func.__qualname__}'] = obj
+
+    return kernels
+
+
+def save_signatures(file_path=None, modules=KERNEL_MODULES):
+    """Records the signatures that the Numba kernels were compiled for.
+
+    The signatures are merged with those already stored in the file. The
+    file is locked while it is updated, so that several processes (e.g.
+    worker processes or concurrent jobs) can record their signatures in
+    the same file.
+
+    Parameters
+    ----------
+    file_path : str, optional
+        Path to the signature file. If not specified, it is stored in the
+        current cache directory
+    modules : List[str], default KERNEL_MODULES
+        List of module names to look for kernels in
+
+    Returns
+    -------
+    int
+        Number of signatures in the file
+    """
+    # Lock the signature file for the duration of the update
+    file_path = file_path or get_signature_path()
+    with open(f'{file_path}.lock', 'a', encoding='utf-8') as lock_file:
+        fcntl.flock(lock_file, fcntl.LOCK_EX)
+
+        # Load the existing signatures
+        signatures = load_signatures(file_path)
+
+        # Add the signatures of the kernels imported in this process
+        kernels = get_kernels(modules, import_modules=False)
+        for name, kernel in kernels.items():
+            sigs = signatures.setdefault(name, [])
+            for sig in kernel.signatures:
+                if sig not in sigs:
+                    sigs.append(sig)
+
+        # Store (write to a temporary file first, so that readers never
+        # load a partially written file)
+        fd, tmp_path = tempfile.mkstemp(
+                dir=os.path.dirname(os.path.abspath(file_path)),
+                suffix='.tmp')
+        with os.fdopen(fd, 'wb') as out_file:
+            pickle.dump(signatures, out_file)
+
+        os.replace(tmp_path, file_path)
+
+    return sum(len(sigs) for sigs in signatures.values())
+
+
+def record_signatures(file_path=None, modules=KERNEL_MODULES):
+    """Records the signatures compiled in this process when it exits.
+
+    This is meant to be called when a worker process (e.g. from a
+    :mod:`multiprocessing` pool) is initialized: the signatures it compiled
+    are merged into the signature file when the worker shuts down.
+
+    Parameters
+    ----------
+    file_path : str, optional
+        Path to the signature file. If not specified, it is stored in the
+        cache directory of the process
+    modules : List[str], default KERNEL_MODULES
+        List of module names to look for kernels in
+    """
+    # Worker processes do not necessarily run the interpreter exit
+    # handlers, register a multiprocessing finalizer instead
+    Finalize(None, save_signatures, args=(file_path, modules),
+             exitpriority=0)
+
+
+def get_signature_path():
+    """Returns the path to the signature file of the current cache directory.
+
+    Returns
+    -------
+    str
+        Path to the signature file
+    """
+    assert nb.config.CACHE_DIR, (
+            "The Numba cache directory is not set. Call `set_cache_dir` "
+            "or provide the path to the signature file explicitly.")
+
+    return os.path.join(nb.config.CACHE_DIR, SIGNATURE_FILE)
+
+
+def load_signatures(file_path):
+    """Loads recorded kernel signatures.
+
+    Parameters
+    ----------
+    file_path : str
+        Path to the signature file
+
+    Returns
+    -------
+    Dict[str, List[tuple]]
+        Dictionary which maps each kernel name to a list of signatures
+    """
+    if not os.path.isfile(file_path):
+        return {}
+
+    with open(file_path, 'rb') as in_file:
+        return pickle.load(in_file)
+
+
+def warmup(file_path=None, modules=KERNEL_MODULES):
+    """Compiles the Numba kernels for all the recorded signatures.
+
+    The compiled kernels are written to the cache, or loaded from it if
+    they are already there.
+
+    Parameters
+    ----------
+    file_path : str, optional
+        Path to the signature file. If not specified, it is loaded from the
+        current cache directory
+    modules : List[str], default KERNEL_MODULES
+        List of module names to look for kernels in
+
+    Returns
+    -------
+    int
+        Number of signatures compiled or loaded
+    """
+    # Load the signatures
+    file_path = file_path or get_signature_path()
+    signatures = load_signatures(file_path)
+
+    # Loop over the kernels, compile each recorded signature
+    count = 0
+    for name, kernel in get_kernels(modules).items():
+        for sig in signatures.get(name, []):
+            try:
+                kernel.compile(sig)
+                count += 1
+            except Exception as err: # pylint: disable=W0718
+                logger.warning(
+                        "Could not compile %s for %s: %s", name, sig, err)
+
+    return count
+
@@ -3,7 +3,7 @@ import numpy as np
 import numba as nb
 
 from .globals import LAR_X0
-from .energy_loss import step_energy_loss_lar
+from .energy_loss import step_energy_loss_lar, bethe_bloch_lar
 
 
 def mcs_fit(theta, M, dx, z = 1, \
@@ -37,6 +37,179 @@ def mcs_fit(theta, M, dx, z = 1, \
     return fit_min.x
 
 
+def mcs_fit_batch(thetas, masses, dx, z = 1, split_angle = False,
+        res_a = 0.25, res_b = 1.25, bounds = (10., 100000.),
+        num_candidates = 16, rtol = 1e-4):
+    '''
+    Finds the kinetic energies which best fit the sets of scattering angles
+    measured along a batch of particle tracks, all at once.
+
+    The tracks are fitted in parallel. For each track, the likelihood of a
+    grid of candidate kinetic energies (log-spaced within a bracket) is
+    evaluated in a single pass through the track steps. The bracket is then
+    narrowed around the best candidate until it is smaller than the
+    requested tolerance.
+
+    Parameters
+    ----------
+    thetas : List[np.ndarray]
+        (T) List of vectors of scattering angle at each step in radians
+    masses : Union[float, np.ndarray]
+        (T) Particle masses in MeV/c^2
+    dx : float
+        Step length in cm
+    z : int, default 1
+        Impinging partile charge in multiples of electron charge
+    split_angle : bool, default False
+        Whether or not to project the 3D angle onto two 2D planes
+    res_a : float, default 0.25 rad*cm^res_b
+        Parameter a in the a/dx^b which models the angular uncertainty
+    res_b : float, default 1.25
+        Parameter b in the a/dx^b which models the angular uncertainty
+    bounds : Tuple[float], default (10., 100000.)
+        Range of kinetic energies to search in MeV
+    num_candidates : int, default 16
+        Number of candidate kinetic energies evaluated at once
+    rtol : float, default 1e-4
+        Relative precision on the kinetic energy at which to stop the search
+
+    Returns
+    -------
+    np.ndarray
+        (T) Best-fit kinetic energy of each track in MeV
+    '''
+    # Build a flat list of angles with track boundaries
+    assert num_candidates > 2, 'Must evaluate at least 3 candidates at once'
+    lengths = np.array([len(theta) for theta in thetas], dtype=np.int64)
+    assert np.all(lengths > 0), 'Must provide angles to esimate the MCS loss'
+    edges = np.zeros(len(thetas) + 1, dtype=np.int64)
+    edges[1:] = np.cumsum(lengths)
+    theta = np.empty(edges[-1], dtype=np.float64)
+    for i, theta_i in enumerate(thetas):
+        theta[edges[i]:edges[i+1]] = theta_i
+
+    masses = np.broadcast_to(
+            np.asarray(masses, dtype=np.float64), (len(thetas),))
+
+    return _mcs_fit_batch(theta, edges, np.ascontiguousarray(masses),
+            float(dx), float(z), split_angle, res_a/dx**res_b,
+            float(bounds[0]), float(bounds[1]), num_candidates, rtol)
+
+
+@nb.njit(cache=True, parallel=True)
+def _mcs_fit_batch(theta: nb.float64[:],
+                   edges: nb.int64[:],
+                   masses: nb.float64[:],
+                   dx: nb.float64,
+                   z: nb.float64,
+                   split_angle: nb.boolean,
+                   res: nb.float64,
+                   T_min: nb.float64,
+                   T_max: nb.float64,
+                   num_candidates: nb.int64,
+                   rtol: nb.float64) -> nb.float64[:]:
+    # Loop over the tracks in parallel
+    num_tracks = len(edges) - 1
+    result = np.empty(num_tracks, dtype=np.float64)
+    for t in nb.prange(num_tracks):
+        # Fetch the angles of this track, split them if requested
+        theta_t = theta[edges[t]:edges[t+1]]
+        if not split_angle:
+            theta1, theta2 = theta_t, theta_t[:0]
+        else:
+            theta1, theta2 = split_angles(theta_t)
+
+        # Narrow the bracket around the best candidate until it is small
+        lower, upper = np.log(T_min), np.log(T_max)
+        best = T_max
+        while True:
+            T0s = np.exp(np.linspace(lower, upper, num_candidates))
+            nlls = _mcs_nll_lar_batch(
+                    T0s, theta1, theta2, masses[t], dx, z, res)
+            i = np.argmin(nlls)
+            best = T0s[i]
+            lower = np.log(T0s[max(i - 1, 0)])
+            upper = np.log(T0s[min(i + 1, num_candidates - 1)])
+            if upper - lower < rtol:
+                break
+
+        result[t] = best
+
+    return result
+
+
+@nb.njit(cache=True)
+def _mcs_nll_lar_batch(T0s: nb.float64[:],
+                       theta1: nb.float64[:],
+                       theta2: nb.float64[:],
+                       M: nb.float64,
+                       dx: nb.float64,
+                       z: nb.float64,
+                       res: nb.float64) -> nb.float64[:]:
+    '''
+    Computes the MCS negative log likelihood of a set of candidate kinetic
+    energies, stepping them through the track at once. Equivalent to
+    calling :func:`mcs_nll_lar` for each candidate.
+
+    Parameters
+    ----------
+    T0s : np.ndarray
+        (C) Candidate particle kinetic energies in MeV
+    theta1 : np.ndarray
+        (N) Vector of scattering angle at each step in radians
+    theta2 : np.ndarray
+        (N) Vector of second projected angles if the angles are split,
+        empty otherwise
+    M : float
+        Particle mass in MeV/c^2
+    dx : float
+        Step length in cm
+    z : float
+       Impinging partile charge in multiples of electron charge
+    res : float
+        Angular resolution in radians
+
+    Returns
+    -------
+    np.ndarray
+        (C) Negative log likelihood of each candidate
+    '''
+    # Initialize the kinetic energies and momenta of the candidates
+    num_candidates = len(T0s)
+    split_angle = len(theta2) > 0
+    nlls = np.zeros(num_candidates, dtype=np.float64)
+    kes = T0s.copy()
+    moms = np.sqrt(kes**2 + 2 * M * kes)
+
+    # Step all candidates through the track at once
+    for s in range(len(theta1)):
+        for c in range(num_candidates):
+            # If the particle stopped before the end of the track, T0 is too low
+            if nlls[c] == np.inf:
+                continue
+
+            ke = kes[c] + dx * bethe_bloch_lar(kes[c], M, z)
+            if ke <= 0.:
+                nlls[c] = np.inf
+                continue
+
+            # Define the segment momentum as the geometric mean of its ends
+            mom = np.sqrt(ke**2 + 2 * M * ke)
+            mom_step = np.sqrt(mom * moms[c])
+            kes[c], moms[c] = ke, mom
+
+            # Get the expected scattering angle, including resolution
+            theta0 = highland(mom_step, M, dx, z)
+            theta0 = np.sqrt(theta0**2 + res**2)
+
+            # Update the negative log likelihood
+            nlls[c] += 0.5 * (theta1[s]/theta0)**2 + 2*np.log(theta0)
+            if split_angle:
+                nlls[c] += 0.5 * (theta2[s]/theta0)**2
+
+    return nlls
+
+
 @nb.njit(cache=True)
 def mcs_nll_lar(T0, theta, M, dx, z = 1,
         split_angle = False, res_a = 0.25, res_b = 1.25):
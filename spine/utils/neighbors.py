@@ -0,0 +1,411 @@
+"""Module with a shared voxel neighborhood service.
+
+Several algorithms (DBSCAN, graph constructors, local direction or dE/dx
+estimators) need to find the neighbors of voxels. This module bins the
+voxels of a batch into a hashed sparse grid once and answers radius and
+k nearest-neighbor queries against it, caching the results so that they
+can be reused by every consumer within the same iteration.
+
+The neighborhood of a batch is typically obtained through
+:meth:`TensorBatch.get_neighborhood`, which caches it on the batch.
+"""
+
+import numpy as np
+import numba as nb
+
+__all__ = ['VoxelNeighborhood']
+
+
+class VoxelNeighborhood:
+    """Sparse grid of voxels which answers neighborhood queries.
+
+    The voxels are binned into cubic cells of a given size. Each non-empty
+    cell is identified by a linear key which includes the batch ID, so that
+    voxels which belong to separate entries are never neighbors. The voxels
+    are sorted by cell key and the cells are looked up by binary search.
+
+    The queries which involve all the voxels of the batch are cached.
+
+    Attributes
+    ----------
+    size : float
+        Size of the grid cells
+    num_points : int
+        Number of voxels in the grid
+    """
+
+    def __init__(self, voxels, batch_ids, size):
+        """Bins the voxels into a grid of cells.
+
+        Parameters
+        ----------
+        voxels : np.ndarray
+            (N, 3) Voxel coordinates
+        batch_ids : np.ndarray
+            (N) Batch ID of each voxel
+        size : float
+            Size of the grid cells. Should be of the order of the typical
+            query radius (queries are cheapest when the radius is <= size)
+        """
+        # Check on the input
+        assert size > 0, "The size of the grid cells must be positive."
+        assert voxels.shape[1] == 3, "Only supports 3D points for now."
+
+        # Store the voxels and build the grid
+        self.size = float(size)
+        self.num_points = len(voxels)
+        self.voxels = np.ascontiguousarray(voxels, dtype=np.float64)
+        self.batch_ids = np.ascontiguousarray(batch_ids, dtype=np.int64)
+        self.order, self.starts, self.cell_keys, self.lower, self.dims = (
+                _build_grid(self.voxels, self.batch_ids, self.size))
+
+        # Initialize the query cache
+        self._cache = {}
+
+    def query_radius(self, points, batch_ids, radius):
+        """Finds the voxels within a certain radius of a set of points.
+
+        Parameters
+        ----------
+        points : np.ndarray
+            (M, 3) Query point coordinates
+        batch_ids : np.ndarray
+            (M) Batch ID of each query point
+        radius : float
+            Radius within which (inclusive) voxels are considered neighbors
+
+        Returns
+        -------
+        offsets : np.ndarray
+            (M + 1) Position of the first neighbor of each point in `index`
+        index : np.ndarray
+            (K) Sorted index of the neighbor voxels of each query point
+        """
+        return _query_radius(
+                self.voxels, self.order, self.starts, self.cell_keys,
+                self.lower, self.dims, self.size,
+                np.ascontiguousarray(points, dtype=np.float64),
+                np.ascontiguousarray(batch_ids, dtype=np.int64),
+                float(radius))
+
+    def radius(self, radius):
+        """Finds the neighbors of each voxel within a certain radius.
+
+        The voxel itself is included in its own list of neighbors.
+
+        Parameters
+        ----------
+        radius : float
+            Radius within which (inclusive) voxels are considered neighbors
+
+        Returns
+        -------
+        offsets : np.ndarray
+            (N + 1) Position of the first neighbor of each voxel in `index`
+        index : np.ndarray
+            (K) Sorted index of the neighbor voxels of each voxel
+        """
+        key = ('radius', float(radius))
+        if key not in self._cache:
+            self._cache[key] = self.query_radius(
+                    self.voxels, self.batch_ids, radius)
+
+        return self._cache[key]
+
+    def radius_graph(self, radius):
+        """Builds the graph which connects voxels within a certain radius.
+
+        Parameters
+        ----------
+        radius : float
+            Radius within which (inclusive) voxels are connected
+
+        Returns
+        -------
+        np.ndarray
+            (2, E) Sorted list of edges, from lower to higher voxel index
+        """
+        key = ('radius_graph', float(radius))
+        if key not in self._cache:
+            offsets, index = self.radius(radius)
+            sources = np.repeat(np.arange(self.num_points), np.diff(offsets))
+            mask = np.where(index > sources)[0]
+            self._cache[key] = np.vstack((sources[mask], index[mask]))
+
+        return self._cache[key]
+
+    def knn(self, k):
+        """Finds the k nearest neighbors of each voxel.
+
+        The voxel itself is excluded from its own list of neighbors. Ties are
+        broken by picking the voxel with the lowest index.
+
+        Parameters
+        ----------
+        k : int
+            Number of neighbors to find
+
+        Returns
+        -------
+        index : np.ndarray
+            (N, k) Index of the neighbors of each voxel, sorted by increasing
+            distance. Padded with -1 if there are not enough voxels in the entry
+        dists : np.ndarray
+            (N, k) Distance to each of the neighbors (inf when padded)
+        """
+        key = ('knn', int(k))
+        if key not in self._cache:
+            self._cache[key] = _query_knn(
+                    self.voxels, self.batch_ids, self.order, self.starts,
+                    self.cell_keys, self.lower, self.dims, self.size, int(k))
+
+        return self._cache[key]
+
+    def dbscan(self, eps, index=None):
+        """Runs DBSCAN (with `min_samples` of 1) on the voxels.
+
+        Two voxels are neighbors if they are within `eps` of each other
+        (inclusive), like in :class:`sklearn.cluster.DBSCAN`.
+
+        Parameters
+        ----------
+        eps : float
+            Distance within which two voxels are considered neighbors
+        index : np.ndarray, optional
+            (M) Subset of voxels to cluster. If not specified, use all voxels
+
+        Returns
+        -------
+        np.ndarray
+            (M) Group assignments, numbered in order of first appearance
+        """
+        if index is None:
+            index = np.arange(self.num_points)
+
+        offsets, neighbors = self.radius(eps)
+
+        return _connected_components(
+                offsets, neighbors, np.asarray(index, dtype=np.int64))
+
+
+@nb.njit(cache=True)
+def _build_grid(x: nb.float64[:,:],
+                batch_ids: nb.int64[:],
+                size: nb.float64) -> (
+                        nb.int64[:], nb.int64[:], nb.int64[:],
+                        nb.float64[:], nb.int64[:]):
+    # Assign each point to a cell
+    num_points = len(x)
+    cells = np.empty((num_points, 3), dtype=np.int64)
+    lower = np.zeros(3, dtype=np.float64)
+    dims = np.ones(3, dtype=np.int64)
+    for d in range(3):
+        if num_points:
+            lower[d] = np.min(x[:, d])
+        for i in range(num_points):
+            cells[i, d] = int((x[i, d] - lower[d])/size)
+        if num_points:
+            dims[d] = np.max(cells[:, d]) + 1
+
+    # Sort the points by cell key (stable, to keep the original order
+    # within each cell), find the range of points in each cell
+    keys = ((batch_ids*dims[0] + cells[:, 0])*dims[1]
+            + cells[:, 1])*dims[2] + cells[:, 2]
+    order = np.argsort(keys, kind='mergesort')
+    sorted_keys = keys[order]
+    starts = np.empty(num_points + 1, dtype=np.int64)
+    num_cells = 0
+    for i in range(num_points):
+        if i == 0 or sorted_keys[i] != sorted_keys[i-1]:
+            starts[num_cells] = i
+            num_cells += 1
+    starts[num_cells] = num_points
+    cell_keys = sorted_keys[starts[:num_cells]]
+
+    return order, starts[:num_cells+1], cell_keys, lower, dims
+
+
+@nb.njit(cache=True)
+def _query_radius(x: nb.float64[:,:],
+                  order: nb.int64[:],
+                  starts: nb.int64[:],
+                  cell_keys: nb.int64[:],
+                  lower: nb.float64[:],
+                  dims: nb.int64[:],
+                  size: nb.float64,
+                  points: nb.float64[:,:],
+                  batch_ids: nb.int64[:],
+                  radius: nb.float64) -> (nb.int64[:], nb.int64[:]):
+    # Loop over the query points twice: count the neighbors, then store them
+    reach = int(np.ceil(radius/size))
+    radius_sq = radius**2
+    num_cells = len(cell_keys)
+    offsets = np.zeros(len(points) + 1, dtype=np.int64)
+    index = np.empty(0, dtype=np.int64)
+    for step in range(2):
+        if step == 1:
+            offsets[1:] = np.cumsum(offsets[1:])
+            index = np.empty(offsets[-1], dtype=np.int64)
+
+        for q in range(len(points)):
+            # Find the cell of the query point
+            cell = np.empty(3, dtype=np.int64)
+            for d in range(3):
+                cell[d] = int(np.floor((points[q, d] - lower[d])/size))
+
+            # Loop over the cells within reach
+            n = 0
+            for cx in range(cell[0] - reach, cell[0] + reach + 1):
+                if cx < 0 or cx >= dims[0]:
+                    continue
+                for cy in range(cell[1] - reach, cell[1] + reach + 1):
+                    if cy < 0 or cy >= dims[1]:
+                        continue
+                    for cz in range(cell[2] - reach, cell[2] + reach + 1):
+                        if cz < 0 or cz >= dims[2]:
+                            continue
+
+                        # Find the cell, skip if it is empty
+                        key = ((batch_ids[q]*dims[0] + cx)*dims[1]
+                               + cy)*dims[2] + cz
+                        c = np.searchsorted(cell_keys, key)
+                        if c == num_cells or cell_keys[c] != key:
+                            continue
+
+                        # Check the distance to each point in the cell
+                        for jj in range(starts[c], starts[c+1]):
+                            j = order[jj]
+                            dist_sq = ((points[q, 0] - x[j, 0])**2 +
+                                       (points[q, 1] - x[j, 1])**2 +
+                                       (points[q, 2] - x[j, 2])**2)
+                            if dist_sq <= radius_sq:
+                                if step == 1:
+                                    index[offsets[q] + n] = j
+                                n += 1
+
+            if step == 0:
+                offsets[q+1] = n
+            else:
+                index[offsets[q]:offsets[q+1]] = np.sort(
+                        index[offsets[q]:offsets[q+1]])
+
+    return offsets, index
+
+
+@nb.njit(cache=True)
+def _query_knn(x: nb.float64[:,:],
+               batch_ids: nb.int64[:],
+               order: nb.int64[:],
+               starts: nb.int64[:],
+               cell_keys: nb.int64[:],
+               lower: nb.float64[:],
+               dims: nb.int64[:],
+               size: nb.float64,
+               k: nb.int64) -> (nb.int64[:,:], nb.float64[:,:]):
+    # Loop over the points, grow the search cube until the k-th neighbor
+    # is guaranteed to be found (any point outside of a cube of reach R
+    # is at least R cells away from the query point)
+    num_points = len(x)
+    num_cells = len(cell_keys)
+    max_reach = np.max(dims)
+    index = np.full((num_points, k), -1, dtype=np.int64)
+    dists = np.full((num_points, k), np.inf, dtype=np.float64)
+    for i in range(num_points):
+        # Find the cell of the query point
+        cell = np.empty(3, dtype=np.int64)
+        for d in range(3):
+            cell[d] = int((x[i, d] - lower[d])/size)
+
+        reach = 1
+        while True:
+            # Loop over the cells within reach, keep the k best candidates
+            # sorted by distance, then index (insertion sort)
+            index[i] = -1
+            dists[i] = np.inf
+            for cx in range(cell[0] - reach, cell[0] + reach + 1):
+                if cx < 0 or cx >= dims[0]:
+                    continue
+                for cy in range(cell[1] - reach, cell[1] + reach + 1):
+                    if cy < 0 or cy >= dims[1]:
+                        continue
+                    for cz in range(cell[2] - reach, cell[2] + reach + 1):
+                        if cz < 0 or cz >= dims[2]:
+                            continue
+                        key = ((batch_ids[i]*dims[0] + cx)*dims[1]
+                               + cy)*dims[2] + cz
+                        c = np.searchsorted(cell_keys, key)
+                        if c == num_cells or cell_keys[c] != key:
+                            continue
+                        for jj in range(starts[c], starts[c+1]):
+                            j = order[jj]
+                            if j == i:
+                                continue
+                            dist = np.sqrt((x[i, 0] - x[j, 0])**2 +
+                                           (x[i, 1] - x[j, 1])**2 +
+                                           (x[i, 2] - x[j, 2])**2)
+                            if dist > dists[i, k-1] or (
+                                    dist == dists[i, k-1] and
+                                    j > index[i, k-1] > -1):
+                                continue
+                            pos = k - 1
+                            while pos > 0 and (
+                                    dist < dists[i, pos-1] or
+                                    (dist == dists[i, pos-1] and
+                                     j < index[i, pos-1])):
+                                dists[i, pos] = dists[i, pos-1]
+                                index[i, pos] = index[i, pos-1]
+                                pos -= 1
+                            dists[i, pos] = dist
+                            index[i, pos] = j
+
+            # Check that the candidate set is complete, expand otherwise
+            if reach >= max_reach or dists[i, k-1] <= reach*size:
+                break
+
+            reach += 1
+
+    return index, dists
+
+
+@nb.njit(cache=True)
+def _connected_components(offsets: nb.int64[:],
+                          neighbors: nb.int64[:],
+                          index: nb.int64[:]) -> nb.int64[:]:
+    # Map each voxel onto its position in the subset (-1 if not in it)
+    num_points = len(offsets) - 1
+    mapping = np.full(num_points, -1, dtype=np.int64)
+    for i, v in enumerate(index):
+        mapping[v] = i
+
+    # Merge the groups of neighbors (find roots with path halving)
+    parents = np.arange(len(index))
+    for i, v in enumerate(index):
+        for jj in range(offsets[v], offsets[v+1]):
+            j = mapping[neighbors[jj]]
+            if j < 0 or j == i:
+                continue
+            ri = i
+            while parents[ri] != ri:
+                parents[ri] = parents[parents[ri]]
+                ri = parents[ri]
+            rj = j
+            while parents[rj] != rj:
+                parents[rj] = parents[parents[rj]]
+                rj = parents[rj]
+            if ri != rj:
+                parents[max(ri, rj)] = min(ri, rj)
+
+    # Number the groups in order of appearance of their first point
+    labels = np.empty(len(index), dtype=np.int64)
+    group_ids = np.full(len(index), -1, dtype=np.int64)
+    count = 0
+    for i in range(len(index)):
+        r = i
+        while parents[r] != r:
+            r = parents[r]
+        if group_ids[r] < 0:
+            group_ids[r] = count
+            count += 1
+        labels[i] = group_ids[r]
+
+    return labels
@@ -19,6 +19,34 @@ def seed(seed: int) -> None:
     np.random.seed(seed)
 
 
+@nb.njit(cache=True)
+def csr_to_list(index: nb.int64[:],
+                edges: nb.int64[:]) -> nb.types.List(nb.int64[:]):
+    """Builds a typed list of indexes from a flat (CSR) representation.
+
+    The elements of the list are views of the flat index. Building the list
+    in compiled code is much faster than converting a reflected list of
+    arrays to a typed list with `nb.typed.List`.
+
+    Parameters
+    ----------
+    index : np.ndarray
+        (M) Concatenated indexes
+    edges : np.ndarray
+        (I + 1) Boundaries of each index in the concatenated index
+
+    Returns
+    -------
+    numba.typed.List
+        (I) List of indexes
+    """
+    index_list = nb.typed.List.empty_list(nb.int64[::1])
+    for i in range(len(edges) - 1):
+        index_list.append(index[edges[i]:edges[i+1]])
+
+    return index_list
+
+
 @nb.njit(cache=True)
 def submatrix(x: nb.float32[:,:],
               index1: nb.int32[:],
@@ -511,13 +539,23 @@ def union_find(edge_index: nb.int64[:,:],
 @nb.njit(cache=True)
 def dbscan(x: nb.float32[:, :],
            eps: nb.float32,
-           metric: str = 'euclidean') -> nb.float32[:]:
+           metric: str = 'euclidean',
+           algorithm: str = 'brute') -> nb.int64[:]:
     """Runs DBSCAN on 3D points and returns the group assignments.
 
+    Two algorithms:
+    - `brute`: compute pdist, threshold it and build groups from the
+               resulting (dense) adjacency matrix. Quadratic in memory.
+    - `grid`: bin the points in a grid of cells of size `eps` and only
+              compare points in neighboring cells. Linear in memory.
+
     Notes
     -----
     The traditional 'min_samples' is always set to 1 here.
 
+    The `grid` algorithm numbers the groups in order of appearance of their
+    first point, the `brute` algorithm does not. The groups are identical.
+
     Parameters
     ----------
     x : np.ndarray
@@ -526,17 +564,192 @@ def dbscan(x: nb.float32[:, :],
         Distance below which two points are considered neighbors
     metric : str, default 'euclidean'
         Distance metric used to compute pdist
+    algorithm : str, default 'brute'
+        Name of the algorithm to use: `brute` or `grid`
 
     Returns
     -------
     np.ndarray
         (N) Group assignments
     """
-    # Produce a sparse adjacency matrix (edge index)
-    edges = np.vstack(np.where(pdist(x, metric) < eps)).T
-    
-    # Build groups
-    return union_find(edges, len(x), return_inverse=True)
+    if algorithm == 'brute':
+        # Produce a sparse adjacency matrix (edge index)
+        edges = np.vstack(np.where(pdist(x, metric) < eps)).T
+
+        # Build groups
+        return union_find(edges, len(x), return_inverse=True)
+
+    elif algorithm == 'grid':
+        return dbscan_grid(x, eps, metric)
+
+    else:
+        raise ValueError("Algorithm not supported")
+
+
+@nb.njit(cache=True)
+def grid_index(x: nb.float32[:, :],
+               size: nb.float32) -> (nb.int64[:], nb.int64[:],
+                                     nb.int64[:], nb.int64[:]):
+    """Bins 3D points into a regular grid of cubic cells.
+
+    The cells are identified by a linear key, padded so that the key of any
+    of the 26 neighbors of a cell can be obtained by adding an offset.
+
+    Parameters
+    ----------
+    x : np.ndarray
+        (N, 3) array of point coordinates
+    size : float
+        Size of the grid cells
+
+    Returns
+    -------
+    order : np.ndarray
+        (N) Index which sorts the points by cell key
+    starts : np.ndarray
+        (N_c + 1) Position of the first point of each cell in `order`
+    cell_keys : np.ndarray
+        (N_c) Sorted keys of the non-empty cells
+    offsets : np.ndarray
+        (13) Key offsets of the forward half of the neighbors of a cell
+    """
+    # Assign each point to a cell, padded by one on each side
+    num_points = len(x)
+    cells = np.empty((num_points, 3), dtype=np.int64)
+    dims = np.zeros(3, dtype=np.int64)
+    for d in range(3):
+        lower = np.min(x[:, d])
+        for i in range(num_points):
+            cells[i, d] = int((x[i, d] - lower)/size) + 1
+        dims[d] = np.max(cells[:, d]) + 2
+
+    # Sort the points by cell key, find the range of points in each cell
+    keys = (cells[:, 0]*dims[1] + cells[:, 1])*dims[2] + cells[:, 2]
+    order = np.argsort(keys)
+    sorted_keys = keys[order]
+    starts = np.empty(num_points + 1, dtype=np.int64)
+    num_cells = 0
+    for i in range(num_points):
+        if i == 0 or sorted_keys[i] != sorted_keys[i-1]:
+            starts[num_cells] = i
+            num_cells += 1
+    starts[num_cells] = num_points
+    cell_keys = sorted_keys[starts[:num_cells]]
+
+    # List the forward neighbor cell key offsets (half of the 26 neighbors)
+    offsets = np.empty(13, dtype=np.int64)
+    n = 0
+    for dx in range(-1, 2):
+        for dy in range(-1, 2):
+            for dz in range(-1, 2):
+                if dx > 0 or (dx == 0 and (dy > 0 or (dy == 0 and dz > 0))):
+                    offsets[n] = (dx*dims[1] + dy)*dims[2] + dz
+                    n += 1
+
+    return order, starts[:num_cells+1], cell_keys, offsets
+
+
+@nb.njit(cache=True)
+def dbscan_grid(x: nb.float32[:, :],
+                eps: nb.float32,
+                metric: str = 'euclidean') -> nb.int64[:]:
+    """Runs DBSCAN on 3D points using a grid of cells of size `eps`.
+
+    Two points closer than `eps` are necessarily in the same or in adjacent
+    cells, whichever the metric. The points are sorted by cell and each
+    cell is only compared to itself and its 13 forward neighbors, while
+    the groups are built on the fly using a disjoint-set forest.
+
+    Parameters
+    ----------
+    x : np.ndarray
+        (N, 3) array of point coordinates
+    eps : float
+        Distance below which two points are considered neighbors
+    metric : str, default 'euclidean'
+        Distance metric: 'euclidean', 'cityblock' or 'chebyshev'
+
+    Returns
+    -------
+    np.ndarray
+        (N) Group assignments, numbered in order of first appearance
+    """
+    # Check on the input
+    assert x.shape[1] == 3, "Only supports 3D points for now."
+    if (metric != 'euclidean' and metric != 'cityblock' and
+        metric != 'chebyshev'):
+        raise ValueError("Distance metric not recognized.")
+
+    num_points = len(x)
+    parents = np.arange(num_points)
+    if num_points == 0:
+        return parents
+
+    # Build the grid of cells
+    order, starts, cell_keys, offsets = grid_index(x, eps)
+    num_cells = len(cell_keys)
+
+    # Loop over the cells, compare points in the cell and its neighbors
+    for c in range(num_cells):
+        for o in range(14):
+            # Find the neighbor cell, skip if it is empty
+            if o == 0:
+                nc = c
+            else:
+                key = cell_keys[c] + offsets[o-1]
+                nc = np.searchsorted(cell_keys, key)
+                if nc == num_cells or cell_keys[nc] != key:
+                    continue
+
+            for ii in range(starts[c], starts[c+1]):
+                i = order[ii]
+                jstart = ii + 1 if o == 0 else starts[nc]
+                for jj in range(jstart, starts[nc+1]):
+                    j = order[jj]
+
+                    # Check that the points are neighbors
+                    if metric == 'euclidean':
+                        dist = np.sqrt(
+                                (x[i][0] - x[j][0])**2 +
+                                (x[i][1] - x[j][1])**2 +
+                                (x[i][2] - x[j][2])**2)
+                    elif metric == 'cityblock':
+                        dist = (abs(x[i][0] - x[j][0]) +
+                                abs(x[i][1] - x[j][1]) +
+                                abs(x[i][2] - x[j][2]))
+                    else:
+                        dist = max(max(abs(x[i][0] - x[j][0]),
+                                       abs(x[i][1] - x[j][1])),
+                                   abs(x[i][2] - x[j][2]))
+                    if dist >= eps:
+                        continue
+
+                    # Merge the two groups (find roots with path halving)
+                    ri = i
+                    while parents[ri] != ri:
+                        parents[ri] = parents[parents[ri]]
+                        ri = parents[ri]
+                    rj = j
+                    while parents[rj] != rj:
+                        parents[rj] = parents[parents[rj]]
+                        rj = parents[rj]
+                    if ri != rj:
+                        parents[max(ri, rj)] = min(ri, rj)
+
+    # Number the groups in order of appearance of their first point
+    labels = np.empty(num_points, dtype=np.int64)
+    mapping = np.full(num_points, -1, dtype=np.int64)
+    count = 0
+    for i in range(num_points):
+        r = i
+        while parents[r] != r:
+            r = parents[r]
+        if mapping[r] < 0:
+            mapping[r] = count
+            count += 1
+        labels[i] = mapping[r]
+
+    return labels
 
 
 @nb.njit(cache=True)
@@ -570,18 +783,21 @@ def farthest_pair(x: nb.float32[:,:],
     """Algorithm which finds the two points which are
     farthest from each other in a set.
 
-    Two algorithms:
+    Three algorithms:
     - `brute`: compute pdist, use argmax
     - `recursive`: Start with the first point in one set, find the farthest
                    point in the other, move to that point, repeat. This
                    algorithm is *not* exact, but a good and very quick proxy.
+    - `bbox`: Partition the points into boxes, only compare the points
+              in pairs of boxes which can contain a farther pair than the
+              best one found so far. This algorithm is exact.
 
     Parameters
     ----------
     x : np.ndarray
         (N, 3) array of point coordinates
     algorithm : str
-        Name of the algorithm to use: `brute` or `recursive`
+        Name of the algorithm to use: `brute`, `recursive` or `bbox`
 
     Returns
     -------
@@ -607,6 +823,10 @@ def farthest_pair(x: nb.float32[:,:],
             dist = dists[idxs[~subidx]]
             subidx = ~subidx
 
+    elif algorithm == 'bbox':
+        i, j, dist = _farthest_pair_bbox(x)
+        idxs = [i, j]
+
     else:
         raise ValueError("Algorithm not supported")
 
@@ -621,11 +841,14 @@ def closest_pair(x1: nb.float32[:,:],
     """Algorithm which finds the two points which are closest to each other
     from two separate sets.
 
-    Two algorithms:
+    Three algorithms:
     - `brute`: compute cdist, use argmin
     - `recursive`: Start with one point in one set, find the closest
                    point in the other set, move to theat point, repeat. This
                    algorithm is *not* exact, but a good and very quick proxy.
+    - `bbox`: Partition each set into boxes, only compare the points in
+              pairs of boxes which can contain a closer pair than the best
+              one found so far. This algorithm is exact.
 
     Parameters
     ----------
@@ -634,7 +857,7 @@ def closest_pair(x1: nb.float32[:,:],
     x1 : np.ndarray
         (Nx3) array of point coordinates in the second set
     algorithm : str
-        Name of the algorithm to use: `brute` or `recursive`
+        Name of the algorithm to use: `brute`, `recursive` or `bbox`
     seed : bool
         Whether or not to use the two farthest points in one set to seed the recursion
 
@@ -683,7 +906,151 @@ def closest_pair(x1: nb.float32[:,:],
             idxs[~set_id] = np.argmin(dists)
             dist = dists[idxs[~set_id]]
             subidx = ~set_id
+
+    elif algorithm == 'bbox':
+        i, j, dist = _closest_pair_bbox(x1, x2)
+        idxs = [i, j]
+
     else:
         raise ValueError("Algorithm not supported")
 
     return idxs[0], idxs[1], dist
+
+
+@nb.njit(cache=True)
+def _farthest_pair_bbox(x: nb.float32[:,:]) -> (nb.int64, nb.int64, nb.float64):
+    # If there are less than two points, trivial
+    if len(x) < 2:
+        return 0, 0, 0.
+
+    # Partition the points into boxes of ~sqrt(N) points
+    leaf_size = max(16, int(np.sqrt(len(x))))
+    perm, edges, lower, upper = _bbox_partition(x, leaf_size)
+
+    # Compute the largest possible distance between each pair of boxes
+    num_boxes = len(edges) - 1
+    num_pairs = num_boxes*(num_boxes + 1)//2
+    box_a = np.empty(num_pairs, dtype=np.int64)
+    box_b = np.empty(num_pairs, dtype=np.int64)
+    bounds = np.zeros(num_pairs, dtype=np.float64)
+    k = 0
+    for a in range(num_boxes):
+        for b in range(a, num_boxes):
+            box_a[k], box_b[k] = a, b
+            for d in range(x.shape[1]):
+                bounds[k] += max(upper[b, d] - lower[a, d],
+                                 upper[a, d] - lower[b, d])**2
+            k += 1
+
+    # Loop over pairs of boxes, from the farthest to the closest. Stop as
+    # soon as no box pair can contain a farther pair of points
+    best_i, best_j, best = 0, 0, -1.
+    for k in np.argsort(-bounds):
+        if bounds[k] <= best:
+            break
+
+        a, b = box_a[k], box_b[k]
+        for ii in range(edges[a], edges[a+1]):
+            i = perm[ii]
+            start = ii + 1 if a == b else edges[b]
+            for jj in range(start, edges[b+1]):
+                j = perm[jj]
+                dist = 0.
+                for d in range(x.shape[1]):
+                    dist += (float(x[i, d]) - x[j, d])**2
+                if dist > best:
+                    best_i, best_j, best = i, j, dist
+
+    return min(best_i, best_j), max(best_i, best_j), np.sqrt(best)
+
+
+@nb.njit(cache=True)
+def _closest_pair_bbox(x1: nb.float32[:,:],
+                       x2: nb.float32[:,:]) -> (nb.int64, nb.int64, nb.float64):
+    # Partition each set of points into boxes of ~sqrt(N) points
+    perm1, edges1, lower1, upper1 = _bbox_partition(
+            x1, max(16, int(np.sqrt(len(x1)))))
+    perm2, edges2, lower2, upper2 = _bbox_partition(
+            x2, max(16, int(np.sqrt(len(x2)))))
+
+    # Compute the smallest possible distance between each pair of boxes
+    num_boxes1, num_boxes2 = len(edges1) - 1, len(edges2) - 1
+    bounds = np.zeros(num_boxes1*num_boxes2, dtype=np.float64)
+    for a in range(num_boxes1):
+        for b in range(num_boxes2):
+            k = a*num_boxes2 + b
+            for d in range(x1.shape[1]):
+                bounds[k] += max(0., lower1[a, d] - upper2[b, d],
+                                 lower2[b, d] - upper1[a, d])**2
+
+    # Loop over pairs of boxes, from the closest to the farthest. Stop as
+    # soon as no box pair can contain a closer pair of points
+    best_i, best_j, best = 0, 0, np.inf
+    for k in np.argsort(bounds):
+        if bounds[k] >= best:
+            break
+
+        a, b = k//num_boxes2, k%num_boxes2
+        for ii in range(edges1[a], edges1[a+1]):
+            i = perm1[ii]
+            for jj in range(edges2[b], edges2[b+1]):
+                j = perm2[jj]
+                dist = 0.
+                for d in range(x1.shape[1]):
+                    dist += (float(x1[i, d]) - x2[j, d])**2
+                if dist < best:
+                    best_i, best_j, best = i, j, dist
+
+    return best_i, best_j, np.sqrt(best)
+
+
+@nb.njit(cache=True)
+def _bbox_partition(x: nb.float32[:,:],
+                    leaf_size: nb.int64) -> (
+                            nb.int64[:], nb.int64[:],
+                            nb.float64[:,:], nb.float64[:,:]):
+    # Recursively split the points at the median of the longest box side,
+    # until each box contains at most `leaf_size` points. The boxes are
+    # produced depth-first, so that each one is a contiguous range of `perm`
+    num_points, dim = x.shape
+    perm = np.arange(num_points)
+    starts = np.empty(num_points + 1, dtype=np.int64)
+    lower = np.empty((num_points, dim), dtype=np.float64)
+    upper = np.empty((num_points, dim), dtype=np.float64)
+    stack = np.empty((num_points + 1, 2), dtype=np.int64)
+    stack[0] = 0, num_points
+    num_stack, num_boxes = 1, 0
+    while num_stack > 0:
+        # Compute the bounding box of the range
+        num_stack -= 1
+        start, end = stack[num_stack]
+        if start == end:
+            continue
+
+        lo = np.full(dim, np.inf)
+        hi = np.full(dim, -np.inf)
+        for ii in range(start, end):
+            for d in range(dim):
+                lo[d] = min(lo[d], x[perm[ii], d])
+                hi[d] = max(hi[d], x[perm[ii], d])
+
+        # If the range is small enough (or all points are identical), store
+        axis = np.argmax(hi - lo)
+        if end - start <= leaf_size or hi[axis] == lo[axis]:
+            starts[num_boxes] = start
+            lower[num_boxes], upper[num_boxes] = lo, hi
+            num_boxes += 1
+            continue
+
+        # Otherwise, split the range at the median along the longest side
+        order = np.argsort(x[perm[start:end], axis])
+        perm[start:end] = perm[start:end][order]
+        mid = start + (end - start)//2
+        stack[num_stack] = mid, end
+        stack[num_stack + 1] = start, mid
+        num_stack += 2
+
+    starts[num_boxes] = num_points
+
+    return (perm, starts[:num_boxes + 1],
+            lower[:num_boxes], upper[:num_boxes])
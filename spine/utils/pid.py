@@ -6,7 +6,7 @@ from scipy.optimize import minimize
 from .globals import TRACK_SHP, MUON_PID, PION_PID, PROT_PID, KAON_PID, PID_MASSES
 from .tracking import get_track_segment_dedxs
 from .energy_loss import (
-        csda_table_spline, csda_ke_lar, bethe_bloch_lar, bethe_bloch_mpv_lar)
+        CSDATable, csda_ke_lar, bethe_bloch_lar, bethe_bloch_mpv_lar)
 
 
 class TemplateParticleIdentifier:
@@ -54,10 +54,9 @@ class TemplateParticleIdentifier:
         self.max_rr = max_rr
         self.optimize_orient = optimize_orient
 
-        # If needed, initialize the spline fits to the dE/dx templates once
+        # If needed, load the dE/dx templates once
         self.include_pids = include_pids
-        self.tables = {
-                pid: csda_table_spline(pid, value='dE/dx') for pid in include_pids}
+        self.table = CSDATable(include_pids)
 
         # Store the tracking parameters
         # TODO: make this is a class which owns the parameters
@@ -193,7 +192,7 @@ class TemplateParticleIdentifier:
             Expected dE/dxs values from a table or the theory
         """
         if self.use_table:
-            exp_dedxs = self.tables[pid](rrs)
+            exp_dedxs = self.table.dedx(rrs, pid)
 
         else:
             mass = PID_MASSES[pid]
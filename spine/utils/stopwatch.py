@@ -155,6 +155,20 @@ class Stopwatch:
         self._time  += self.pause - self.start
         self._start  = Time()
 
+    def add(self, time):
+        """Records a time measured elsewhere as one start/stop cycle.
+
+        Parameters
+        ----------
+        time : Time
+            Execution time to record
+        """
+        self._start = Time(0., 0.)
+        self._stop = time.copy()
+        self._pause = Time()
+        self._time = time.copy()
+        self._total += time
+
     @property
     def time(self):
         """Time between the last start and the last stop."""
@@ -366,3 +380,26 @@ class StopwatchManager:
                 self._watch[key] = value
             else:
                 self._watch[f'{prefix}_{key}'] = value
+
+    def merge(self, other, prefix=None):
+        """Adds the last times recorded by another stopwatch manager to the
+        stopwatches of this manager.
+
+        This is used to combine the times recorded by several processes which
+        each report after every iteration they run: the last time of each of
+        their stopwatches is that of the iteration, which is added to the sum
+        of times of the corresponding stopwatch of this manager.
+
+        Parameters
+        ----------
+        other : StopwatchManager
+             Execution times recorded by another process
+        prefix : str, optional
+             String to prefix the timer key with
+        """
+        for key, value in other.items():
+            if prefix is not None:
+                key = f'{prefix}_{key}'
+            if key not in self._watch:
+                self._watch[key] = Stopwatch()
+            self._watch[key].add(value.time)
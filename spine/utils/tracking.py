@@ -1,3 +1,13 @@
+"""Module with functions to segment tracks and measure their properties.
+
+Tracks can be segmented one at a time (:func:`get_track_segments`) or all at
+once in a single parallel pass (:func:`get_track_segments_batch`). The
+:class:`TrackSegmentCache` stores the segmentation of each track so that
+it can be shared by all the algorithms which use it in an event.
+"""
+
+import hashlib
+
 import numpy as np
 import numba as nb
 
@@ -196,12 +206,19 @@ def get_track_deposition_gradient(coordinates: nb.float32[:,:],
     seg_rrs = seg_rrs[valid_index]
 
     # Compute the dE/dx gradient
-    gradient = np.cov(seg_rrs, seg_dedxs)[0,1]/np.std(seg_rrs)**2 \
-            if np.std(seg_rrs) > 0. else 0.
+    gradient = _get_deposition_gradient(seg_dedxs, seg_rrs)
 
     return gradient, seg_dedxs, seg_rrs, seg_lengths
 
 
+@nb.njit(cache=True)
+def _get_deposition_gradient(seg_dedxs: nb.float32[:],
+                             seg_rrs: nb.float32[:]) -> nb.float32:
+    # Compute the slope of the dE/dx w.r.t. the residual range
+    return np.cov(seg_rrs, seg_dedxs)[0,1]/np.std(seg_rrs)**2 \
+            if np.std(seg_rrs) > 0. else 0.
+
+
 @nb.njit(cache=True)
 def get_track_segment_dedxs(coordinates: nb.float32[:,:],
                             values: nb.float32[:],
@@ -261,25 +278,39 @@ def get_track_segment_dedxs(coordinates: nb.float32[:,:],
     seg_rrs  = np.empty(len(seg_clusts), dtype=np.float32)
     residual_range = 0.
     for i, seg in enumerate(seg_clusts):
-        # Compute the rate of energy/charge deposition
-        # If the segment has insufficient content, return dummy values
-        dx = seg_lengths[i]
-        if len(seg) >= min_count and dx > 0.:
-            de = np.sum(values[seg])
-            dde = np.std(values[seg])*np.sqrt(len(seg))
-            seg_dedxs[i] = de/dx
-            seg_errs[i] = dde/dx
-        else:
-            seg_dedxs[i] = -1.
-            seg_errs[i] = -1.
-
-        # Compute the residual_range
-        seg_rrs[i]  = residual_range + dx/2.
-        residual_range += dx
+        residual_range = _fill_segment_dedx(
+                values[seg], seg_lengths[i], min_count, residual_range,
+                i, seg_dedxs, seg_errs, seg_rrs)
 
     return seg_dedxs, seg_errs, seg_rrs, seg_clusts, seg_dirs, seg_lengths
 
 
+@nb.njit(cache=True)
+def _fill_segment_dedx(seg_values: nb.float32[:],
+                       dx: nb.float32,
+                       min_count: int,
+                       residual_range: nb.float64,
+                       i: int,
+                       seg_dedxs: nb.float32[:],
+                       seg_errs: nb.float32[:],
+                       seg_rrs: nb.float32[:]) -> nb.float64:
+    # Compute the rate of energy/charge deposition
+    # If the segment has insufficient content, return dummy values
+    if len(seg_values) >= min_count and dx > 0.:
+        de = np.sum(seg_values)
+        dde = np.std(seg_values)*np.sqrt(len(seg_values))
+        seg_dedxs[i] = de/dx
+        seg_errs[i] = dde/dx
+    else:
+        seg_dedxs[i] = -1.
+        seg_errs[i] = -1.
+
+    # Compute the residual_range
+    seg_rrs[i]  = residual_range + dx/2.
+
+    return residual_range + dx
+
+
 @nb.njit(cache=True)
 def get_track_segments(coordinates: nb.float32[:,:],
                        segment_length: nb.float32,
@@ -478,6 +509,440 @@ def get_track_segments(coordinates: nb.float32[:,:],
         raise ValueError('Track segmentation method not recognized')
 
 
+def get_track_segments_batch(coordinates, edges, segment_length, points=None,
+                             method='step_next', anchor_point=True,
+                             min_count=10):
+    """Segments a batch of tracks at once.
+
+    The tracks are segmented in parallel, each one as in
+    :func:`get_track_segments`.
+
+    Parameters
+    ----------
+    coordinates : np.ndarray
+        (N, 3) Coordinates of the points that make up the tracks, ordered
+        by track
+    edges : np.ndarray
+        (T + 1) Boundaries of each track in the list of coordinates
+    segment_length : float
+        Segment length in the units that specify the coordinates
+    points : np.ndarray, optional
+        (T, 3) Preferred end point of each track from which to start
+    method : str, default 'step_next'
+        Method used to segment the tracks (one of 'step', 'step_next'
+        or 'bin_pca')
+    anchor_point : bool, default True
+        Weather or not to collapse end points onto the closest track point
+    min_count : int, default 10
+        Minimum number of points in a segment to use it to evaluate the
+        direction of the next step along the track.
+
+    Returns
+    -------
+    seg_index : np.ndarray
+        (M) Index of the points in each segment, with respect to the first
+        point of the track they belong to
+    seg_edges : np.ndarray
+        (S + 1) Boundaries of each segment in the segment index
+    track_edges : np.ndarray
+        (T + 1) Boundaries of the segments of each track
+    seg_dirs : np.ndarray
+        (S, 3) Array of segment direction vectors
+    seg_lengths : np.ndarray
+        (S) Array of segment lengths
+    """
+    # Check the segmentation method
+    assert method in ('step', 'step_next', 'bin_pca'), (
+            'Track segmentation method not recognized')
+
+    # Segment the tracks, each in a padded block of segments
+    edges = np.asarray(edges, dtype=np.int64)
+    use_points = points is not None
+    if not use_points:
+        points = np.empty((len(edges) - 1, coordinates.shape[1]),
+                          dtype=coordinates.dtype)
+    points = np.asarray(points, dtype=coordinates.dtype)
+
+    args = (coordinates, edges, points, use_points, float(segment_length),
+            method, anchor_point, min_count)
+    min_bounds = np.zeros(len(edges) - 1, dtype=np.int64)
+    labels, counts, offsets, dirs, lengths = _get_track_segments_batch(
+            *args, min_bounds)
+
+    # The size of the block of each track is a heuristic bound. If a track
+    # has more segments than its block holds, segment again with exact bounds
+    if np.any(counts > np.diff(offsets)):
+        labels, counts, offsets, dirs, lengths = _get_track_segments_batch(
+                *args, counts)
+
+    # Build the list of segments of each track
+    track_edges = np.zeros(len(counts) + 1, dtype=np.int64)
+    track_edges[1:] = np.cumsum(counts)
+    seg_gather = (np.repeat(offsets[:-1] - track_edges[:-1], counts)
+                  + np.arange(track_edges[-1]))
+
+    # Group the points by segment, preserving the order within each segment
+    seg_index, seg_edges = _group_segment_points(labels, edges, track_edges)
+
+    return (seg_index, seg_edges, track_edges,
+            dirs[seg_gather], lengths[seg_gather])
+
+
+@nb.njit(cache=True, parallel=True)
+def _get_track_segments_batch(coordinates: nb.float32[:,:],
+                              edges: nb.int64[:],
+                              points: nb.float32[:,:],
+                              use_points: bool,
+                              segment_length: nb.float64,
+                              method: str,
+                              anchor_point: bool,
+                              min_count: int,
+                              min_bounds: nb.int64[:]) -> (
+                                      nb.int64[:], nb.int64[:], nb.int64[:],
+                                      nb.float32[:,:], nb.float32[:]):
+    # Bound the number of segments in each track. Each step of the
+    # segmentation either contains points or moves the segment start by one
+    # segment length towards the remaining points, so the count scales with
+    # the number of points and the extent of the track. This is not a strict
+    # bound (sparse, curly tracks can exceed it), hence the minimum bounds.
+    num_tracks = len(edges) - 1
+    dim = coordinates.shape[1]
+    bounds = np.empty(num_tracks, dtype=np.int64)
+    for t in nb.prange(num_tracks):
+        lower, upper = edges[t], edges[t+1]
+        extent = 0.
+        if upper > lower:
+            for d in range(dim):
+                vmin = np.min(coordinates[lower:upper, d])
+                vmax = np.max(coordinates[lower:upper, d])
+                if use_points:
+                    vmin = min(vmin, points[t, d])
+                    vmax = max(vmax, points[t, d])
+                extent += (vmax - vmin)**2
+
+        bounds[t] = max(min_bounds[t], 2*(upper - lower)
+                        + int(np.ceil(np.sqrt(extent)/segment_length)) + 2)
+
+    offsets = np.zeros(num_tracks + 1, dtype=np.int64)
+    offsets[1:] = np.cumsum(bounds)
+
+    # Segment each track, store the segment label of each point
+    labels = np.full(len(coordinates), -1, dtype=np.int64)
+    counts = np.zeros(num_tracks, dtype=np.int64)
+    dirs = np.empty((offsets[-1], dim), dtype=coordinates.dtype)
+    lengths = np.empty(offsets[-1], dtype=coordinates.dtype)
+    for t in nb.prange(num_tracks):
+        lower, upper = edges[t], edges[t+1]
+        if upper == lower:
+            continue
+
+        coords = coordinates[lower:upper]
+        if use_points:
+            seg_clusts, seg_dirs, seg_lengths = get_track_segments(
+                    coords, segment_length, points[t], method,
+                    anchor_point, min_count)
+        else:
+            seg_clusts, seg_dirs, seg_lengths = get_track_segments(
+                    coords, segment_length, None, method,
+                    anchor_point, min_count)
+
+        num_segs = len(seg_clusts)
+        counts[t] = num_segs
+        for s, seg in enumerate(seg_clusts):
+            labels[lower + seg] = s
+
+        # Only store the segments which fit in the block of the track (the
+        # count is returned, so that the overflow can be detected)
+        num_store = min(num_segs, offsets[t+1] - offsets[t])
+        dirs[offsets[t]:offsets[t] + num_store] = seg_dirs[:num_store]
+        lengths[offsets[t]:offsets[t] + num_store] = seg_lengths[:num_store]
+
+    return labels, counts, offsets, dirs, lengths
+
+
+@nb.njit(cache=True, parallel=True)
+def _group_segment_points(labels: nb.int64[:],
+                          edges: nb.int64[:],
+                          track_edges: nb.int64[:]) -> (
+                                  nb.int64[:], nb.int64[:]):
+    # Count the points in each segment (points with no segment are dropped)
+    num_tracks = len(edges) - 1
+    seg_counts = np.zeros(track_edges[-1], dtype=np.int64)
+    for t in nb.prange(num_tracks):
+        for i in range(edges[t], edges[t+1]):
+            if labels[i] > -1:
+                seg_counts[track_edges[t] + labels[i]] += 1
+
+    seg_edges = np.zeros(track_edges[-1] + 1, dtype=np.int64)
+    seg_edges[1:] = np.cumsum(seg_counts)
+
+    # Place the points in their segment, in order, relative to their track
+    seg_index = np.empty(seg_edges[-1], dtype=np.int64)
+    for t in nb.prange(num_tracks):
+        fill = seg_edges[track_edges[t]:track_edges[t+1]].copy()
+        for i in range(edges[t], edges[t+1]):
+            if labels[i] > -1:
+                seg_index[fill[labels[i]]] = i - edges[t]
+                fill[labels[i]] += 1
+
+    return seg_index, seg_edges
+
+
+@nb.njit(cache=True)
+def _get_segment_dedxs(values: nb.float32[:],
+                       seg_index: nb.int64[:],
+                       seg_edges: nb.int64[:],
+                       seg_lengths: nb.float32[:],
+                       min_count: int) -> (
+                               nb.float32[:], nb.float32[:], nb.float32[:]):
+    # Compute the dQdxs and residual ranges of each segment
+    num_segs = len(seg_edges) - 1
+    seg_dedxs = np.empty(num_segs, dtype=np.float32)
+    seg_errs = np.empty(num_segs, dtype=np.float32)
+    seg_rrs  = np.empty(num_segs, dtype=np.float32)
+    residual_range = 0.
+    for i in range(num_segs):
+        seg = seg_index[seg_edges[i]:seg_edges[i+1]]
+        residual_range = _fill_segment_dedx(
+                values[seg], seg_lengths[i], min_count, residual_range,
+                i, seg_dedxs, seg_errs, seg_rrs)
+
+    return seg_dedxs, seg_errs, seg_rrs
+
+
+class TrackSegments:
+    """Segmentation of a single track.
+
+    Attributes
+    ----------
+    index : np.ndarray
+        (M) Index of the track points in each segment
+    edges : np.ndarray
+        (S + 1) Boundaries of each segment in the index
+    dirs : np.ndarray
+        (S, 3) Array of segment direction vectors
+    lengths : np.ndarray
+        (S) Array of segment lengths
+    """
+
+    def __init__(self, index, edges, dirs, lengths):
+        """Store the segmentation of the track.
+
+        Parameters
+        ----------
+        index : np.ndarray
+            (M) Index of the track points in each segment
+        edges : np.ndarray
+            (S + 1) Boundaries of each segment in the index
+        dirs : np.ndarray
+            (S, 3) Array of segment direction vectors
+        lengths : np.ndarray
+            (S) Array of segment lengths
+        """
+        self.index = index
+        self.edges = edges
+        self.dirs = dirs
+        self.lengths = lengths
+
+    def __len__(self):
+        """Returns the number of segments in the track.
+
+        Returns
+        -------
+        int
+            Number of segments
+        """
+        return len(self.lengths)
+
+    @property
+    def clusts(self):
+        """List of indexes which correspond to each segment cluster of points.
+
+        Returns
+        -------
+        List[np.ndarray]
+            (S) List of segment point indexes
+        """
+        return np.split(self.index, self.edges[1:-1])
+
+    @property
+    def length(self):
+        """Total length of the track.
+
+        Returns
+        -------
+        float
+            Sum of the segment lengths
+        """
+        return np.sum(self.lengths)
+
+    def dedxs(self, values, min_count=10):
+        """Computes the energy/charge deposition rate of each segment.
+
+        Parameters
+        ----------
+        values : np.ndarray
+            (N) Values associated with each point of the track
+        min_count : int, default 10
+            Minimum number of points in a segment for it to be valid. If not
+            valid, the dedx value returned for the segment is -1.
+
+        Returns
+        -------
+        seg_dedxs : np.ndarray
+           (S) Array of energy/charge deposition rate values
+        seg_errs : np.ndarray
+           (S) Array of uncertainties on the energy/charge deposition rate
+        seg_rrs : np.ndarray
+           (S) Array of residual ranges (center of the segment w.r.t. start)
+        """
+        return _get_segment_dedxs(
+                values, self.index, self.edges, self.lengths, min_count)
+
+    def gradient(self, values, min_count=10):
+        """Computes the deposition gradient along the track.
+
+        Parameters
+        ----------
+        values : np.ndarray
+            (N) Values associated with each point of the track
+        min_count : int, default 10
+            Minimum number of points in a segment for it to be used
+
+        Returns
+        -------
+        float
+           Deposition gradient along the track from its start
+        """
+        seg_dedxs, _, seg_rrs = self.dedxs(values, min_count)
+        valid_index = np.where(seg_dedxs > -1)[0]
+        if not len(valid_index):
+            return 0.
+
+        return _get_deposition_gradient(
+                seg_dedxs[valid_index], seg_rrs[valid_index])
+
+
+class TrackSegmentCache:
+    """Stores the segmentation of tracks.
+
+    Each segmentation is stored for the segmentation parameters, the start
+    point and the point coordinates (hashed) it has been requested with, so
+    that it is reused when the same track is segmented the same way again.
+    The tracks which have not been segmented yet are segmented all at once.
+
+    The cache is meant to be scoped to an event: it must be cleared once the
+    event is processed (see :class:`spine.post.PostManager`).
+    """
+
+    def __init__(self):
+        """Initialize the cache."""
+        self._cache = {}
+
+    def __len__(self):
+        """Returns the number of segmentations stored in the cache.
+
+        Returns
+        -------
+        int
+            Number of cached segmentations
+        """
+        return len(self._cache)
+
+    def clear(self):
+        """Removes all the segmentations from the cache."""
+        self._cache.clear()
+
+    def __call__(self, points, start_points=None, segment_length=5.,
+                 method='step_next', anchor_point=True, min_count=10):
+        """Fetches the segmentation of a list of tracks.
+
+        Parameters
+        ----------
+        points : List[np.ndarray]
+            (T) Coordinates of the points that make up each track
+        start_points : List[np.ndarray], optional
+            (T) Preferred end point of each track from which to start
+        segment_length : float, default 5.
+            Segment length in the units that specify the coordinates
+        method : str, default 'step_next'
+            Method used to segment the tracks (one of 'step', 'step_next'
+            or 'bin_pca')
+        anchor_point : bool, default True
+            Weather or not to collapse end points onto the closest track point
+        min_count : int, default 10
+            Minimum number of points in a segment to use it to evaluate the
+            direction of the next step along the track.
+
+        Returns
+        -------
+        List[TrackSegments]
+            (T) Segmentation of each track
+        """
+        # Build the cache key of each track, find the missing ones
+        config = (method, float(segment_length), bool(anchor_point),
+                  int(min_count))
+        keys, missing = [], []
+        for i, track in enumerate(points):
+            start = None if start_points is None else start_points[i]
+            key = (config, *self.get_key(track, start))
+            keys.append(key)
+            if key not in self._cache:
+                missing.append(i)
+
+        # Segment the missing tracks at once
+        if len(missing):
+            edges = np.zeros(len(missing) + 1, dtype=np.int64)
+            edges[1:] = np.cumsum([len(points[i]) for i in missing])
+            coordinates = np.concatenate([points[i] for i in missing])
+            starts = None
+            if start_points is not None:
+                starts = np.vstack([start_points[i] for i in missing])
+
+            seg_index, seg_edges, track_edges, seg_dirs, seg_lengths = (
+                    get_track_segments_batch(
+                        coordinates, edges, segment_length, starts, method,
+                        anchor_point, min_count))
+
+            for j, i in enumerate(missing):
+                lower, upper = track_edges[j], track_edges[j+1]
+                point_lower = seg_edges[lower]
+                self._cache[keys[i]] = TrackSegments(
+                        seg_index[point_lower:seg_edges[upper]],
+                        seg_edges[lower:upper+1] - point_lower,
+                        seg_dirs[lower:upper], seg_lengths[lower:upper])
+
+        return [self._cache[key] for key in keys]
+
+    @staticmethod
+    def get_key(points, start_point=None):
+        """Builds the cache key of a track.
+
+        The point coordinates are hashed as a whole, so that any change to
+        them (including a permutation) yields a different key. The start
+        point is keyed on its bytes, so that NaN coordinates match too.
+
+        Parameters
+        ----------
+        points : np.ndarray
+            (N, 3) Coordinates of the points that make up the track
+        start_point : np.ndarray, optional
+            (3) Preferred end point of the track from which to start
+
+        Returns
+        -------
+        tuple
+            Cache key of the track
+        """
+        points = np.ascontiguousarray(points)
+        digest = hashlib.blake2b(points.tobytes(), digest_size=16).digest()
+        start = None
+        if start_point is not None:
+            start = np.asarray(start_point, dtype=np.float64).tobytes()
+
+        return points.shape, points.dtype.str, digest, start
+
+
 def get_track_spline(coordinates, segment_length, s=None):
     """Estimate the best approximating curve defined by a point cloud using
     univariate 3D splines.
@@ -8,6 +8,7 @@ import os
 import pytest
 
 import urllib
+import numpy as np
 
 os.environ['CUDA_VISIBLE_DEVICES'] = ''
 
@@ -80,3 +81,36 @@ def fixture_hdf5_data(tmp_path, hdf5_datafile):
     urllib.request.urlretrieve(datafile_url, data_path)
 
     return data_path
+
+
+@pytest.fixture(name='hdf5_local')
+def fixture_hdf5_local(tmp_path):
+    """Writes a small HDF5 file here, without downloading anything.
+
+    Parameters
+    ----------
+    tmp_path : str
+       Generic pytest fixture used to handle temporary test files
+    """
+    from spine.data import ObjectList, Particle, RunInfo
+    from spine.io.write import HDF5Writer
+
+    # Set the random seed so that there are no surprises
+    np.random.seed(seed=0)
+
+    # Write a few batches of entries, some of which are empty
+    path = os.path.join(tmp_path, 'local.h5')
+    writer = HDF5Writer(path)
+    for b in range(3):
+        sizes = [5, 0, 3]
+        writer({
+                'index': b*len(sizes) + np.arange(len(sizes)),
+                'run_info': [RunInfo(run=0, subrun=b, event=i)
+                             for i in range(len(sizes))],
+                'points': [np.random.rand(s, 3) for s in sizes],
+                'particles': [
+                    ObjectList([Particle(id=i) for i in range(s)], Particle())
+                    for s in sizes]
+        })
+
+    return path
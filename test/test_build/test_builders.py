@@ -0,0 +1,246 @@
+"""Test that the data representation builders work as intended."""
+
+from itertools import combinations
+
+import pytest
+
+import numpy as np
+
+from spine.data import Particle
+
+from spine.utils.globals import (
+        COORD_COLS, VALUE_COL, CLUST_COL, PART_COL, GROUP_COL, INTER_COL,
+        SHAPE_COL)
+
+from spine.build.fragment import FragmentBuilder
+from spine.build.particle import ParticleBuilder
+from spine.build.interaction import InteractionBuilder
+
+
+@pytest.fixture(name='event', params=[0, 1, 20])
+def fixture_event(request):
+    """Generates the data products of an event with a number of particles.
+
+    Each particle group is made up of 1 to 3 particles, each particle of
+    1 to 3 fragments. Some voxels are unlabeled, and the adapted labels
+    are a random subset of the labels.
+    """
+    # Generate the particles, assign them to groups and interactions
+    np.random.seed(seed=0)
+    num_parts = request.param
+    group_ids = np.sort(np.random.randint(0, max(num_parts//2, 1), num_parts))
+    particles = []
+    for i in range(num_parts):
+        group_id = group_ids[i]
+        group_id = group_id if group_id in group_ids[:i] else i
+        particles.append(Particle(
+                id=i, group_id=group_id, interaction_id=group_id%3,
+                shape=np.random.randint(0, 4),
+                energy_deposit=np.random.rand()))
+
+    # Generate the voxels, assign them to fragments and particles
+    num_frags = 2*num_parts
+    frag_parts = np.random.randint(0, max(num_parts, 1), size=num_frags)
+    num_points = 500
+    frag_ids = np.random.randint(-1, num_frags, size=num_points)
+    if not num_parts:
+        frag_ids[:] = -1
+
+    label = np.full((num_points, 10), -1.)
+    label[:, COORD_COLS] = np.random.rand(num_points, 3)
+    label[:, VALUE_COL] = np.random.rand(num_points)
+    label[:, CLUST_COL] = frag_ids
+    valid = frag_ids > -1
+    part_ids = np.full(num_points, -1)
+    part_ids[valid] = frag_parts[frag_ids[valid]]
+    label[:, PART_COL] = part_ids
+    label[valid, GROUP_COL] = [particles[p].group_id for p in part_ids[valid]]
+    label[valid, INTER_COL] = [
+            particles[p].interaction_id for p in part_ids[valid]]
+    label[:, SHAPE_COL] = np.random.randint(0, 4, size=num_points)
+
+    # Adapted label tensor: random subset of the points
+    adapt_index = np.sort(np.random.choice(num_points, 400, replace=False))
+    label_adapt = label[adapt_index]
+
+    return {
+            'label_tensor': label,
+            'label_adapt_tensor': label_adapt,
+            'label_g4_tensor': label,
+            'particles': particles,
+            'points': label_adapt[:, COORD_COLS],
+            'depositions': label_adapt[:, VALUE_COL],
+            'sources': np.random.randint(0, 2, size=(len(label_adapt), 2)),
+            'points_label': label[:, COORD_COLS],
+            'depositions_label': label[:, VALUE_COL],
+            'points_g4': label[:, COORD_COLS],
+            'depositions_g4': 2*label[:, VALUE_COL],
+            'sources_label': np.random.randint(0, 2, size=(num_points, 2))
+    }
+
+
+def get_reco_inputs(event):
+    """Builds the full chain output of the reconstructed particles.
+
+    The particles are the adapted label groups, the fragments are the
+    adapted label fragments, both provided in random order.
+
+    Parameters
+    ----------
+    event : dict
+        Event data products
+
+    Returns
+    -------
+    dict
+        Full chain output
+    """
+    label = event['label_adapt_tensor']
+    result = {k: event[k] for k in ['points', 'depositions', 'sources']}
+    for prefix, col in [('particle', GROUP_COL), ('fragment', CLUST_COL)]:
+        ids = np.unique(label[:, col])
+        ids = np.random.permutation(ids[ids > -1])
+        clusts = np.empty(len(ids), dtype=object)
+        for i, c in enumerate(ids):
+            clusts[i] = np.where(label[:, col] == c)[0]
+
+        num_clusts = len(clusts)
+        result[f'{prefix}_clusts'] = clusts
+        result[f'{prefix}_shapes'] = np.random.randint(0, 4, num_clusts)
+        result[f'{prefix}_start_points'] = np.random.rand(num_clusts, 3)
+        result[f'{prefix}_end_points'] = np.random.rand(num_clusts, 3)
+
+    num_parts = len(result['particle_clusts'])
+    result['particle_group_pred'] = np.random.randint(0, 3, num_parts)
+    result['particle_node_type_pred'] = np.random.rand(num_parts, 5)
+    result['particle_node_primary_pred'] = np.random.rand(num_parts, 2)
+    result['particle_node_orient_pred'] = np.random.rand(num_parts, 2)
+
+    return result
+
+
+def check_views(objects, event):
+    """Checks that the long-form attributes of objects are independent.
+
+    Parameters
+    ----------
+    objects : List[object]
+        List of objects
+    event : dict
+        Event data products
+    """
+    # Check that no two objects share memory, nor with the input
+    for attr in ['points', 'depositions', 'sources']:
+        for obj in objects:
+            assert not np.shares_memory(getattr(obj, attr), event[attr])
+        for obj1, obj2 in combinations(objects, 2):
+            assert not np.shares_memory(getattr(obj1, attr),
+                                        getattr(obj2, attr))
+
+    # Check that modifying one object in place leaves the others untouched
+    if len(objects) > 1:
+        ref = [obj.depositions.copy() for obj in objects]
+        objects[0].depositions[:] = -1.
+        for obj, dep in zip(objects[1:], ref[1:]):
+            assert np.array_equal(obj.depositions, dep)
+
+
+def test_build_reco(event):
+    """Tests that the reconstructed objects match the input clusters."""
+    # Build the reconstructed fragments, particles and interactions
+    data = get_reco_inputs(event)
+    frags = FragmentBuilder('reco', 'cm')._build_reco(
+            **{k: v for k, v in data.items() if not k.startswith('part')})
+    parts = ParticleBuilder('reco', 'cm')._build_reco(
+            **{k: v for k, v in data.items() if not k.startswith('frag')})
+    inter_ids = [p.interaction_id for p in parts]
+    inters = InteractionBuilder('reco', 'cm')._build_reco(parts)
+
+    # Check the long-form attributes of each object
+    for prefix, objects in [('fragment', frags), ('particle', parts)]:
+        clusts = data[f'{prefix}_clusts']
+        assert len(objects) == len(clusts)
+        for obj, index in zip(objects, clusts):
+            assert np.array_equal(obj.index, index)
+            assert np.array_equal(obj.points, data['points'][index])
+            assert np.array_equal(obj.depositions, data['depositions'][index])
+            assert np.array_equal(obj.sources, data['sources'][index])
+
+        check_views(objects, event)
+
+    # Check that the interactions group the particles by interaction ID
+    assert len(inters) == len(np.unique(inter_ids))
+    for i, inter_id in enumerate(np.unique(inter_ids)):
+        ref = np.where(np.asarray(inter_ids) == inter_id)[0]
+        assert np.array_equal(inters[i].particle_ids, ref)
+
+
+def check_truth(obj, label_id, event, col, g4=True):
+    """Checks the long-form attributes of a true object against the labels.
+
+    Parameters
+    ----------
+    obj : Union[TruthFragment, TruthParticle]
+        True object
+    label_id : int
+        Label of the object
+    event : dict
+        Event data products
+    col : int
+        Column of the label tensors which contains the object label
+    g4 : bool, default True
+        Whether the Geant4 attributes are expected to be filled
+    """
+    # Check the attributes from the label tensor
+    index = np.where(event['label_tensor'][:, col] == label_id)[0]
+    assert np.array_equal(obj.index, index)
+    assert np.array_equal(obj.points, event['points_label'][index])
+    assert np.array_equal(obj.depositions, event['depositions_label'][index])
+    assert np.array_equal(obj.sources, event['sources_label'][index])
+
+    # Check the attributes from the adapted label tensor
+    index = np.where(event['label_adapt_tensor'][:, col] == label_id)[0]
+    assert np.array_equal(obj.index_adapt, index)
+    assert np.array_equal(obj.points_adapt, event['points'][index])
+    assert np.array_equal(obj.depositions_adapt, event['depositions'][index])
+    assert np.array_equal(obj.sources_adapt, event['sources'][index])
+
+    # Check the attributes from the Geant4 label tensor
+    if g4:
+        index = np.where(event['label_g4_tensor'][:, col] == label_id)[0]
+        assert np.array_equal(obj.index_g4, index)
+        assert np.array_equal(obj.points_g4, event['points_g4'][index])
+        assert np.array_equal(
+                obj.depositions_g4, event['depositions_g4'][index])
+
+
+def test_build_truth(event):
+    """Tests that the true objects match the label groups."""
+    # Build the true particles, check them against the labels
+    parts = ParticleBuilder('truth', 'cm')._build_truth(**event)
+    group_ids = np.unique(event['label_tensor'][:, GROUP_COL])
+    group_ids = group_ids[group_ids > -1]
+    assert len(parts) == len(group_ids)
+    for part, group_id in zip(parts, group_ids):
+        check_truth(part, group_id, event, GROUP_COL)
+
+    # Check that the particle group energy is the sum of its particles
+    for part in parts:
+        ref = sum(p.energy_deposit for p in event['particles']
+                  if p.group_id == part.orig_id)
+        assert np.isclose(part.energy_deposit, ref)
+
+    # Build the true fragments, with unadapted labels (the label tensors
+    # must be the same object). The fragments do not match the particles,
+    # so they are broken and cannot be matched to Geant4 information.
+    event = {**event, 'label_adapt_tensor': event['label_tensor'],
+             'points': event['points_label'],
+             'depositions': event['depositions_label'],
+             'sources': event['sources_label']}
+    frags = FragmentBuilder('truth', 'cm')._build_truth(**event)
+    frag_ids = np.unique(event['label_tensor'][:, CLUST_COL])
+    frag_ids = frag_ids[frag_ids > -1]
+    assert len(frags) == len(frag_ids)
+    for frag, frag_id in zip(frags, frag_ids):
+        check_truth(frag, frag_id, event, CLUST_COL, g4=False)
+        assert len(frag.index_g4) == 0
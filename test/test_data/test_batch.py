@@ -0,0 +1,83 @@
+"""Test that the batched data structures work as intended."""
+
+import pickle
+from copy import deepcopy
+
+import pytest
+
+import numpy as np
+import torch
+
+from spine.data import TensorBatch, IndexBatch, Meta
+from spine.utils.globals import COORD_COLS
+
+
+@pytest.mark.parametrize('counts', [[0], [3, 0, 5]])
+def test_index_batch_csr(counts):
+    """Tests that the CSR representation of an index list, and the typed
+    list built from it, match the list and are rebuilt after a copy.
+    """
+    # Generate a list of random indexes in each entry of the batch
+    np.random.seed(seed=0)
+    num_indexes = np.sum(counts)
+    single_counts = np.random.randint(0, 10, size=num_indexes)
+    index_list = np.empty(num_indexes, dtype=object)
+    for i, count in enumerate(single_counts):
+        index_list[i] = np.random.randint(0, 100, size=count)
+
+    offsets = 100*np.arange(len(counts))
+    index = IndexBatch(
+            index_list, offsets, counts, single_counts,
+            default=np.empty(0, dtype=np.int64))
+
+    # Check the CSR representation and the typed list
+    csr_index, csr_edges = index.get_csr()
+    assert np.array_equal(csr_edges[1:] - csr_edges[:-1], single_counts)
+    assert len(index.typed_index_list) == num_indexes
+    for i, ref in enumerate(index_list):
+        sub_index = csr_index[csr_edges[i]:csr_edges[i+1]]
+        assert np.array_equal(sub_index, ref)
+        assert np.array_equal(index.typed_index_list[i], ref)
+
+    # Check that the cached representations are not copied, but rebuilt
+    for copy in [pickle.loads(pickle.dumps(index)), deepcopy(index)]:
+        for attr in ['counts', 'single_counts', 'offsets', 'edges']:
+            assert np.array_equal(getattr(copy, attr), getattr(index, attr))
+        assert '_csr' not in copy.__dict__
+        assert '_typed_index_list' not in copy.__dict__
+        assert np.array_equal(copy.csr_index, csr_index)
+        assert np.array_equal(copy.csr_edges, csr_edges)
+        assert len(copy.typed_index_list) == num_indexes
+        for ref, sub_index in zip(index_list, copy.typed_index_list):
+            assert np.array_equal(sub_index, ref)
+
+
+def test_tensor_batch_neighborhood():
+    """Tests that the voxel neighborhood is shared between a tensor batch and
+    its numpy conversion, and that it is reset when the coordinates change.
+    """
+    # Generate a batch of random voxels
+    np.random.seed(seed=0)
+    counts = [20, 30]
+    data = np.zeros((np.sum(counts), 4), dtype=np.float32)
+    data[:, 0] = np.repeat(np.arange(len(counts)), counts)
+    data[:, COORD_COLS] = np.random.randint(0, 10, size=(len(data), 3))
+    data = TensorBatch(torch.tensor(data), counts)
+
+    # Check that the neighborhood is built once
+    neighborhood = data.get_neighborhood(2.)
+    assert data.get_neighborhood(2.) is neighborhood
+    assert data.to_numpy().get_neighborhood(2.) is neighborhood
+    assert data.get_neighborhood(3.) is not neighborhood
+
+    # Check that the neighborhood is reset when the units change
+    data_np = data.to_numpy()
+    meta = Meta(lower=[0., 0., 0.], upper=[20., 20., 20.], size=[2., 2., 2.],
+                count=[10, 10, 10])
+    data_np.to_cm(meta)
+    neighborhood_cm = data_np.get_neighborhood(2.)
+    assert neighborhood_cm is not neighborhood
+    assert np.allclose(neighborhood_cm.voxels, data_np.tensor[:, COORD_COLS])
+
+    data_np.to_px(meta)
+    assert data_np.get_neighborhood(2.) is not neighborhood_cm
@@ -0,0 +1,249 @@
+"""Test that the driver works as intended."""
+
+import os
+import gc
+
+import pytest
+
+import numpy as np
+import h5py
+
+from spine.data import ObjectList, RecoParticle
+from spine.driver import Driver
+from spine.io.read import HDF5Reader
+from spine.io.write import HDF5Writer
+
+
+@pytest.fixture(name='hdf5_tracks')
+def fixture_hdf5_tracks(tmp_path):
+    """Writes a small HDF5 file of reconstructed tracks here.
+
+    Parameters
+    ----------
+    tmp_path : str
+       Generic pytest fixture used to handle temporary test files
+    """
+    # Set the random seed so that there are no surprises
+    np.random.seed(seed=0)
+
+    # Write a few entries, each with a few wiggly muon tracks
+    path = os.path.join(tmp_path, 'tracks.h5')
+    writer = HDF5Writer(path)
+    for b in range(2):
+        data = {'index': 2*b + np.arange(2), 'points': [],
+                'depositions': [], 'reco_particles': []}
+        for _ in range(2):
+            points, particles = [], []
+            for t in range(3):
+                direction = np.random.randn(3)
+                direction /= np.linalg.norm(direction)
+                track = (np.outer(np.linspace(0., 50., 100), direction)
+                         + np.cumsum(0.1*np.random.randn(100, 3), axis=0))
+                index = np.arange(100*t, 100*(t+1))
+                particles.append(RecoParticle(
+                    id=t, shape=1, pid=2, index=index, start_point=track[0]))
+                points.append(track)
+
+            data['points'].append(np.vstack(points))
+            data['depositions'].append(np.random.rand(300))
+            data['reco_particles'].append(ObjectList(particles, RecoParticle()))
+
+        writer(data)
+
+    return path
+
+
+def get_config(tmp_path, data_path, writer=None, **base):
+    """Builds a reader-mode driver configuration.
+
+    Parameters
+    ----------
+    tmp_path : str
+        Directory in which to write the logs
+    data_path : str
+        Path to the input HDF5 file
+    writer : dict, optional
+        Writer configuration
+    **base : dict, optional
+        Additional base configuration parameters
+
+    Returns
+    -------
+    dict
+        Driver configuration
+    """
+    cfg = {
+        'base': {'log_dir': os.path.join(tmp_path, 'logs'), 'seed': 0,
+                 'verbosity': 'warning', **base},
+        'io': {'reader': {'name': 'hdf5', 'file_keys': data_path}}
+    }
+    if writer is not None:
+        cfg['io']['writer'] = writer
+
+    return cfg
+
+
+@pytest.mark.parametrize('queue_size', [None, 2])
+def test_driver_close(tmp_path, hdf5_local, queue_size):
+    """Tests that the buffered output of a driver is written to file, even
+    if the driver is used entry by entry and never closed."""
+    # Process the entries one at a time, delete the driver without closing it
+    output = os.path.join(tmp_path, 'output.h5')
+    writer = {'name': 'hdf5', 'file_name': output, 'buffer_size': 100}
+    if queue_size is not None:
+        writer['queue_size'] = queue_size
+
+    driver = Driver(get_config(tmp_path, hdf5_local, writer))
+    num_entries = len(driver)
+    for entry in range(num_entries):
+        driver.process(entry=entry)
+
+    del driver
+    gc.collect()
+
+    # Check that all the entries were written
+    with h5py.File(output, 'r') as out_file:
+        assert len(out_file['events']) == num_entries
+
+
+def test_driver_close_error(tmp_path, hdf5_local):
+    """Tests that an error raised while closing the writer of a driver does
+    not hide the error which interrupted the processing loop."""
+    # Make both the processing and the writer closing fail
+    output = os.path.join(tmp_path, 'output.h5')
+    writer = {'name': 'hdf5', 'file_name': output, 'buffer_size': 100}
+    driver = Driver(get_config(tmp_path, hdf5_local, writer, iterations=-1))
+
+    def fail(*args, **kwargs):
+        raise ValueError("Processing failed.")
+
+    def fail_close():
+        raise OSError("Closing failed.")
+
+    driver.process = fail
+    driver.writer.close = fail_close
+
+    # Check that the processing error is the one raised
+    with pytest.raises(ValueError):
+        driver.run()
+
+
+def get_reco_config(tmp_path, data_path, output, **base):
+    """Builds a driver configuration which runs a stochastic post-processor.
+
+    Parameters
+    ----------
+    tmp_path : str
+        Directory in which to write the logs
+    data_path : str
+        Path to the input HDF5 file
+    output : str
+        Path to the output HDF5 file
+    **base : dict, optional
+        Additional base configuration parameters
+
+    Returns
+    -------
+    dict
+        Driver configuration
+    """
+    writer = {'name': 'hdf5', 'file_name': output}
+    base = {'iterations': -1, 'overwrite_log': True, **base}
+    cfg = get_config(tmp_path, data_path, writer, **base)
+    cfg['build'] = {'fragments': False, 'particles': True,
+                    'interactions': False, 'mode': 'reco'}
+    cfg['post'] = {'mcs_ke': {'split_angle': True, 'run_mode': 'reco'}}
+
+    return cfg
+
+
+@pytest.mark.slow
+def test_driver_pipeline(tmp_path, hdf5_tracks):
+    """Tests that the pipelined execution of a stochastic post-processor
+    does not depend on the number of workers."""
+    # Run the same configuration with different numbers of workers
+    mcs_kes = {}
+    for mode, num_workers, seed in [('single', 1, 0), ('multi', 2, 0),
+                                    ('multi_seed', 2, 1)]:
+        output = os.path.join(tmp_path, f'{mode}.h5')
+        cfg = get_reco_config(
+                tmp_path, hdf5_tracks, output, seed=seed,
+                pipeline={'num_workers': num_workers})
+        Driver(cfg).run()
+
+        reader = HDF5Reader(output)
+        mcs_kes[mode] = np.array([
+            [p.mcs_ke for p in reader[i]['reco_particles']]
+            for i in range(len(reader))])
+
+    # Check that the output is reproducible, but does depend on the seed
+    assert np.array_equal(mcs_kes['single'], mcs_kes['multi'])
+    assert not np.array_equal(mcs_kes['single'], mcs_kes['multi_seed'])
+
+
+@pytest.mark.slow
+def test_driver_pipeline_times(tmp_path, hdf5_tracks):
+    """Tests that the execution times of the pipeline workers are summed."""
+    # Run the reconstruction in two workers
+    output = os.path.join(tmp_path, 'output.h5')
+    cfg = get_reco_config(
+            tmp_path, hdf5_tracks, output, pipeline={'num_workers': 2})
+    driver = Driver(cfg)
+    driver.run()
+
+    # Check that the total times include those of every iteration
+    log = np.genfromtxt(
+            driver.logger.file_name, delimiter=',', names=True)
+    for key in ['build', 'post', 'post_mcs_ke']:
+        assert (log[f'{key}_time_sum'][-1]
+                >= np.sum(log[f'{key}_time']) - 1e-6)
+        assert (driver.watch.time_sum(key).wall
+                >= np.sum(log[f'{key}_time']) - 1e-6)
+
+
+@pytest.mark.parametrize('num_workers', [1, 2, 4])
+def test_driver_shard(tmp_path, hdf5_local, num_workers):
+    """Tests that the entry shards are disjoint and cover all the entries."""
+    # Initialize one driver per shard, collect the entries each one processes
+    output = os.path.join(tmp_path, 'output.h5')
+    writer = {'name': 'hdf5', 'file_name': output}
+    entries = []
+    for shard_id in range(num_workers):
+        cfg = get_config(
+                tmp_path, hdf5_local, writer, iterations=-1,
+                num_workers=num_workers, shard_id=shard_id)
+        driver = Driver(cfg)
+        entries.append(driver.reader.entry_index)
+
+        # Check that the outputs are tagged with the shard index
+        assert driver.writer.file_name == os.path.join(
+                tmp_path, f'output_shard{shard_id}.h5')
+        assert driver.log_dir == os.path.join(
+                tmp_path, 'logs', f'shard_{shard_id}')
+        assert driver.iterations == len(entries[-1])
+
+    # Check that the shards are contiguous, disjoint and complete
+    num_entries = len(HDF5Reader(hdf5_local))
+    assert np.array_equal(np.concatenate(entries), np.arange(num_entries))
+
+
+@pytest.mark.slow
+def test_driver_shard_run(tmp_path, hdf5_local):
+    """Tests that the sharded inference writes every entry exactly once."""
+    # Run the inference in several processes
+    from spine.main import run
+    output = os.path.join(tmp_path, 'output.h5')
+    writer = {'name': 'hdf5', 'file_name': output}
+    cfg = get_config(
+            tmp_path, hdf5_local, writer, iterations=-1, num_workers=2)
+    run(cfg)
+
+    # Check that each shard wrote its own file, check the entries they hold
+    index = []
+    for shard_id in range(2):
+        reader = HDF5Reader(os.path.join(tmp_path, f'output_shard{shard_id}.h5'))
+        index.extend(reader[i]['index'] for i in range(len(reader)))
+
+    reader = HDF5Reader(hdf5_local)
+    assert not os.path.isfile(output)
+    assert index == [reader[i]['index'] for i in range(len(reader))]
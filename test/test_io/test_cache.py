@@ -0,0 +1,78 @@
+"""Test that the parser output cache works as intended."""
+
+import os
+
+import numpy as np
+
+from spine.data import Meta, Particle, ObjectList
+from spine.io import cache as cache_module
+from spine.io.cache import ParserCache
+
+
+def test_parser_cache(tmp_path):
+    """Tests that the cached entries are loaded back identically."""
+    # Create a dummy input file to key the cache on
+    file_path = os.path.join(tmp_path, 'dummy.root')
+    with open(file_path, 'w', encoding='utf-8') as dummy:
+        dummy.write('dummy')
+
+    # Store an entry with all the typical parser output types
+    schema = {'data': {'parser': 'sparse3d', 'sparse_event': 'sparse3d_pcluster'}}
+    cache = ParserCache(tmp_path, schema, 'float32', [file_path])
+    data = {
+            'data': (np.random.rand(100, 3), np.random.rand(100, 2), Meta()),
+            'clusts': (np.arange(10), 5),
+            'particles': ObjectList([Particle(id=i) for i in range(3)], Particle()),
+            'empty': np.empty((0, 3), dtype=np.float32)
+    }
+    assert 0 not in cache
+    cache.save(0, data)
+    assert 0 in cache
+
+    # Check that the entry is loaded back identically
+    result = cache.load(0)
+    for i in range(2):
+        assert np.array_equal(result['data'][i], data['data'][i])
+    assert np.array_equal(result['clusts'][0], data['clusts'][0])
+    assert result['clusts'][1] == data['clusts'][1]
+    assert [p.id for p in result['particles']] == [0, 1, 2]
+    assert result['empty'].shape == (0, 3)
+    assert result['empty'].dtype == np.float32
+
+    # Check that modifying the loaded arrays does not affect the cache
+    result['data'][0][:] = -1.
+    assert np.array_equal(cache.load(0)['data'][0], data['data'][0])
+
+    # Check that changing the schema changes the cache location
+    schema['data']['sparse_event'] = 'sparse3d_reco'
+    other = ParserCache(tmp_path, schema, 'float32', [file_path])
+    assert other.path != cache.path
+    assert 0 not in other
+
+
+def test_parser_cache_key(tmp_path, monkeypatch):
+    """Tests that the cache is invalidated when a parser dependency changes."""
+    # Create a dummy package with a parser and one of its dependencies
+    source_dir = os.path.join(tmp_path, 'spine')
+    parser_path = os.path.join(source_dir, 'io', 'parse', 'sparse.py')
+    module_path = os.path.join(source_dir, 'utils', 'cluster.py')
+    for path, code in [(parser_path, 'from spine.utils.cluster import dbscan\n'),
+                       (module_path, 'def dbscan(x):\n    return x\n')]:
+        os.makedirs(os.path.dirname(path))
+        with open(path, 'w', encoding='utf-8') as source:
+            source.write(code)
+
+    monkeypatch.setattr(cache_module, 'SOURCE_DIR', source_dir)
+
+    # Check that the key only changes when the source code changes
+    file_path = os.path.join(tmp_path, 'dummy.root')
+    with open(file_path, 'w', encoding='utf-8') as dummy:
+        dummy.write('dummy')
+
+    schema = {'data': {'parser': 'sparse3d'}}
+    key = ParserCache.get_key(schema, 'float32', [file_path])
+    assert ParserCache.get_key(schema, 'float32', [file_path]) == key
+
+    with open(module_path, 'a', encoding='utf-8') as source:
+        source.write('\ndef grid_dbscan(x):\n    return x\n')
+    assert ParserCache.get_key(schema, 'float32', [file_path]) != key
@@ -3,7 +3,7 @@
 import numpy as np
 import pytest
 
-from spine import Meta
+from spine.data import Meta
 from spine.io.collate import CollateAll
 
 
@@ -147,3 +147,67 @@ def test_collate_list():
     # Check that the input is intact
     for i, data in enumerate(batch_list):
         assert data['list'] == result['list'][i]
+
+
+@pytest.mark.parametrize('split, num_points', [
+    (False, 1), (False, 2), (True, 1), (True, 2)])
+def test_collate_sparse_reference(split, num_points):
+    """Tests that the collated sparse tensors match a simple stacking."""
+    # Generate a batch of sparse tensors which span both ICARUS modules, some
+    # of which are empty. Rows may hold more than one point (e.g. segments).
+    np.random.seed(seed=0)
+    lower = np.array([-400., -200., -1000.])
+    upper = np.array([400., 200., 1000.])
+    meta = Meta(lower=lower, upper=upper, size=[1., 1., 1.])
+    batch = []
+    for num_rows in [10, 0, 50]:
+        coords = (np.tile(upper - lower, num_points)
+                  * np.random.rand(num_rows, 3*num_points))
+        features = np.random.rand(num_rows, 2).astype(np.float32)
+        sources = np.random.randint(0, 2, size=(num_rows, 2))
+        batch.append({'sparse': (coords, features, meta),
+                      'feats': features, 'sources': sources})
+
+    # Collate the batch
+    detector = 'icarus' if split else None
+    collate_fn = CollateAll(
+            split=split, detector=detector, source={'feats': 'sources'})
+    result = collate_fn(batch)
+
+    # Build the reference, one block of rows per [entry, module] pair
+    blocks, feat_blocks, counts = [], [], []
+    for s, sample in enumerate(batch):
+        coords, features, _ = sample['sparse']
+        if not split:
+            blocks.append(np.hstack(
+                [np.full((len(coords), 1), s), coords, features]))
+            feat_blocks.append(features)
+            counts.append(len(coords))
+            continue
+
+        # Assign each row to the lowest module which holds one of its points
+        geo = collate_fn.geo
+        num_modules = geo.tpc.num_modules
+        wrapped, module_indexes = geo.split(
+                coords.reshape(-1, 3), 0, meta=meta)
+        wrapped = wrapped.reshape(-1, coords.shape[1])
+        row_modules = np.full(len(coords)*num_points, num_modules)
+        for m, index in reversed(list(enumerate(module_indexes))):
+            row_modules[index] = m
+        row_modules = row_modules.reshape(-1, num_points).min(axis=1)
+        for m in range(num_modules):
+            index = np.where(row_modules == m)[0]
+            blocks.append(np.hstack(
+                [np.full((len(index), 1), num_modules*s + m),
+                 wrapped[index], features[index]]))
+            feat_index = np.where(sample['sources'][:, 0] == m)[0]
+            feat_blocks.append(features[feat_index])
+            counts.append(len(index))
+
+    # Check that the collated tensors match
+    tensor = result['sparse']
+    assert not split or np.count_nonzero(tensor.counts) > 2
+    assert tensor.tensor.dtype == np.float32
+    assert np.array_equal(tensor.counts, counts)
+    assert np.allclose(tensor.tensor, np.vstack(blocks))
+    assert np.array_equal(result['feats'].tensor, np.vstack(feat_blocks))
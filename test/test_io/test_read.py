@@ -1,17 +1,22 @@
 """Test that the reader classes work as intended."""
 
+import os
+import pickle
+from copy import deepcopy
+
 import pytest
 
 import numpy as np
-import ROOT
 import h5py
 
 from spine.io.read import *
+from spine.io.write import HDF5Writer
 
 
 def test_larcv_reader(larcv_data):
     """Tests the loading of a LArCV file."""
     # Get the list of tree keys in the larcv file
+    import ROOT
     root_file = ROOT.TFile(larcv_data, 'r')
     num_entries = None
     tree_keys = []
@@ -160,3 +165,148 @@ def test_hdf5_reader(hdf5_data):
     # Try to restrict the number of files to be loaded
     reader = HDF5Reader([hdf5_data, hdf5_data], limit_num_files=1)
     assert reader.num_entries == num_entries
+
+
+def test_hdf5_reader_get_many(hdf5_data):
+    """Tests the loading of several entries of an HDF5 file at once."""
+    # Intialize the readers, with and without a pool of open files
+    reader = HDF5Reader([hdf5_data, hdf5_data])
+    reader_pool = HDF5Reader(
+            [hdf5_data, hdf5_data], keep_open=True, max_open_files=1)
+
+    # Load all entries at once, in reverse order
+    indices = np.arange(len(reader))[::-1]
+    entries = reader_pool.get_many(indices)
+    assert len(entries) == len(indices)
+
+    # Check that the entries match those loaded one at a time
+    for idx, entry in zip(indices, entries):
+        ref = reader[idx]
+        assert ref.keys() == entry.keys()
+        for key, value in ref.items():
+            if isinstance(value, np.ndarray) and value.dtype != object:
+                assert np.array_equal(value, entry[key])
+            elif isinstance(value, (list, np.ndarray)):
+                assert len(value) == len(entry[key])
+            else:
+                assert value == entry[key]
+
+    # Check that the pool does not hold more files than allowed
+    assert len(reader_pool.file_pool) == 1
+    reader_pool.close()
+    assert len(reader_pool.file_pool) == 0
+
+
+def test_hdf5_reader_object_table(hdf5_data):
+    """Tests the loading of stored objects as columnar tables."""
+    # Intialize the readers, with and without the table mode
+    reader = HDF5Reader(hdf5_data)
+    reader_table = HDF5Reader(hdf5_data, object_table=True)
+
+    # Check that the tables match the list of objects, attribute by attribute
+    entry, entry_table = reader[0], reader_table[0]
+    for key, value in entry.items():
+        if isinstance(value, list) and len(value) and hasattr(value[0], 'as_dict'):
+            table = entry_table[key]
+            assert len(table) == len(value)
+            for name in table.dtype.names:
+                attr = getattr(value[0], name)
+                if np.isscalar(attr) and not isinstance(attr, str):
+                    for i, obj in enumerate(value):
+                        assert table[name][i] == getattr(obj, name)
+
+
+def test_hdf5_reader_lazy(hdf5_data):
+    """Tests the selective and lazy loading of HDF5 file entries."""
+    # Get the list of keys in the HDF5 file
+    with h5py.File(hdf5_data, 'r') as h5_file:
+        data_keys = h5_file['events'].dtype.names
+
+    # Check that the key selection restricts the loaded products
+    key = [k for k in data_keys if k != 'index'][0]
+    reader = HDF5Reader(hdf5_data, keys=[key])
+    assert sorted(reader[0].keys()) == sorted(['file_index', 'index', key])
+
+    reader = HDF5Reader(hdf5_data, skip_keys=[key])
+    assert key not in reader[0]
+
+    with pytest.raises(KeyError):
+        HDF5Reader(hdf5_data, keys=['__missing_key__'])
+
+    # Check that the lazy entries only load products when accessed
+    reader = HDF5Reader(hdf5_data)
+    reader_lazy = HDF5Reader(hdf5_data, lazy=True)
+    entry, entry_lazy = reader[0], reader_lazy[0]
+    assert entry.keys() == entry_lazy.keys()
+    assert len(entry_lazy.pending) == len(data_keys)
+
+    entry_lazy[key]
+    assert len(entry_lazy.pending) == len(data_keys) - 1
+
+    entry_lazy.load()
+    assert len(entry_lazy.pending) == 0
+
+
+def test_hdf5_reader_read_ranges(tmp_path):
+    """Tests that the row ranges read from a dataset are independent."""
+    # Store a small dataset
+    path = os.path.join(tmp_path, 'ranges.h5')
+    with h5py.File(path, 'w') as out_file:
+        out_file.create_dataset('data', data=np.arange(20.).reshape(10, 2))
+
+    # Read overlapping, contiguous and empty ranges
+    starts, stops = np.array([0, 2, 4, 4, 8]), np.array([3, 4, 4, 4, 10])
+    with h5py.File(path, 'r') as in_file:
+        arrays = HDF5Reader.read_ranges(in_file['data'], starts, stops)
+        for array, start, stop in zip(arrays, starts, stops):
+            assert np.array_equal(array, in_file['data'][start:stop])
+
+    # Check that each empty range is given its own array
+    assert arrays[2] is not arrays[3]
+
+
+def test_hdf5_reader_lazy_copy(hdf5_local, tmp_path):
+    """Tests that every copy of a lazy entry loads its data products."""
+    # Copy lazy entries in every possible way, check they match the reference
+    reader = HDF5Reader(hdf5_local)
+    reader_lazy = HDF5Reader(hdf5_local, lazy=True)
+    copies = [dict, lambda e: {**e}, lambda e: e.copy(), deepcopy,
+              lambda e: pickle.loads(pickle.dumps(e)),
+              lambda e: dict(e.items()), lambda e: {}.update(e) or dict(e)]
+    for copy in copies:
+        for i in range(len(reader)):
+            check_entry(reader[i], copy(reader_lazy[i]))
+
+    # Write copies of the lazy entries, check that the file matches
+    output = os.path.join(tmp_path, 'copy.h5')
+    writer = HDF5Writer(output)
+    for i in range(len(reader_lazy)):
+        writer(dict(reader_lazy[i]))
+
+    reader_copy = HDF5Reader(output)
+    assert len(reader_copy) == len(reader)
+    for i in range(len(reader)):
+        check_entry(reader[i], reader_copy[i])
+
+
+def check_entry(ref, entry):
+    """Checks that an entry matches a reference entry.
+
+    Parameters
+    ----------
+    ref : dict
+        Reference dictionary of data products
+    entry : dict
+        Dictionary of data products to check
+    """
+    assert type(entry) is dict
+    assert ref.keys() == entry.keys()
+    for key, value in ref.items():
+        assert entry[key] is not None
+        if isinstance(value, np.ndarray) and value.dtype != object:
+            assert np.array_equal(value, entry[key])
+        elif isinstance(value, (list, np.ndarray)):
+            assert len(value) == len(entry[key])
+            assert all(a == b for a, b in zip(value, entry[key]))
+        else:
+            assert value == entry[key]
@@ -0,0 +1,102 @@
+"""Test that the shared memory batch transport works as intended."""
+
+from multiprocessing.reduction import ForkingPickler
+
+import pytest
+
+import numpy as np
+import torch.multiprocessing # pylint: disable=W0611
+from torch.utils.data import DataLoader
+
+from spine.data import Meta, TensorBatch, EdgeIndexBatch
+from spine.io.collate import CollateAll
+from spine.io.shared import SharedMemoryCollate, SharedBatch
+
+
+def generate_batch(batch_size):
+    """Generates a batch of parsed sparse tensors and edge indexes.
+
+    Parameters
+    ----------
+    batch_size : int
+        Number of entries in the batch
+
+    Returns
+    -------
+    List[dict]
+        One dictionary of data per entry in the batch
+    """
+    # Set the random seed so that there are no surprises
+    np.random.seed(seed=0)
+
+    # Generate entries of various sizes, one of which is empty
+    meta = Meta(lower=[0., 0., 0.], upper=[100., 100., 100.],
+                size=[1., 1., 1.])
+    batch = []
+    for b in range(batch_size):
+        num_points = 1000*b
+        coords = 100*np.random.rand(num_points, 3)
+        features = np.random.rand(num_points, 2).astype(np.float32)
+        edge_index = np.random.randint(0, 10, size=(2, 100*b))
+        batch.append({'sparse': (coords, features, meta),
+                      'edge_index': (edge_index, 10), 'entry': b})
+
+    return batch
+
+
+def check_batch(ref, data):
+    """Checks that a transported batch matches the reference batch.
+
+    Parameters
+    ----------
+    ref : dict
+        Reference dictionary of batched data
+    data : dict
+        Transported dictionary of batched data
+    """
+    assert ref.keys() == data.keys()
+    for key, value in ref.items():
+        assert type(data[key]) is type(value)
+        if isinstance(value, (TensorBatch, EdgeIndexBatch)):
+            assert np.array_equal(value.data, data[key].data)
+            assert np.array_equal(value.counts, data[key].counts)
+            assert np.array_equal(value.edges, data[key].edges)
+        else:
+            assert value == data[key]
+
+
+@pytest.mark.parametrize('min_bytes', [0, 1024, np.inf])
+def test_shared_memory_pickle(min_bytes):
+    """Tests that the batches are rebuilt identically when unpickled."""
+    # Collate a batch, wrap it
+    batch = generate_batch(4)
+    ref = CollateAll()(batch)
+    data = SharedMemoryCollate(CollateAll(), min_bytes=min_bytes)(batch)
+    for key in ['sparse', 'edge_index']:
+        assert isinstance(data[key], SharedBatch)
+
+    # Send it through the pickler used by the worker processes
+    data = ForkingPickler.loads(ForkingPickler.dumps(data))
+    check_batch(ref, data)
+
+
+def test_shared_memory_loader():
+    """Tests that the batches loaded by workers through shared memory match
+    the batches loaded in the main process."""
+    # Load the same dataset with and without shared memory workers. The
+    # workers are not forked from this process: if numba's TBB threading
+    # layer was initialized by an earlier test, the process hangs on exit
+    dataset = generate_batch(8)
+    loader = DataLoader(dataset, batch_size=2, collate_fn=CollateAll())
+    loader_shared = DataLoader(
+            dataset, batch_size=2, num_workers=2,
+            collate_fn=SharedMemoryCollate(CollateAll()),
+            multiprocessing_context='forkserver')
+
+    # Check that the batches match
+    num_batches = 0
+    for ref, data in zip(loader, loader_shared):
+        check_batch(ref, data)
+        num_batches += 1
+
+    assert num_batches == len(loader)
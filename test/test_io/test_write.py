@@ -8,7 +8,9 @@ import h5py
 
 from spine.data import (
         ObjectList, Particle, Neutrino, Meta, Flash, CRTHit, RunInfo, Trigger)
+from spine.io.read import HDF5Reader
 from spine.io.write import *
+from spine.io.write.background import BackgroundWriter
 
 
 @pytest.fixture(name='hdf5_output')
@@ -117,6 +119,104 @@ def test_hdf5_writer(hdf5_output, tensor_list, index_list, edge_index_list):
     writer(data)
 
 
+@pytest.mark.parametrize(
+        'tensor_list, index_list',
+        [((0, 0), (0, 0)), ((5, 10, 0), (5, 10, 0))], indirect=True)
+@pytest.mark.parametrize(
+        'buffer_size, compression', [(1, None), (2, 'gzip'), (10, None)])
+def test_hdf5_writer_buffered(tmp_path, tensor_list, index_list, buffer_size,
+                              compression):
+    """Tests that the buffered HDF5 writer produces the same output."""
+    # Create an output similar to that of the full chain
+    batch_size = len(tensor_list)
+    sizes = [len(t) for t in tensor_list]
+    data = {
+            'index': np.arange(batch_size),
+            'dummy_run_info': [RunInfo()] * batch_size,
+            'dummy_particles': generate_object_list(Particle, sizes),
+            'dummy_tensor': tensor_list,
+            'dummy_clusts': index_list
+    }
+
+    # Write the same output twice, with and without the buffer
+    ref_output = os.path.join(tmp_path, 'ref.h5')
+    writer = HDF5Writer(ref_output)
+    for _ in range(3):
+        writer(dict(data))
+
+    # Overwrite the input tensors once buffered, which must not affect the
+    # buffered entries
+    output = os.path.join(tmp_path, 'buffered.h5')
+    writer = HDF5Writer(
+            output, buffer_size=buffer_size, chunks=4, compression=compression)
+    for _ in range(3):
+        tensors = [tensor.copy() for tensor in tensor_list]
+        writer(dict(data, dummy_tensor=tensors))
+        for tensor in tensors:
+            tensor[:] = -1.
+    writer.close()
+
+    # Check that the two files contain the same information
+    with h5py.File(ref_output, 'r') as ref_file, h5py.File(output, 'r') as out_file:
+        assert len(ref_file['events']) == len(out_file['events'])
+        for i, (ref_event, event) in enumerate(
+                zip(ref_file['events'], out_file['events'])):
+            assert np.array_equal(
+                    ref_file['dummy_tensor'][ref_event['dummy_tensor']],
+                    out_file['dummy_tensor'][event['dummy_tensor']])
+            assert (len(ref_file['dummy_particles'][ref_event['dummy_particles']]) ==
+                    len(out_file['dummy_particles'][event['dummy_particles']]))
+
+            ref_refs = ref_file['dummy_clusts']['index'][ref_event['dummy_clusts']]
+            refs = out_file['dummy_clusts']['index'][event['dummy_clusts']]
+            assert len(ref_refs) == len(refs)
+            for ref_ref, ref in zip(ref_refs, refs):
+                assert np.array_equal(
+                        ref_file['dummy_clusts']['elements'][ref_ref],
+                        out_file['dummy_clusts']['elements'][ref])
+
+
+@pytest.mark.parametrize('tensor_list', [[100, 50]], indirect=True)
+def test_background_writer(hdf5_output, tensor_list):
+    """Tests that the background writer thread writes all the data."""
+    # Write a few batches in the background
+    batch_size = len(tensor_list)
+    data = {'index': np.arange(batch_size), 'dummy_tensor': tensor_list}
+    writer = BackgroundWriter(HDF5Writer(hdf5_output), queue_size=1)
+    for _ in range(4):
+        writer(dict(data))
+    writer.close()
+
+    # Check that all the entries were written, in order
+    with h5py.File(hdf5_output, 'r') as out_file:
+        assert len(out_file['events']) == 4*batch_size
+        for i, event in enumerate(out_file['events']):
+            assert np.array_equal(
+                    out_file['dummy_tensor'][event['dummy_tensor']],
+                    tensor_list[i%batch_size])
+
+    # Check that lazily loaded entries are written in full
+    reader = HDF5Reader(hdf5_output, lazy=True)
+    output = os.path.join(os.path.dirname(hdf5_output), 'lazy.h5')
+    writer = BackgroundWriter(HDF5Writer(output))
+    for i in range(len(reader)):
+        writer(reader[i])
+    writer.close()
+
+    with h5py.File(output, 'r') as out_file:
+        assert len(out_file['events']) == 4*batch_size
+        for i, event in enumerate(out_file['events']):
+            assert np.array_equal(
+                    out_file['dummy_tensor'][event['dummy_tensor']],
+                    tensor_list[i%batch_size])
+
+    # Check that an error in the writer thread is propagated
+    writer = BackgroundWriter(HDF5Writer(hdf5_output, overwrite=True))
+    writer({'dummy_tensor': tensor_list})
+    with pytest.raises(RuntimeError):
+        writer.close()
+
+
 def generate_object_list(cls, sizes):
     """Generates a dummy list of lists of objects of the request class.
 
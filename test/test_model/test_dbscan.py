@@ -0,0 +1,68 @@
+"""Test that the DBSCAN fragmenter works as intended."""
+
+import pytest
+
+import numpy as np
+from sklearn.cluster import DBSCAN as sklearn_dbscan
+
+from spine.data import TensorBatch
+
+from spine.utils.globals import COORD_COLS
+
+from spine.model.layer.common.dbscan import DBSCAN
+
+
+@pytest.mark.parametrize('counts', [[0], [1, 0], [500, 200, 10]])
+@pytest.mark.parametrize('eps', [1.1, [1.8, 1.1, 1.8, 3.]])
+def test_dbscan_fragmenter(counts, eps):
+    """Tests that the fragments built using the shared voxel neighborhood
+    match the ones obtained by running sklearn on each entry and shape.
+    """
+    # Generate a random walk of voxels for each entry, with some jitter,
+    # assign random shapes to contiguous chunks of it
+    np.random.seed(seed=0)
+    num_points = np.sum(counts)
+    steps = np.random.randint(-1, 2, size=(num_points, 3))
+    points = np.cumsum(steps, axis=0) + 0.2*np.random.rand(num_points, 3)
+    batch_ids = np.repeat(np.arange(len(counts)), counts)
+    chunks = np.repeat(np.arange(num_points), 20)[:num_points]
+    shapes = np.random.randint(0, 4, size=num_points)[chunks]
+
+    data = np.zeros((num_points, 5))
+    data[:, 0] = batch_ids
+    data[:, COORD_COLS] = points
+    data = TensorBatch(data, counts)
+    seg_pred = TensorBatch(shapes, counts)
+
+    # Run the fragmenter on every shape, without break points
+    fragmenter = DBSCAN(eps=eps, min_size=3, break_shapes=[])
+    assert all(c is None for c in fragmenter.clusterers)
+    clusts, clust_shapes = fragmenter(data, seg_pred)
+
+    # Build the reference fragments
+    offsets = data.edges[:-1]
+    ref_clusts, ref_shapes, ref_counts = [], [], []
+    for b in range(len(counts)):
+        ref_counts.append(len(ref_clusts))
+        for k, s in enumerate(fragmenter.shapes):
+            index = np.where(seg_pred[b] == s)[0]
+            if not len(index):
+                continue
+
+            dbscan = sklearn_dbscan(eps=fragmenter.eps[k], min_samples=1)
+            labels = dbscan.fit(data[b][index][:, COORD_COLS]).labels_
+            for c in np.unique(labels):
+                clust = np.where(labels == c)[0]
+                if len(clust) > fragmenter.min_size[k]:
+                    ref_clusts.append(offsets[b] + index[clust])
+                    ref_shapes.append(s)
+
+        ref_counts[-1] = len(ref_clusts) - ref_counts[-1]
+
+    # Check that the fragments are identical
+    assert np.array_equal(clusts.counts, ref_counts)
+    assert np.array_equal(clust_shapes.tensor, ref_shapes)
+    assert len(clusts.index_list) == len(ref_clusts)
+    for clust, ref in zip(clusts.index_list, ref_clusts):
+        assert np.array_equal(clust, ref)
+    assert np.sum(clusts.counts) > 0 or num_points < 2
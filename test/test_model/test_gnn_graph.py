@@ -0,0 +1,244 @@
+"""Test that the GNN graph constructors work as intended."""
+
+from itertools import combinations
+
+import pytest
+
+import numpy as np
+import torch
+from scipy.spatial import Delaunay
+from scipy.sparse.csgraph import minimum_spanning_tree, connected_components
+
+from spine.data import TensorBatch, IndexBatch
+
+from spine.utils.globals import COORD_COLS, PRINT_COL
+from spine.utils.gnn.network import (
+        inter_cluster_distance, get_cluster_edge_features)
+
+from spine.model.layer.common.dbscan import DBSCAN
+from spine.model.layer.gnn.graph import (
+        CompleteGraph, DelaunayGraph, MSTGraph, KNNGraph, BipartiteGraph,
+        LoopGraph)
+
+
+def generate_clusters(num_clusts, batch_size, size=50, num_points=20):
+    """Generates a batch of random walk clusters.
+
+    Parameters
+    ----------
+    num_clusts : int
+        Number of clusters in each entry of the batch
+    batch_size : int
+        Number of entries in the batch
+    size : float, default 50
+        Size of the box in which the clusters are generated
+    num_points : int, default 20
+        Number of points in each cluster
+
+    Returns
+    -------
+    TensorBatch
+        (N, 1 + D + N_f) Batch of voxels
+    IndexBatch
+        (C) Batch of cluster indexes
+    """
+    # Generate one random walk per cluster, with some jitter
+    np.random.seed(seed=0)
+    num_tot = batch_size*num_clusts
+    steps = np.random.randint(-1, 2, size=(num_tot, num_points, 3))
+    jitter = 0.2*np.random.rand(num_tot, num_points, 3)
+    starts = size*np.random.rand(num_tot, 1, 3)
+    points = (starts + np.cumsum(steps, axis=1) + jitter).reshape(-1, 3)
+
+    # Build the batched voxel tensor, flag random clusters as primaries
+    data = np.zeros((len(points), PRINT_COL + 1), dtype=np.float32)
+    data[:, 0] = np.repeat(np.arange(batch_size), num_clusts*num_points)
+    data[:, COORD_COLS] = points
+    primaries = np.random.randint(0, 2, size=num_tot)
+    data[:, PRINT_COL] = np.repeat(primaries, num_points)
+    data = TensorBatch(data, [num_clusts*num_points]*batch_size)
+
+    # Build the cluster index list (shuffle the points within each cluster)
+    clusts = np.empty(num_tot, dtype=object)
+    for i in range(num_tot):
+        clusts[i] = i*num_points + np.random.permutation(num_points)
+    clusts = IndexBatch(
+            clusts, data.edges[:-1], [num_clusts]*batch_size,
+            [num_points]*num_tot)
+
+    return data, clusts
+
+
+@pytest.mark.parametrize('num_clusts', [1, 50])
+@pytest.mark.parametrize('directed', [False, True])
+def test_graph_grid(num_clusts, directed):
+    """Tests that graphs built using sparse distances match the dense ones."""
+    # Build the same restricted graph with dense and sparse distances
+    data, clusts = generate_clusters(num_clusts, 2)
+    graphs = {}
+    for algorithm in ['brute', 'grid']:
+        graph = CompleteGraph(
+                directed=directed, max_length=5., dist_algorithm=algorithm)
+        graphs[algorithm] = graph(data, clusts)
+
+    # Check that the edges are identical
+    (edge_brute, _, index_brute), (edge_grid, _, index_grid) = (
+            graphs['brute'], graphs['grid'])
+    assert np.array_equal(edge_brute.index, edge_grid.index)
+    assert np.array_equal(edge_brute.counts, edge_grid.counts)
+    assert num_clusts < 2 or edge_brute.index.shape[1] > 0
+
+    # Check that the edge features are identical
+    index = edge_brute.directed_index_t
+    feats_brute = get_cluster_edge_features(
+            data.tensor, clusts.typed_index_list, index, index_brute)
+    feats_grid = get_cluster_edge_features(
+            data.tensor, clusts.typed_index_list, index, index_grid)
+    assert np.array_equal(feats_brute, feats_grid)
+
+
+def test_graph_shared_neighborhood():
+    """Tests that the DBSCAN fragmenter and the 'grid' graph constructor share
+    the voxel neighborhood cached on the input tensor batch.
+    """
+    # Bring the voxels to torch, like in the full chain
+    data, _ = generate_clusters(20, 2)
+    data = TensorBatch(torch.tensor(data.tensor), torch.tensor(data.counts))
+    seg_pred = TensorBatch(
+            torch.zeros(len(data.tensor), dtype=torch.long), data.counts)
+
+    # Build fragments, then a graph with the same distance cutoff
+    fragmenter = DBSCAN(eps=5., shapes=[0], min_size=0, break_shapes=[])
+    clusts, _ = fragmenter(data, seg_pred)
+    neighborhood = data.get_neighborhood(5.)
+
+    graph = CompleteGraph(max_length=5., dist_algorithm='grid')
+    data_np = data.to_numpy()
+    edge_index, _, _ = graph(data_np, clusts)
+
+    # Check that the neighborhood (and its radius query) were reused
+    assert data_np.get_neighborhood(5.) is neighborhood
+    assert list(neighborhood._cache) == [('radius', 5.)]
+    assert len(data_np._neighborhoods) == 1
+
+
+def get_reference_edges(name, data, clusts, **kwargs):
+    """Builds the set of edges of a graph, one entry and one pair at a time.
+
+    Parameters
+    ----------
+    name : str
+        Name of the graph constructor
+    data : TensorBatch
+        (N, 1 + D + N_f) Batch of voxels
+    clusts : IndexBatch
+        (C) Batch of cluster indexes
+    **kwargs : dict, optional
+        Graph constructor parameters
+
+    Returns
+    -------
+    set
+        Set of (i, j) edges
+    """
+    voxels = data.tensor[:, COORD_COLS]
+    index_list = clusts.index_list
+    dist_mat = inter_cluster_distance(
+            voxels, clusts.typed_index_list, clusts.counts)
+    edges = set()
+    for b in range(clusts.batch_size):
+        ids = np.arange(clusts.edges[b], clusts.edges[b+1])
+        if name == 'complete':
+            edges.update(combinations(ids, 2))
+
+        elif name == 'loop':
+            edges.update(zip(ids, ids))
+
+        elif name == 'knn':
+            for i in ids:
+                dists = dist_mat[i, ids]
+                order = np.argsort(dists, kind='stable')
+                for j in ids[order[1:kwargs['k'] + 1]]:
+                    edges.add((i, j))
+
+        elif name == 'mst' and len(ids) > 1:
+            mst = minimum_spanning_tree(np.triu(dist_mat[np.ix_(ids, ids)]))
+            for i, j in zip(*mst.nonzero()):
+                edges.add((ids[i], ids[j]))
+
+        elif name == 'delaunay' and len(ids) > 1:
+            index = np.concatenate(index_list[ids])
+            labels = np.repeat(ids, [len(index_list[i]) for i in ids])
+            tri = Delaunay(voxels[index])
+            for simplex in labels[tri.simplices]:
+                for i, j in combinations(simplex, 2):
+                    if i != j:
+                        edges.add((min(i, j), max(i, j)))
+
+        elif name == 'bipartite':
+            primaries = data.tensor[[c[0] for c in index_list], PRINT_COL]
+            for i in ids[primaries[ids] == 1]:
+                for j in ids[primaries[ids] == 0]:
+                    if kwargs['directed_to'] == 'secondary':
+                        edges.add((i, j))
+                    else:
+                        edges.add((j, i))
+
+    return edges
+
+
+@pytest.mark.parametrize('num_clusts', [1, 2, 20])
+@pytest.mark.parametrize(
+        'graph_class, kwargs',
+        [(CompleteGraph, {}),
+         (LoopGraph, {'directed': True}),
+         (KNNGraph, {'k': 3, 'directed': True}),
+         (MSTGraph, {}),
+         (DelaunayGraph, {'point_method': 'voxel'}),
+         (BipartiteGraph, {'directed': True, 'directed_to': 'secondary'}),
+         (BipartiteGraph, {'directed': True, 'directed_to': 'primary'})])
+def test_graph(num_clusts, graph_class, kwargs):
+    """Tests that each graph constructor produces the expected edges."""
+    # Build the graph
+    data, clusts = generate_clusters(num_clusts, 2)
+    graph = graph_class(**kwargs)
+    edge_index, _, _ = graph(data, clusts)
+
+    # Check that the edges match the reference, one entry at a time
+    ref_kwargs = {k: v for k, v in kwargs.items() if k != 'directed'}
+    ref_edges = get_reference_edges(graph.name, data, clusts, **ref_kwargs)
+    index = edge_index.directed_index
+    edges = set(zip(*index))
+    assert len(edges) == index.shape[1]
+    assert edges == ref_edges
+
+    # Check that the edges are counted in the right entry
+    batch_ids = clusts.batch_ids
+    counts = np.bincount(
+            batch_ids[index[0]], minlength=clusts.batch_size)
+    assert np.all(batch_ids[index[0]] == batch_ids[index[1]])
+    assert np.array_equal(edge_index.directed_counts, counts)
+
+
+@pytest.mark.parametrize('num_clusts', [1, 2, 5, 50])
+@pytest.mark.parametrize('point_method', ['hull', 'centroid'])
+def test_graph_delaunay(num_clusts, point_method):
+    """Tests that the reduced Delaunay graphs connect each entry."""
+    # Build the graph
+    data, clusts = generate_clusters(num_clusts, 2)
+    graph = DelaunayGraph(point_method=point_method)
+    edge_index, _, _ = graph(data, clusts)
+
+    # Check that each edge is unique and ordered
+    index = edge_index.directed_index
+    assert np.all(index[0] < index[1])
+    assert len(set(zip(*index))) == index.shape[1]
+
+    # Check that every entry is connected, and only within itself
+    batch_ids = clusts.batch_ids
+    assert np.all(batch_ids[index[0]] == batch_ids[index[1]])
+    num_nodes = len(batch_ids)
+    adj = np.zeros((num_nodes, num_nodes), dtype=bool)
+    adj[index[0], index[1]] = True
+    num_comps, _ = connected_components(adj, directed=False)
+    assert num_comps == clusts.batch_size
@@ -0,0 +1,181 @@
+"""Test that the calibration post-processor works as intended."""
+
+from copy import deepcopy
+
+import pytest
+
+import numpy as np
+
+from spine.data.out import RecoParticle, TruthParticle
+from spine.utils.globals import SHOWR_SHP, TRACK_SHP
+from spine.utils.geo import Geometry
+
+from spine.post.reco.calo import CalibrationProcessor
+
+
+def get_config():
+    """Returns a calibration configuration with all point-wise corrections.
+
+    Returns
+    -------
+    dict
+        Calibration manager configuration
+    """
+    return {
+            'geometry': {'detector': 'icarus'},
+            'lifetime': {'lifetime': 3000., 'driftv': 0.1572},
+            'gain': {'gain': 85.},
+            'recombination': {'efield': 0.5, 'model': 'mbox'}
+    }
+
+
+def make_particles(num_parts, points, sources, depositions, truth):
+    """Partitions a random subset of points into particles.
+
+    Parameters
+    ----------
+    num_parts : int
+        Number of particles to generate
+    points : np.ndarray
+        (N, 3) Point coordinates
+    sources : np.ndarray
+        (N, 2) Point sources
+    depositions : np.ndarray
+        (N) Point depositions
+    truth : bool
+        Whether to generate true particles or not
+
+    Returns
+    -------
+    List[Union[RecoParticle, TruthParticle]]
+        List of particles
+    """
+    perm = np.random.permutation(len(points))[:3*len(points)//4]
+    particles = []
+    for i, index in enumerate(np.array_split(perm, num_parts)):
+        index = np.sort(index)
+        attrs = {'points': points[index], 'sources': sources[index]}
+        shape = TRACK_SHP if i%2 == 0 else SHOWR_SHP
+        if not truth:
+            particles.append(RecoParticle(
+                id=i, shape=shape, index=index,
+                depositions=depositions[index], **attrs))
+        else:
+            attrs = {f'{k}_adapt': v for k, v in attrs.items()}
+            particles.append(TruthParticle(
+                id=i, shape=shape, index=index, index_adapt=index,
+                points=points[index], sources=sources[index],
+                depositions_q=depositions[index],
+                depositions_adapt_q=depositions[index], **attrs))
+
+    return particles
+
+
+@pytest.fixture(name='data')
+def fixture_data():
+    """Generates straight segments in each TPC, along with unassociated
+    points, and the reconstructed and true particles which contain them.
+    """
+    # Generate the points, one segment at a time
+    np.random.seed(seed=0)
+    geo = Geometry('icarus')
+    points, sources = [], []
+    for m in range(geo.tpc.num_modules):
+        for t in range(geo.tpc.num_chambers_per_module):
+            tpc = geo.tpc[m, t]
+            for _ in range(5):
+                num_points = np.random.randint(20, 100)
+                start = np.random.uniform(tpc.lower + 20., tpc.upper - 20.)
+                direction = np.random.randn(3)
+                direction /= np.linalg.norm(direction)
+                proj = np.random.uniform(0., 15., num_points)
+                points.append(start + np.outer(proj, direction))
+                sources.append(np.tile([m, t], (num_points, 1)))
+
+    points = np.vstack(points)
+    sources = np.vstack(sources)
+    depositions = np.random.uniform(50., 500., len(points))
+
+    # Build the particles, with a different partition for reco and truth
+    data = {
+            'points': points, 'sources': sources,
+            'depositions': depositions,
+            'points_label': points.copy(), 'sources_label': sources.copy(),
+            'depositions_q_label': depositions.copy(),
+            'reco_particles': make_particles(
+                10, points, sources, depositions, False),
+            'truth_particles': make_particles(
+                15, points, sources, depositions, True)
+    }
+
+    return data
+
+
+def calibrate(data, event_level, **cfg):
+    """Calibrates a copy of the data products.
+
+    Parameters
+    ----------
+    data : dict
+        Dictionary of data products
+    event_level : bool
+        Whether to calibrate the whole entry at once or not
+    **cfg : dict
+        Calibration post-processor configuration
+
+    Returns
+    -------
+    dict
+        Dictionary of calibrated data products
+    """
+    data = deepcopy(data)
+    processor = CalibrationProcessor(
+            event_level=event_level, obj_type='particle', **cfg,
+            **get_config())
+    processor.process(data)
+
+    return data
+
+
+@pytest.mark.parametrize('run_mode', ['reco', 'truth'])
+@pytest.mark.parametrize('truth_point_mode', ['points', 'points_adapt'])
+@pytest.mark.parametrize('do_tracking', [False, True])
+def test_calibration_event(data, run_mode, truth_point_mode, do_tracking):
+    """Tests that calibrating an entry at once matches the per-object
+    calibration of its particles.
+    """
+    # Calibrate the entry both ways
+    cfg = {'run_mode': run_mode, 'truth_point_mode': truth_point_mode,
+           'do_tracking': do_tracking}
+    result = calibrate(data, True, **cfg)
+    ref = calibrate(data, False, **cfg)
+
+    # Check that the tensors and the particle depositions match
+    for key in ['depositions', 'depositions_q_label']:
+        assert np.allclose(result[key], ref[key])
+    for key in ['reco_particles', 'truth_particles']:
+        for part, ref_part in zip(result[key], ref[key]):
+            for attr in ['depositions', 'depositions_q',
+                         'depositions_adapt_q']:
+                if hasattr(part, attr):
+                    assert np.allclose(
+                            getattr(part, attr), getattr(ref_part, attr))
+
+
+@pytest.mark.parametrize('event_level', [True, False])
+def test_calibration_shared(data, event_level):
+    """Tests that a tensor shared by reconstructed and true particles is
+    only calibrated once.
+    """
+    # Calibrate reco and adapted truth particles, which share a tensor
+    result = calibrate(
+            data, event_level, run_mode='both',
+            truth_point_mode='points_adapt')
+    ref = calibrate(data, event_level, run_mode='reco')
+
+    # Check that the shared tensor was calibrated once, for both particles
+    assert np.allclose(result['depositions'], ref['depositions'])
+    for part in result['truth_particles']:
+        assert np.allclose(
+                part.depositions_adapt_q,
+                ref['depositions'][part.index_adapt])
@@ -0,0 +1,46 @@
+"""Test that the post-processor manager works as intended."""
+
+import numpy as np
+
+from spine.data.out import RecoParticle
+from spine.utils.globals import TRACK_SHP, MUON_PID
+from spine.post import PostManager
+from spine.post.reco.tracking import CSDAEnergyProcessor
+
+
+def test_segment_cache():
+    """Tests that the track segmentations are shared by the post-processors
+    and only kept for the entries being processed.
+    """
+    # Initialize a manager with two post-processors which segment tracks
+    cfg = {'csda_ke': {'run_mode': 'reco'},
+           'mcs_ke': {'run_mode': 'reco', 'tracking_mode': 'step_next'}}
+    manager = PostManager(cfg)
+    for module in manager.modules.values():
+        assert module.segment_cache is manager.segment_cache
+
+    # Build a batch of straight muon tracks
+    np.random.seed(seed=0)
+    data = {'index': [0, 1], 'reco_particles': []}
+    for _ in data['index']:
+        particles = []
+        for i in range(3):
+            direction = np.random.randn(3)
+            direction /= np.linalg.norm(direction)
+            proj = np.sort(np.random.uniform(0., 100., 200))
+            points = np.outer(proj, direction) + 0.1*np.random.randn(200, 3)
+            particles.append(RecoParticle(
+                id=i, shape=TRACK_SHP, pid=MUON_PID, points=points,
+                start_point=points[0], end_point=points[-1]))
+        data['reco_particles'].append(particles)
+
+    # Check that the cache is empty once the batch is processed
+    manager(data)
+    assert not len(manager.segment_cache)
+
+    # Check that the result matches that of a standalone post-processor
+    processor = CSDAEnergyProcessor(run_mode='reco')
+    for particles in data['reco_particles']:
+        lengths = [part.length for part in particles]
+        processor.process({'reco_particles': particles})
+        assert np.allclose([part.length for part in particles], lengths)
@@ -0,0 +1,68 @@
+"""Test that the driver imports quickly, without optional subsystems."""
+
+import os
+import sys
+import subprocess
+
+import pytest
+
+# Modules which must only be imported when the configuration requires them
+LAZY_MODULES = [
+        'ROOT', 'larcv', 'MinkowskiEngine', 'sklearn', 'pandas', 'plotly',
+        'scipy.spatial', 'spine.model.full_chain', 'spine.build.manager',
+        'spine.post.manager', 'spine.ana.manager', 'spine.io.parse',
+        'spine.io.read', 'spine.vis'
+]
+
+# Maximum time spent importing the driver, on top of torch and numba (s)
+MAX_IMPORT_TIME = 1.
+
+
+def import_driver():
+    """Imports the driver in a fresh interpreter, reports on it.
+
+    Returns
+    -------
+    Set[str]
+        Set of modules imported
+    Dict[str, float]
+        Cumulative import time of each module (s)
+    """
+    # Run the import in a subprocess, with the package in the python path
+    main_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    env = dict(os.environ)
+    env['PYTHONPATH'] = os.pathsep.join(
+            filter(None, [main_dir, env.get('PYTHONPATH')]))
+
+    code = 'import sys, spine.driver; print(" ".join(sys.modules))'
+    result = subprocess.run(
+            [sys.executable, '-X', 'importtime', '-c', code],
+            capture_output=True, text=True, check=True, env=env)
+
+    # Parse the cumulative import time of each module
+    times = {}
+    for line in result.stderr.splitlines():
+        if line.startswith('import time:') and 'cumulative' not in line:
+            _, cumulative, name = line.split('|')
+            times[name.strip()] = float(cumulative)*1e-6
+
+    return set(result.stdout.split()), times
+
+
+def test_startup_modules():
+    """Tests that the driver does not import the optional subsystems."""
+    modules, _ = import_driver()
+    imported = [name for name in LAZY_MODULES if name in modules]
+    assert not imported, (
+            f"The driver should not import these modules: {imported}")
+
+
+@pytest.mark.slow
+def test_startup_time():
+    """Tests that the time spent importing the driver stays small."""
+    _, times = import_driver()
+    extra = (times['spine.driver'] - times.get('torch', 0.)
+             - times.get('numba', 0.))
+    assert extra < MAX_IMPORT_TIME, (
+            f"Importing the driver took {extra:.2f} s on top of torch "
+            f"and numba, more than {MAX_IMPORT_TIME:.2f} s.")
@@ -0,0 +1,110 @@
+"""Test that the calibration database loads and queries as intended."""
+
+import sqlite3 as sql
+
+import pytest
+
+import numpy as np
+
+from spine.utils.calib.database import CalibrationDatabase, compile_database
+
+
+def make_database(db_path, db_type, runs, num_tpcs=4, bins=(3, 5),
+                  active=True):
+    """Writes a SQLite database with the structure of ICARUS databases.
+
+    Parameters
+    ----------
+    db_path : pathlib.Path
+        Path to the SQLite database
+    db_type : str
+        Type of database (one 'value' or one 'map' per TPC)
+    runs : List[int]
+        List of boundary runs
+    num_tpcs : int, default 4
+        Number of TPCs
+    bins : Tuple[int], default (3, 5)
+        Number of bins in y and z of the look-up tables
+    active : bool, default True
+        Whether the runs are flagged as active or not
+    """
+    stem = db_path.stem
+    quantity = '_'.join(stem.split('_')[1:-1])
+    db = sql.connect(db_path)
+    db.execute(f'CREATE TABLE {stem}_iovs (iov_id, begin_time, active)')
+    if db_type == 'value':
+        db.execute(f'CREATE TABLE {stem}_data (__iov_id, channel, {quantity})')
+    else:
+        db.execute(f'CREATE TABLE {stem}_data (__iov_id, tpc, ybin, zbin, '
+                    'ylow, yhigh, zlow, zhigh, scale)')
+
+    for i, run in enumerate(runs):
+        db.execute(f'INSERT INTO {stem}_iovs VALUES (?, ?, ?)',
+                   (i, run + int(1e9), int(active)))
+        if db_type == 'value':
+            for t in range(num_tpcs):
+                db.execute(f'INSERT INTO {stem}_data VALUES (?, ?, ?)',
+                           (i, t, 100.*i + t))
+        else:
+            for t, tpc in enumerate(['EE', 'EW', 'WE', 'WW']):
+                for y in range(bins[0]):
+                    for z in range(bins[1]):
+                        value = -999. if y == z else 100.*i + 10.*t + y + z
+                        db.execute(
+                                f'INSERT INTO {stem}_data VALUES '
+                                 '(?, ?, ?, ?, ?, ?, ?, ?, ?)',
+                                (i, tpc, y, z, 10.*y, 10.*(y + 1),
+                                 10.*z, 10.*(z + 1), value))
+
+    db.commit()
+    db.close()
+
+
+@pytest.mark.parametrize('db_type', ['value', 'map'])
+def test_calib_database(tmp_path, db_type):
+    """Tests that the SQLite and compiled databases agree."""
+    # Build a database, load it and compile it
+    runs = [1000, 3000, 2000]
+    db_path = tmp_path / 'tpc_quantity_data.db'
+    make_database(db_path, db_type, runs)
+
+    database = CalibrationDatabase(db_path, 4, db_type)
+    compile_database(db_path, tmp_path / 'compiled', 4, db_type)
+    compiled = CalibrationDatabase(str(tmp_path / 'compiled'), 4, db_type)
+    assert isinstance(compiled.values, np.memmap)
+
+    # Check that the queries pick the closest earlier run
+    points = 10.*np.random.rand(100, 3)*[1, 3, 5]
+    for run_id, i in [(1000, 0), (1999, 0), (2000, 2), (2500, 2), (5000, 1)]:
+        for db in (database, compiled):
+            result = db[run_id]
+            if db_type == 'value':
+                assert np.allclose(result, 100.*i + np.arange(4))
+            else:
+                for t, lut in enumerate(result):
+                    y, z = points[:, 1]//10, points[:, 2]//10
+                    ref = np.where(y == z, 1., 100.*i + 10.*t + y + z)
+                    assert np.allclose(lut.query(points), ref)
+
+    # Check that the results are cached
+    assert compiled[2500] is compiled[2000]
+
+    # Check that runs before the first boundary are rejected
+    with pytest.raises(IndexError):
+        compiled.query(999)
+
+
+@pytest.mark.parametrize('db_type', ['value', 'map'])
+def test_calib_database_empty(tmp_path, db_type):
+    """Tests that a database without any active run can be compiled."""
+    # Build a database with inactive runs only, compile it
+    db_path = tmp_path / 'tpc_quantity_data.db'
+    make_database(db_path, db_type, [1000, 2000], active=False)
+    compile_database(db_path, tmp_path / 'compiled', 4, db_type)
+    compiled = CalibrationDatabase(str(tmp_path / 'compiled'), 4, db_type)
+    assert len(compiled.runs) == 0
+    assert len(compiled.values) == 0
+
+    # Check that any query is rejected
+    with pytest.raises(IndexError):
+        compiled.query(1000)
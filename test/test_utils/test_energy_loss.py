@@ -0,0 +1,95 @@
+"""Test that the energy loss tables work as intended."""
+
+import os
+
+import pytest
+
+import numpy as np
+from scipy.integrate import quad
+
+from spine.utils.globals import (
+        MUON_PID, PION_PID, PROT_PID, KAON_PID, MUON_MASS, PROT_MASS)
+from spine.utils.energy_loss import (
+        CSDATable, csda_table_spline, csda_ke_lar, csda_range_lar,
+        inv_bethe_bloch_lar)
+
+
+@pytest.mark.parametrize('pid', [MUON_PID, PION_PID, PROT_PID, KAON_PID])
+def test_csda_table(tmp_path, pid):
+    """Tests that the dense CSDA tables match the source table splines."""
+    # Load the table, check that it is cached
+    table = CSDATable([pid], cache_dir=tmp_path)
+    assert len(os.listdir(tmp_path)) == 1
+    table = CSDATable([pid], cache_dir=tmp_path)
+
+    # Check the kinetic energy and dE/dx values against the splines
+    np.random.seed(seed=0)
+    ranges = np.exp(np.random.uniform(np.log(0.1), np.log(1000.), 100))
+    kes = table.ke(ranges, pid)
+    assert np.allclose(kes, csda_table_spline(pid)(ranges), rtol=1e-5)
+    assert np.allclose(table.dedx(ranges, pid),
+                       csda_table_spline(pid, 'dE/dx')(ranges), rtol=1e-5)
+
+    # Check that the range look-up is the inverse of the kinetic energy one
+    assert np.allclose(table.range(kes, pid), ranges)
+    assert np.isscalar(table.ke(10., pid))
+
+    # Check that the values outside of the tables match the splines
+    ranges = np.array([0.5*table.ranges[0, 0], 2.*table.ranges[0, -1]])
+    assert np.allclose(table.ke(ranges, pid), csda_table_spline(pid)(ranges))
+    assert np.allclose(table.dedx(ranges, pid),
+                       csda_table_spline(pid, 'dE/dx')(ranges))
+
+
+def test_csda_table_multi(tmp_path):
+    """Tests that the CSDA tables can be queried for mixed species."""
+    pids = [MUON_PID, PION_PID, PROT_PID, KAON_PID]
+    table = CSDATable(pids, cache_dir=tmp_path)
+
+    np.random.seed(seed=0)
+    ranges = np.random.uniform(1., 500., 100)
+    query_pids = np.random.choice(pids, 100)
+    kes = table.ke(ranges, query_pids)
+    for pid in pids:
+        mask = query_pids == pid
+        assert np.allclose(kes[mask], table.ke(ranges[mask], pid))
+
+
+def test_csda_table_cache(tmp_path, monkeypatch):
+    """Tests the location of the cached tables and the in-memory fallback."""
+    # Check that the tables are cached in the user cache directory
+    monkeypatch.delenv('XDG_CACHE_HOME', raising=False)
+    monkeypatch.setenv('HOME', str(tmp_path))
+    table = CSDATable([MUON_PID])
+    cache_dir = os.path.join(tmp_path, '.cache', 'spine', 'csda_tables')
+    assert len(os.listdir(cache_dir)) == 1
+
+    # Check that the tables are still built if the directory is unusable
+    file_path = os.path.join(tmp_path, 'file')
+    with open(file_path, 'w', encoding='utf-8') as dummy:
+        dummy.write('dummy')
+
+    other = CSDATable([MUON_PID], cache_dir=os.path.join(file_path, 'dir'))
+    assert np.array_equal(other.kes, table.kes)
+
+
+@pytest.mark.parametrize('mass', [MUON_MASS, PROT_MASS])
+def test_csda_lar(mass):
+    """Tests that the tabulated Bethe-Bloch CSDA range and kinetic energy
+    match a precise integration of the inverse Bethe-Bloch formula.
+    """
+    # Integrate precisely from the start of the table (1 MeV)
+    def ref_range(T0):
+        return csda_range_lar(1., mass) - quad(
+                inv_bethe_bloch_lar, 1., T0, args=(mass, 1), epsrel=1e-10)[0]
+
+    # Check the range and its inverse
+    for T0 in np.geomspace(1., 1e5, 20):
+        R = ref_range(T0)
+        assert np.isclose(csda_range_lar(T0, mass), R, rtol=1e-4)
+        assert np.isclose(csda_ke_lar(R, mass), T0, rtol=1e-4)
+
+    # Check that the values outside of the table are still integrated
+    assert csda_range_lar(0., mass) == 0.
+    assert 0. < csda_range_lar(0.5, mass) < csda_range_lar(1., mass)
+    assert 0. < csda_ke_lar(csda_range_lar(0.5, mass), mass) < 1.
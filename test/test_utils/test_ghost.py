@@ -0,0 +1,50 @@
+"""Test that the label adaptation functions work as intended."""
+
+import pytest
+
+import numpy as np
+
+from spine.utils.globals import COORD_COLS, VALUE_COL, CLUST_COL, SHAPE_COL
+from spine.utils.ghost import adapt_labels
+
+
+@pytest.mark.parametrize('num_points', [1, 100, 1000])
+def test_adapt_labels_break(num_points):
+    """Tests that the cluster break up algorithms produce the same fragments
+    and that the default matches the brute-force numbering.
+    """
+    # Generate a random walk of voxels, assign random clusters and shapes
+    # to contiguous chunks of it, so that most clusters are broken up
+    np.random.seed(seed=0)
+    steps = np.random.randint(-1, 2, size=(num_points, 3))
+    coords = np.cumsum(2*steps, axis=0).astype(np.float32)
+    chunks = np.repeat(np.arange(num_points), 10)[:num_points]
+    clusts = np.random.randint(0, 5, size=num_points)[chunks]
+    shapes = np.random.randint(0, 4, size=5)[clusts]
+
+    clust_label = np.zeros((num_points, 9), dtype=np.float32)
+    clust_label[:, COORD_COLS] = coords
+    clust_label[:, VALUE_COL] = 1.
+    clust_label[:, CLUST_COL] = clusts
+    clust_label[:, SHAPE_COL] = shapes
+    seg_label = clust_label[:, [*range(VALUE_COL), SHAPE_COL]]
+    seg_pred = shapes.astype(np.int64)
+
+    # Adapt the labels with both algorithms and with the default
+    labels = {}
+    for algorithm in [None, 'brute', 'grid']:
+        kwargs = {'break_algorithm': algorithm} if algorithm else {}
+        labels[algorithm] = adapt_labels(
+                clust_label, seg_label, seg_pred, **kwargs)
+
+    # Check that the default is the brute-force algorithm
+    assert np.array_equal(labels[None], labels['brute'])
+
+    # Check that both algorithms produce the same fragments
+    brute, grid = labels['brute'], labels['grid']
+    assert np.array_equal(np.delete(brute, CLUST_COL, axis=1),
+                          np.delete(grid, CLUST_COL, axis=1))
+    pairs = set(zip(brute[:, CLUST_COL], grid[:, CLUST_COL]))
+    assert len(pairs) == len(np.unique(brute[:, CLUST_COL]))
+    assert len(pairs) == len(np.unique(grid[:, CLUST_COL]))
+    assert len(pairs) >= min(num_points, 5)
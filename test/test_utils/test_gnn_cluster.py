@@ -0,0 +1,96 @@
+"""Test that the cluster feature extraction works as intended."""
+
+import pytest
+
+import numpy as np
+import torch
+
+from spine.data import TensorBatch, IndexBatch
+
+from spine.utils.globals import COORD_COLS, VALUE_COL, SHAPE_COL
+from spine.utils.gnn.cluster import (
+        get_cluster_features_fused, get_cluster_features_fused_batch)
+
+
+@pytest.mark.parametrize('num_clusts', [1, 20])
+def test_cluster_features_fused(num_clusts):
+    """Tests that the fused cluster features match a numpy reference."""
+    # Generate random voxels, assign them to random clusters
+    np.random.seed(seed=0)
+    num_points = 50*num_clusts
+    data = np.zeros((num_points, 6))
+    data[:, COORD_COLS] = 10*np.random.rand(num_points, 3)
+    data[:, VALUE_COL] = np.random.rand(num_points)
+    data[:, SHAPE_COL] = np.random.randint(0, 4, num_points)
+    labels = np.random.randint(0, num_clusts, num_points)
+    index = np.argsort(labels, kind='stable')
+    edges = np.concatenate(
+            ([0], np.cumsum(np.bincount(labels, minlength=num_clusts))))
+
+    # Compute the features
+    features = ['size', 'center', 'cov', 'dir', 'value', 'shape', 'energy']
+    feats = get_cluster_features_fused(data, index, edges, features)
+    assert feats.shape == (num_clusts, 20)
+
+    # Check them against a reference implementation
+    for k in range(num_clusts):
+        clust = index[edges[k]:edges[k+1]]
+        x = data[clust][:, COORD_COLS]
+        center = np.mean(x, axis=0)
+        A = (x - center).T @ (x - center)
+        w, v = np.linalg.eigh(A)
+        v0 = v[:, 2]
+        x0 = (x - center) @ v0
+        xp = (x - center) - np.outer(x0, v0)
+        if np.dot(x0, np.linalg.norm(xp, axis=1)) < 0:
+            v0 = -v0
+        values = data[clust, VALUE_COL]
+        shapes, counts = np.unique(data[clust, SHAPE_COL], return_counts=True)
+
+        ref = np.concatenate(
+                ([len(clust)], center, (A/w[2]).flatten(),
+                 (1. - w[1]/w[2])*v0, [np.mean(values), np.std(values)],
+                 [shapes[np.argmax(counts)]], [np.sum(values)]))
+        assert np.allclose(feats[k], ref)
+
+
+@pytest.mark.parametrize('to_torch', [False, True])
+def test_cluster_features_fused_batch(to_torch):
+    """Tests that the batched fused cluster features are identical, whether
+    the index batch is built from its CSR representation or from a list of
+    torch indexes.
+    """
+    # Generate random voxels in two entries, split them in random clusters
+    np.random.seed(seed=0)
+    counts, clust_counts = [100, 60], [5, 3]
+    data = np.zeros((np.sum(counts), 6), dtype=np.float32)
+    data[:, COORD_COLS] = 10*np.random.rand(len(data), 3)
+    data[:, VALUE_COL] = np.random.rand(len(data))
+    labels = np.concatenate(
+            [np.random.randint(0, c, n) for c, n in zip(clust_counts, counts)])
+    labels[counts[0]:] += clust_counts[0]
+    index = np.argsort(labels, kind='stable')
+    edges = np.concatenate(([0], np.cumsum(np.bincount(labels))))
+    offsets = [0, counts[0]]
+
+    clusts = IndexBatch.from_csr(index, edges, offsets, clust_counts)
+    assert np.array_equal(clusts.csr_index, index)
+    for k, clust in enumerate(clusts.index_list):
+        assert np.array_equal(clust, index[edges[k]:edges[k+1]])
+
+    data = TensorBatch(data, counts)
+    if to_torch:
+        clust_list = [torch.tensor(c) for c in clusts.index_list]
+        clusts = IndexBatch(
+                clust_list, torch.tensor(offsets), torch.tensor(clust_counts),
+                torch.tensor(np.diff(edges)))
+        data = data.to_tensor()
+
+    # Check that the features match the unbatched ones
+    features = ['center', 'cov', 'dir', 'size', 'value']
+    feats = get_cluster_features_fused_batch(data, clusts, features)
+    ref = get_cluster_features_fused(
+            data.to_numpy().tensor, index, edges, features)
+    assert isinstance(feats.tensor, torch.Tensor) == to_torch
+    assert np.array_equal(feats.to_numpy().tensor, ref)
+    assert np.array_equal(feats.counts, clust_counts)
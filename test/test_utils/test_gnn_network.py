@@ -0,0 +1,144 @@
+"""Test that the graph construction functions work as intended."""
+
+import pytest
+
+import numpy as np
+
+from spine.data import TensorBatch, IndexBatch
+
+from spine.utils.globals import COORD_COLS
+from spine.utils.gnn.network import (
+        inter_cluster_distance, inter_cluster_distance_sparse,
+        inter_cluster_distance_neighbors, get_cluster_edge_features)
+
+
+def generate_clusters(num_clusts, batch_size, size=50, num_points=20):
+    """Generates a batch of random walk clusters.
+
+    Parameters
+    ----------
+    num_clusts : int
+        Number of clusters in each entry of the batch
+    batch_size : int
+        Number of entries in the batch
+    size : float, default 50
+        Size of the box in which the clusters are generated
+    num_points : int, default 20
+        Number of points in each cluster
+
+    Returns
+    -------
+    TensorBatch
+        (N, 1 + D + N_f) Batch of voxels
+    IndexBatch
+        (C) Batch of cluster indexes
+    """
+    # Generate one random walk per cluster, with some jitter
+    np.random.seed(seed=0)
+    num_tot = batch_size*num_clusts
+    steps = np.random.randint(-1, 2, size=(num_tot, num_points, 3))
+    jitter = 0.2*np.random.rand(num_tot, num_points, 3)
+    starts = size*np.random.rand(num_tot, 1, 3)
+    points = (starts + np.cumsum(steps, axis=1) + jitter).reshape(-1, 3)
+
+    # Build the batched voxel tensor
+    data = np.zeros((len(points), 6), dtype=np.float32)
+    data[:, 0] = np.repeat(np.arange(batch_size), num_clusts*num_points)
+    data[:, COORD_COLS] = points
+    data = TensorBatch(data, [num_clusts*num_points]*batch_size)
+
+    # Build the cluster index list (shuffle the points within each cluster)
+    clusts = np.empty(num_tot, dtype=object)
+    for i in range(num_tot):
+        clusts[i] = i*num_points + np.random.permutation(num_points)
+    clusts = IndexBatch(
+            clusts, data.edges[:-1], [num_clusts]*batch_size,
+            [num_points]*num_tot)
+
+    return data, clusts
+
+
+@pytest.mark.parametrize('num_clusts', [1, 2, 50])
+@pytest.mark.parametrize('batch_size', [1, 3])
+def test_inter_cluster_distance_sparse(num_clusts, batch_size):
+    """Tests that the sparse inter-cluster distance matches the dense one."""
+    # Compute the dense and the sparse inter-cluster distances
+    max_dist = 5.
+    data, clusts = generate_clusters(num_clusts, batch_size)
+    voxels = data.tensor[:, COORD_COLS]
+    dist_mat, closest_index = inter_cluster_distance(
+            voxels, clusts.typed_index_list, clusts.counts, return_index=True)
+    dist_dict, index_dict = inter_cluster_distance_sparse(
+            voxels, clusts.typed_index_list, max_dist, clusts.counts)
+
+    # Check that every pair within the cutoff is stored, and only those
+    batch_ids = np.repeat(np.arange(batch_size), num_clusts)
+    pairs = set()
+    for i, j in zip(*np.where(dist_mat < max_dist)):
+        if i != j and batch_ids[i] == batch_ids[j]:
+            pairs.add((i, j))
+
+    assert set(dist_dict.keys()) == pairs
+    assert set(index_dict.keys()) == pairs
+
+    # Check that the distances and the closest pair of voxels match
+    for i, j in pairs:
+        assert np.isclose(dist_dict[(i, j)], dist_mat[i, j])
+        assert index_dict[(i, j)] == closest_index[i, j]
+
+
+@pytest.mark.parametrize('num_clusts', [1, 2, 50])
+@pytest.mark.parametrize('batch_size', [1, 3])
+def test_inter_cluster_distance_neighbors(num_clusts, batch_size):
+    """Tests that the inter-cluster distance computed from the shared voxel
+    neighborhood matches the one computed from a dedicated grid, including
+    when clusters overlap.
+    """
+    # Add a cluster which overlaps with the last one
+    max_dist = 5.
+    data, clusts = generate_clusters(num_clusts, batch_size)
+    voxels = data.tensor[:, COORD_COLS]
+    clust_list = list(clusts.index_list) + [clusts.index_list[-1][:5]]
+    counts = clusts.counts.copy()
+    counts[-1] += 1
+
+    # Compute the sparse inter-cluster distances both ways
+    dist_ref, index_ref = inter_cluster_distance_sparse(
+            voxels, clust_list, max_dist, counts)
+    dist_dict, index_dict = inter_cluster_distance_neighbors(
+            voxels, clust_list, data.get_neighborhood(max_dist), max_dist)
+
+    # Check that they are identical
+    assert dict(dist_dict) == dict(dist_ref)
+    assert dict(index_dict) == dict(index_ref)
+    assert (len(clust_list) - 1, len(clust_list) - 2) in dist_dict
+
+
+@pytest.mark.parametrize('num_clusts', [1, 50])
+def test_cluster_edge_features_sparse(num_clusts):
+    """Tests that the edge features are identical, whether the closest pair
+    of voxels is provided as a dense matrix, as a sparse dictionary or not
+    provided at all.
+    """
+    # Compute the dense and the sparse inter-cluster distances
+    data, clusts = generate_clusters(num_clusts, 2)
+    voxels = data.tensor[:, COORD_COLS]
+    _, closest_index = inter_cluster_distance(
+            voxels, clusts.typed_index_list, clusts.counts, return_index=True)
+    _, index_dict = inter_cluster_distance_sparse(
+            voxels, clusts.typed_index_list, 5., clusts.counts)
+
+    # Build edges between all pairs of clusters within the cutoff
+    edge_index = np.array(sorted(index_dict.keys()), dtype=np.int64)
+    edge_index = edge_index.reshape(-1, 2)
+    assert num_clusts < 2 or len(edge_index) > 0
+
+    # Check that the edge features are identical
+    feats = {}
+    for key, index in [('dense', closest_index), ('sparse', index_dict),
+                       ('none', None)]:
+        feats[key] = get_cluster_edge_features(
+                data.tensor, clusts.typed_index_list, edge_index, index)
+
+    assert np.array_equal(feats['dense'], feats['sparse'])
+    assert np.allclose(feats['dense'], feats['none'])
@@ -0,0 +1,157 @@
+"""Test that the Numba kernel cache management works as intended."""
+
+import os
+import ast
+import sys
+import json
+import subprocess
+
+import pytest
+
+from spine.utils.jit import KERNEL_MODULES, SIGNATURE_FILE, load_signatures
+
+# Path to the main package directory
+MAIN_DIR = os.path.dirname(os.path.dirname(
+    os.path.dirname(os.path.abspath(__file__))))
+
+# Code which records the signatures of a kernel compiled for several types
+# in the main process and in a pool of worker processes
+RECORD_CODE = '''
+import sys
+import multiprocessing as mp
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
+from spine.utils.jit import set_cache_dir, save_signatures, record_signatures
+from spine.utils.numba_local import unique
+
+def run(dtype):
+    return len(unique(np.arange(3, dtype=dtype))[0])
+
+if __name__ == '__main__':
+    set_cache_dir(sys.argv[1])
+    run('int32')
+    with ProcessPoolExecutor(
+            max_workers=3, mp_context=mp.get_context('spawn'),
+            initializer=record_signatures) as executor:
+        list(executor.map(run, ['int64', 'float32', 'float64']))
+    save_signatures()
+'''
+
+# Code which compiles the recorded signatures
+WARMUP_CODE = '''
+import sys
+from spine.utils.jit import set_cache_dir, warmup
+set_cache_dir(sys.argv[1])
+print(warmup())
+'''
+
+# Code which relocates a read-only cache directory twice
+RELOCATE_CODE = '''
+import os, sys, json
+import spine.utils.jit as jit
+jit.os.access = lambda *args: False
+dirs = [jit.set_cache_dir(sys.argv[1]) for _ in range(2)]
+print(json.dumps([[d, sorted(os.listdir(d))] for d in dirs]))
+'''
+
+
+def run_code(code, work_dir, *args):
+    """Runs a piece of code as a script in a fresh interpreter.
+
+    Parameters
+    ----------
+    code : str
+        Code to execute
+    work_dir : str
+        Directory where the script is written
+    *args : List[str]
+        Command-line arguments
+
+    Returns
+    -------
+    str
+        Standard output of the process
+    """
+    env = dict(os.environ)
+    env['PYTHONPATH'] = os.pathsep.join(
+            filter(None, [MAIN_DIR, env.get('PYTHONPATH')]))
+    env.pop('NUMBA_CACHE_DIR', None)
+    script_path = os.path.join(work_dir, 'script.py')
+    with open(script_path, 'w', encoding='utf-8') as script:
+        script.write(code)
+
+    result = subprocess.run(
+            [sys.executable, script_path, *args],
+            capture_output=True, text=True, check=True, env=env)
+
+    return result.stdout
+
+
+@pytest.mark.slow
+def test_signatures(tmp_path):
+    """Tests that the signatures compiled in the main process and in its
+    workers are recorded, and that they can be compiled ahead of time.
+    """
+    # Record the signatures
+    cache_dir = str(tmp_path / 'cache')
+    run_code(RECORD_CODE, tmp_path, cache_dir)
+
+    # Check that the signatures of all the processes are stored
+    signatures = load_signatures(os.path.join(cache_dir, SIGNATURE_FILE))
+    sigs = signatures['spine.utils.numba_local.unique']
+    dtypes = sorted(str(sig[0].dtype) for sig in sigs)
+    assert dtypes == ['float32', 'float64', 'int32', 'int64']
+
+    # Check that all the signatures can be compiled in a new process
+    count = sum(len(sigs) for sigs in signatures.values())
+    assert int(run_code(WARMUP_CODE, tmp_path, cache_dir)) == count
+
+
+def test_read_only_cache(tmp_path):
+    """Tests that a read-only cache is copied to a new scratch directory
+    in each process, which is removed when the process exits.
+    """
+    # Create a dummy cache
+    cache_dir = tmp_path / 'cache'
+    cache_dir.mkdir()
+    (cache_dir / SIGNATURE_FILE).write_bytes(b'')
+
+    # Relocate it, check that each copy is distinct and complete
+    copies = json.loads(run_code(RELOCATE_CODE, tmp_path, str(cache_dir)))
+    assert copies[0][0] != copies[1][0]
+    for path, files in copies:
+        assert path != str(cache_dir)
+        assert files == [SIGNATURE_FILE]
+        assert not os.path.exists(path)
+
+
+def test_kernel_modules():
+    """Tests that every module which defines cached kernels is listed."""
+    # Find the modules which define kernels with `cache=True`
+    modules = set()
+    source_dir = os.path.join(MAIN_DIR, 'spine')
+    for root, _, files in os.walk(source_dir):
+        for file_name in files:
+            if not file_name.endswith('.py'):
+                continue
+
+            # Skip modules which cannot be parsed (they cannot be imported)
+            path = os.path.join(root, file_name)
+            with open(path, 'r', encoding='utf-8') as source:
+                try:
+                    tree = ast.parse(source.read())
+                except SyntaxError:
+                    continue
+
+            for node in ast.walk(tree):
+                if not isinstance(node, ast.FunctionDef):
+                    continue
+                for dec in node.decorator_list:
+                    if isinstance(dec, ast.Call) and any(
+                            kw.arg == 'cache' and
+                            getattr(kw.value, 'value', False) is True
+                            for kw in dec.keywords):
+                        name = os.path.relpath(path[:-3], MAIN_DIR)
+                        modules.add(name.replace(os.sep, '.'))
+
+    assert modules == set(KERNEL_MODULES)
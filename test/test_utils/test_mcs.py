@@ -0,0 +1,38 @@
+"""Test that the MCS kinetic energy fits work as intended."""
+
+import pytest
+
+import numpy as np
+
+from spine.utils.globals import MUON_MASS, PROT_MASS
+from spine.utils.energy_loss import step_energy_loss_lar
+from spine.utils.mcs import mcs_fit, mcs_fit_batch, mcs_nll_lar, highland
+
+
+@pytest.mark.parametrize('num_tracks', [1, 20])
+def test_mcs_fit_batch(num_tracks):
+    """Tests that the batched MCS fit agrees with the scipy fit."""
+    # Generate random scattering angles for a set of muons and protons
+    np.random.seed(seed=0)
+    dx, res = 5., 0.25/5.**1.25
+    thetas, masses = [], []
+    for i in range(num_tracks):
+        mass = MUON_MASS if i%2 == 0 else PROT_MASS
+        ke = np.exp(np.random.uniform(np.log(100.), np.log(3000.)))
+        kes = step_energy_loss_lar(ke, mass, dx, num_steps=20)
+        kes = np.maximum(kes, 1.)
+        moms = np.sqrt(kes**2 + 2*mass*kes)
+        theta0 = highland(np.sqrt(moms[1:]*moms[:-1]), mass, dx)
+        theta0 = np.sqrt(theta0**2 + res**2)
+        thetas.append(np.abs(np.random.normal(0., np.sqrt(2)*theta0)))
+        masses.append(mass)
+
+    # Fit the tracks, check that the batched fit agrees with the scipy fit,
+    # unless it finds a better minimum
+    kes = mcs_fit_batch(thetas, masses, dx)
+    assert kes.shape == (num_tracks,)
+    for theta, mass, ke in zip(thetas, masses, kes):
+        ref = mcs_fit(theta, mass, dx)
+        nll = mcs_nll_lar(ke, theta, mass, dx)
+        nll_ref = mcs_nll_lar(ref, theta, mass, dx)
+        assert np.isclose(ke, ref, rtol=1e-3) or nll < nll_ref
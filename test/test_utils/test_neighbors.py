@@ -0,0 +1,79 @@
+"""Test that the voxel neighborhood service works as intended."""
+
+import pytest
+
+import numpy as np
+from scipy.spatial.distance import cdist
+from sklearn.cluster import DBSCAN
+
+from spine.data import TensorBatch
+
+
+@pytest.mark.parametrize('counts', [[0], [1, 0], [200, 50, 3]])
+def test_neighborhood(counts):
+    """Tests that the neighborhood queries match brute-force ones."""
+    # Generate a random walk of voxels for each entry, with some jitter
+    np.random.seed(seed=0)
+    num_points = np.sum(counts)
+    steps = np.random.randint(-1, 2, size=(num_points, 3))
+    points = np.cumsum(steps, axis=0) + 0.2*np.random.rand(num_points, 3)
+    batch_ids = np.repeat(np.arange(len(counts)), counts)
+    data = TensorBatch(np.hstack((batch_ids[:, None], points)), counts)
+
+    # Compute the brute-force distance between voxels of the same entry
+    dist_mat = cdist(points, points)
+    dist_mat[batch_ids[:, None] != batch_ids] = np.inf
+
+    # Check that the neighborhood is cached on the batch
+    neighborhood = data.get_neighborhood(1.5)
+    assert data.get_neighborhood(1.5) is neighborhood
+
+    # Check the radius queries (the radius may exceed the cell size)
+    for radius in [1.5, 3.]:
+        offsets, index = neighborhood.radius(radius)
+        for i in range(num_points):
+            ref = np.where(dist_mat[i] <= radius)[0]
+            assert np.array_equal(index[offsets[i]:offsets[i+1]], ref)
+
+    # Check the kNN queries
+    index, dists = neighborhood.knn(4)
+    np.fill_diagonal(dist_mat, np.inf)
+    for i in range(num_points):
+        ref = np.lexsort((np.arange(num_points), dist_mat[i]))[:4]
+        ref = ref[np.isfinite(dist_mat[i, ref])]
+        assert np.array_equal(index[i, :len(ref)], ref)
+        assert np.allclose(dists[i, :len(ref)], dist_mat[i, ref])
+        assert np.all(index[i, len(ref):] == -1)
+
+
+@pytest.mark.parametrize('counts', [[0], [1, 0], [200, 50, 3]])
+@pytest.mark.parametrize('eps', [1.1, 1.8])
+def test_neighborhood_dbscan(counts, eps):
+    """Tests that the DBSCAN partition matches sklearn in each entry."""
+    # Generate a random walk of voxels for each entry, with some jitter
+    np.random.seed(seed=0)
+    num_points = np.sum(counts)
+    steps = np.random.randint(-1, 2, size=(num_points, 3))
+    points = np.cumsum(2*steps, axis=0) + 0.2*np.random.rand(num_points, 3)
+    batch_ids = np.repeat(np.arange(len(counts)), counts)
+    data = TensorBatch(np.hstack((batch_ids[:, None], points)), counts)
+
+    # Run DBSCAN on all the voxels and on a random subset of them
+    neighborhood = data.get_neighborhood(eps)
+    subset = np.sort(np.random.choice(
+            num_points, num_points//2, replace=False))
+    for index in [np.arange(num_points), subset]:
+        labels = neighborhood.dbscan(eps, index)
+        assert len(labels) == len(index)
+
+        # Check that the partition matches sklearn in each entry, and
+        # that no group spans more than one entry
+        for b in range(len(counts)):
+            mask = batch_ids[index] == b
+            if not np.any(mask):
+                continue
+
+            ref = DBSCAN(eps=eps, min_samples=1).fit(points[index[mask]])
+            assert np.array_equal(
+                    labels[mask] - labels[mask][0], ref.labels_)
+            assert not np.any(np.isin(labels[mask], labels[~mask]))
@@ -0,0 +1,71 @@
+"""Test that the numba-accelerated functions work as intended."""
+
+import pytest
+
+import numpy as np
+from scipy.spatial.distance import cdist
+
+from spine.utils.numba_local import (
+        dbscan, csr_to_list, farthest_pair, closest_pair)
+
+
+@pytest.mark.parametrize('metric', ['euclidean', 'cityblock', 'chebyshev'])
+@pytest.mark.parametrize('num_points', [0, 1, 10, 500])
+def test_dbscan(metric, num_points):
+    """Tests that the grid DBSCAN matches the brute-force DBSCAN."""
+    # Generate a random walk of voxels, with some jitter
+    np.random.seed(seed=0)
+    steps = np.random.randint(-1, 2, size=(num_points, 3))
+    jitter = 0.2*np.random.rand(num_points, 3)
+    points = (np.cumsum(2*steps, axis=0) + jitter).astype(np.float32)
+
+    # Run both algorithms, check that they produce the same partition
+    labels_brute = dbscan(points, 1.5, metric, 'brute')
+    labels_grid = dbscan(points, 1.5, metric, 'grid')
+    assert len(labels_grid) == num_points
+    pairs = set(zip(labels_brute, labels_grid))
+    assert len(pairs) == len(np.unique(labels_brute))
+    assert len(pairs) == len(np.unique(labels_grid))
+
+    # Check that the grid groups are numbered in order of appearance
+    if num_points:
+        _, first = np.unique(labels_grid, return_index=True)
+        assert np.all(np.diff(first) > 0)
+
+
+@pytest.mark.parametrize('num_indexes', [0, 1, 20])
+def test_csr_to_list(num_indexes):
+    """Tests that the typed list built from a CSR index matches the input."""
+    # Generate a list of random indexes, concatenate them
+    np.random.seed(seed=0)
+    counts = np.random.randint(0, 10, size=num_indexes)
+    edges = np.concatenate(([0], np.cumsum(counts))).astype(np.int64)
+    index = np.random.permutation(edges[-1]).astype(np.int64)
+
+    # Build the list, check that each element is a view of the index
+    index_list = csr_to_list(index, edges)
+    assert len(index_list) == num_indexes
+    for i, sub_index in enumerate(index_list):
+        assert np.array_equal(sub_index, index[edges[i]:edges[i+1]])
+
+
+@pytest.mark.parametrize('num_points', [1, 2, 100, 1000])
+def test_pairs(num_points):
+    """Tests that the bounding-box pair searches match the brute-force ones."""
+    # Generate two overlapping random walks of voxels
+    np.random.seed(seed=0)
+    steps = np.random.randint(-1, 2, size=(2, num_points, 3))
+    x1, x2 = (np.cumsum(steps, axis=1) + 0.2*np.random.rand(
+        2, num_points, 3)).astype(np.float32)
+
+    # Check the farthest pair of points in one set
+    i, j, dist = farthest_pair(x1, 'bbox')
+    dist_mat = cdist(x1, x1)
+    assert np.isclose(dist, np.max(dist_mat), atol=1e-5)
+    assert np.isclose(dist, dist_mat[i, j], atol=1e-5)
+
+    # Check the closest pair of points between two sets
+    i, j, dist = closest_pair(x1, x2, 'bbox')
+    dist_mat = cdist(x1, x2)
+    assert np.isclose(dist, np.min(dist_mat), atol=1e-5)
+    assert np.isclose(dist, dist_mat[i, j], atol=1e-5)
@@ -0,0 +1,140 @@
+"""Test that the track segmentation works as intended."""
+
+import pytest
+
+import numpy as np
+
+from spine.utils.tracking import (
+        get_track_segments, get_track_segments_batch,
+        get_track_segment_dedxs, TrackSegmentCache)
+
+
+def make_tracks(num_tracks):
+    """Generates a set of noisy straight tracks, some with a gap.
+
+    Parameters
+    ----------
+    num_tracks : int
+        Number of tracks to generate
+
+    Returns
+    -------
+    List[np.ndarray]
+        (T) List of track point coordinates
+    List[np.ndarray]
+        (T) List of track start points
+    """
+    np.random.seed(seed=0)
+    tracks, starts = [], []
+    for t in range(num_tracks):
+        num_points = np.random.randint(1, 200)
+        direction = np.random.randn(3)
+        direction /= np.linalg.norm(direction)
+        proj = np.random.uniform(0., 50., num_points)
+        if t%3 == 0:
+            proj[proj > 25.] += 20.
+        points = (np.outer(proj, direction)
+                  + 0.3*np.random.randn(num_points, 3))
+        tracks.append(points.astype(np.float32))
+        starts.append(
+                (points[np.argmin(proj)]
+                 + np.random.randn(3)).astype(np.float32))
+
+    return tracks, starts
+
+
+@pytest.mark.parametrize('method', ['step', 'step_next', 'bin_pca'])
+@pytest.mark.parametrize('use_starts', [True, False])
+def test_track_segments_batch(method, use_starts):
+    """Tests that the batched segmentation matches the single-track one."""
+    # Segment the tracks at once
+    tracks, starts = make_tracks(20)
+    edges = np.concatenate(([0], np.cumsum([len(t) for t in tracks])))
+    points = np.vstack(starts) if use_starts else None
+    seg_index, seg_edges, track_edges, seg_dirs, seg_lengths = (
+            get_track_segments_batch(
+                np.vstack(tracks), edges, 5., points, method))
+
+    # Check against the segmentation of each track
+    for t, track in enumerate(tracks):
+        point = starts[t] if use_starts else None
+        clusts, dirs, lengths = get_track_segments(
+                track, 5., point, method)
+        lower, upper = track_edges[t], track_edges[t+1]
+        assert upper - lower == len(clusts)
+        for s, clust in enumerate(clusts):
+            seg = seg_index[seg_edges[lower + s]:seg_edges[lower + s + 1]]
+            assert np.array_equal(seg, clust)
+        assert np.allclose(seg_dirs[lower:upper], dirs)
+        assert np.allclose(seg_lengths[lower:upper], lengths)
+
+
+def test_track_segments_batch_curly():
+    """Tests that the batched segmentation handles long, curly tracks with
+    more segments than the heuristic bound on their number.
+    """
+    # Generate sparse, winding tracks which progress along the x axis
+    np.random.seed(seed=0)
+    tracks = []
+    for _ in range(20):
+        steps = 30.*np.random.randn(18, 3)
+        steps[:, 0] = np.abs(steps[:, 0])
+        tracks.append(np.cumsum(steps, axis=0).astype(np.float32))
+
+    tracks += make_tracks(5)[0]
+    edges = np.concatenate(([0], np.cumsum([len(t) for t in tracks])))
+    seg_index, seg_edges, track_edges, seg_dirs, seg_lengths = (
+            get_track_segments_batch(
+                np.vstack(tracks), edges, 1., None, 'step'))
+
+    # Check against the segmentation of each track, check that some tracks
+    # exceed the heuristic bound
+    num_over = 0
+    for t, track in enumerate(tracks):
+        clusts, dirs, lengths = get_track_segments(track, 1., None, 'step')
+        extent = np.linalg.norm(np.max(track, axis=0) - np.min(track, axis=0))
+        num_over += len(clusts) > 2*len(track) + int(np.ceil(extent)) + 2
+        lower, upper = track_edges[t], track_edges[t+1]
+        assert upper - lower == len(clusts)
+        for s, clust in enumerate(clusts):
+            seg = seg_index[seg_edges[lower + s]:seg_edges[lower + s + 1]]
+            assert np.array_equal(seg, clust)
+        assert np.allclose(seg_dirs[lower:upper], dirs)
+        assert np.allclose(seg_lengths[lower:upper], lengths)
+
+    assert num_over > 0
+
+
+def test_track_segment_cache():
+    """Tests that the segmentation cache is reused and matches the
+    single-track deposition rate measurement."""
+    # Segment the tracks twice, check that the second call uses the cache
+    tracks, starts = make_tracks(10)
+    cache = TrackSegmentCache()
+    segments = cache(tracks, starts)
+    assert len(cache) == len(tracks)
+    assert all(s is c for s, c in zip(segments, cache(tracks, starts)))
+
+    # Check the segment dE/dx values
+    for track, start, segs in zip(tracks, starts, segments):
+        values = np.random.rand(len(track)).astype(np.float32)
+        ref = get_track_segment_dedxs(track, values, start)[:3]
+        for arr, arr_ref in zip(segs.dedxs(values), ref):
+            assert np.allclose(arr, arr_ref)
+
+    # Check that modified tracks and parameters are segmented again
+    flip_tracks = [track[::-1] for track in tracks]
+    for track, segs, ref in zip(
+            tracks, cache(flip_tracks, starts), segments):
+        assert len(track) == 1 or segs is not ref
+    for segs, ref in zip(cache(tracks, starts, 3.), segments):
+        assert segs is not ref
+
+    # Check that undefined start points are matched too
+    nan_starts = [np.full(3, np.nan, dtype=np.float32) for _ in tracks]
+    segments = cache(tracks, nan_starts)
+    assert all(s is c for s, c in zip(segments, cache(tracks, nan_starts)))
+
+    # Check that the cache can be cleared
+    cache.clear()
+    assert not len(cache)